@@ -0,0 +1,922 @@
+"""
+Stockage du catalogue et de l'historique des emprunts dans une base SQLite
+(module sqlite3 de la bibliothèque standard), à la place des fichiers
+(livres.csv et son instantané, emprunts.dat et ses index).
+
+Choisi par STOCKAGE = "sqlite" (config.py) : data.charger_catalogue_rapide
+et data.ouvrir_historique renvoient alors un CatalogueSQLite et un
+HistoriqueSQLite, qui s'utilisent comme Catalogue et HistoriqueEmprunts.
+Au premier lancement, la base est remplie à partir des fichiers existants
+(data.importer_base_sqlite, ou en ligne de commande ci-dessous).
+
+Rien n'est chargé en mémoire à l'ouverture : chaque lecture est une requête
+sur des tables indexées, dont le coût dépend du nombre de livres (ou
+d'emprunts) lus et non de la taille de la base. Plusieurs processus peuvent
+partager la base (journal WAL : les lectures ne bloquent pas les écritures).
+
+Tables :
+- livres : un livre par ligne ; `id` suit l'ordre d'insertion (ordre des
+  résultats) ; clé d'auteur normalisée, indexée avec la note
+- categories : (catégorie, livre, note), indexée par catégorie et note
+- titres : table FTS5 à trigrammes des titres en minuscules (recherche
+  partielle)
+- termes : table FTS5 des termes repliés des titres et des auteurs
+  (recherche approchée)
+- mots, noms, vocabulaire : clés de complétion des mots des titres et des
+  auteurs, termes de la recherche approchée, avec leur nombre de livres
+- emprunts, emprunts_livres, livres_empruntes : historique, index inversé
+  livre -> emprunts et nombre d'emprunts par livre
+- versions : compteur des modifications du catalogue, par n'importe quel
+  processus (génération du catalogue pour le cache des recherches)
+
+Nécessite SQLite 3.34 ou plus récent avec FTS5 (cas des versions fournies
+avec Python).
+
+Usage (création de la base à partir des fichiers) :
+    python base_sqlite.py [--base mediatheque.db] [--catalogue livres.csv] [--historique emprunts.dat] [--remplacer]
+"""
+
+import argparse
+import glob
+import heapq
+import os
+import sqlite3
+import sys
+import threading
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from datetime import datetime
+
+from catalogue import nouvelle_generation
+from config import BASE_SQLITE, CATALOGUE_CSV, EMPRUNTS_FILE, HISTORIQUE_FILE, SYNCHRONISER_EMPRUNTS
+from historique import _borne, date_horodatage, date_texte, horodatage
+from index import (
+    MAX_TERMES_REQUETE,
+    MAX_VARIANTES,
+    POIDS_AUTEUR,
+    POIDS_DISTANCE,
+    TAILLE_NGRAMME,
+    Vocabulaire,
+    analyser_requete,
+    cles_auteur,
+    distance_max,
+    mots_titre,
+    normaliser_auteur,
+    replier,
+    termes_recherche,
+)
+
+
+# Version du schéma (PRAGMA user_version) ; à changer si le format évolue
+VERSION_BASE = 1
+
+SCHEMA = (
+    """CREATE TABLE livres (
+        id INTEGER PRIMARY KEY,
+        code TEXT NOT NULL UNIQUE,
+        titre TEXT NOT NULL,
+        auteur TEXT NOT NULL,
+        note REAL NOT NULL,
+        categories TEXT NOT NULL,
+        cle_auteur TEXT NOT NULL
+    )""",
+    "CREATE INDEX livres_auteur ON livres (cle_auteur, note DESC)",
+    """CREATE TABLE categories (
+        categorie TEXT NOT NULL,
+        livre INTEGER NOT NULL,
+        note REAL NOT NULL,
+        PRIMARY KEY (categorie, livre)
+    ) WITHOUT ROWID""",
+    "CREATE INDEX categories_note ON categories (categorie, note DESC, livre)",
+    "CREATE INDEX categories_livre ON categories (livre)",
+    "CREATE VIRTUAL TABLE titres USING fts5 (titre, tokenize = 'trigram')",
+    "CREATE VIRTUAL TABLE termes USING fts5 (titre, auteur, tokenize = \"unicode61 remove_diacritics 0 tokenchars '_'\")",
+    "CREATE TABLE mots (cle TEXT PRIMARY KEY, forme TEXT NOT NULL, livres INTEGER NOT NULL) WITHOUT ROWID",
+    "CREATE TABLE noms (cle TEXT PRIMARY KEY, forme TEXT NOT NULL, livres INTEGER NOT NULL) WITHOUT ROWID",
+    "CREATE TABLE vocabulaire (cle TEXT PRIMARY KEY, forme TEXT NOT NULL, livres INTEGER NOT NULL) WITHOUT ROWID",
+    "CREATE TABLE emprunts (numero INTEGER PRIMARY KEY, horodatage INTEGER NOT NULL, codes TEXT NOT NULL)",
+    "CREATE INDEX emprunts_date ON emprunts (horodatage)",
+    """CREATE TABLE emprunts_livres (
+        code TEXT NOT NULL,
+        numero INTEGER NOT NULL,
+        PRIMARY KEY (code, numero)
+    ) WITHOUT ROWID""",
+    "CREATE TABLE livres_empruntes (code TEXT PRIMARY KEY, emprunts INTEGER NOT NULL) WITHOUT ROWID",
+    "CREATE INDEX livres_empruntes_effectif ON livres_empruntes (emprunts DESC, code)",
+    "CREATE TABLE versions (nom TEXT PRIMARY KEY, valeur INTEGER NOT NULL) WITHOUT ROWID",
+    "INSERT INTO versions VALUES ('catalogue', 0)",
+)
+
+# Tables des clés comptées par livre (complétion, vocabulaire)
+TABLES_CLES = ("mots", "noms", "vocabulaire")
+
+# Majorant de toutes les chaînes qui commencent par un préfixe donné
+_FIN_PREFIXE = "\U0010ffff"
+
+# Lignes lues par lot lors d'un parcours : le premier lot est petit (une
+# recherche limitée n'en lit souvent pas davantage), les suivants grandissent
+PREMIER_LOT = 16
+TAILLE_LOT = 1024
+
+# Nombre de livres ou d'emprunts écrits par requête lors d'un import
+TAILLE_LOT_IMPORT = 10_000
+
+
+def connecter(path=BASE_SQLITE):
+    """
+    Ouvre la base (créée si besoin) et retourne la connexion.
+
+    La connexion est en mode autocommit : les transactions sont ouvertes
+    explicitement (voir _ConnexionBase.verrouiller). Elle peut servir à
+    plusieurs fils, sous le verrou de son propriétaire.
+    Lève ValueError si la base a un format inconnu, sqlite3.Error si SQLite
+    ne prend pas en charge FTS5.
+    """
+    base = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    try:
+        base.execute("PRAGMA journal_mode = WAL")
+        base.execute("PRAGMA synchronous = " + ("FULL" if SYNCHRONISER_EMPRUNTS else "NORMAL"))
+        version = base.execute("PRAGMA user_version").fetchone()[0]
+        if version == 0:
+            base.execute("BEGIN IMMEDIATE")
+            # Une autre borne a pu créer le schéma entre-temps
+            if base.execute("PRAGMA user_version").fetchone()[0] == 0:
+                for instruction in SCHEMA:
+                    base.execute(instruction)
+                base.execute(f"PRAGMA user_version = {VERSION_BASE}")
+            base.execute("COMMIT")
+            version = VERSION_BASE
+        if version != VERSION_BASE:
+            raise ValueError(f"format de base inconnu (version {version}) : {path}")
+    except BaseException:
+        base.close()
+        raise
+    return base
+
+
+def _phrase(texte):
+    """Texte cherché tel quel dans une requête FTS5 (entre guillemets)."""
+    return '"' + texte.replace('"', '""') + '"'
+
+
+def _cle_auteur(auteur):
+    return replier(normaliser_auteur(auteur))
+
+
+def _cles_livre(titre, auteur):
+    """Clés comptées d'un livre : {table : [(clé, forme), ...]} (voir TABLES_CLES)."""
+    nom = normaliser_auteur(auteur)
+    termes = set(termes_recherche(titre))
+    termes.update(termes_recherche(auteur))
+    return {
+        "mots": [(replier(mot), mot) for mot in mots_titre(titre)],
+        "noms": [(cle, nom) for cle in cles_auteur(nom)],
+        "vocabulaire": [(terme, terme) for terme in termes],
+    }
+
+
+# -------------------- CONNEXION --------------------
+
+class _ConnexionBase:
+    """
+    Connexion à la base, partagée par les fils d'un processus (service),
+    avec des transactions d'écriture imbriquables.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._base = connecter(path)
+        self._verrou = threading.RLock()
+        self._profondeur = 0
+
+    @contextmanager
+    def verrouiller(self):
+        """
+        Transaction d'écriture : BEGIN IMMEDIATE (verrou d'écriture de la
+        base, entre processus), validée à la sortie du bloc le plus
+        extérieur, annulée en cas d'exception. Les lectures faites dans le
+        bloc voient un état stable de la base.
+        """
+        with self._verrou:
+            if self._profondeur == 0:
+                self._base.execute("BEGIN IMMEDIATE")
+            self._profondeur += 1
+            try:
+                yield
+            except BaseException:
+                self._profondeur -= 1
+                if self._profondeur == 0:
+                    self._base.execute("ROLLBACK")
+                raise
+            self._profondeur -= 1
+            if self._profondeur == 0:
+                self._base.execute("COMMIT")
+
+    def _ligne(self, sql, parametres=()):
+        with self._verrou:
+            return self._base.execute(sql, parametres).fetchone()
+
+    def _lignes(self, sql, parametres=()):
+        with self._verrou:
+            return self._base.execute(sql, parametres).fetchall()
+
+    def _parcourir(self, sql, parametres=()):
+        """
+        Itère sur les lignes d'une requête, lues par lots de taille
+        croissante : un parcours interrompu tôt (recherche limitée) ne lit
+        que le début du résultat.
+        """
+        with self._verrou:
+            curseur = self._base.execute(sql, parametres)
+            lignes = curseur.fetchmany(PREMIER_LOT)
+        taille = PREMIER_LOT
+        while lignes:
+            yield from lignes
+            taille = min(2 * taille, TAILLE_LOT)
+            with self._verrou:
+                lignes = curseur.fetchmany(taille)
+
+    def fermer(self):
+        with self._verrou:
+            self._base.close()
+
+
+# -------------------- CATALOGUE --------------------
+
+class CatalogueSQLite(_ConnexionBase, MutableMapping):
+    """
+    Catalogue stocké dans la base : dictionnaire code -> livre dont les
+    livres sont lus à la demande.
+
+    catalogue[code] et les parcours renvoient des dictionnaires construits
+    à la lecture (les modifier ne modifie pas la base : il faut réaffecter
+    catalogue[code]). Un livre modifié garde sa place.
+
+    Les attributs index_titres, index_termes, index_categories,
+    index_auteurs et index_completion répondent comme ceux de Catalogue, par
+    des requêtes sur la base : logic s'en sert sans savoir où sont les
+    livres ; leurs résultats sont des itérateurs, lus dans la base au fur
+    et à mesure (une recherche limitée ne lit que le début du résultat).
+    `generation` change à chaque modification du catalogue, y compris par
+    un autre processus.
+    """
+
+    def __init__(self, path=BASE_SQLITE):
+        super().__init__(path)
+        self._version = None
+        self._generation = None
+        self._taille = None
+        self.index_titres = _TitresSQLite(self)
+        self.index_termes = _TermesSQLite(self)
+        self.index_categories = _CategoriesSQLite(self)
+        self.index_auteurs = _AuteursSQLite(self)
+        self.index_completion = _CompletionSQLite(self)
+
+    @property
+    def generation(self):
+        version = self._ligne("SELECT valeur FROM versions WHERE nom = 'catalogue'")[0]
+        if version != self._version:
+            # Catalogue modifié (par ce processus ou par un autre) : les
+            # valeurs gardées en mémoire sont oubliées
+            self._version = version
+            self._generation = nouvelle_generation()
+            self._taille = None
+            self.index_termes.oublier()
+        return self._generation
+
+    # ---- lecture ----
+
+    @staticmethod
+    def _livre(ligne):
+        code, titre, auteur, note, categories = ligne
+        return {
+            "code": code,
+            "titre": titre,
+            "auteur": auteur,
+            "note": note,
+            "categories": categories.split(";") if categories else [],
+        }
+
+    def __getitem__(self, code):
+        ligne = self._ligne("SELECT code, titre, auteur, note, categories FROM livres WHERE code = ?", (code,))
+        if ligne is None:
+            raise KeyError(code)
+        return self._livre(ligne)
+
+    def __contains__(self, code):
+        return self._ligne("SELECT 1 FROM livres WHERE code = ?", (code,)) is not None
+
+    def __len__(self):
+        self.generation
+        if self._taille is None:
+            self._taille = self._ligne("SELECT count(*) FROM livres")[0]
+        return self._taille
+
+    def __iter__(self):
+        return (code for (code,) in self._parcourir("SELECT code FROM livres ORDER BY id"))
+
+    def values(self):
+        """Itère sur les livres dans l'ordre d'insertion (une seule requête)."""
+        requete = "SELECT code, titre, auteur, note, categories FROM livres ORDER BY id"
+        return (self._livre(ligne) for ligne in self._parcourir(requete))
+
+    def items(self):
+        """Itère sur les couples (code, livre) dans l'ordre d'insertion."""
+        return ((livre["code"], livre) for livre in self.values())
+
+    # ---- écriture ----
+
+    @staticmethod
+    def _colonnes(livre):
+        return (livre["titre"], livre["auteur"], float(livre["note"]),
+                ";".join(livre["categories"]), _cle_auteur(livre["auteur"]))
+
+    def __setitem__(self, code, livre):
+        with self.verrouiller():
+            ancien = self._ligne("SELECT id, titre, auteur FROM livres WHERE code = ?", (code,))
+            if ancien is None:
+                curseur = self._base.execute(
+                    "INSERT INTO livres (code, titre, auteur, note, categories, cle_auteur) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (code,) + self._colonnes(livre),
+                )
+                ident = curseur.lastrowid
+            else:
+                ident = ancien[0]
+                self._desindexer(*ancien)
+                self._base.execute(
+                    "UPDATE livres SET titre = ?, auteur = ?, note = ?, categories = ?, cle_auteur = ? "
+                    "WHERE id = ?",
+                    self._colonnes(livre) + (ident,),
+                )
+            self._indexer([(ident, livre)])
+            self._modifier()
+
+    def __delitem__(self, code):
+        with self.verrouiller():
+            ancien = self._ligne("SELECT id, titre, auteur FROM livres WHERE code = ?", (code,))
+            if ancien is None:
+                raise KeyError(code)
+            self._desindexer(*ancien)
+            self._base.execute("DELETE FROM livres WHERE id = ?", (ancien[0],))
+            self._modifier()
+
+    def clear(self):
+        with self.verrouiller():
+            for table in ("livres", "categories", "titres", "termes") + TABLES_CLES:
+                self._base.execute(f"DELETE FROM {table}")
+            self._modifier()
+
+    def importer(self, livres):
+        """
+        Ajoute des livres en nombre (import) dans une seule transaction et
+        retourne le nombre de livres lus. Les livres sont écrits par lots
+        (une requête par table et par lot) ; comme pour charger_catalogue,
+        un code déjà présent est remplacé par le dernier livre lu, qui
+        garde la place du premier.
+        """
+        nombre = 0
+        lot = {}
+        with self.verrouiller():
+            for livre in livres:
+                nombre += 1
+                code = livre["code"]
+                if code in lot:
+                    lot[code] = livre
+                elif code in self:
+                    self[code] = livre
+                else:
+                    lot[code] = livre
+                    if len(lot) >= TAILLE_LOT_IMPORT:
+                        self._importer_lot(lot)
+                        lot = {}
+            self._importer_lot(lot)
+            self._modifier()
+        return nombre
+
+    def _importer_lot(self, lot):
+        if not lot:
+            return
+        premier = self._ligne("SELECT coalesce(max(id), 0) + 1 FROM livres")[0]
+        livres = list(enumerate(lot.values(), premier))
+        self._base.executemany(
+            "INSERT INTO livres (id, code, titre, auteur, note, categories, cle_auteur) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(ident, livre["code"]) + self._colonnes(livre) for ident, livre in livres],
+        )
+        self._indexer(livres)
+
+    def _indexer(self, livres):
+        """Indexe des livres [(id, livre), ...] déjà écrits dans la table livres."""
+        execute = self._base.executemany
+        execute("INSERT INTO categories VALUES (?, ?, ?)",
+                [(cat, ident, float(livre["note"])) for ident, livre in livres
+                 for cat in dict.fromkeys(livre["categories"])])
+        execute("INSERT INTO titres (rowid, titre) VALUES (?, ?)",
+                [(ident, livre["titre"].lower()) for ident, livre in livres])
+        execute("INSERT INTO termes (rowid, titre, auteur) VALUES (?, ?, ?)",
+                [(ident, " ".join(termes_recherche(livre["titre"])), " ".join(termes_recherche(livre["auteur"])))
+                 for ident, livre in livres])
+
+        # Clés comptées une fois par lot : une même clé revient dans de
+        # nombreux livres
+        comptes = {table: {} for table in TABLES_CLES}
+        for _, livre in livres:
+            for table, cles in _cles_livre(livre["titre"], livre["auteur"]).items():
+                compte = comptes[table]
+                for cle, forme in cles:
+                    if cle in compte:
+                        compte[cle][1] += 1
+                    else:
+                        compte[cle] = [forme, 1]
+        for table, compte in comptes.items():
+            execute(f"INSERT INTO {table} VALUES (?, ?, ?) "
+                    "ON CONFLICT (cle) DO UPDATE SET livres = livres + excluded.livres",
+                    [(cle, forme, n) for cle, (forme, n) in compte.items()])
+
+    def _desindexer(self, ident, titre, auteur):
+        """Retire des index le livre `ident`, tel qu'il a été indexé (titre, auteur)."""
+        for table in ("categories WHERE livre", "titres WHERE rowid", "termes WHERE rowid"):
+            self._base.execute(f"DELETE FROM {table} = ?", (ident,))
+        for table, cles in _cles_livre(titre, auteur).items():
+            cles = [(cle,) for cle, _ in cles]
+            self._base.executemany(f"UPDATE {table} SET livres = livres - 1 WHERE cle = ?", cles)
+            self._base.executemany(f"DELETE FROM {table} WHERE cle = ? AND livres <= 0", cles)
+
+    def _modifier(self):
+        self._base.execute("UPDATE versions SET valeur = valeur + 1 WHERE nom = 'catalogue'")
+
+
+class _TitresSQLite:
+    """index_titres d'un CatalogueSQLite (voir IndexTitres) : table FTS5 à trigrammes."""
+
+    def __init__(self, catalogue):
+        self._catalogue = catalogue
+
+    def rechercher(self, fragment):
+        if fragment == "":
+            return iter(())
+        if len(fragment) < TAILLE_NGRAMME:
+            # Fragment sans trigramme : parcours des titres
+            lignes = self._catalogue._parcourir("SELECT code, titre FROM livres ORDER BY id")
+            return (code for code, titre in lignes if fragment in titre.lower())
+        lignes = self._catalogue._parcourir(
+            "SELECT l.code, t.titre FROM titres AS t JOIN livres AS l ON l.id = t.rowid "
+            "WHERE titres MATCH ? ORDER BY t.rowid",
+            (_phrase(fragment),),
+        )
+        # Vérification finale (minuscules de Python, comme IndexTitres) :
+        # le repliement de la casse de SQLite peut donner des candidats en trop
+        return (code for code, titre in lignes if fragment in titre)
+
+
+class _CategoriesSQLite:
+    """index_categories d'un CatalogueSQLite (voir IndexCategories)."""
+
+    def __init__(self, catalogue):
+        self._catalogue = catalogue
+
+    def categories(self):
+        return [cat for (cat,) in self._catalogue._lignes("SELECT DISTINCT categorie FROM categories ORDER BY categorie")]
+
+    def effectif(self, cat):
+        return self._catalogue._ligne("SELECT count(*) FROM categories WHERE categorie = ?", (cat,))[0]
+
+    def rechercher(self, cat, par_note=False):
+        ordre = "c.note DESC, c.livre" if par_note else "c.livre"
+        lignes = self._catalogue._parcourir(
+            "SELECT l.code FROM categories AS c JOIN livres AS l ON l.id = c.livre "
+            f"WHERE c.categorie = ? ORDER BY {ordre}",
+            (cat,),
+        )
+        return (code for (code,) in lignes)
+
+    def rechercher_requete(self, requete, par_note=False):
+        """
+        Comme IndexCategories.rechercher_requete : la requête est traduite
+        en une seule requête SQL (UNION, INTERSECT, EXCEPT sur la table
+        categories). Lève ValueError si la requête est mal formée.
+        """
+        parametres = []
+        selection = _sql_requete(analyser_requete(requete), parametres)
+        ordre = "l.note DESC, l.id" if par_note else "l.id"
+        lignes = self._catalogue._parcourir(
+            f"SELECT l.code FROM livres AS l WHERE l.id IN ({selection}) ORDER BY {ordre}", parametres
+        )
+        return (code for (code,) in lignes)
+
+
+def _sql_requete(noeud, parametres):
+    """Sélection SQL des identifiants de livres d'un arbre de requête (voir _AnalyseurRequete)."""
+    genre = noeud[0]
+    if genre == "cat":
+        parametres.append(noeud[1])
+        return "SELECT livre FROM categories WHERE categorie = ?"
+    if genre == "ou":
+        return " UNION ".join(f"SELECT livre FROM ({_sql_requete(e, parametres)})" for e in noeud[1])
+    # genre == "et" : noeud = ("et", inclus, exclus)
+    inclus = [f"SELECT livre FROM ({_sql_requete(e, parametres)})" for e in noeud[1]]
+    selection = " INTERSECT ".join(inclus) if inclus else "SELECT id AS livre FROM livres"
+    for enfant in noeud[2]:
+        selection += f" EXCEPT SELECT livre FROM ({_sql_requete(enfant, parametres)})"
+    return selection
+
+
+class _AuteursSQLite:
+    """index_auteurs d'un CatalogueSQLite (voir IndexAuteurs) : colonne cle_auteur indexée."""
+
+    def __init__(self, catalogue):
+        self._catalogue = catalogue
+
+    def nombre_livres(self, auteur):
+        return self._catalogue._ligne("SELECT count(*) FROM livres WHERE cle_auteur = ?", (_cle_auteur(auteur),))[0]
+
+    def rechercher(self, auteur, par_note=False):
+        return self._selection("cle_auteur = ?", (_cle_auteur(auteur),), par_note)
+
+    def rechercher_prefixe(self, prefixe, par_note=False):
+        cle = _cle_auteur(prefixe)
+        return self._selection("cle_auteur >= ? AND cle_auteur < ?", (cle, cle + _FIN_PREFIXE), par_note)
+
+    def _selection(self, condition, parametres, par_note):
+        ordre = "note DESC, id" if par_note else "id"
+        lignes = self._catalogue._parcourir(f"SELECT code FROM livres WHERE {condition} ORDER BY {ordre}", parametres)
+        return (code for (code,) in lignes)
+
+
+class _TermesSQLite:
+    """
+    index_termes d'un CatalogueSQLite (voir IndexTermes) : même classement,
+    calculé par SQLite sur la table FTS5 des termes.
+
+    Les termes proches de ceux de la requête sont cherchés dans le
+    vocabulaire (table vocabulaire), gardé en mémoire jusqu'à la
+    modification suivante du catalogue.
+    """
+
+    def __init__(self, catalogue):
+        self._catalogue = catalogue
+        self.oublier()
+
+    def oublier(self):
+        """Le vocabulaire sera relu à la prochaine recherche."""
+        self._vocabulaire = None
+        self._variantes = {}
+
+    def _variantes_de(self, terme):
+        if self._vocabulaire is None:
+            vocabulaire = Vocabulaire()
+            for (cle,) in self._catalogue._parcourir("SELECT cle FROM vocabulaire"):
+                vocabulaire.ajouter(cle)
+            self._vocabulaire = vocabulaire
+        variantes = self._variantes.get(terme)
+        if variantes is None:
+            if len(self._variantes) >= MAX_VARIANTES:
+                self._variantes.clear()
+            variantes = self._variantes[terme] = self._vocabulaire.rechercher(terme, distance_max(terme))
+        return variantes
+
+    def rechercher(self, requete, limite=20):
+        termes = list(dict.fromkeys(termes_recherche(requete)))[:MAX_TERMES_REQUETE]
+        if not termes or limite <= 0:
+            return []
+        # Prise en compte des modifications (vocabulaire à relire)
+        self._catalogue.generation
+
+        variantes = [dict(self._variantes_de(terme)) for terme in termes]
+        trouves = [v for v in variantes if v]
+        if not trouves:
+            return []
+        if len(trouves) > 1:
+            # Les livres qui contiennent tous les termes trouvés sont classés
+            # avant les autres : s'ils suffisent, les autres (souvent bien
+            # plus nombreux) ne sont pas lus
+            resultats = self._classer_complets(trouves, limite)
+            if len(resultats) >= limite:
+                return [(code, round(score / len(termes), 3)) for code, score in resultats]
+
+        # Une sélection par terme de la requête, distance et colonne : le
+        # poids d'un livre pour un terme est celui de sa meilleure correspondance
+        selections = []
+        parametres = []
+        for numero, proches in enumerate(trouves):
+            par_distance = {}
+            for trouve, d in proches.items():
+                par_distance.setdefault(d, []).append(_phrase(trouve))
+            for d, phrases in par_distance.items():
+                for colonne, facteur in (("titre", 1.0), ("auteur", POIDS_AUTEUR)):
+                    selections.append(f"SELECT rowid AS livre, {numero} AS terme, ? AS poids "
+                                      "FROM termes WHERE termes MATCH ?")
+                    parametres += [POIDS_DISTANCE[d] * facteur, f"{colonne} : ({' OR '.join(phrases)})"]
+
+        parametres.append(limite)
+        lignes = self._catalogue._lignes(
+            f"WITH trouves AS ({' UNION ALL '.join(selections)}), "
+            "meilleurs AS (SELECT livre, max(poids) AS poids FROM trouves GROUP BY livre, terme) "
+            "SELECT l.code, count(*) AS nombre, round(sum(m.poids), 6) AS score "
+            "FROM meilleurs AS m JOIN livres AS l ON l.id = m.livre GROUP BY m.livre "
+            "ORDER BY nombre DESC, score DESC, l.note DESC, l.id LIMIT ?",
+            parametres,
+        )
+        return [(code, round(score / len(termes), 3)) for code, _, score in lignes]
+
+    def _classer_complets(self, trouves, limite):
+        """
+        Les `limite` meilleurs livres (code, somme des poids) parmi ceux qui
+        contiennent une variante de chacun des termes (`trouves` : pour
+        chaque terme, {variante : distance}). Les poids sont calculés ici à
+        partir des termes du livre, lus dans la table FTS5.
+        """
+        expression = " AND ".join(
+            "{titre auteur} : (" + " OR ".join(_phrase(t) for t in proches) + ")" for proches in trouves
+        )
+        classes = []
+        for code, note, ident, titre, auteur in self._catalogue._parcourir(
+            "SELECT l.code, l.note, l.id, t.titre, t.auteur FROM termes AS t JOIN livres AS l ON l.id = t.rowid "
+            "WHERE termes MATCH ?",
+            (expression,),
+        ):
+            titre = set(titre.split())
+            auteur = set(auteur.split())
+            score = 0.0
+            for proches in trouves:
+                poids = 0.0
+                for trouve, d in proches.items():
+                    if trouve in titre:
+                        poids = max(poids, POIDS_DISTANCE[d])
+                    elif trouve in auteur:
+                        poids = max(poids, POIDS_DISTANCE[d] * POIDS_AUTEUR)
+                score += poids
+            classes.append((-round(score, 6), -note, ident, code))
+        return [(code, -score) for score, _, _, code in heapq.nsmallest(limite, classes)]
+
+
+class _CompletionSQLite:
+    """index_completion d'un CatalogueSQLite (voir IndexCompletion) : tables mots et noms."""
+
+    def __init__(self, catalogue):
+        self._catalogue = catalogue
+
+    def _completer(self, requete, prefixe, k):
+        if k <= 0:
+            return []
+        return [valeur for (valeur,) in self._catalogue._lignes(requete, (prefixe, prefixe + _FIN_PREFIXE, k))]
+
+    def completer_codes(self, prefixe, k):
+        return self._completer("SELECT code FROM livres WHERE code >= ? AND code < ? ORDER BY code LIMIT ?",
+                               prefixe.strip().upper(), k)
+
+    def completer_mots(self, prefixe, k):
+        return self._completer("SELECT forme FROM mots WHERE cle >= ? AND cle < ? ORDER BY livres DESC, cle LIMIT ?",
+                               replier(prefixe.strip()), k)
+
+    def completer_auteurs(self, prefixe, k):
+        # Un auteur a une clé par mot de son nom (voir IndexCompletion)
+        prefixe = " ".join(replier(prefixe).split())
+        noms = []
+        for nom in self._completer("SELECT forme FROM noms WHERE cle >= ? AND cle < ? "
+                                   "ORDER BY livres DESC, cle LIMIT ?", prefixe, 4 * k):
+            if nom not in noms:
+                noms.append(nom)
+                if len(noms) == k:
+                    break
+        return noms
+
+
+# -------------------- HISTORIQUE DES EMPRUNTS --------------------
+
+class HistoriqueSQLite(_ConnexionBase):
+    """
+    Historique des emprunts stocké dans la base ; s'utilise comme
+    HistoriqueEmprunts (emprunts numérotés à partir de 0 dans l'ordre
+    chronologique, parcours inverse, recherche par période, index inversé
+    par livre).
+
+    Les emprunts sont indexés par numéro, par date et par livre, et le
+    nombre d'emprunts de chaque livre est tenu à jour à chaque ajout :
+    aucune lecture ne dépend du nombre total d'emprunts. Chaque lecture
+    interroge la base : les emprunts des autres processus sont vus sans
+    rafraîchissement.
+    """
+
+    def __init__(self, path=BASE_SQLITE, partage=True):
+        super().__init__(path)
+        self.partage = partage
+        self.index_codes = _IndexCodesSQLite(self)
+        self._synchrone = SYNCHRONISER_EMPRUNTS
+
+    def rafraichir(self):
+        """Sans effet (chaque lecture interroge la base) : retourne 0."""
+        return 0
+
+    @staticmethod
+    def _emprunt(ligne):
+        valeur, codes = ligne
+        return {"datetime": date_texte(valeur), "codes": codes.split(",") if codes else []}
+
+    def __len__(self):
+        return self._ligne("SELECT coalesce(max(numero) + 1, 0) FROM emprunts")[0]
+
+    def lire(self, numero):
+        """Retourne l'emprunt numéro `numero` (les négatifs partent de la fin)."""
+        if numero < 0:
+            numero += len(self)
+        ligne = self._ligne("SELECT horodatage, codes FROM emprunts WHERE numero = ?", (numero,))
+        if ligne is None or numero < 0:
+            raise IndexError("numéro d'emprunt hors de l'historique")
+        return self._emprunt(ligne)
+
+    def __iter__(self):
+        """Parcourt les emprunts du plus ancien au plus récent."""
+        return self.entre()
+
+    def parcourir_inverse(self, depuis=None):
+        """
+        Parcourt les emprunts du plus récent au plus ancien (à partir de
+        l'emprunt numéro `depuis` s'il est donné).
+        """
+        if depuis is None:
+            lignes = self._parcourir("SELECT horodatage, codes FROM emprunts ORDER BY numero DESC")
+        else:
+            lignes = self._parcourir("SELECT horodatage, codes FROM emprunts WHERE numero <= ? "
+                                     "ORDER BY numero DESC", (depuis,))
+        return (self._emprunt(ligne) for ligne in lignes)
+
+    def numeros_entre(self, debut=None, fin=None):
+        """
+        Intervalle (range) des numéros des emprunts dont la date est
+        comprise entre `debut` et `fin` (bornes incluses, None = pas de
+        borne) : premier et dernier emprunt de la période, lus dans l'index
+        des dates.
+        """
+        with self._verrou:
+            if debut is None:
+                bas = 0
+            else:
+                ligne = self._ligne("SELECT numero FROM emprunts WHERE horodatage >= ? "
+                                    "ORDER BY horodatage, numero LIMIT 1", (_borne(debut),))
+                bas = len(self) if ligne is None else ligne[0]
+            if fin is None:
+                haut = len(self)
+            else:
+                ligne = self._ligne("SELECT numero FROM emprunts WHERE horodatage <= ? "
+                                    "ORDER BY horodatage DESC, numero DESC LIMIT 1", (_borne(fin, fin=True),))
+                haut = 0 if ligne is None else ligne[0] + 1
+        return range(bas, max(bas, haut))
+
+    def entre(self, debut=None, fin=None):
+        """Parcourt, dans l'ordre chronologique, les emprunts d'une période."""
+        numeros = self.numeros_entre(debut, fin)
+        lignes = self._parcourir("SELECT horodatage, codes FROM emprunts WHERE numero >= ? AND numero < ? "
+                                 "ORDER BY numero", (numeros.start, numeros.stop))
+        return (self._emprunt(ligne) for ligne in lignes)
+
+    def dates_extremes(self):
+        """Dates (datetime) du premier et du dernier emprunt, ou None si vide."""
+        premier = self._ligne("SELECT horodatage FROM emprunts ORDER BY numero LIMIT 1")
+        if premier is None:
+            return None
+        dernier = self._ligne("SELECT horodatage FROM emprunts ORDER BY numero DESC LIMIT 1")
+        return date_horodatage(premier[0]), date_horodatage(dernier[0])
+
+    def emprunts_du_livre(self, code):
+        """Parcourt, dans l'ordre chronologique, les emprunts contenant le livre `code`."""
+        lignes = self._parcourir(
+            "SELECT e.horodatage, e.codes FROM emprunts_livres AS x JOIN emprunts AS e ON e.numero = x.numero "
+            "WHERE x.code = ? ORDER BY x.numero",
+            (code,),
+        )
+        return (self._emprunt(ligne) for ligne in lignes)
+
+    # ---- écriture ----
+
+    def ajouter(self, codes, moment=None):
+        """Ajoute un emprunt (maintenant par défaut) et retourne son numéro."""
+        return self.ajouter_lot([(moment or datetime.now(), codes)])
+
+    def ajouter_lot(self, emprunts, synchroniser=False):
+        """
+        Ajoute plusieurs emprunts (couples (datetime, codes)) dans une seule
+        transaction et retourne le numéro du dernier.
+
+        Si `synchroniser` est vrai, les validations de cette connexion sont
+        désormais forcées sur le disque (PRAGMA synchronous = FULL).
+        """
+        emprunts = list(emprunts)
+        with self._verrou:
+            if synchroniser and not self._synchrone and self._profondeur == 0:
+                self._base.execute("PRAGMA synchronous = FULL")
+                self._synchrone = True
+            with self.verrouiller():
+                premier = len(self)
+                precedent = self._ligne("SELECT horodatage FROM emprunts ORDER BY numero DESC LIMIT 1")
+                precedent = 0 if precedent is None else precedent[0]
+                lignes = []
+                livres = []
+                for numero, (moment, codes) in enumerate(emprunts, premier):
+                    # Dates croissantes, comme dans HistoriqueEmprunts : une
+                    # date antérieure à la précédente est rangée à celle-ci
+                    precedent = max(precedent, horodatage(moment))
+                    lignes.append((numero, precedent, ",".join(codes)))
+                    livres.extend((code, numero) for code in set(codes))
+                self._base.executemany("INSERT INTO emprunts VALUES (?, ?, ?)", lignes)
+                self._base.executemany("INSERT INTO emprunts_livres VALUES (?, ?)", livres)
+                self._base.executemany(
+                    "INSERT INTO livres_empruntes VALUES (?, 1) "
+                    "ON CONFLICT (code) DO UPDATE SET emprunts = emprunts + 1",
+                    [(code,) for code, _ in livres],
+                )
+                return premier + len(emprunts) - 1
+
+    def importer(self, emprunts):
+        """
+        Ajoute des emprunts en nombre (import), par lots, dans une seule
+        transaction ; retourne le nombre d'emprunts importés.
+        """
+        nombre = 0
+        lot = []
+        with self.verrouiller():
+            for emprunt in emprunts:
+                lot.append(emprunt)
+                if len(lot) >= TAILLE_LOT_IMPORT:
+                    self.ajouter_lot(lot)
+                    nombre += len(lot)
+                    lot = []
+            self.ajouter_lot(lot)
+        return nombre + len(lot)
+
+
+class _IndexCodesSQLite:
+    """index_codes d'un HistoriqueSQLite (voir IndexCodesEmprunts)."""
+
+    def __init__(self, historique):
+        self._historique = historique
+
+    def __len__(self):
+        return self._historique._ligne("SELECT count(*) FROM livres_empruntes")[0]
+
+    @property
+    def jusqu_a(self):
+        """Nombre d'emprunts indexés : tous ceux de la base."""
+        return len(self._historique)
+
+    def numeros(self, code):
+        """Numéros (croissants) des emprunts contenant le livre `code`."""
+        lignes = self._historique._lignes("SELECT numero FROM emprunts_livres WHERE code = ? ORDER BY numero", (code,))
+        return [numero for (numero,) in lignes]
+
+    def effectif(self, code):
+        """Nombre d'emprunts contenant le livre `code`."""
+        ligne = self._historique._ligne("SELECT emprunts FROM livres_empruntes WHERE code = ?", (code,))
+        return 0 if ligne is None else ligne[0]
+
+    def effectifs(self):
+        """Itère sur les couples (code, nombre d'emprunts)."""
+        return iter(self._historique._parcourir("SELECT code, emprunts FROM livres_empruntes"))
+
+    def plus_empruntes(self, n=10):
+        """Les `n` livres les plus empruntés (code, nombre d'emprunts), à égalité par ordre de code."""
+        if n <= 0:
+            return []
+        return self._historique._lignes(
+            "SELECT code, emprunts FROM livres_empruntes ORDER BY emprunts DESC, code LIMIT ?", (n,)
+        )
+
+
+# -------------------- LIGNE DE COMMANDE --------------------
+
+def fichiers_base(path):
+    """Fichiers d'une base : la base, son journal WAL, le journal des retours et le point de reprise."""
+    return [path, path + "-wal", path + "-shm", path + ".dispo"] + glob.glob(glob.escape(path) + ".retours*")
+
+
+def main():
+    # Import différé : data s'appuie sur ce module (stockage "sqlite")
+    from data import importer_base_sqlite
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base", default=BASE_SQLITE)
+    parser.add_argument("--catalogue", default=CATALOGUE_CSV, help="catalogue CSV à importer")
+    parser.add_argument("--historique", default=HISTORIQUE_FILE,
+                        help="historique binaire à importer (à défaut, l'ancien historique texte)")
+    parser.add_argument("--remplacer", action="store_true", help="supprimer d'abord la base existante")
+    args = parser.parse_args()
+
+    if args.remplacer:
+        for path in fichiers_base(args.base):
+            if os.path.exists(path):
+                os.remove(path)
+    try:
+        livres, emprunts, retours = importer_base_sqlite(args.base, args.catalogue, args.historique, EMPRUNTS_FILE)
+    except FileExistsError:
+        print(f"[ERREUR] La base {args.base} existe déjà (--remplacer pour la recréer).")
+        return 1
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print("[ERREUR] Import impossible :", e)
+        return 1
+    print(f"[OK] Base {args.base} créée : {livres} livre(s), {emprunts} emprunt(s), {retours} retour(s) importé(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+"""
+Mode non interactif (traitement par lots) de l'application.
+
+Lit une suite de commandes (une par ligne) depuis un fichier ou l'entrée
+standard et écrit, pour chaque commande, une ligne JSON sur la sortie
+standard. Le catalogue et ses index sont chargés une seule fois pour
+toutes les commandes.
+
+Commandes :
+    code <code>              recherche par code
+    titre <texte>            recherche par titre (partielle)
+    categorie <catégorie>    recherche par catégorie
+    categories <requête>     recherche multi-catégories (ET / OU / SAUF)
+    approche <texte>         recherche approchée (titre ou auteur, classée)
+    auteur <nom>             livres d'un auteur, par note décroissante
+                             (début du nom suivi de * : plusieurs auteurs)
+    ajouter <code> [...]     ajout à la liste d'emprunt (un ou plusieurs codes)
+    retirer <code> [...]     retrait de la liste d'emprunt (un ou plusieurs codes)
+    liste                    contenu de la liste d'emprunt
+    valider                  validation de l'emprunt
+    rendre <code> [...]      retour de livres empruntés (un ou plusieurs codes)
+    mesures                  mesures de performance (si elles sont activées)
+    cache                    compteurs du cache des résultats de recherche
+
+Les lignes vides et celles qui commencent par # sont ignorées.
+
+Usage :
+    python batch.py commandes.txt
+    python batch.py < commandes.txt
+"""
+
+import argparse
+import json
+import sys
+import time
+from contextlib import redirect_stdout
+
+import mesures
+from cache import cache_recherches
+from catalogue import livre_en_json
+from config import CATALOGUE_CSV, HISTORIQUE_FILE
+from data import charger_catalogue_rapide, fermer_historiques, ouvrir_disponibilites
+from index import analyser_requete
+from logic import (
+    ListeEmprunt,
+    ajouter_emprunt,
+    retirer_emprunt,
+    rechercher_par_code,
+    rechercher_par_titre,
+    rechercher_par_categorie,
+    rechercher_par_categories,
+    rechercher_par_auteur,
+    rechercher_approximative,
+    ajouter_livres_emprunt,
+    supprimer_livres_emprunt,
+    emprunter_livres,
+    rendre_livres,
+)
+
+
+def resultat_validation(codes, refus):
+    """
+    Résultat de la validation d'une liste d'emprunt, d'après
+    emprunter_livres : codes empruntés, refus et message.
+    """
+    resultat = {
+        "ok": bool(codes),
+        "codes": codes,
+        "message": "[OK] Emprunt validé et enregistré. La liste d'emprunt a été réinitialisée."
+        if codes else "[INFO] Aucun livre n'a pu être emprunté. La liste d'emprunt a été réinitialisée.",
+    }
+    if refus:
+        resultat["refus"] = [{"code": code, "message": message} for code, message in refus]
+    return resultat
+
+
+class SessionLot:
+    """
+    Session de traitement par lots : un catalogue et une liste d'emprunt
+    partagés par toutes les commandes.
+
+    Les commandes n'affichent rien : leurs messages sont renvoyés dans le
+    champ "message" du résultat (la sortie standard ne contient que du
+    JSON). Rien n'est capturé sur sys.stdout, que d'autres fils (écrivain
+    des emprunts, service) peuvent utiliser au même moment.
+
+    Si `limite` est donnée, seuls les `limite` premiers livres d'une
+    recherche sont écrits ("nombre" reste le nombre total de résultats).
+    """
+
+    def __init__(self, catalogue, path_historique=HISTORIQUE_FILE, limite=None):
+        self.catalogue = catalogue
+        self.path_historique = path_historique
+        self.limite = limite
+        self.liste_emprunt = ListeEmprunt(disponibilites=ouvrir_disponibilites(path_historique))
+        self.commandes = {
+            "code": self._code,
+            "titre": self._titre,
+            "categorie": self._categorie,
+            "categories": self._categories,
+            "approche": self._approche,
+            "auteur": self._auteur,
+            "ajouter": self._ajouter,
+            "retirer": self._retirer,
+            "liste": self._liste,
+            "valider": self._valider,
+            "rendre": self._rendre,
+            "mesures": self._mesures,
+            "cache": self._cache,
+        }
+
+    def executer(self, ligne):
+        """
+        Exécute une ligne de commande et retourne le résultat (dictionnaire),
+        ou None pour une ligne vide ou un commentaire.
+        """
+        ligne = ligne.strip()
+        if ligne == "" or ligne.startswith("#"):
+            return None
+
+        morceaux = ligne.split(None, 1)
+        nom = morceaux[0].lower()
+        argument = morceaux[1] if len(morceaux) > 1 else ""
+
+        resultat = {"commande": nom, "argument": argument}
+        fonction = self.commandes.get(nom)
+        if fonction is None:
+            resultat["ok"] = False
+            resultat["message"] = f"[ERREUR] Commande inconnue : '{nom}'."
+            return resultat
+
+        debut = time.perf_counter()
+        resultat.update(fonction(argument))
+        resultat["duree_ms"] = round((time.perf_counter() - debut) * 1000, 3)
+        return resultat
+
+    def _resultats(self, livres):
+        affiches = livres if self.limite is None else livres[:self.limite]
+        return {"ok": True, "nombre": len(livres), "resultats": [livre_en_json(l) for l in affiches]}
+
+    def _code(self, argument):
+        livre = rechercher_par_code(self.catalogue, argument)
+        return self._resultats([livre] if livre is not None else [])
+
+    def _titre(self, argument):
+        return self._resultats(rechercher_par_titre(self.catalogue, argument))
+
+    def _categorie(self, argument):
+        return self._resultats(rechercher_par_categorie(self.catalogue, argument))
+
+    def _categories(self, argument):
+        try:
+            if argument.strip():
+                analyser_requete(argument)
+        except ValueError as e:
+            resultat = self._resultats([])
+            resultat["ok"] = False
+            resultat["message"] = f"[ERREUR] Requête de catégories invalide : {e}"
+            return resultat
+        return self._resultats(rechercher_par_categories(self.catalogue, argument))
+
+    def _approche(self, argument):
+        return self._resultats(rechercher_approximative(self.catalogue, argument))
+
+    def _auteur(self, argument):
+        return self._resultats(rechercher_par_auteur(self.catalogue, argument, "note"))
+
+    def _lot(self, refus):
+        # Plusieurs codes : un message par code refusé, dans "refus"
+        return {
+            "ok": not refus,
+            "taille_liste": len(self.liste_emprunt),
+            "refus": [{"code": code, "message": message} for code, message in refus],
+        }
+
+    def _ajouter(self, argument):
+        codes = argument.split()
+        if len(codes) > 1:
+            return self._lot(ajouter_livres_emprunt(self.catalogue, self.liste_emprunt, codes))
+        ajoute, message = ajouter_emprunt(self.catalogue, self.liste_emprunt, argument)
+        return {"ok": ajoute, "taille_liste": len(self.liste_emprunt), "message": message}
+
+    def _retirer(self, argument):
+        codes = argument.split()
+        if len(codes) > 1:
+            return self._lot(supprimer_livres_emprunt(self.liste_emprunt, codes))
+        retire, message = retirer_emprunt(self.liste_emprunt, argument)
+        return {"ok": retire, "taille_liste": len(self.liste_emprunt), "message": message}
+
+    def _liste(self, argument):
+        return self._resultats(list(self.liste_emprunt))
+
+    def _valider(self, argument):
+        if not self.liste_emprunt:
+            return {"ok": False, "codes": [], "message": "[INFO] La liste d'emprunt est vide. Rien à valider."}
+        return resultat_validation(*emprunter_livres(self.liste_emprunt, self.path_historique))
+
+    def _rendre(self, argument):
+        suivi = self.liste_emprunt.disponibilites
+        if suivi is None:
+            return {"ok": False, "message": "[ERREUR] Le suivi des disponibilités est désactivé."}
+        refus = rendre_livres(suivi, argument.split() or [argument])
+        return {"ok": not refus, "refus": [{"code": code, "message": message} for code, message in refus]}
+
+    def _mesures(self, argument):
+        if not mesures.ACTIVES:
+            return {"ok": False, "message": "[ERREUR] Les mesures de performance sont désactivées."}
+        return {"ok": True, "mesures": mesures.instantane()}
+
+    def _cache(self, argument):
+        return {"ok": True, "cache": cache_recherches.statistiques()}
+
+
+def executer_lot(session, lignes, sortie):
+    """
+    Exécute toutes les lignes et écrit un résultat JSON par commande dans
+    `sortie`. Retourne le nombre de commandes exécutées.
+    """
+    nombre = 0
+    for numero, ligne in enumerate(lignes, start=1):
+        resultat = session.executer(ligne)
+        if resultat is None:
+            continue
+        sortie.write(json.dumps({"ligne": numero, **resultat}, ensure_ascii=False) + "\n")
+        nombre += 1
+    return nombre
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Traitement par lots des commandes de la médiathèque.")
+    parser.add_argument("fichier", nargs="?", default="-",
+                        help="fichier de commandes (entrée standard par défaut)")
+    parser.add_argument("--catalogue", default=CATALOGUE_CSV, help="fichier CSV du catalogue")
+    parser.add_argument("--historique", default=HISTORIQUE_FILE,
+                        help="historique où enregistrer les emprunts validés")
+    parser.add_argument("--limite", type=int, default=None,
+                        help="nombre maximal de livres écrits par recherche")
+    args = parser.parse_args(arguments)
+
+    debut = time.perf_counter()
+    # Les messages de chargement (catalogue, import de l'ancien historique,
+    # suivi des disponibilités) vont sur la sortie d'erreur
+    with redirect_stdout(sys.stderr):
+        catalogue = charger_catalogue_rapide(args.catalogue)
+        session = SessionLot(catalogue, args.historique, args.limite)
+    chargement = time.perf_counter() - debut
+
+    entree = sys.stdin if args.fichier == "-" else open(args.fichier, "r", encoding="utf-8")
+
+    debut = time.perf_counter()
+    try:
+        nombre = executer_lot(session, entree, sys.stdout)
+    finally:
+        if entree is not sys.stdin:
+            entree.close()
+        fermer_historiques()
+    duree = time.perf_counter() - debut
+
+    debit = nombre / duree if duree > 0 else 0.0
+    print(f"[INFO] Catalogue chargé en {chargement:.2f} s ; {nombre} commande(s) "
+          f"en {duree:.2f} s ({debit:.0f} commandes/s).", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""
+Scripts de mesure de performances de l'application.
+
+Chaque script se lance depuis la racine du projet, par exemple :
+
+    python -m benchmarks.bench_titre
+"""
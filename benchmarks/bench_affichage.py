@@ -0,0 +1,125 @@
+"""
+Benchmark de l'affichage des résultats : fonction de tableau d'origine (deux
+passages sur les livres, un print par ligne) contre ecrire_livres (un seul
+passage, largeurs mesurées sur les premières lignes, écriture par lots), en
+tableau, CSV et JSON.
+
+Deux sorties, toutes deux vers os.devnull :
+- "fichier" : tampon par blocs (redirection vers un fichier ou un tube)
+- "terminal" : tampon par lignes, comme la console
+
+Usage :
+    python -m benchmarks.bench_affichage [--tailles 1000 10000 100000]
+"""
+
+import argparse
+import os
+import time
+from contextlib import redirect_stdout
+
+from benchmarks.synthetique import generer_livres
+from ui import ecrire_livres
+
+
+def afficher_tableau_origine(livres, titre_tableau=None):
+    """
+    Fonction d'affichage d'origine (référence du benchmark).
+
+    Colonnes :
+    - Code
+    - Titre
+    - Auteur
+    - Note
+    - Catégories
+
+    Si la liste est vide, affiche un message adapté.
+    """
+    if not livres:
+        print("Aucun livre à afficher.")
+        return
+
+    # Noms des colonnes
+    entetes = ["Code", "Titre", "Auteur", "Note", "Catégories"]
+
+    # Calcul de la largeur de chaque colonne
+    largeur_code = len(entetes[0])
+    largeur_titre = len(entetes[1])
+    largeur_auteur = len(entetes[2])
+    largeur_note = len(entetes[3])
+    largeur_cat = len(entetes[4])
+
+    for livre in livres:
+        largeur_code = max(largeur_code, len(livre["code"]))
+        largeur_titre = max(largeur_titre, len(livre["titre"]))
+        largeur_auteur = max(largeur_auteur, len(livre["auteur"]))
+
+        # Note affichée avec un chiffre après la virgule
+        note_str = f"{livre['note']:.1f}"
+        largeur_note = max(largeur_note, len(note_str))
+        cats_str = ", ".join(livre["categories"])
+        largeur_cat = max(largeur_cat, len(cats_str))
+
+    # Largeur totale (pour la ligne de séparation)
+    largeur_totale = (
+        largeur_code + largeur_titre + largeur_auteur +
+        largeur_note + largeur_cat + 4 * 3  # 4 séparateurs " | "
+    )
+
+    if titre_tableau is not None:
+        print(titre_tableau)
+
+    # Affichage de l'en-tête
+    print(
+        f"{entetes[0]:<{largeur_code}} | "
+        f"{entetes[1]:<{largeur_titre}} | "
+        f"{entetes[2]:<{largeur_auteur}} | "
+        f"{entetes[3]:<{largeur_note}} | "
+        f"{entetes[4]:<{largeur_cat}}"
+    )
+    print("-" * largeur_totale)
+
+    # Affichage des lignes
+    for livre in livres:
+        note_str = f"{livre['note']:.1f}"
+        cats_str = ", ".join(livre["categories"])
+        print(
+            f"{livre['code']:<{largeur_code}} | "
+            f"{livre['titre']:<{largeur_titre}} | "
+            f"{livre['auteur']:<{largeur_auteur}} | "
+            f"{note_str:<{largeur_note}} | "
+            f"{cats_str:<{largeur_cat}}"
+        )
+
+
+def mesurer(fonction, livres, sortie):
+    """Temps d'affichage de tous les livres sur `sortie` (en ms)."""
+    debut = time.perf_counter()
+    with redirect_stdout(sortie):
+        fonction(livres)
+    sortie.flush()
+    return (time.perf_counter() - debut) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tailles", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'Livres':>8} | {'Sortie':>8} | {'Origine (ms)':>12} | {'Tableau (ms)':>12} | "
+          f"{'CSV (ms)':>8} | {'JSON (ms)':>9} | {'Gain':>6}")
+    print("-" * 82)
+
+    for taille in args.tailles:
+        livres = generer_livres(taille)
+        for nom, tampon in (("fichier", -1), ("terminal", 1)):
+            with open(os.devnull, "w", buffering=tampon, encoding="utf-8") as sortie:
+                origine = mesurer(afficher_tableau_origine, livres, sortie)
+                tableau = mesurer(ecrire_livres, livres, sortie)
+                en_csv = mesurer(lambda l: ecrire_livres(l, format_sortie="csv"), livres, sortie)
+                en_json = mesurer(lambda l: ecrire_livres(l, format_sortie="json"), livres, sortie)
+            print(f"{taille:>8} | {nom:>8} | {origine:>12.1f} | {tableau:>12.1f} | {en_csv:>8.1f} | "
+                  f"{en_json:>9.1f} | {origine / tableau:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark de la recherche approchée (titre ou auteur, fautes de frappe
+tolérées, résultats classés) sur l'index de termes du catalogue.
+
+Les requêtes sont tirées des livres du catalogue : un à trois mots, avec
+ou sans accents, avec ou sans faute de frappe. Le temps de la première
+requête (numérotation des livres par note) est affiché à part.
+
+Le vocabulaire des titres synthétiques est très petit (une cinquantaine de
+mots, chacun présent dans des dizaines de milliers de livres) : --mots-rares
+ajoute à chaque titre un mot tiré d'un vocabulaire de cette taille, pour
+mesurer aussi le coût de la recherche des variantes d'un mot dans un grand
+vocabulaire.
+
+Usage :
+    python -m benchmarks.bench_approximative [--tailles 10000 100000 1000000] [--requetes 500] [--mots-rares 0 100000]
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.synthetique import generer_livres, generer_requetes_approchees
+from catalogue import Catalogue
+from logic import rechercher_approximative
+
+
+# Temps moyen visé par requête (ms)
+OBJECTIF_MS = 10.0
+
+SYLLABES = [
+    "ba", "ber", "ca", "cho", "da", "del", "fa", "gen", "gra", "la", "lou",
+    "ma", "mer", "mi", "na", "no", "pa", "pi", "que", "ra", "ri", "ro",
+    "sa", "si", "son", "ta", "ti", "tor", "va", "vi", "zo",
+]
+
+
+def generer_mots_rares(nombre, graine=13):
+    """Génère `nombre` mots distincts de deux à cinq syllabes."""
+    alea = random.Random(graine)
+    mots = set()
+    while len(mots) < nombre:
+        mots.add("".join(alea.choice(SYLLABES) for _ in range(alea.randint(2, 5))))
+    return sorted(mots)
+
+
+def ajouter_mots_rares(livres, nombre, graine=17):
+    """Copie des livres dont chaque titre se termine par un mot rare."""
+    if nombre == 0:
+        return livres
+    alea = random.Random(graine)
+    mots = generer_mots_rares(nombre)
+    return [dict(livre, titre=livre["titre"] + " " + alea.choice(mots)) for livre in livres]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tailles", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--requetes", type=int, default=500)
+    parser.add_argument("--mots-rares", type=int, nargs="+", default=[0, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'Livres':>9} | {'Vocabulaire':>11} | {'Index (s)':>9} | {'1re (ms)':>8} | "
+          f"{'Moyenne (ms)':>12} | {'p99 (ms)':>8}")
+    print("-" * 73)
+
+    for taille in args.tailles:
+        for rares in args.mots_rares:
+            livres = ajouter_mots_rares(generer_livres(taille), rares)
+            requetes = generer_requetes_approchees(args.requetes, livres)
+
+            debut = time.perf_counter()
+            catalogue = Catalogue(livres)
+            construction = time.perf_counter() - debut
+            vocabulaire = len(catalogue.index_termes._vocabulaire)
+
+            debut = time.perf_counter()
+            rechercher_approximative(catalogue, "premier")
+            premiere = (time.perf_counter() - debut) * 1000
+
+            durees = []
+            trouvees = 0
+            for requete in requetes:
+                debut = time.perf_counter()
+                resultats = rechercher_approximative(catalogue, requete)
+                durees.append((time.perf_counter() - debut) * 1000)
+                trouvees += bool(resultats)
+            durees.sort()
+            moyenne = sum(durees) / len(durees)
+            p99 = durees[min(len(durees) - 1, len(durees) * 99 // 100)]
+
+            print(f"{taille:>9} | {vocabulaire:>11} | {construction:>9.2f} | {premiere:>8.1f} | "
+                  f"{moyenne:>12.3f} | {p99:>8.3f}")
+            # Chaque requête est tirée d'un livre : elle doit au moins le retrouver
+            if trouvees < len(requetes):
+                print(f"[ATTENTION] {len(requetes) - trouvees} requête(s) sans résultat.")
+            if moyenne > OBJECTIF_MS:
+                print(f"[ATTENTION] Temps moyen au-dessus de l'objectif ({OBJECTIF_MS} ms).")
+
+
+if __name__ == "__main__":
+    main()
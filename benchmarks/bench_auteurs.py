@@ -0,0 +1,111 @@
+"""
+Benchmark de la recherche par auteur : construction de l'index d'auteurs
+(temps et mémoire), puis temps d'une recherche par nom exact, par début de
+nom et des dix livres les mieux notés d'un auteur, contre un parcours du
+catalogue.
+
+Les noms cherchés sont tirés du catalogue et écrits comme un utilisateur
+les taperait : en minuscules, sans accents, avec des espaces en trop.
+
+Usage :
+    python -m benchmarks.bench_auteurs [--tailles 10000 100000 1000000] [--requetes 1000]
+"""
+
+import argparse
+import gc
+import heapq
+import random
+import time
+import tracemalloc
+
+from benchmarks.synthetique import generer_livres
+from cache import cache_recherches
+from catalogue import Catalogue
+from index import IndexAuteurs, normaliser_auteur, replier
+from logic import rechercher_par_auteur
+
+
+def parcours(livres, nom, prefixe=False, meilleurs=None):
+    """Recherche par auteur en comparant le nom normalisé de chaque livre."""
+    cle = replier(normaliser_auteur(nom))
+    if prefixe:
+        trouves = [l for l in livres if replier(normaliser_auteur(l["auteur"])).startswith(cle)]
+    else:
+        trouves = [l for l in livres if replier(normaliser_auteur(l["auteur"])) == cle]
+    if meilleurs is not None:
+        return heapq.nsmallest(meilleurs, trouves, key=lambda livre: -livre["note"])
+    return trouves
+
+
+def generer_noms(livres, nombre, graine=5):
+    alea = random.Random(graine)
+    noms = []
+    for livre in alea.choices(livres, k=nombre):
+        noms.append("  " + replier(livre["auteur"]).replace(" ", "   ") + " ")
+    return noms
+
+
+def chrono_us(fonction, elements):
+    """Temps moyen (en µs) de fonction(element)."""
+    debut = time.perf_counter()
+    for element in elements:
+        fonction(element)
+    return (time.perf_counter() - debut) * 1e6 / len(elements)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tailles", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--requetes", type=int, default=1000)
+    parser.add_argument("--parcours", type=int, default=5,
+                        help="nombre de recherches par parcours du catalogue")
+    args = parser.parse_args()
+    # Mesure des recherches elles-mêmes : pas de cache des résultats
+    cache_recherches.entrees_max = 0
+
+    print(f"{'Livres':>9} | {'Index (Mo)':>10} | {'Construction (s)':>16} | {'Recherche':>9} | "
+          f"{'Index (µs)':>10} | {'Parcours (ms)':>13} | {'Gain':>7}")
+    print("-" * 92)
+
+    for taille in args.tailles:
+        livres = generer_livres(taille)
+
+        gc.collect()
+        debut = time.perf_counter()
+        index = IndexAuteurs()
+        for livre in livres:
+            index.ajouter(livre["code"], livre["auteur"], livre["note"])
+        construction = time.perf_counter() - debut
+        del index
+
+        # Mémoire mesurée à part : tracemalloc ralentit les allocations
+        gc.collect()
+        tracemalloc.start()
+        index = IndexAuteurs()
+        for livre in livres:
+            index.ajouter(livre["code"], livre["auteur"], livre["note"])
+        memoire, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del index
+
+        catalogue = Catalogue(livres)
+        noms = generer_noms(livres, args.requetes)
+        prefixes = [nom.strip()[:3] + "*" for nom in noms]
+        cas = (
+            ("exact", noms, lambda nom: rechercher_par_auteur(catalogue, nom),
+             lambda nom: parcours(livres, nom)),
+            ("début", prefixes, lambda nom: rechercher_par_auteur(catalogue, nom),
+             lambda nom: parcours(livres, nom[:-1], prefixe=True)),
+            ("top 10", noms, lambda nom: rechercher_par_auteur(catalogue, nom, "note", 10),
+             lambda nom: parcours(livres, nom, meilleurs=10)),
+        )
+        for nom_cas, requetes, par_index, par_parcours in cas:
+            temps_index = chrono_us(par_index, requetes)
+            temps_parcours = chrono_us(par_parcours, requetes[: args.parcours]) / 1000
+            print(f"{taille:>9} | {memoire / 2**20:>10.1f} | {construction:>16.2f} | {nom_cas:>9} | "
+                  f"{temps_index:>10.1f} | {temps_parcours:>13.1f} | {temps_parcours * 1000 / temps_index:>6.0f}x")
+        del catalogue
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark du cache des résultats de recherche : rejoue un mélange de
+recherches par titre, catégorie et auteur où quelques requêtes reviennent
+très souvent (loi de Zipf), sans cache puis avec des caches de plusieurs
+tailles. Les résultats sont lus au fur et à mesure, comme dans les menus de
+la console (iterer_par_*) ; rechercher_par_* passe par les mêmes entrées.
+
+Les requêtes distinctes (mots et paires de mots des titres, catégories,
+auteurs) sont classées au hasard ; la requête de rang r est tirée avec une
+probabilité proportionnelle à 1 / r**s. Avec --modifications N, un livre
+du catalogue est modifié toutes les N requêtes (nouvelle génération : les
+résultats en cache ne servent plus).
+
+Usage :
+    python -m benchmarks.bench_cache [--livres 100000] [--requetes 20000] [--zipf 1.1] [--entrees 64 256 1024]
+"""
+
+import argparse
+import itertools
+import random
+import time
+
+from benchmarks.synthetique import CATEGORIES, MOTS_TITRE, NOMS, PRENOMS, generer_livres
+from cache import cache_recherches
+from catalogue import Catalogue
+from logic import iterer_par_auteur, iterer_par_categorie, iterer_par_titre
+
+
+def requetes_distinctes():
+    """Toutes les requêtes possibles : (fonction, texte, tri)."""
+    requetes = [(iterer_par_titre, mot, None) for mot in MOTS_TITRE]
+    requetes += [(iterer_par_titre, f"{a} {b}", None) for a, b in itertools.permutations(MOTS_TITRE, 2)]
+    requetes += [(iterer_par_categorie, cat, "note") for cat in CATEGORIES]
+    requetes += [(iterer_par_auteur, f"{p} {n}", "note") for p in PRENOMS for n in NOMS]
+    return requetes
+
+
+def generer_melange(nombre, exposant, graine=3):
+    """`nombre` requêtes tirées selon une loi de Zipf d'exposant `exposant`."""
+    alea = random.Random(graine)
+    requetes = requetes_distinctes()
+    alea.shuffle(requetes)
+    poids = list(itertools.accumulate(1 / rang ** exposant for rang in range(1, len(requetes) + 1)))
+    return alea.choices(requetes, cum_weights=poids, k=nombre), len(requetes)
+
+
+def rejouer(catalogue, melange, limite, modifications):
+    """Exécute le mélange de requêtes ; retourne la durée totale (s)."""
+    livre = dict(catalogue[next(iter(catalogue))])
+    debut = time.perf_counter()
+    for numero, (fonction, texte, tri) in enumerate(melange, 1):
+        # Lecture complète, comme l'affichage d'un tableau de résultats
+        for _ in fonction(catalogue, texte, tri, limite):
+            pass
+        if modifications and numero % modifications == 0:
+            livre["note"] = round(5 - livre["note"], 1)
+            catalogue[livre["code"]] = dict(livre)
+    return time.perf_counter() - debut
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--livres", type=int, default=100_000)
+    parser.add_argument("--requetes", type=int, default=20_000)
+    parser.add_argument("--zipf", type=float, default=1.1, help="exposant de la loi de Zipf")
+    parser.add_argument("--entrees", type=int, nargs="+", default=[64, 256, 1024],
+                        help="tailles de cache essayées (nombre d'entrées)")
+    parser.add_argument("--limite", type=int, default=50,
+                        help="nombre maximal de livres par recherche (comme le service)")
+    parser.add_argument("--modifications", type=int, default=0,
+                        help="modifier un livre toutes les N requêtes (0 : jamais)")
+    args = parser.parse_args()
+
+    catalogue = Catalogue(generer_livres(args.livres))
+    melange, distinctes = generer_melange(args.requetes, args.zipf)
+    print(f"{len(melange)} requêtes, {distinctes} distinctes, {len(set(melange))} différentes tirées "
+          f"(loi de Zipf, exposant {args.zipf})\n")
+
+    print(f"{'Cache (entrées)':>15} | {'µs/requête':>10} | {'Requêtes/s':>10} | {'Succès':>7} | "
+          f"{'Évictions':>9} | {'Mémoire (Mo)':>12} | {'Gain':>6}")
+    print("-" * 88)
+
+    sans = None
+    for entrees in [0] + args.entrees:
+        cache_recherches.reinitialiser()
+        cache_recherches.entrees_max = entrees
+        duree = rejouer(catalogue, melange, args.limite, args.modifications)
+        stats = cache_recherches.statistiques()
+        if sans is None:
+            sans = duree
+        libelle = "sans" if entrees == 0 else str(entrees)
+        taux = f"{stats['taux_succes']:.0%}" if entrees else "-"
+        print(f"{libelle:>15} | {duree * 1e6 / len(melange):>10.1f} | {len(melange) / duree:>10.0f} | "
+              f"{taux:>7} | {stats['evictions']:>9} | {stats['memoire'] / 2**20:>12.2f} | "
+              f"{sans / duree:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
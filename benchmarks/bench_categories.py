@@ -0,0 +1,67 @@
+"""
+Benchmark de la recherche par catégorie : parcours linéaire du catalogue
+comparé à l'index de catégories, pour des requêtes simples et booléennes.
+
+Usage :
+    python -m benchmarks.bench_categories [--tailles 10000 100000 1000000] [--requetes 50]
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.synthetique import CATEGORIES, generer_livres
+from cache import cache_recherches
+from catalogue import Catalogue
+from logic import rechercher_par_categorie, rechercher_par_categories
+
+
+def mesurer(fonction, requetes):
+    """Exécute toutes les requêtes et retourne le temps moyen par requête (en ms)."""
+    debut = time.perf_counter()
+    for requete in requetes:
+        fonction(requete)
+    return (time.perf_counter() - debut) * 1000 / len(requetes)
+
+
+def generer_requetes_booleennes(nombre, graine=3):
+    """Génère des requêtes de la forme "a AND b NOT c"."""
+    alea = random.Random(graine)
+    requetes = []
+    for _ in range(nombre):
+        a, b, c = alea.sample(CATEGORIES, 3)
+        requetes.append(f"{a} AND {b} NOT {c}")
+    return requetes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tailles", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--requetes", type=int, default=50)
+    args = parser.parse_args()
+    # Mesure des recherches elles-mêmes : pas de cache des résultats
+    cache_recherches.entrees_max = 0
+
+    simples = [random.Random(i).choice(CATEGORIES) for i in range(args.requetes)]
+    booleennes = generer_requetes_booleennes(args.requetes)
+
+    print(f"{'Livres':>10} | {'Requête':>9} | {'Scan (ms)':>9} | {'Index (ms)':>10} | {'Gain':>6}")
+    print("-" * 56)
+
+    for taille in args.tailles:
+        livres = generer_livres(taille)
+        simple = {livre["code"]: livre for livre in livres}
+        indexe = Catalogue(livres)
+
+        scan = mesurer(lambda r: rechercher_par_categorie(simple, r), simples)
+        index = mesurer(lambda r: rechercher_par_categorie(indexe, r), simples)
+        print(f"{taille:>10} | {'simple':>9} | {scan:>9.3f} | {index:>10.3f} | {scan / index:>5.1f}x")
+
+        # Sans index, une requête booléenne revient à un parcours complet
+        scan = mesurer(lambda r: rechercher_par_categories(simple, r), booleennes)
+        index = mesurer(lambda r: rechercher_par_categories(indexe, r), booleennes)
+        print(f"{taille:>10} | {'booléenne':>9} | {scan:>9.3f} | {index:>10.3f} | {scan / index:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
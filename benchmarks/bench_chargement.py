@@ -0,0 +1,64 @@
+"""
+Benchmark du chargement du catalogue : lecture en flux par lots (sans
+garder les livres) comparée au chargement complet avec index.
+
+Chaque mesure est faite dans un processus séparé pour que le pic de
+mémoire rapporté ne dépende que du mode mesuré.
+
+Usage :
+    python -m benchmarks.bench_chargement [--tailles 100000 1000000]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.synthetique import ecrire_catalogue_csv, generer_livres
+from data import charger_catalogue, iterer_catalogue
+
+
+def mesurer_mode(mode, path):
+    """Charge le fichier selon le mode demandé et affiche les statistiques."""
+    stats = {}
+    if mode == "flux":
+        for _ in iterer_catalogue(path, stats=stats):
+            pass
+    else:
+        charger_catalogue(path, stats=stats)
+
+    memoire = stats["memoire_max"]
+    memoire_str = f"{memoire / 2**20:.0f} Mo" if memoire is not None else "n/d"
+    print(f"{stats['lignes']:>10} | {mode:>8} | {stats['duree']:>9.2f} | "
+          f"{stats['lignes_par_seconde']:>12.0f} | {memoire_str:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tailles", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--mode", choices=["flux", "complet"], help=argparse.SUPPRESS)
+    parser.add_argument("--fichier", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode is not None:
+        mesurer_mode(args.mode, args.fichier)
+        return
+
+    print(f"{'Livres':>10} | {'Mode':>8} | {'Durée (s)':>9} | {'Lignes/s':>12} | {'Mémoire':>10}")
+    print("-" * 63)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        for taille in args.tailles:
+            path = os.path.join(dossier, f"livres_{taille}.csv")
+            ecrire_catalogue_csv(path, generer_livres(taille))
+            for mode in ("flux", "complet"):
+                subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_chargement",
+                     "--mode", mode, "--fichier", path],
+                    check=True,
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark de la complétion par préfixe : mémoire et temps de construction
+de l'index de complétion, puis temps d'une complétion de code, de mot du
+titre et de nom d'auteur contre un parcours du catalogue.
+
+Les préfixes ont une à quatre lettres, tirées du début de codes, de mots
+et de noms du catalogue : les plus courts correspondent à une grande
+partie du vocabulaire.
+
+Usage :
+    python -m benchmarks.bench_completion [--tailles 10000 100000 1000000] [--requetes 2000]
+"""
+
+import argparse
+import gc
+import random
+import re
+import time
+import tracemalloc
+
+from benchmarks.synthetique import generer_livres
+from index import IndexCompletion, replier
+
+
+# Nombre de propositions demandées par complétion
+LIMITE = 10
+
+
+def construire(livres):
+    index = IndexCompletion()
+    for livre in livres:
+        index.ajouter(livre["code"], livre["titre"], livre["auteur"])
+    # Première complétion de chaque sorte : fusion des clés ajoutées
+    index.completer_codes("", LIMITE)
+    index.completer_mots("", LIMITE)
+    index.completer_auteurs("", LIMITE)
+    return index
+
+
+def parcours_codes(livres, prefixe, k):
+    """Complétion de code par parcours de tout le catalogue."""
+    prefixe = prefixe.upper()
+    return sorted(livre["code"] for livre in livres if livre["code"].startswith(prefixe))[:k]
+
+
+def parcours_mots(livres, prefixe, k):
+    """Complétion de mot par parcours des titres de tout le catalogue."""
+    prefixe = replier(prefixe)
+    compte = {}
+    for livre in livres:
+        for mot in set(re.findall(r"\w+", livre["titre"].lower())):
+            if len(mot) > 1 and replier(mot).startswith(prefixe):
+                compte[mot] = compte.get(mot, 0) + 1
+    return sorted(compte, key=lambda mot: (-compte[mot], mot))[:k]
+
+
+def parcours_auteurs(livres, prefixe, k):
+    """Complétion d'auteur par parcours de tout le catalogue."""
+    prefixe = replier(prefixe)
+    compte = {}
+    for livre in livres:
+        mots = replier(livre["auteur"]).split()
+        if any(" ".join(mots[i:]).startswith(prefixe) for i in range(len(mots))):
+            compte[livre["auteur"]] = compte.get(livre["auteur"], 0) + 1
+    return sorted(compte, key=lambda nom: (-compte[nom], nom))[:k]
+
+
+def generer_prefixes(livres, nombre, sorte, graine=3):
+    alea = random.Random(graine)
+    prefixes = []
+    for livre in alea.choices(livres, k=nombre):
+        if sorte == "code":
+            texte = livre["code"]
+        elif sorte == "titre":
+            texte = alea.choice(livre["titre"].split())
+        else:
+            texte = alea.choice(livre["auteur"].split())
+        prefixes.append(texte[: alea.randint(1, 4)])
+    return prefixes
+
+
+def chrono(fonction, prefixes):
+    """Temps moyen et p99 (en µs) d'une complétion."""
+    durees = []
+    for prefixe in prefixes:
+        debut = time.perf_counter()
+        fonction(prefixe, LIMITE)
+        durees.append((time.perf_counter() - debut) * 1e6)
+    durees.sort()
+    return sum(durees) / len(durees), durees[int(0.99 * (len(durees) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tailles", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--requetes", type=int, default=2000)
+    parser.add_argument("--parcours", type=int, default=20,
+                        help="nombre de complétions par parcours du catalogue")
+    args = parser.parse_args()
+
+    print(f"{'Livres':>9} | {'Index (Mo)':>10} | {'Construction (s)':>16} | {'Sorte':>6} | "
+          f"{'Moyenne (µs)':>12} | {'p99 (µs)':>9} | {'Parcours (ms)':>13} | {'Gain':>7}")
+    print("-" * 104)
+
+    for taille in args.tailles:
+        livres = generer_livres(taille)
+
+        gc.collect()
+        tracemalloc.start()
+        debut = time.perf_counter()
+        index = construire(livres)
+        construction = time.perf_counter() - debut
+        memoire, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        cas = (
+            ("code", index.completer_codes, parcours_codes),
+            ("titre", index.completer_mots, parcours_mots),
+            ("auteur", index.completer_auteurs, parcours_auteurs),
+        )
+        for sorte, completer, parcourir in cas:
+            prefixes = generer_prefixes(livres, args.requetes, sorte)
+            moyenne, p99 = chrono(completer, prefixes)
+
+            echantillon = prefixes[: args.parcours]
+            debut = time.perf_counter()
+            for prefixe in echantillon:
+                parcourir(livres, prefixe, LIMITE)
+            parcours = (time.perf_counter() - debut) * 1000 / len(echantillon)
+
+            print(f"{taille:>9} | {memoire / 2**20:>10.1f} | {construction:>16.2f} | {sorte:>6} | "
+                  f"{moyenne:>12.1f} | {p99:>9.1f} | {parcours:>13.1f} | {parcours * 1000 / moyenne:>6.0f}x")
+        del index
+
+
+if __name__ == "__main__":
+    main()
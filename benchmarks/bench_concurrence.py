@@ -0,0 +1,149 @@
+"""
+Test de charge de l'historique partagé : N processus ajoutent chacun M
+emprunts au même historique pendant qu'un processus lecteur le relit.
+
+Vérifie à la fin qu'aucun emprunt n'est perdu, dupliqué ou corrompu, que
+les emprunts de chaque processus sont dans leur ordre d'écriture et que
+le lecteur n'a jamais vu d'enregistrement incomplet. Affiche le débit
+global (emprunts/s).
+
+Usage :
+    python -m benchmarks.bench_concurrence [--processus 1,2,4,8] [--emprunts 5000] [--lot 1]
+    python -m benchmarks.bench_concurrence --sans-verrou   # pour comparaison
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from historique import HistoriqueEmprunts
+
+
+def ecrire(path, numero, nombre, taille_lot, partage, depart):
+    """Processus écrivain : emprunts ["Pnn", "Nnnnnnn"] par lots de `taille_lot`."""
+    historique = HistoriqueEmprunts(path, partage=partage)
+    depart.wait()
+    lot = []
+    for i in range(nombre):
+        lot.append((datetime.now(), [f"P{numero:02d}", f"N{i:07d}"]))
+        if len(lot) >= taille_lot:
+            historique.ajouter_lot(lot)
+            lot = []
+    historique.ajouter_lot(lot)
+    historique.fermer()
+
+
+def lire(path, partage, depart, fin, resultat):
+    """Processus lecteur : relit les nouveaux emprunts tant que les écrivains tournent."""
+    historique = HistoriqueEmprunts(path, partage=partage)
+    depart.wait()
+    lus = 0
+    erreurs = 0
+    while True:
+        termine = fin.is_set()
+        historique.rafraichir()
+        while lus < len(historique):
+            try:
+                codes = historique.lire(lus)["codes"]
+                if len(codes) != 2:
+                    erreurs += 1
+            except Exception:
+                erreurs += 1
+            lus += 1
+        if termine:
+            break
+        time.sleep(0.001)
+    historique.fermer()
+    resultat.put((lus, erreurs))
+
+
+def verifier(path, processus, nombre):
+    """Retourne la liste des anomalies trouvées dans l'historique final."""
+    anomalies = []
+    historique = HistoriqueEmprunts(path)
+    suivants = [0] * processus
+    for numero in range(len(historique)):
+        try:
+            ecrivain, rang = historique.lire(numero)["codes"]
+            ecrivain = int(ecrivain[1:])
+            rang = int(rang[1:])
+        except Exception as e:
+            anomalies.append(f"emprunt {numero} illisible ({e})")
+            continue
+        if rang != suivants[ecrivain]:
+            anomalies.append(f"processus {ecrivain} : emprunt {rang} au lieu de {suivants[ecrivain]}")
+        suivants[ecrivain] = rang + 1
+    for ecrivain, suivant in enumerate(suivants):
+        if suivant != nombre:
+            anomalies.append(f"processus {ecrivain} : {suivant} emprunt(s) sur {nombre}")
+    if len(historique) != processus * nombre:
+        anomalies.append(f"{len(historique)} emprunt(s) au total au lieu de {processus * nombre}")
+    historique.fermer()
+    return anomalies
+
+
+def executer(dossier, processus, nombre, taille_lot, partage):
+    path = os.path.join(dossier, f"emprunts_{processus}.dat")
+    HistoriqueEmprunts(path, partage=partage).fermer()
+
+    depart = multiprocessing.Event()
+    fin = multiprocessing.Event()
+    resultat = multiprocessing.Queue()
+    ecrivains = [
+        multiprocessing.Process(target=ecrire, args=(path, i, nombre, taille_lot, partage, depart))
+        for i in range(processus)
+    ]
+    lecteur = multiprocessing.Process(target=lire, args=(path, partage, depart, fin, resultat))
+    for p in ecrivains + [lecteur]:
+        p.start()
+
+    # Laisse les processus ouvrir l'historique avant de lancer le chrono
+    time.sleep(0.2)
+    debut = time.perf_counter()
+    depart.set()
+    for p in ecrivains:
+        p.join()
+    duree = time.perf_counter() - debut
+    fin.set()
+    lus, erreurs_lecture = resultat.get()
+    lecteur.join()
+
+    anomalies = verifier(path, processus, nombre)
+    if erreurs_lecture:
+        anomalies.append(f"lecteur : {erreurs_lecture} enregistrement(s) incomplet(s)")
+    return duree, lus, anomalies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processus", default="1,2,4,8",
+                        help="nombres de processus écrivains, séparés par des virgules")
+    parser.add_argument("--emprunts", type=int, default=5000, help="emprunts par processus")
+    parser.add_argument("--lot", type=int, default=1, help="emprunts par écriture")
+    parser.add_argument("--sans-verrou", action="store_true",
+                        help="désactive l'accès partagé (montre les pertes)")
+    args = parser.parse_args()
+    partage = not args.sans_verrou
+
+    print(f"{'Processus':>9} | {'Emprunts':>9} | {'Durée (s)':>9} | {'Emprunts/s':>10} | {'Lus':>9} | Anomalies")
+    print("-" * 72)
+    total_anomalies = 0
+    with tempfile.TemporaryDirectory() as dossier:
+        for processus in [int(n) for n in args.processus.split(",")]:
+            duree, lus, anomalies = executer(dossier, processus, args.emprunts, args.lot, partage)
+            total = processus * args.emprunts
+            print(f"{processus:>9} | {total:>9} | {duree:>9.2f} | {total / duree:>10.0f} | {lus:>9} | {len(anomalies)}")
+            for anomalie in anomalies[:5]:
+                print("           ", anomalie)
+            total_anomalies += len(anomalies)
+
+    if total_anomalies and partage:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
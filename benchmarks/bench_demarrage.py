@@ -0,0 +1,52 @@
+"""
+Benchmark du démarrage : chargement du catalogue depuis le CSV comparé au
+chargement depuis l'instantané binaire (livres + index).
+
+Usage :
+    python -m benchmarks.bench_demarrage [--tailles 100000 1000000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetique import ecrire_catalogue_csv, generer_livres
+from data import charger_catalogue_rapide
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tailles", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--stockage", choices=["dict", "livre", "colonnes"], default="dict")
+    args = parser.parse_args()
+
+    print(f"{'Livres':>10} | {'CSV (s)':>8} | {'Instantané (s)':>14} | {'Fichier (Mo)':>12} | {'Gain':>6}")
+    print("-" * 64)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        for taille in args.tailles:
+            path = os.path.join(dossier, f"livres_{taille}.csv")
+            cache = path + ".cache"
+            ecrire_catalogue_csv(path, generer_livres(taille))
+
+            # Premier démarrage : lecture du CSV (l'écriture de l'instantané
+            # n'est pas comptée)
+            stats = {}
+            charger_catalogue_rapide(path, cache, args.stockage, stats)
+            assert stats["source"] == "csv"
+            duree_csv = stats["duree"]
+
+            stats = {}
+            debut = time.perf_counter()
+            charger_catalogue_rapide(path, cache, args.stockage, stats)
+            duree_instantane = time.perf_counter() - debut
+            assert stats["source"] == "instantane"
+
+            taille_cache = os.path.getsize(cache) / 2**20
+            print(f"{taille:>10} | {duree_csv:>8.2f} | {duree_instantane:>14.2f} | "
+                  f"{taille_cache:>12.1f} | {duree_csv / duree_instantane:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark du suivi des disponibilités : pour plusieurs tailles de journaux
+(emprunts, et un retour pour la moitié d'entre eux), temps de lecture de la
+disponibilité d'un livre par la table contre un parcours des journaux, puis
+reconstruction de la table depuis le point de reprise contre un rejeu
+complet.
+
+Vérifie ensuite qu'aucun exemplaire n'est prêté deux fois quand plusieurs
+bornes (processus) partagent l'historique : chaque borne, avec son écrivain
+à tampon, demande au même moment tous les livres d'un petit fonds (un
+exemplaire chacun, dans un ordre propre à la borne).
+
+Usage :
+    python -m benchmarks.bench_disponibilites [--emprunts 10000 100000 1000000] [--livres 100000] [--bornes 4]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+
+from benchmarks.synthetique import generer_emprunts
+from disponibilites import SuiviDisponibilites
+from historique import EcrivainEmprunts, HistoriqueEmprunts
+
+
+def sortis_par_parcours(suivi, code):
+    """Exemplaires sortis d'un livre, en relisant tous les emprunts et retours."""
+    emprunts = sum(enregistrement["codes"].count(code) for enregistrement in suivi.historique)
+    retours = sum(enregistrement["codes"].count(code) for enregistrement in suivi.retours)
+    return emprunts - retours
+
+
+def borne(path, codes, depart, resultats):
+    """Une borne : emprunte chaque livre de `codes`, un par un ; renvoie les codes accordés."""
+    historique = HistoriqueEmprunts(path)
+    ecrivain = EcrivainEmprunts(historique, taille_tampon=64, delai=1.0)
+    suivi = SuiviDisponibilites(historique, {}, ecrivain, defaut=1)
+    depart.wait()
+    accordes = [code for code in codes if not suivi.emprunter([code])]
+    ecrivain.fermer()
+    suivi.fermer()
+    historique.fermer()
+    resultats.put(accordes)
+
+
+def verifier_bornes(nombre_bornes, nombre_livres):
+    """
+    Lance `nombre_bornes` processus qui se disputent `nombre_livres` livres
+    d'un exemplaire ; retourne (accordés, prêtés deux fois), d'après les
+    réponses des bornes et d'après l'historique.
+    """
+    codes = [f"B{numero:04d}" for numero in range(nombre_livres)]
+    with tempfile.TemporaryDirectory() as dossier:
+        path = os.path.join(dossier, "emprunts.dat")
+        SuiviDisponibilites(HistoriqueEmprunts(path)).fermer()
+        depart = multiprocessing.Barrier(nombre_bornes)
+        resultats = multiprocessing.Queue()
+        processus = []
+        for numero in range(nombre_bornes):
+            ordre = list(codes)
+            random.Random(numero).shuffle(ordre)
+            processus.append(multiprocessing.Process(target=borne, args=(path, ordre, depart, resultats)))
+        for p in processus:
+            p.start()
+        accordes = Counter()
+        for _ in processus:
+            accordes.update(resultats.get())
+        for p in processus:
+            p.join()
+        ecrits = Counter(code for emprunt in HistoriqueEmprunts(path) for code in emprunt["codes"])
+    doubles = sum(1 for compte in (accordes, ecrits) for n in compte.values() if n > 1)
+    return sum(accordes.values()), doubles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--emprunts", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--livres", type=int, default=100_000)
+    parser.add_argument("--requetes", type=int, default=10_000)
+    parser.add_argument("--bornes", type=int, default=4, help="processus qui se disputent les exemplaires")
+    parser.add_argument("--fonds", type=int, default=200, help="livres (un exemplaire) disputés par les bornes")
+    args = parser.parse_args()
+
+    print(f"{'Emprunts':>9} | {'Retours':>8} | {'Table (µs)':>10} | {'Parcours (ms)':>13} | "
+          f"{'Rejeu (s)':>9} | {'Reprise (s)':>11} | {'Gain':>6}")
+    print("-" * 85)
+
+    for nombre in args.emprunts:
+        emprunts = generer_emprunts(nombre, args.livres)
+        # Un retour pour chaque emprunt de la première moitié
+        retours = emprunts[: nombre // 2]
+        alea = random.Random(7)
+        codes = [alea.choice(codes) for _, codes in alea.choices(emprunts, k=args.requetes)]
+
+        with tempfile.TemporaryDirectory() as dossier:
+            path = os.path.join(dossier, "emprunts.dat")
+            # Suivi en place avant le premier emprunt (pas de régularisation)
+            SuiviDisponibilites(HistoriqueEmprunts(path)).fermer()
+            HistoriqueEmprunts(path).ajouter_lot(emprunts)
+            HistoriqueEmprunts(path + ".retours").ajouter_lot(retours)
+
+            debut = time.perf_counter()
+            suivi = SuiviDisponibilites(HistoriqueEmprunts(path))
+            rejeu = time.perf_counter() - debut
+
+            debut = time.perf_counter()
+            for code in codes:
+                suivi.disponibles(code)
+            table = (time.perf_counter() - debut) * 1e6 / len(codes)
+
+            echantillon = codes[:3]
+            debut = time.perf_counter()
+            for code in echantillon:
+                assert sortis_par_parcours(suivi, code) == suivi.sortis(code)
+            parcours = (time.perf_counter() - debut) * 1000 / len(echantillon)
+            suivi.fermer()
+
+            debut = time.perf_counter()
+            SuiviDisponibilites(HistoriqueEmprunts(path)).fermer()
+            reprise = time.perf_counter() - debut
+
+        print(f"{nombre:>9} | {len(retours):>8} | {table:>10.2f} | {parcours:>13.1f} | "
+              f"{rejeu:>9.3f} | {reprise:>11.3f} | {parcours * 1000 / table:>5.0f}x")
+
+    accordes, doubles = verifier_bornes(args.bornes, args.fonds)
+    print(f"\n{args.bornes} bornes, {args.fonds} livres d'un exemplaire, {args.bornes * args.fonds} demandes : "
+          f"{accordes} accordées, {doubles} exemplaire(s) prêté(s) deux fois")
+    if doubles or accordes != args.fonds:
+        raise SystemExit("[ERREUR] Exemplaires prêtés plusieurs fois (ou jamais prêtés)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark de l'écriture des emprunts (emprunts/s) :
+
+- ancienne méthode : ouverture du fichier texte, ajout d'une ligne,
+  fermeture, pour chaque emprunt
+- historique binaire, un emprunt par écriture (fichiers gardés ouverts)
+- écrivain avec tampon (écriture groupée), avec ou sans fsync groupé
+- fsync à chaque emprunt, pour comparaison
+
+Usage :
+    python -m benchmarks.bench_ecriture [--emprunts 100000] [--tampon 64]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from historique import EcrivainEmprunts, HistoriqueEmprunts
+
+CODES = ["L01", "L05", "L15"]
+
+
+def ancienne_methode(path, nombre):
+    for _ in range(nombre):
+        ligne = datetime.now().strftime("%Y-%m-%d %H:%M:%S") + " | " + ", ".join(CODES) + "\n"
+        with open(path, "a", encoding="utf-8") as fichier:
+            fichier.write(ligne)
+
+
+def sans_tampon(path, nombre, synchroniser=False):
+    historique = HistoriqueEmprunts(path)
+    for _ in range(nombre):
+        historique.ajouter_lot([(datetime.now(), CODES)], synchroniser=synchroniser)
+    historique.fermer()
+
+
+def avec_tampon(path, nombre, taille_tampon, synchroniser=False):
+    historique = HistoriqueEmprunts(path)
+    ecrivain = EcrivainEmprunts(historique, taille_tampon, delai=None, synchroniser=synchroniser)
+    for _ in range(nombre):
+        ecrivain.ecrire(CODES)
+    ecrivain.fermer()
+    historique.fermer()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--emprunts", type=int, default=100_000)
+    parser.add_argument("--tampon", type=int, default=64)
+    args = parser.parse_args()
+
+    n = args.emprunts
+    # Le fsync à chaque emprunt est beaucoup plus lent : moins d'emprunts
+    n_fsync = max(1, n // 100)
+
+    cas = [
+        ("ouverture par emprunt (texte)", n, lambda p: ancienne_methode(p, n)),
+        ("historique, sans tampon", n, lambda p: sans_tampon(p, n)),
+        (f"écrivain, tampon {args.tampon}", n, lambda p: avec_tampon(p, n, args.tampon)),
+        (f"écrivain, tampon {args.tampon} + fsync", n, lambda p: avec_tampon(p, n, args.tampon, True)),
+        ("fsync à chaque emprunt", n_fsync, lambda p: sans_tampon(p, n_fsync, True)),
+    ]
+
+    print(f"{'Méthode':<34} | {'Emprunts':>8} | {'Emprunts/s':>12}")
+    print("-" * 60)
+    with tempfile.TemporaryDirectory() as dossier:
+        for i, (nom, nombre, fonction) in enumerate(cas):
+            path = os.path.join(dossier, f"emprunts_{i}")
+            debut = time.perf_counter()
+            fonction(path)
+            duree = time.perf_counter() - debut
+            print(f"{nom:<34} | {nombre:>8} | {nombre / duree:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
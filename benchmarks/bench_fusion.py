@@ -0,0 +1,84 @@
+"""
+Benchmark du chargement d'un catalogue réparti en plusieurs fichiers :
+durée de charger_catalogues() selon le nombre de processus d'analyse,
+contre le chargement séquentiel (un seul processus).
+
+Les fichiers sont générés dans un dossier temporaire ; une part des codes
+(--doublons) est aussi présente dans le fichier suivant, avec une note
+différente une fois sur deux. L'analyse des fichiers est répartie entre
+les processus ; la fusion et l'indexation restent dans le processus
+principal : le gain est borné par cette partie séquentielle, et par le
+nombre de cœurs de la machine.
+
+Usage :
+    python -m benchmarks.bench_fusion [--livres 400000] [--fichiers 8] [--doublons 0.05] [--processus 1 2 4]
+"""
+
+import argparse
+import gc
+import os
+import tempfile
+
+from benchmarks.synthetique import ecrire_catalogue_csv, generer_livres
+from fusion import charger_catalogues
+
+
+def generer_fichiers(dossier, livres, nombre, doublons):
+    """
+    Répartit `livres` dans `nombre` fichiers ; une part `doublons` des
+    livres de chaque fichier est recopiée dans le suivant.
+    """
+    paths = []
+    taille = -(-len(livres) // nombre)
+    for numero in range(nombre):
+        part = livres[numero * taille:(numero + 1) * taille]
+        if numero > 0 and doublons > 0:
+            precedent = livres[(numero - 1) * taille:numero * taille]
+            copies = [dict(livre) for livre in precedent[: int(len(precedent) * doublons)]]
+            for livre in copies[::2]:
+                livre["note"] = round(5 - livre["note"], 1)
+            part = copies + part
+        path = os.path.join(dossier, f"region_{numero:02}.csv")
+        ecrire_catalogue_csv(path, part)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--livres", type=int, default=400_000)
+    parser.add_argument("--fichiers", type=int, default=8)
+    parser.add_argument("--doublons", type=float, default=0.05,
+                        help="part des livres d'un fichier recopiés dans le suivant")
+    parser.add_argument("--processus", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--stockage", choices=("dict", "livre", "colonnes"), default="dict")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        paths = generer_fichiers(dossier, generer_livres(args.livres), args.fichiers, args.doublons)
+        octets = sum(os.path.getsize(path) for path in paths)
+        print(f"{args.fichiers} fichiers, {octets / 2**20:.1f} Mo, {os.cpu_count()} cœur(s)\n")
+
+        print(f"{'Processus':>9} | {'Livres':>9} | {'Conflits':>8} | {'Durée (s)':>9} | "
+              f"{'Analyse (s)':>11} | {'Livres/s':>9} | {'Gain':>6}")
+        print("-" * 80)
+
+        sequentiel = None
+        for processus in args.processus:
+            gc.collect()
+            rapport = {}
+            catalogue = charger_catalogues(paths, processus, stockage=args.stockage, rapport=rapport)
+            duree = rapport["duree"]
+            # Somme des temps d'analyse des fichiers (dans leurs processus)
+            analyse = sum(fichier["duree_analyse"] for fichier in rapport["fichiers"])
+            if sequentiel is None:
+                sequentiel = duree
+            print(f"{rapport['processus']:>9} | {len(catalogue):>9} | {len(rapport['conflits']):>8} | "
+                  f"{duree:>9.2f} | {analyse:>11.2f} | {len(catalogue) / duree:>9.0f} | "
+                  f"{sequentiel / duree:>5.2f}x")
+            del catalogue
+
+
+if __name__ == "__main__":
+    main()
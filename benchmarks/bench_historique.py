@@ -0,0 +1,70 @@
+"""
+Benchmark de l'historique des emprunts : ancien fichier texte relu en
+entier à chaque consultation, comparé à l'historique binaire indexé.
+
+Mesures :
+- ouverture (chargement de l'index)
+- lecture des 20 emprunts les plus récents
+- recherche des emprunts d'une journée
+
+Usage :
+    python -m benchmarks.bench_historique [--tailles 100000 1000000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from itertools import islice
+
+from benchmarks.synthetique import ecrire_historique_texte, generer_emprunts
+from historique import HistoriqueEmprunts, lire_historique_texte, migrer_historique_texte
+
+
+def chrono(fonction):
+    """Exécute la fonction et retourne (résultat, durée en ms)."""
+    debut = time.perf_counter()
+    resultat = fonction()
+    return resultat, (time.perf_counter() - debut) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tailles", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'Emprunts':>10} | {'Mesure':>12} | {'Texte (ms)':>10} | {'Binaire (ms)':>12}")
+    print("-" * 54)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        for taille in args.tailles:
+            emprunts = generer_emprunts(taille, 100_000)
+            path_texte = os.path.join(dossier, f"emprunts_{taille}.txt")
+            path = os.path.join(dossier, f"emprunts_{taille}.dat")
+            ecrire_historique_texte(path_texte, emprunts)
+            migrer_historique_texte(path_texte, path)
+
+            jour = emprunts[len(emprunts) // 2][0].date()
+
+            # Ancien format : tout relire puis filtrer
+            tout, texte_ouverture = chrono(lambda: list(lire_historique_texte(path_texte)))
+            _, texte_recents = chrono(lambda: list(lire_historique_texte(path_texte))[-20:][::-1])
+            _, texte_jour = chrono(
+                lambda: [e for e in lire_historique_texte(path_texte) if e[0].date() == jour]
+            )
+
+            historique, binaire_ouverture = chrono(lambda: HistoriqueEmprunts(path))
+            recents, binaire_recents = chrono(lambda: list(islice(historique.parcourir_inverse(), 20)))
+            du_jour, binaire_jour = chrono(lambda: list(historique.entre(jour, jour)))
+            historique.fermer()
+
+            for mesure, texte, binaire in (
+                ("ouverture", texte_ouverture, binaire_ouverture),
+                ("20 récents", texte_recents, binaire_recents),
+                ("une journée", texte_jour, binaire_jour),
+            ):
+                print(f"{taille:>10} | {mesure:>12} | {texte:>10.2f} | {binaire:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
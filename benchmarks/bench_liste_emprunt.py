@@ -0,0 +1,141 @@
+"""
+Benchmark de la liste d'emprunt : liste Python d'origine (recherche
+linéaire des doublons, retrait par parcours puis del) contre ListeEmprunt
+(dictionnaire ordonné par code), livre par livre et par lots de codes.
+
+Chaque mesure ajoute `taille` livres à une liste vide puis les retire tous,
+dans un ordre mélangé.
+
+Usage :
+    python -m benchmarks.bench_liste_emprunt [--tailles 100 1000 10000]
+"""
+
+import argparse
+import io
+import random
+import time
+from contextlib import redirect_stdout
+
+from benchmarks.synthetique import generer_livres
+from logic import (
+    ListeEmprunt,
+    ajouter_livre_emprunt,
+    ajouter_livres_emprunt,
+    supprimer_livre_emprunt,
+    supprimer_livres_emprunt,
+)
+
+
+def ajouter_origine(catalogue, liste_emprunt, code):
+    """
+    Fonction d'ajout d'origine (référence du benchmark).
+
+    - Vérifie que le code n'est pas vide
+    - Vérifie que le livre existe dans le catalogue
+    - Vérifie que le livre n'est pas déjà dans la liste d'emprunt
+    - Ajoute le livre si tout est OK
+
+    Affiche des messages d'information / d'erreur pour l'utilisateur.
+    """
+
+    if code is None:
+        print("[ERREUR] Code vide. Merci de saisir un code valide.")
+        return
+
+    code = code.strip().upper()
+    if code == "":
+        print("[ERREUR] Code vide. Merci de saisir un code valide.")
+        return
+
+    # On cherche le livre dans le catalogue
+    livre = catalogue.get(code)
+    if livre is None:
+        print(f"[ERREUR] Aucun livre avec le code '{code}'.")
+        return
+
+    # On vérifie si le livre est déjà dans la liste d'emprunt
+    for l in liste_emprunt:
+        if l["code"] == code:
+            print(f"[INFO] Le livre '{livre['titre']}' est déjà dans la liste d'emprunt.")
+            return
+
+    # Tout est bon, on ajoute
+    liste_emprunt.append(livre)
+    print("[OK] Livre ajouté à la liste d'emprunt :", livre["titre"])
+
+
+def supprimer_origine(liste_emprunt, code):
+    """
+    Fonction de retrait d'origine (référence du benchmark).
+
+    - Vérifie que le code n'est pas vide
+    - Supprime le livre s'il est présent
+    - Affiche un message d'erreur sinon
+    """
+
+    if code is None:
+        print("[ERREUR] Code vide. Merci de saisir un code valide.")
+        return
+
+    code = code.strip().upper()
+    if code == "":
+        print("[ERREUR] Code vide. Merci de saisir un code valide.")
+        return
+
+    for index, livre in enumerate(liste_emprunt):
+        if livre["code"] == code:
+            titre = livre["titre"]
+            del liste_emprunt[index]
+            print("[OK] Livre retiré de la liste d'emprunt :", titre)
+            return
+
+    print(f"[ERREUR] Le livre avec le code '{code}' n'est pas dans la liste d'emprunt.")
+
+
+def mesurer(ajouter, retirer, codes_ajout, codes_retrait):
+    """Temps d'ajout puis de retrait de tous les codes (en ms)."""
+    debut = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        ajouter(codes_ajout)
+        retirer(codes_retrait)
+    return (time.perf_counter() - debut) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tailles", type=int, nargs="+", default=[100, 1_000, 10_000])
+    args = parser.parse_args()
+
+    print(f"{'Livres':>7} | {'Origine (ms)':>12} | {'Un par un (ms)':>14} | {'Par lots (ms)':>13} | {'Gain':>7}")
+    print("-" * 66)
+
+    for taille in args.tailles:
+        catalogue = {livre["code"]: livre for livre in generer_livres(taille)}
+        codes_ajout = list(catalogue)
+        codes_retrait = list(catalogue)
+        random.Random(1).shuffle(codes_retrait)
+
+        liste = []
+        origine = mesurer(
+            lambda codes: [ajouter_origine(catalogue, liste, code) for code in codes],
+            lambda codes: [supprimer_origine(liste, code) for code in codes],
+            codes_ajout, codes_retrait)
+
+        panier = ListeEmprunt()
+        un_par_un = mesurer(
+            lambda codes: [ajouter_livre_emprunt(catalogue, panier, code) for code in codes],
+            lambda codes: [supprimer_livre_emprunt(panier, code) for code in codes],
+            codes_ajout, codes_retrait)
+
+        panier = ListeEmprunt()
+        par_lots = mesurer(
+            lambda codes: ajouter_livres_emprunt(catalogue, panier, codes),
+            lambda codes: supprimer_livres_emprunt(panier, codes),
+            codes_ajout, codes_retrait)
+
+        print(f"{taille:>7} | {origine:>12.2f} | {un_par_un:>14.2f} | {par_lots:>13.2f} | "
+              f"{origine / par_lots:>6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Benchmark du mode par lots : rejoue une journée de commandes synthétiques
+sur un catalogue synthétique (catalogue chargé une seule fois).
+
+Usage :
+    python -m benchmarks.bench_lot [--livres 100000] [--commandes 50000] [--limite 20]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from batch import SessionLot, executer_lot
+from benchmarks.synthetique import generer_commandes_lot, generer_livres
+from catalogue import Catalogue
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--livres", type=int, default=100_000)
+    parser.add_argument("--commandes", type=int, default=50_000)
+    parser.add_argument("--limite", type=int, default=20, help="livres écrits par recherche")
+    args = parser.parse_args()
+
+    catalogue = Catalogue(generer_livres(args.livres))
+    commandes = generer_commandes_lot(args.commandes, args.livres)
+
+    with tempfile.TemporaryDirectory() as dossier, open(os.devnull, "w", encoding="utf-8") as sortie:
+        session = SessionLot(catalogue, os.path.join(dossier, "emprunts.dat"), args.limite)
+        debut = time.perf_counter()
+        nombre = executer_lot(session, commandes, sortie)
+        duree = time.perf_counter() - debut
+
+    print(f"{nombre} commandes en {duree:.2f} s : {nombre / duree:.0f} commandes/s")
+
+
+if __name__ == "__main__":
+    main()
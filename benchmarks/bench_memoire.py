@@ -0,0 +1,64 @@
+"""
+Benchmark mémoire des représentations du catalogue : dictionnaire par
+livre, Livre à __slots__ et stockage en colonnes.
+
+La mémoire est mesurée avec tracemalloc après chargement d'un CSV
+synthétique. La part des index (identique pour les trois représentations)
+est mesurée séparément pour isoler le coût des données.
+
+Usage :
+    python -m benchmarks.bench_memoire [--tailles 100000 1000000]
+"""
+
+import argparse
+import gc
+import os
+import tempfile
+import tracemalloc
+
+from benchmarks.synthetique import ecrire_catalogue_csv, generer_livres
+from data import charger_catalogue
+from index import IndexCategories, IndexTitres
+
+
+def memoire_index(catalogue):
+    """Mémoire allouée par des index construits sur le catalogue (en octets)."""
+    tracemalloc.start()
+    titres = IndexTitres()
+    categories = IndexCategories()
+    for code, livre in catalogue.items():
+        titres.ajouter(code, livre["titre"])
+        categories.ajouter(code, livre["categories"])
+    taille, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return taille
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tailles", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'Livres':>10} | {'Stockage':>8} | {'Total (Mo)':>10} | {'Données (Mo)':>12} | {'Octets/livre':>12}")
+    print("-" * 64)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        for taille in args.tailles:
+            path = os.path.join(dossier, f"livres_{taille}.csv")
+            ecrire_catalogue_csv(path, generer_livres(taille))
+
+            for stockage in ("dict", "livre", "colonnes"):
+                gc.collect()
+                tracemalloc.start()
+                catalogue = charger_catalogue(path, stockage=stockage)
+                total, _ = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                donnees = total - memoire_index(catalogue)
+                print(f"{taille:>10} | {stockage:>8} | {total / 2**20:>10.1f} | "
+                      f"{donnees / 2**20:>12.1f} | {donnees / taille:>12.0f}")
+                del catalogue
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark du coût des mesures de performance : temps d'un appel de
+fonctions du catalogue sans instrumentation, avec mesures désactivées
+(fonction d'origine) et avec mesures activées.
+
+Usage :
+    python -m benchmarks.bench_mesures [--livres 100000] [--appels 100000]
+"""
+
+import argparse
+import time
+
+import mesures
+from benchmarks.synthetique import generer_livres
+from cache import cache_recherches
+from catalogue import Catalogue
+from logic import rechercher_par_categorie, rechercher_par_code, rechercher_par_titre
+
+
+def chrono_us(fonction, appels):
+    """Temps moyen d'un appel (en µs)."""
+    debut = time.perf_counter()
+    for _ in range(appels):
+        fonction()
+    return (time.perf_counter() - debut) * 1e6 / appels
+
+
+def instrumentee(fonction, actives, **volume):
+    """La fonction décorée par instrumenter, mesures activées ou non."""
+    avant = mesures.ACTIVES
+    mesures.ACTIVES = actives
+    try:
+        return mesures.instrumenter(f"bench.{fonction.__name__}", **volume)(fonction)
+    finally:
+        mesures.ACTIVES = avant
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--livres", type=int, default=100_000)
+    parser.add_argument("--appels", type=int, default=100_000)
+    args = parser.parse_args()
+    # Mesure des recherches elles-mêmes : pas de cache des résultats
+    cache_recherches.entrees_max = 0
+
+    catalogue = Catalogue(generer_livres(args.livres))
+    code = next(iter(catalogue))
+    categorie = catalogue[code]["categories"][0]
+    cas = (
+        ("rechercher_par_code", rechercher_par_code, (catalogue, code),
+         {"lignes": lambda livre: livre is not None}, args.appels),
+        ("rechercher_par_titre", rechercher_par_titre, (catalogue, "zzz"),
+         {"lignes": len}, args.appels // 10),
+        ("rechercher_par_categorie", rechercher_par_categorie, (catalogue, categorie, "note", 10),
+         {"lignes": len}, args.appels // 10),
+    )
+
+    print(f"{'Fonction':>24} | {'Nue (µs)':>9} | {'Désactivées (µs)':>16} | "
+          f"{'Activées (µs)':>13} | {'Surcoût (µs)':>12}")
+    print("-" * 88)
+    for nom, fonction, arguments, volume, appels in cas:
+        desactivee = instrumentee(fonction, False, **volume)
+        activee = instrumentee(fonction, True, **volume)
+        nue = chrono_us(lambda: fonction(*arguments), appels)
+        sans = chrono_us(lambda: desactivee(*arguments), appels)
+        avec = chrono_us(lambda: activee(*arguments), appels)
+        print(f"{nom:>24} | {nue:>9.3f} | {sans:>16.3f} | {avec:>13.3f} | {avec - nue:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
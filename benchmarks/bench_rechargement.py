@@ -0,0 +1,98 @@
+"""
+Benchmark du rechargement à chaud du catalogue : pour plusieurs tailles de
+catalogue et de différence, compare le rechargement incrémental
+(RechargeurCatalogue) à un rechargement complet du CSV.
+
+Deux sortes de différence :
+- "dispersés" : livres ajoutés, modifiés et supprimés partout dans le fichier
+- "en fin" : livres ajoutés à la fin du fichier
+
+Usage :
+    python -m benchmarks.bench_rechargement [--tailles 10000 100000 1000000] [--diffs 10 1000 10000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.synthetique import ecrire_catalogue_csv, generer_livres
+from data import charger_catalogue
+from rechargement import RechargeurCatalogue
+
+
+def modifier(livres, nombre, alea):
+    """Retourne une copie des livres avec `nombre` changements (1/3 de chaque sorte)."""
+    livres = list(livres)
+    for i in range(nombre):
+        sorte = i % 3
+        position = alea.randrange(len(livres))
+        if sorte == 0:
+            nouveau = dict(livres[position])
+            nouveau["code"] = f"N{i:08d}"
+            livres.insert(position, nouveau)
+        elif sorte == 1:
+            modifie = dict(livres[position])
+            modifie["titre"] += " (réédition)"
+            livres[position] = modifie
+        else:
+            livres.pop(position)
+    return livres
+
+
+def ajouter_en_fin(livres, nombre, alea):
+    """Retourne une copie des livres avec `nombre` nouveaux livres à la fin."""
+    nouveaux = []
+    for i in range(nombre):
+        nouveau = dict(alea.choice(livres))
+        nouveau["code"] = f"N{i:08d}"
+        nouveaux.append(nouveau)
+    return livres + nouveaux
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tailles", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--diffs", type=int, nargs="+", default=[10, 1_000, 10_000])
+    args = parser.parse_args()
+
+    alea = random.Random(3)
+    print(f"{'Livres':>9} | {'Position':>9} | {'Changements':>11} | {'Incrémental (s)':>15} | "
+          f"{'Complet (s)':>11} | {'Gain':>6}")
+    print("-" * 76)
+    with tempfile.TemporaryDirectory() as dossier:
+        path = os.path.join(dossier, "livres.csv")
+        for taille in args.tailles:
+            livres = generer_livres(taille)
+            for nombre in args.diffs:
+                if nombre > taille:
+                    continue
+                for position, changer in (("dispersés", modifier), ("en fin", ajouter_en_fin)):
+                    ecrire_catalogue_csv(path, livres)
+                    catalogue = charger_catalogue(path)
+                    rechargeur = RechargeurCatalogue(catalogue, path)
+
+                    # Date de modification différente même sur un système de
+                    # fichiers à faible résolution
+                    ecrire_catalogue_csv(path, changer(livres, nombre, alea))
+                    infos = os.stat(path)
+                    os.utime(path, ns=(infos.st_atime_ns, infos.st_mtime_ns + 10**9))
+
+                    # Première vérification : le fichier n'est relu qu'une
+                    # fois stable d'une vérification à la suivante
+                    rechargeur.a_change()
+                    debut = time.perf_counter()
+                    diff = rechargeur.recharger()
+                    incremental = time.perf_counter() - debut
+
+                    debut = time.perf_counter()
+                    charger_catalogue(path)
+                    complet = time.perf_counter() - debut
+
+                    print(f"{taille:>9} | {position:>9} | {len(diff):>11} | {incremental:>15.4f} | "
+                          f"{complet:>11.3f} | {complet / incremental:>5.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark du service HTTP/JSON (serveur.py) sur la boucle locale.
+
+Le service tourne dans un processus séparé sur un catalogue synthétique.
+Un générateur de charge ouvre `--connexions` connexions (une borne chacune,
+connexion gardée ouverte) qui rejouent une journée de commandes
+synthétiques. Affiche les latences p50 / p99 et le nombre de requêtes/s.
+
+Usage :
+    python -m benchmarks.bench_serveur [--livres 100000] [--requetes 20000] [--connexions 1,10,50]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+from urllib.parse import quote
+
+from benchmarks.synthetique import generer_commandes_lot, generer_livres
+from catalogue import Catalogue
+
+
+def lancer_service(nb_livres, path_historique, limite, file_port):
+    """Processus du service : catalogue synthétique puis boucle asyncio."""
+    from serveur import ServiceMediatheque, servir
+
+    service = ServiceMediatheque(Catalogue(generer_livres(nb_livres)), path_historique, limite)
+    with open(os.devnull, "w") as nulle, redirect_stdout(nulle):
+        asyncio.run(servir(service, "127.0.0.1", 0, pret=file_port.put))
+
+
+def requete_http(commande, client):
+    """Traduit une commande du mode par lots en (méthode, chemin, corps)."""
+    nom, _, argument = commande.partition(" ")
+    if nom == "code":
+        return "GET", f"/livres/{quote(argument)}", b""
+    if nom in ("titre", "categorie", "categories"):
+        return "GET", f"/livres?{nom}={quote(argument)}", b""
+    if nom == "ajouter":
+        return "POST", f"/clients/{client}/liste", json.dumps({"code": argument}).encode("utf-8")
+    if nom == "retirer":
+        return "DELETE", f"/clients/{client}/liste/{quote(argument)}", b""
+    if nom == "liste":
+        return "GET", f"/clients/{client}/liste", b""
+    return "POST", f"/clients/{client}/valider", b""
+
+
+async def borne(port, client, commandes, latences):
+    """Une connexion : envoie les requêtes l'une après l'autre et mesure chaque réponse."""
+    lecteur, ecrivain = await asyncio.open_connection("127.0.0.1", port)
+    for commande in commandes:
+        methode, chemin, corps = requete_http(commande, client)
+        debut = time.perf_counter()
+        ecrivain.write(
+            f"{methode} {chemin} HTTP/1.1\r\nHost: localhost\r\n"
+            f"Content-Length: {len(corps)}\r\n\r\n".encode("latin-1") + corps
+        )
+        statut = await lecteur.readline()
+        longueur = 0
+        while True:
+            entete = await lecteur.readline()
+            if entete in (b"\r\n", b""):
+                break
+            if entete.lower().startswith(b"content-length:"):
+                longueur = int(entete.split(b":", 1)[1])
+        await lecteur.readexactly(longueur)
+        latences.append(time.perf_counter() - debut)
+        if not statut.startswith(b"HTTP/1.1 200"):
+            raise RuntimeError(f"{commande!r} : {statut.decode().strip()}")
+    ecrivain.close()
+
+
+async def generer_charge(port, commandes, connexions):
+    latences = []
+    parts = [commandes[i::connexions] for i in range(connexions)]
+    debut = time.perf_counter()
+    await asyncio.gather(*(borne(port, f"borne{i}", part, latences) for i, part in enumerate(parts)))
+    return latences, time.perf_counter() - debut
+
+
+def centile(valeurs_triees, p):
+    return valeurs_triees[min(len(valeurs_triees) - 1, int(len(valeurs_triees) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--livres", type=int, default=100_000)
+    parser.add_argument("--requetes", type=int, default=20_000)
+    parser.add_argument("--connexions", default="1,10,50",
+                        help="nombres de connexions simultanées, séparés par des virgules")
+    parser.add_argument("--limite", type=int, default=20, help="livres renvoyés par recherche")
+    args = parser.parse_args()
+
+    commandes = generer_commandes_lot(args.requetes, args.livres)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        file_port = multiprocessing.Queue()
+        service = multiprocessing.Process(
+            target=lancer_service,
+            args=(args.livres, os.path.join(dossier, "emprunts.dat"), args.limite, file_port),
+            daemon=True,
+        )
+        service.start()
+        port = file_port.get(timeout=300)
+
+        print(f"{'Connexions':>10} | {'Requêtes':>8} | {'p50 (ms)':>9} | {'p99 (ms)':>9} | {'Requêtes/s':>10}")
+        print("-" * 58)
+        try:
+            for connexions in [int(n) for n in args.connexions.split(",")]:
+                latences, duree = asyncio.run(generer_charge(port, commandes, connexions))
+                latences.sort()
+                print(f"{connexions:>10} | {len(latences):>8} | {centile(latences, 50) * 1000:>9.3f} | "
+                      f"{centile(latences, 99) * 1000:>9.3f} | {len(latences) / duree:>10.0f}")
+        finally:
+            service.terminate()
+            service.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Benchmark du stockage SQLite (base_sqlite.py) contre les fichiers : temps
+d'ouverture du catalogue (CSV, instantané, base), taille sur disque, puis
+temps des recherches et des lectures de l'historique.
+
+Avec les fichiers, tout le catalogue est chargé en mémoire à l'ouverture
+et les recherches se font dans les index en mémoire ; avec la base,
+l'ouverture ne lit rien et chaque recherche est une requête SQL. La
+colonne « Import » est la création de la base à partir des livres (une
+seule fois).
+
+Usage :
+    python -m benchmarks.bench_sqlite [--tailles 10000 100000] [--emprunts 100000] [--requetes 300]
+"""
+
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+from itertools import islice
+
+from base_sqlite import CatalogueSQLite, HistoriqueSQLite, fichiers_base
+from benchmarks.synthetique import (
+    CATEGORIES,
+    ecrire_catalogue_csv,
+    generer_livres,
+    generer_requetes_approchees,
+    iterer_emprunts,
+)
+from cache import cache_recherches
+from data import charger_catalogue, charger_instantane, sauvegarder_instantane
+from historique import HistoriqueEmprunts
+from logic import (
+    completer,
+    rechercher_approximative,
+    rechercher_par_auteur,
+    rechercher_par_categorie,
+    rechercher_par_code,
+    rechercher_par_titre,
+)
+
+
+def chrono(fonction, *args):
+    """Durée (s) de fonction(*args) et son résultat."""
+    gc.collect()
+    debut = time.perf_counter()
+    resultat = fonction(*args)
+    return time.perf_counter() - debut, resultat
+
+
+def chrono_us(fonction, elements):
+    """
+    Temps moyen (en µs) de fonction(element), après un premier appel non
+    mesuré (index construits à la première recherche, vocabulaire lu).
+    """
+    fonction(elements[0])
+    debut = time.perf_counter()
+    for element in elements:
+        fonction(element)
+    return (time.perf_counter() - debut) * 1e6 / len(elements)
+
+
+def cas_catalogue(livres, nombre, graine=4):
+    """Recherches mesurées : (nom, requêtes, fonction(catalogue, requête))."""
+    alea = random.Random(graine)
+    tires = alea.choices(livres, k=nombre)
+    return (
+        ("code", [l["code"] for l in tires], rechercher_par_code),
+        ("titre", [l["titre"].split()[-1] for l in tires], lambda c, t: rechercher_par_titre(c, t, None, 50)),
+        ("catégorie top 10", alea.choices(CATEGORIES, k=nombre),
+         lambda c, cat: rechercher_par_categorie(c, cat, "note", 10)),
+        ("auteur", [l["auteur"] for l in tires], lambda c, nom: rechercher_par_auteur(c, nom, None, 50)),
+        ("approchée", generer_requetes_approchees(nombre, livres), rechercher_approximative),
+        ("complétion", [l["titre"][:2] for l in tires], lambda c, p: completer(c, p, "titre")),
+    )
+
+
+def cas_historique(historique, nombre, nb_livres, graine=6):
+    """Lectures mesurées de l'historique : (nom, requêtes, fonction(historique, requête))."""
+    alea = random.Random(graine)
+    debut, fin = historique.dates_extremes()
+    jours = max(1, (fin - debut).days)
+    periodes = []
+    for _ in range(nombre):
+        jour = (debut + (fin - debut) * alea.random()).date()
+        periodes.append((jour, jour))
+    largeur = max(2, len(str(nb_livres)))
+    codes = [f"L{alea.randint(1, nb_livres):0{largeur}d}" for _ in range(nombre)]
+    return jours, (
+        ("dernière page", [None] * nombre, lambda h, _: list(islice(h.parcourir_inverse(), 10))),
+        ("journée", periodes, lambda h, p: list(h.entre(*p))),
+        ("emprunts d'un livre", codes, lambda h, code: list(h.emprunts_du_livre(code))),
+        ("plus empruntés", [10] * nombre, lambda h, n: h.index_codes.plus_empruntes(n)),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tailles", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--emprunts", type=int, default=100_000)
+    parser.add_argument("--requetes", type=int, default=300)
+    args = parser.parse_args()
+    # Mesure des recherches elles-mêmes : pas de cache des résultats
+    cache_recherches.entrees_max = 0
+
+    with tempfile.TemporaryDirectory() as dossier:
+        path_csv = os.path.join(dossier, "livres.csv")
+        path_cache = os.path.join(dossier, "livres.cache")
+        path_base = os.path.join(dossier, "mediatheque.db")
+
+        print(f"{'Livres':>9} | {'CSV (s)':>8} | {'Instantané (s)':>14} | {'Import (s)':>10} | "
+              f"{'Base (ms)':>9} | {'CSV (Mo)':>8} | {'Instantané (Mo)':>15} | {'Base (Mo)':>9}")
+        print("-" * 104)
+        mesures = []
+        for taille in args.tailles:
+            livres = generer_livres(taille)
+            ecrire_catalogue_csv(path_csv, livres)
+            for path in fichiers_base(path_base):
+                if os.path.exists(path):
+                    os.remove(path)
+
+            duree_csv, catalogue = chrono(charger_catalogue, path_csv)
+            sauvegarder_instantane(catalogue, path_csv, path_cache)
+            del catalogue
+            duree_instantane, catalogue = chrono(charger_instantane, path_csv, path_cache)
+
+            base = CatalogueSQLite(path_base)
+            duree_import, _ = chrono(base.importer, livres)
+            base.fermer()
+            # Ouverture et première lecture (nombre de livres)
+            duree_base, base = chrono(lambda: CatalogueSQLite(path_base))
+            duree_base += chrono(len, base)[0]
+
+            print(f"{taille:>9} | {duree_csv:>8.2f} | {duree_instantane:>14.2f} | {duree_import:>10.2f} | "
+                  f"{duree_base * 1000:>9.1f} | {os.path.getsize(path_csv) / 2**20:>8.1f} | "
+                  f"{os.path.getsize(path_cache) / 2**20:>15.1f} | {os.path.getsize(path_base) / 2**20:>9.1f}")
+            mesures.append((taille, catalogue, base, cas_catalogue(livres, args.requetes)))
+            del livres
+
+        print(f"\n{'Livres':>9} | {'Recherche':>16} | {'Mémoire (µs)':>12} | {'SQLite (µs)':>11} | {'Rapport':>7}")
+        print("-" * 68)
+        for taille, catalogue, base, cas in mesures:
+            for nom, requetes, fonction in cas:
+                en_memoire = chrono_us(lambda r: fonction(catalogue, r), requetes)
+                en_base = chrono_us(lambda r: fonction(base, r), requetes)
+                print(f"{taille:>9} | {nom:>16} | {en_memoire:>12.1f} | {en_base:>11.1f} | "
+                      f"{en_base / en_memoire:>6.3g}x")
+            base.fermer()
+        del mesures
+
+        # Historique : mêmes emprunts dans les deux stockages
+        taille = args.tailles[-1]
+        fichier = HistoriqueEmprunts(os.path.join(dossier, "emprunts.dat"), partage=False)
+        duree_fichier, _ = chrono(fichier.ajouter_lot, iterer_emprunts(args.emprunts, taille))
+        base = HistoriqueSQLite(path_base)
+        duree_base, _ = chrono(base.importer, iterer_emprunts(args.emprunts, taille))
+        jours, cas = cas_historique(fichier, args.requetes, taille)
+        print(f"\n{args.emprunts} emprunts sur {jours} jours : écriture {duree_fichier:.2f} s (fichier), "
+              f"{duree_base:.2f} s (base)\n")
+        print(f"{'Lecture':>20} | {'Fichier (µs)':>12} | {'SQLite (µs)':>11} | {'Rapport':>7}")
+        print("-" * 60)
+        for nom, requetes, fonction in cas:
+            en_fichier = chrono_us(lambda r: fonction(fichier, r), requetes)
+            en_base = chrono_us(lambda r: fonction(base, r), requetes)
+            print(f"{nom:>20} | {en_fichier:>12.1f} | {en_base:>11.1f} | {en_base / en_fichier:>6.3g}x")
+        fichier.fermer()
+        base.fermer()
+
+
+if __name__ == "__main__":
+    main()
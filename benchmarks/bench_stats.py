@@ -0,0 +1,86 @@
+"""
+Benchmark des statistiques d'emprunts : temps de construction de l'index
+inversé puis temps de chaque requête de tableau de bord.
+
+Mesure aussi le coût d'un ajout d'emprunt quand l'index inversé est chargé
+(tenu à jour, et sauvegardé de temps en temps, à chaque ajout).
+
+Usage :
+    python -m benchmarks.bench_stats [--emprunts 1000000] [--livres 100000] [--ajouts 10000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetique import generer_emprunts, generer_livres
+from catalogue import Catalogue
+from historique import HistoriqueEmprunts
+from stats import StatistiquesEmprunts
+
+
+def chrono_ms(fonction, repetitions=100):
+    """Temps moyen d'un appel (en ms)."""
+    debut = time.perf_counter()
+    for _ in range(repetitions):
+        fonction()
+    return (time.perf_counter() - debut) * 1000 / repetitions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--emprunts", type=int, default=1_000_000)
+    parser.add_argument("--livres", type=int, default=100_000)
+    parser.add_argument("--ajouts", type=int, default=10_000,
+                        help="emprunts ajoutés un par un, index inversé chargé")
+    args = parser.parse_args()
+
+    catalogue = Catalogue(generer_livres(args.livres))
+    emprunts = generer_emprunts(args.emprunts, args.livres)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        path = os.path.join(dossier, "emprunts.dat")
+        historique = HistoriqueEmprunts(path)
+        historique.ajouter_lot(emprunts)
+
+        debut = time.perf_counter()
+        stats = StatistiquesEmprunts(historique, catalogue)
+        stats.livres_plus_empruntes()
+        stats.categories_plus_empruntees()
+        print(f"Construction de l'index inversé : {time.perf_counter() - debut:.2f} s")
+
+        # Réouverture : l'index inversé est relu depuis sa sauvegarde
+        historique.fermer()
+        debut = time.perf_counter()
+        historique = HistoriqueEmprunts(path)
+        stats = StatistiquesEmprunts(historique, catalogue)
+        stats.livres_plus_empruntes()
+        print(f"Réouverture (index sauvegardé)  : {time.perf_counter() - debut:.2f} s")
+        stats.categories_plus_empruntees()
+
+        ajouts = generer_emprunts(args.ajouts, args.livres)
+        debut = time.perf_counter()
+        for moment, codes in ajouts:
+            historique.ajouter(codes, moment)
+        duree = time.perf_counter() - debut
+        print(f"Ajouts un par un (index chargé) : {duree * 1e6 / len(ajouts):.1f} µs/emprunt")
+
+        code = emprunts[0][1][0]
+        mois = emprunts[len(emprunts) // 2][0].date().replace(day=1)
+
+        print(f"\n{'Requête':<32} | {'ms':>8}")
+        print("-" * 43)
+        for nom, fonction in (
+            ("top 10 livres", lambda: stats.livres_plus_empruntes(10)),
+            ("top 10 catégories", lambda: stats.categories_plus_empruntees(10)),
+            ("emprunts d'un livre (compte)", lambda: stats.nombre_emprunts_livre(code)),
+            ("emprunts par jour (un mois)", lambda: stats.emprunts_par_jour(mois, mois.replace(day=28))),
+            ("emprunts par mois (tout)", lambda: stats.emprunts_par_mois()),
+        ):
+            print(f"{nom:<32} | {chrono_ms(fonction):>8.4f}")
+        historique.fermer()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark de la recherche par titre : parcours linéaire du catalogue
+comparé à l'index de trigrammes.
+
+Usage :
+    python -m benchmarks.bench_titre [--tailles 10000 100000 1000000] [--requetes 200]
+"""
+
+import argparse
+import time
+
+from benchmarks.synthetique import generer_livres, generer_requetes_titre
+from cache import cache_recherches
+from catalogue import Catalogue
+from logic import rechercher_par_titre
+
+
+def mesurer(fonction, requetes):
+    """Exécute toutes les requêtes et retourne le temps moyen par requête (en ms)."""
+    debut = time.perf_counter()
+    for requete in requetes:
+        fonction(requete)
+    return (time.perf_counter() - debut) * 1000 / len(requetes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tailles", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--requetes", type=int, default=200)
+    args = parser.parse_args()
+    # Mesure des recherches elles-mêmes : pas de cache des résultats
+    cache_recherches.entrees_max = 0
+
+    requetes = generer_requetes_titre(args.requetes)
+
+    print(f"{'Livres':>10} | {'Index (s)':>9} | {'Scan (ms)':>9} | {'Index (ms)':>10} | {'Gain':>6}")
+    print("-" * 56)
+
+    for taille in args.tailles:
+        livres = generer_livres(taille)
+        simple = {livre["code"]: livre for livre in livres}
+
+        debut = time.perf_counter()
+        indexe = Catalogue(livres)
+        construction = time.perf_counter() - debut
+
+        # Les deux versions doivent renvoyer exactement les mêmes livres
+        for requete in requetes[:20]:
+            assert rechercher_par_titre(simple, requete) == rechercher_par_titre(indexe, requete)
+
+        scan = mesurer(lambda r: rechercher_par_titre(simple, r), requetes)
+        index = mesurer(lambda r: rechercher_par_titre(indexe, r), requetes)
+
+        print(f"{taille:>10} | {construction:>9.2f} | {scan:>9.3f} | {index:>10.3f} | {scan / index:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark des meilleurs livres d'une recherche par note : tri complet de la
+liste des résultats, sélection par tas sur les résultats produits au fur et
+à mesure, et ordre par note de l'index de catégories.
+
+Deux sortes de requêtes :
+- "simple" : une catégorie
+- "large" : OU de cinq catégories (la majorité du catalogue, comme
+  "classique" sur le vrai fonds)
+
+Usage :
+    python -m benchmarks.bench_tri [--tailles 10000 100000 1000000] [--requetes 50] [--k 10]
+"""
+
+import argparse
+import heapq
+import random
+import time
+
+from benchmarks.synthetique import CATEGORIES, generer_livres
+from catalogue import Catalogue
+from logic import iterer_par_categories, rechercher_par_categories
+
+
+def mesurer(fonction, requetes):
+    """Exécute toutes les requêtes et retourne le temps moyen par requête (en ms)."""
+    debut = time.perf_counter()
+    for requete in requetes:
+        fonction(requete)
+    return (time.perf_counter() - debut) * 1000 / len(requetes)
+
+
+def generer_requetes(nombre, taille_ou, graine=13):
+    """Génère des requêtes "a OU b OU ..." de `taille_ou` catégories."""
+    alea = random.Random(graine)
+    return [" OU ".join(alea.sample(CATEGORIES, taille_ou)) for _ in range(nombre)]
+
+
+def cle_note(livre):
+    return -livre["note"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tailles", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--requetes", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+    k = args.k
+
+    print(f"{'Livres':>10} | {'Requête':>7} | {'Résultats':>9} | {'Tri complet (ms)':>16} | "
+          f"{'Tas (ms)':>8} | {'Index (ms)':>10} | {'Ordre (ms)':>10} | {'Gain':>6}")
+    print("-" * 98)
+
+    for taille in args.tailles:
+        indexe = Catalogue(generer_livres(taille))
+
+        # Construction de l'ordre par note (faite une fois, à la première
+        # requête par note d'un gros résultat)
+        debut = time.perf_counter()
+        indexe.index_categories._ordre_notes()
+        ordre = (time.perf_counter() - debut) * 1000
+
+        for nom, taille_ou in (("simple", 1), ("large", 5)):
+            requetes = generer_requetes(args.requetes, taille_ou)
+            resultats = len(rechercher_par_categories(indexe, requetes[0]))
+
+            complet = mesurer(
+                lambda r: sorted(rechercher_par_categories(indexe, r), key=cle_note)[:k], requetes)
+            tas = mesurer(
+                lambda r: heapq.nsmallest(k, iterer_par_categories(indexe, r), key=cle_note), requetes)
+            index = mesurer(lambda r: rechercher_par_categories(indexe, r, "note", k), requetes)
+
+            print(f"{taille:>10} | {nom:>7} | {resultats:>9} | {complet:>16.3f} | {tas:>8.3f} | "
+                  f"{index:>10.3f} | {ordre:>10.1f} | {complet / index:>5.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Suite de benchmarks reproductible : chargement du catalogue, chaque type
+de recherche, liste d'emprunt, validation et historique, sur un catalogue
+et un historique synthétiques (graines fixes), comparés à une référence
+enregistrée.
+
+Chaque scénario est exécuté plusieurs fois ; on garde le temps le plus
+court par opération. Un scénario plus lent que sa référence de plus de son
+seuil (SEUIL_REGRESSION, ou SEUILS pour les scénarios plus variables, et
+d'au moins ECART_MINIMAL_MS) est signalé comme régression, et le script
+se termine alors avec le code 1.
+
+La référence (benchmarks/reference.json) dépend de la machine : la
+réenregistrer avec --enregistrer après un changement de machine, ou
+après une amélioration voulue.
+
+Usage :
+    python -m benchmarks.suite [--livres 100000] [--emprunts 100000] [--repetitions 3]
+    python -m benchmarks.suite --enregistrer
+    python -m benchmarks.suite --scenarios recherche_titre recherche_approchee
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+
+from benchmarks.synthetique import (
+    CATEGORIES,
+    ecrire_catalogue_csv,
+    ecrire_historique_texte,
+    generer_livres,
+    generer_requetes_approchees,
+    generer_requetes_titre,
+    iterer_emprunts,
+)
+from cache import cache_recherches
+from data import (
+    charger_catalogue,
+    charger_catalogue_rapide,
+    fermer_historiques,
+    ouvrir_disponibilites,
+    ouvrir_historique,
+)
+from historique import migrer_historique_texte
+from logic import (
+    ListeEmprunt,
+    ajouter_livres_emprunt,
+    rechercher_approximative,
+    rechercher_par_auteur,
+    rechercher_par_categorie,
+    rechercher_par_categories,
+    rechercher_par_code,
+    rechercher_par_titre,
+    supprimer_livres_emprunt,
+    valider_emprunt,
+)
+from ui import afficher_emprunt, page_historique
+
+
+# Référence enregistrée (à côté de ce fichier)
+REFERENCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reference.json")
+
+# Ralentissement toléré par rapport à la référence (0.25 : 25 %)
+SEUIL_REGRESSION = 0.25
+
+# Seuils des scénarios plus sensibles aux écritures disque ou aux caches
+SEUILS = {
+    "validation": 0.50,
+    "historique_import": 0.50,
+    "historique_affichage": 0.50,
+}
+
+# Ralentissement (ms par opération) en dessous duquel il n'y a jamais
+# régression : bruit de mesure des opérations de l'ordre de la microseconde
+ECART_MINIMAL_MS = 0.001
+
+# Nombre de requêtes des scénarios de recherche
+NB_REQUETES = 200
+
+# Nombre de livres ajoutés puis retirés de la liste d'emprunt
+TAILLE_LISTE = 1000
+
+# Nombre d'emprunts validés (3 livres chacun) et de pages d'historique affichées
+NB_VALIDATIONS = 200
+NB_PAGES = 20
+
+
+class Contexte:
+    """Données partagées par les scénarios (fichiers, catalogue, requêtes)."""
+
+    def __init__(self, dossier, livres, emprunts):
+        self.dossier = dossier
+        self.nb_livres = livres
+        self.nb_emprunts = emprunts
+        self.path_csv = os.path.join(dossier, "livres.csv")
+        self.path_cache = os.path.join(dossier, "livres.cache")
+        self.path_texte = os.path.join(dossier, "emprunts.txt")
+
+        livres = generer_livres(livres)
+        ecrire_catalogue_csv(self.path_csv, livres)
+        ecrire_historique_texte(self.path_texte, iterer_emprunts(emprunts, len(livres)))
+        self.catalogue = charger_catalogue(self.path_csv)
+
+        self.codes = [livre["code"] for livre in livres[:: max(1, len(livres) // NB_REQUETES)]]
+        self.titres = generer_requetes_titre(NB_REQUETES)
+        self.categories = [CATEGORIES[i % len(CATEGORIES)] for i in range(NB_REQUETES)]
+        self.requetes_categories = [
+            f"{CATEGORIES[i % 16]} ET {CATEGORIES[(i + 3) % 16]} SAUF {CATEGORIES[(i + 7) % 16]}"
+            for i in range(NB_REQUETES)
+        ]
+        self.approchees = generer_requetes_approchees(NB_REQUETES, livres)
+        self.auteurs = [livre["auteur"] for livre in livres[:: max(1, len(livres) // NB_REQUETES)]]
+        self.codes_liste = [livre["code"] for livre in livres[:TAILLE_LISTE]]
+
+        self._numero = 0
+
+    def chemin(self, nom):
+        """Chemin d'un nouveau fichier du dossier (un par exécution de scénario)."""
+        self._numero += 1
+        return os.path.join(self.dossier, f"{self._numero}-{nom}")
+
+
+def chronometrer(fonction, elements):
+    """Applique `fonction` à chaque élément ; retourne (opérations, secondes)."""
+    debut = time.perf_counter()
+    for element in elements:
+        fonction(element)
+    return len(elements), time.perf_counter() - debut
+
+
+# -------------------- SCÉNARIOS --------------------
+# Chaque scénario retourne (nombre d'opérations, durée en secondes)
+
+def chargement_csv(ctx):
+    debut = time.perf_counter()
+    charger_catalogue(ctx.path_csv)
+    return 1, time.perf_counter() - debut
+
+
+def chargement_instantane(ctx):
+    if not os.path.exists(ctx.path_cache):
+        charger_catalogue_rapide(ctx.path_csv, ctx.path_cache)
+    debut = time.perf_counter()
+    charger_catalogue_rapide(ctx.path_csv, ctx.path_cache)
+    return 1, time.perf_counter() - debut
+
+
+def recherche_code(ctx):
+    return chronometrer(lambda code: rechercher_par_code(ctx.catalogue, code), ctx.codes)
+
+
+def recherche_titre(ctx):
+    return chronometrer(lambda texte: rechercher_par_titre(ctx.catalogue, texte), ctx.titres)
+
+
+def recherche_categorie(ctx):
+    return chronometrer(lambda cat: rechercher_par_categorie(ctx.catalogue, cat), ctx.categories)
+
+
+def recherche_meilleures(ctx):
+    return chronometrer(lambda cat: rechercher_par_categorie(ctx.catalogue, cat, "note", 10), ctx.categories)
+
+
+def recherche_categories(ctx):
+    return chronometrer(lambda req: rechercher_par_categories(ctx.catalogue, req), ctx.requetes_categories)
+
+
+def recherche_approchee(ctx):
+    return chronometrer(lambda texte: rechercher_approximative(ctx.catalogue, texte), ctx.approchees)
+
+
+def recherche_auteur(ctx):
+    return chronometrer(lambda nom: rechercher_par_auteur(ctx.catalogue, nom, "note", 10), ctx.auteurs)
+
+
+def liste_emprunt(ctx):
+    liste = ListeEmprunt()
+    debut = time.perf_counter()
+    ajouter_livres_emprunt(ctx.catalogue, liste, ctx.codes_liste)
+    supprimer_livres_emprunt(liste, ctx.codes_liste)
+    return 2 * len(ctx.codes_liste), time.perf_counter() - debut
+
+
+def validation(ctx):
+    path = ctx.chemin("emprunts.dat")
+    liste = ListeEmprunt(disponibilites=ouvrir_disponibilites(path, ctx.chemin("exemplaires.csv")))
+    codes = list(ctx.catalogue)
+    with open(os.devnull, "w", encoding="utf-8") as neant, redirect_stdout(neant):
+        debut = time.perf_counter()
+        for i in range(NB_VALIDATIONS):
+            ajouter_livres_emprunt(ctx.catalogue, liste, codes[3 * i: 3 * i + 3])
+            valider_emprunt(liste, path)
+        # Les emprunts en attente sont écrits à la fermeture
+        fermer_historiques()
+        duree = time.perf_counter() - debut
+    return NB_VALIDATIONS, duree
+
+
+def historique_import(ctx):
+    path = ctx.chemin("emprunts.dat")
+    debut = time.perf_counter()
+    migrer_historique_texte(ctx.path_texte, path)
+    return 1, time.perf_counter() - debut
+
+
+def historique_affichage(ctx):
+    path = ctx.chemin("emprunts.dat")
+    migrer_historique_texte(ctx.path_texte, path)
+    with open(os.devnull, "w", encoding="utf-8") as neant, redirect_stdout(neant):
+        debut = time.perf_counter()
+        historique = ouvrir_historique(path, None)
+        dernier = len(historique) - 1
+        pages = 0
+        while pages < NB_PAGES and dernier >= 0:
+            for numero, record in page_historique(historique, dernier, 10):
+                afficher_emprunt(numero, record, ctx.catalogue)
+            dernier -= 10
+            pages += 1
+        duree = time.perf_counter() - debut
+    fermer_historiques()
+    return max(1, pages), duree
+
+
+SCENARIOS = {
+    "chargement_csv": chargement_csv,
+    "chargement_instantane": chargement_instantane,
+    "recherche_code": recherche_code,
+    "recherche_titre": recherche_titre,
+    "recherche_categorie": recherche_categorie,
+    "recherche_meilleures": recherche_meilleures,
+    "recherche_categories": recherche_categories,
+    "recherche_approchee": recherche_approchee,
+    "recherche_auteur": recherche_auteur,
+    "liste_emprunt": liste_emprunt,
+    "validation": validation,
+    "historique_import": historique_import,
+    "historique_affichage": historique_affichage,
+}
+
+
+# -------------------- RÉFÉRENCE --------------------
+
+def description_machine():
+    return {
+        "python": platform.python_version(),
+        "systeme": platform.system(),
+        "processeur": platform.machine(),
+    }
+
+
+def charger_reference(path):
+    """Référence enregistrée, ou None si le fichier n'existe pas."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as fichier:
+        return json.load(fichier)
+
+
+def enregistrer_reference(path, parametres, resultats):
+    contenu = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "machine": description_machine(),
+        "parametres": parametres,
+        "resultats": resultats,
+    }
+    with open(path, "w", encoding="utf-8") as fichier:
+        json.dump(contenu, fichier, ensure_ascii=False, indent=2)
+        fichier.write("\n")
+
+
+def comparer(nom, mesure, reference):
+    """Retourne (écart relatif ou None, état) d'une mesure par rapport à la référence."""
+    if reference is None:
+        return None, "nouveau"
+    ecart = mesure / reference - 1
+    if ecart > SEUILS.get(nom, SEUIL_REGRESSION) and mesure - reference > ECART_MINIMAL_MS:
+        return ecart, "RÉGRESSION"
+    return ecart, "ok"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--livres", type=int, default=100_000)
+    parser.add_argument("--emprunts", type=int, default=100_000)
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--reference", default=REFERENCE, help="fichier de référence (JSON)")
+    parser.add_argument("--enregistrer", action="store_true",
+                        help="enregistre les mesures comme nouvelle référence")
+    args = parser.parse_args()
+    # Mesure des recherches elles-mêmes : pas de cache des résultats
+    cache_recherches.entrees_max = 0
+
+    parametres = {"livres": args.livres, "emprunts": args.emprunts}
+    reference = None if args.enregistrer else charger_reference(args.reference)
+    if reference is not None:
+        if reference["parametres"] != parametres:
+            print(f"[ATTENTION] Référence mesurée avec {reference['parametres']} : pas de comparaison.")
+            reference = None
+        elif reference["machine"] != description_machine():
+            print(f"[ATTENTION] Référence mesurée sur une autre machine ({reference['machine']}).")
+    references = reference["resultats"] if reference is not None else {}
+
+    print(f"{'Scénario':>21} | {'Opérations':>10} | {'Temps (ms/op)':>13} | "
+          f"{'Référence':>10} | {'Écart':>7} | État")
+    print("-" * 84)
+
+    resultats = {}
+    regressions = []
+    with tempfile.TemporaryDirectory() as dossier:
+        with redirect_stdout(sys.stderr):
+            ctx = Contexte(dossier, args.livres, args.emprunts)
+        for nom in args.scenarios:
+            meilleur = None
+            for _ in range(args.repetitions):
+                operations, duree = SCENARIOS[nom](ctx)
+                par_operation = duree * 1000 / operations
+                if meilleur is None or par_operation < meilleur:
+                    meilleur = par_operation
+            resultats[nom] = meilleur
+
+            ecart, etat = comparer(nom, meilleur, references.get(nom))
+            if etat == "RÉGRESSION":
+                regressions.append(nom)
+            texte_reference = f"{references[nom]:>10.4f}" if nom in references else f"{'-':>10}"
+            texte_ecart = f"{ecart:>+7.0%}" if ecart is not None else f"{'-':>7}"
+            print(f"{nom:>21} | {operations:>10} | {meilleur:>13.4f} | "
+                  f"{texte_reference} | {texte_ecart} | {etat}")
+
+    if args.enregistrer:
+        enregistrer_reference(args.reference, parametres, resultats)
+        print(f"[OK] Référence enregistrée dans {args.reference}.")
+    elif regressions:
+        print(f"[ERREUR] {len(regressions)} régression(s) : {', '.join(regressions)}.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
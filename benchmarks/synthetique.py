@@ -0,0 +1,219 @@
+"""
+Génération de données synthétiques pour les benchmarks.
+
+Les livres générés ont la même forme que ceux produits par
+data.charger_catalogue (dictionnaires avec les clés "code", "titre",
+"auteur", "note", "categories"). La génération est déterministe pour une
+graine donnée.
+
+Lancé directement, le module écrit un catalogue (livres.csv, cp1252) et un
+historique d'emprunts au format texte (emprunts.txt, "date | codes") :
+
+    python -m benchmarks.synthetique --livres 100000 --emprunts 1000000 --dossier donnees
+"""
+
+import argparse
+import csv
+import os
+import random
+import re
+
+
+MOTS_TITRE = [
+    "le", "la", "les", "un", "une", "de", "du", "des", "et", "au",
+    "nuit", "jour", "mer", "ciel", "terre", "feu", "roi", "reine", "prince",
+    "voyage", "secret", "mystère", "histoire", "chemin", "maison", "jardin",
+    "rouge", "noir", "blanc", "bleu", "petit", "grand", "dernier", "premier",
+    "île", "château", "ville", "forêt", "montagne", "rivière", "étoile",
+    "misérables", "étranger", "comte", "condition", "humaine", "fleurs",
+    "mal", "chartreuse", "parme", "horla", "germinal", "bovary", "goriot",
+]
+
+PRENOMS = [
+    "Victor", "Émile", "Gustave", "Honoré", "Albert", "Jules", "Guy",
+    "Alexandre", "Charles", "Marguerite", "George", "Colette", "Simone",
+    "Louis-Ferdinand", "Antoine", "André", "Élie", "Marcel", "Annie",
+]
+
+NOMS = [
+    "Hugo", "Zola", "Flaubert", "Balzac", "Camus", "Verne", "Maupassant",
+    "Dumas", "Baudelaire", "Duras", "Sand", "Beauvoir", "Céline",
+    "Saint-Exupéry", "Malraux", "Wiesel", "Proust", "Ernaux", "Stendhal",
+]
+
+CATEGORIES = [
+    "classique", "roman", "drame", "aventure", "poésie", "philosophie",
+    "jeunesse", "historique", "fantastique", "science-fiction", "critique",
+    "témoignage", "mémoire", "policier", "théâtre", "biographie",
+]
+
+
+def generer_livres(nombre, graine=42):
+    """
+    Génère une liste de `nombre` livres synthétiques.
+
+    Les codes sont de la forme L0000001, uniques et croissants.
+    """
+    alea = random.Random(graine)
+    largeur = max(2, len(str(nombre)))
+    livres = []
+
+    for i in range(1, nombre + 1):
+        titre = " ".join(alea.choice(MOTS_TITRE) for _ in range(alea.randint(2, 6)))
+        auteur = alea.choice(PRENOMS) + " " + alea.choice(NOMS)
+        categories = alea.sample(CATEGORIES, alea.randint(1, 3))
+        livres.append({
+            "code": f"L{i:0{largeur}d}",
+            "titre": titre[0].upper() + titre[1:],
+            "auteur": auteur,
+            "note": round(alea.uniform(0, 5), 1),
+            "categories": categories,
+        })
+
+    return livres
+
+
+def generer_requetes_titre(nombre, graine=7):
+    """Génère des fragments de titres à rechercher (mots isolés et paires de mots)."""
+    alea = random.Random(graine)
+    requetes = []
+    for _ in range(nombre):
+        if alea.random() < 0.5:
+            requetes.append(alea.choice(MOTS_TITRE))
+        else:
+            requetes.append(alea.choice(MOTS_TITRE) + " " + alea.choice(MOTS_TITRE))
+    return requetes
+
+
+def ecrire_catalogue_csv(path, livres):
+    """
+    Écrit des livres dans un fichier CSV au format de livres.csv
+    (en-tête code,titre,auteur,note,categories, encodage cp1252).
+    """
+    with open(path, "w", encoding="cp1252", errors="replace", newline="") as fichier:
+        ecrivain = csv.writer(fichier)
+        ecrivain.writerow(["code", "titre", "auteur", "note", "categories"])
+        for livre in livres:
+            ecrivain.writerow([
+                livre["code"],
+                livre["titre"],
+                livre["auteur"],
+                livre["note"],
+                ";".join(livre["categories"]),
+            ])
+
+
+def iterer_emprunts(nombre, nb_livres, debut=None, graine=11):
+    """
+    Produit `nombre` emprunts (couples (datetime, codes)) dans l'ordre
+    chronologique, portant sur des livres de codes générés par generer_livres.
+    """
+    from datetime import datetime, timedelta
+
+    alea = random.Random(graine)
+    largeur = max(2, len(str(nb_livres)))
+    moment = debut or datetime(2020, 1, 1, 9, 0, 0)
+    for _ in range(nombre):
+        moment += timedelta(seconds=alea.randint(1, 600))
+        codes = [f"L{alea.randint(1, nb_livres):0{largeur}d}" for _ in range(alea.randint(1, 5))]
+        yield moment, codes
+
+
+def generer_emprunts(nombre, nb_livres, debut=None, graine=11):
+    """Comme iterer_emprunts, sous forme de liste."""
+    return list(iterer_emprunts(nombre, nb_livres, debut, graine))
+
+
+def ecrire_historique_texte(path, emprunts):
+    """Écrit des emprunts dans l'ancien format texte "date | code1, code2"."""
+    with open(path, "w", encoding="utf-8") as fichier:
+        for moment, codes in emprunts:
+            fichier.write(moment.strftime("%Y-%m-%d %H:%M:%S") + " | " + ", ".join(codes) + "\n")
+
+
+def generer_commandes_lot(nombre, nb_livres, graine=5):
+    """
+    Génère une journée de commandes pour batch.py : recherches, ajouts,
+    retraits et validations, dans des proportions proches de l'accueil.
+    """
+    alea = random.Random(graine)
+    largeur = max(2, len(str(nb_livres)))
+    commandes = []
+    for _ in range(nombre):
+        tirage = alea.random()
+        code = f"L{alea.randint(1, nb_livres):0{largeur}d}"
+        if tirage < 0.30:
+            commandes.append(f"code {code}")
+        elif tirage < 0.50:
+            commandes.append("titre " + alea.choice(MOTS_TITRE) + " " + alea.choice(MOTS_TITRE))
+        elif tirage < 0.60:
+            commandes.append("categorie " + alea.choice(CATEGORIES))
+        elif tirage < 0.65:
+            a, b = alea.sample(CATEGORIES, 2)
+            commandes.append(f"categories {a} ET {b}")
+        elif tirage < 0.85:
+            commandes.append(f"ajouter {code}")
+        elif tirage < 0.92:
+            commandes.append(f"retirer {code}")
+        else:
+            commandes.append("valider")
+    return commandes
+
+
+def faute_de_frappe(mot, alea):
+    """Retourne le mot avec une faute de frappe (lettre remplacée, oubliée ou ajoutée)."""
+    position = alea.randrange(len(mot))
+    lettre = alea.choice("abcdefghijklmnopqrstuvwxyz")
+    sorte = alea.randrange(3)
+    if sorte == 0:
+        return mot[:position] + lettre + mot[position + 1:]
+    if sorte == 1:
+        return mot[:position] + mot[position + 1:]
+    return mot[:position] + lettre + mot[position:]
+
+
+def generer_requetes_approchees(nombre, livres, graine=9):
+    """
+    Génère des requêtes de recherche approchée à partir de livres tirés au
+    hasard : un à trois mots du titre ou de l'auteur, sans accents une fois
+    sur deux, avec une faute de frappe dans un mot d'au moins 5 lettres une
+    fois sur deux.
+    """
+    from index import replier
+
+    alea = random.Random(graine)
+    requetes = []
+    for _ in range(nombre):
+        livre = alea.choice(livres)
+        mots = re.findall(r"\w+", livre["titre"] + " " + livre["auteur"])
+        mots = alea.sample(mots, min(len(mots), alea.randint(1, 3)))
+        if alea.random() < 0.5:
+            mots = [replier(mot) for mot in mots]
+        longs = [i for i, mot in enumerate(mots) if len(mot) >= 5]
+        if longs and alea.random() < 0.5:
+            i = alea.choice(longs)
+            mots[i] = faute_de_frappe(mots[i], alea)
+        requetes.append(" ".join(mots))
+    return requetes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Écrit un catalogue et un historique d'emprunts synthétiques.")
+    parser.add_argument("--livres", type=int, default=100_000, help="nombre de livres du catalogue")
+    parser.add_argument("--emprunts", type=int, default=100_000, help="nombre d'emprunts de l'historique")
+    parser.add_argument("--dossier", default=".", help="dossier où écrire livres.csv et emprunts.txt")
+    parser.add_argument("--graine", type=int, default=42)
+    args = parser.parse_args()
+
+    os.makedirs(args.dossier, exist_ok=True)
+    path_csv = os.path.join(args.dossier, "livres.csv")
+    path_texte = os.path.join(args.dossier, "emprunts.txt")
+    ecrire_catalogue_csv(path_csv, generer_livres(args.livres, args.graine))
+    # Écrit au fur et à mesure : l'historique n'est jamais entier en mémoire
+    ecrire_historique_texte(path_texte, iterer_emprunts(args.emprunts, args.livres, graine=args.graine))
+    print(f"[OK] {args.livres} livre(s) écrit(s) dans {path_csv}, "
+          f"{args.emprunts} emprunt(s) dans {path_texte}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Cache des résultats de recherche (moins récemment utilisé, LRU).
+
+Les bornes reposent souvent les mêmes recherches par titre, par catégorie
+ou par auteur. Les itérateurs de recherche décorés par en_cache()
+(logic.iterer_par_*, qu'utilisent la console et, via rechercher_par_*, le
+mode par lots et le service) gardent leurs derniers résultats, dans la
+limite de ENTREES_CACHE_RECHERCHES entrées et de MEMOIRE_CACHE_RECHERCHES
+octets : au-delà, les entrées les moins récemment lues sont évincées.
+
+Une entrée est associée à la fonction, à la requête normalisée (casse,
+espaces), aux paramètres tri et limite, et à la génération du catalogue
+(catalogue.generation). Toute modification du catalogue (rechargement,
+ajout, suppression de livre) change sa génération : les entrées déjà en
+cache deviennent inaccessibles et sortent du cache au fil des évictions.
+Un catalogue sans génération (dictionnaire simple) n'est pas mis en cache.
+
+Le cache ne copie pas les livres, il garde des références vers ceux du
+catalogue : la mémoire d'une entrée est estimée d'après la liste des
+résultats et la clé.
+"""
+
+import functools
+import sys
+import threading
+from collections import OrderedDict
+
+from config import CACHE_RECHERCHES, ENTREES_CACHE_RECHERCHES, MEMOIRE_CACHE_RECHERCHES
+
+
+# Mémoire estimée d'une entrée en plus de la liste des résultats (octets) :
+# nœud du dictionnaire ordonné, tuple de la clé
+SURCOUT_ENTREE = 200
+
+# Mémoire d'un élément de plus dans un tuple (un pointeur)
+TAILLE_ELEMENT = sys.getsizeof((None,)) - sys.getsizeof(())
+
+
+class CacheLRU:
+    """
+    Dictionnaire borné en nombre d'entrées et en mémoire, qui évince les
+    entrées les moins récemment lues. Compte les lectures trouvées
+    (`succes`), manquées (`echecs`) et les évictions.
+    """
+
+    def __init__(self, entrees_max=ENTREES_CACHE_RECHERCHES, memoire_max=MEMOIRE_CACHE_RECHERCHES):
+        self.entrees_max = entrees_max
+        self.memoire_max = memoire_max
+        self._entrees = OrderedDict()   # clé -> (valeur, taille estimée)
+        self.memoire = 0
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+        # Les recherches peuvent venir de plusieurs fils (service)
+        self._verrou = threading.Lock()
+
+    def __len__(self):
+        return len(self._entrees)
+
+    def lire(self, cle):
+        """Valeur associée à `cle` (qui devient la plus récente), ou None."""
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is None:
+                self.echecs += 1
+                return None
+            self._entrees.move_to_end(cle)
+            self.succes += 1
+            return entree[0]
+
+    def ecrire(self, cle, valeur, taille):
+        """
+        Associe `valeur` (de `taille` octets estimés) à `cle`, puis évince
+        les entrées les plus anciennes tant que le cache dépasse ses bornes.
+        Une valeur plus grosse que tout le cache n'est pas gardée.
+        """
+        if taille > self.memoire_max or self.entrees_max <= 0:
+            return
+        with self._verrou:
+            ancienne = self._entrees.pop(cle, None)
+            if ancienne is not None:
+                self.memoire -= ancienne[1]
+            self._entrees[cle] = (valeur, taille)
+            self.memoire += taille
+            while len(self._entrees) > self.entrees_max or self.memoire > self.memoire_max:
+                _, (_, taille_evincee) = self._entrees.popitem(last=False)
+                self.memoire -= taille_evincee
+                self.evictions += 1
+
+    def vider(self):
+        """Supprime toutes les entrées (les compteurs sont gardés)."""
+        with self._verrou:
+            self._entrees.clear()
+            self.memoire = 0
+
+    def reinitialiser(self):
+        """Supprime toutes les entrées et remet les compteurs à zéro."""
+        with self._verrou:
+            self._entrees.clear()
+            self.memoire = 0
+            self.succes = self.echecs = self.evictions = 0
+
+    def statistiques(self):
+        """Compteurs et occupation du cache, sous forme de dictionnaire."""
+        with self._verrou:
+            lectures = self.succes + self.echecs
+            return {
+                "entrees": len(self._entrees),
+                "entrees_max": self.entrees_max,
+                "memoire": self.memoire,
+                "memoire_max": self.memoire_max,
+                "succes": self.succes,
+                "echecs": self.echecs,
+                "evictions": self.evictions,
+                "taux_succes": self.succes / lectures if lectures else 0.0,
+            }
+
+
+# Cache partagé par toutes les fonctions de recherche décorées
+cache_recherches = CacheLRU()
+
+
+def _taille_entree(resultats, cle):
+    taille = sys.getsizeof(resultats) + SURCOUT_ENTREE
+    for element in cle:
+        if isinstance(element, str):
+            taille += sys.getsizeof(element)
+    return taille
+
+
+def en_cache(normaliser):
+    """
+    Décorateur des itérateurs de recherche (catalogue, requete, tri=None,
+    limite=None) -> livres : les résultats sont mis dans cache_recherches.
+    `normaliser` transforme la requête en clé (deux requêtes de même clé
+    ont les mêmes résultats).
+
+    Les livres sont toujours produits au fur et à mesure : une recherche
+    absente du cache les transmet pendant qu'elle les trouve, et n'est
+    gardée qu'une fois l'itérateur épuisé (une recherche interrompue n'est
+    pas mise en cache). Les livres ne sont plus accumulés dès que l'entrée
+    dépasserait la mémoire du cache (elle n'y serait pas gardée) : une
+    recherche très large ne coûte pas une copie de tous ses résultats. Si
+    CACHE_RECHERCHES est désactivé, la fonction est retournée telle quelle.
+    """
+    def decorer(fonction):
+        if not CACHE_RECHERCHES:
+            return fonction
+
+        nom = fonction.__name__
+
+        @functools.wraps(fonction)
+        def enveloppe(catalogue, requete, tri=None, limite=None):
+            generation = getattr(catalogue, "generation", None)
+            if generation is None or requete is None or cache_recherches.entrees_max <= 0:
+                yield from fonction(catalogue, requete, tri, limite)
+                return
+
+            cle = (nom, normaliser(requete), tri, limite, generation)
+            resultats = cache_recherches.lire(cle)
+            if resultats is not None:
+                yield from resultats
+                return
+
+            livres = []
+            restants = (cache_recherches.memoire_max - _taille_entree((), cle)) // TAILLE_ELEMENT
+            for livre in fonction(catalogue, requete, tri, limite):
+                if livres is not None:
+                    if len(livres) < restants:
+                        livres.append(livre)
+                    else:
+                        livres = None
+                yield livre
+            if livres is None:
+                return
+            resultats = tuple(livres)
+            cache_recherches.ecrire(cle, resultats, _taille_entree(resultats, cle))
+
+        return enveloppe
+
+    return decorer
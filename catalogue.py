@@ -0,0 +1,365 @@
+"""
+Catalogue de livres indexé.
+
+Le catalogue reste un dictionnaire (code -> livre) : toutes les fonctions
+qui manipulent un dictionnaire simple continuent de fonctionner. Il porte
+en plus des index construits au chargement et tenus à jour à chaque
+ajout / suppression de livre.
+
+Deux représentations plus compactes sont proposées pour les gros
+catalogues :
+- Livre : enregistrement à __slots__ qui remplace le dictionnaire d'un livre
+- CatalogueColonnes : stockage en colonnes parallèles (codes, titres,
+  auteurs, notes) avec les catégories stockées sous forme d'entiers
+"""
+
+import sys
+from array import array
+from collections.abc import Mapping, MutableMapping
+from itertools import count
+
+from index import IndexAuteurs, IndexCategories, IndexCompletion, IndexTermes, IndexTitres
+
+
+# Clés d'un livre, dans l'ordre d'affichage
+CLES_LIVRE = ("code", "titre", "auteur", "note", "categories")
+
+# Numéros de génération, uniques pour tous les catalogues du processus
+_generations = count(1)
+
+
+def nouvelle_generation():
+    """Numéro de génération jamais encore attribué dans ce processus."""
+    return next(_generations)
+
+
+# -------------------- LIVRE COMPACT --------------------
+
+class Livre:
+    """
+    Livre stocké de façon compacte (pas de dictionnaire par instance).
+
+    S'utilise comme un dictionnaire en lecture : livre["titre"],
+    livre.get("note"), "code" in livre, dict(livre)... Les catégories sont
+    un tuple de chaînes en minuscules.
+    """
+
+    __slots__ = CLES_LIVRE
+
+    def __init__(self, code, titre, auteur, note, categories):
+        self.code = code
+        self.titre = titre
+        self.auteur = auteur
+        self.note = note
+        self.categories = tuple(categories)
+
+    @classmethod
+    def depuis(cls, livre):
+        """Construit un Livre à partir d'un dictionnaire (ou d'un autre Livre)."""
+        return cls(livre["code"], livre["titre"], livre["auteur"], livre["note"], livre["categories"])
+
+    def __getitem__(self, cle):
+        if cle not in CLES_LIVRE:
+            raise KeyError(cle)
+        return getattr(self, cle)
+
+    def get(self, cle, defaut=None):
+        if cle not in CLES_LIVRE:
+            return defaut
+        return getattr(self, cle)
+
+    def __contains__(self, cle):
+        return cle in CLES_LIVRE
+
+    def __iter__(self):
+        return iter(CLES_LIVRE)
+
+    def __len__(self):
+        return len(CLES_LIVRE)
+
+    def keys(self):
+        return CLES_LIVRE
+
+    def values(self):
+        return tuple(getattr(self, cle) for cle in CLES_LIVRE)
+
+    def items(self):
+        return tuple((cle, getattr(self, cle)) for cle in CLES_LIVRE)
+
+    def __eq__(self, autre):
+        # Égal à un dictionnaire ayant les mêmes valeurs (catégories en
+        # liste ou en tuple indifféremment)
+        if isinstance(autre, (Livre, Mapping)):
+            return len(autre) == len(CLES_LIVRE) and all(
+                cle in autre and autre[cle] == getattr(self, cle) for cle in CLES_LIVRE[:-1]
+            ) and tuple(autre["categories"]) == self.categories
+        return NotImplemented
+
+    # Comme un dictionnaire, un livre n'est pas hachable
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Livre({self.code!r}, {self.titre!r}, {self.auteur!r}, {self.note!r}, {self.categories!r})"
+
+
+def livre_en_json(livre):
+    """Convertit un livre (dictionnaire ou Livre) en dictionnaire sérialisable."""
+    return {
+        "code": livre["code"],
+        "titre": livre["titre"],
+        "auteur": livre["auteur"],
+        "note": livre["note"],
+        "categories": list(livre["categories"]),
+    }
+
+
+# -------------------- INDEX PARTAGÉS --------------------
+
+class _CatalogueIndexe:
+    """
+    Gestion des index commune aux différentes représentations du catalogue.
+
+    Attributs :
+    - index_titres : index de trigrammes sur les titres
+    - index_termes : index de recherche approchée sur les titres et auteurs
+    - index_categories : index catégorie -> ensemble de livres
+    - index_auteurs : index auteur (nom normalisé) -> livres de l'auteur
+    - index_completion : complétion par préfixe des codes, mots des titres
+      et auteurs ; construit à la première complétion (le chargement n'en
+      paie pas le coût), puis tenu à jour
+
+    `ancien` / `livre` à la désindexation : le livre tel qu'il a été
+    indexé (l'index de complétion ne garde rien par livre).
+
+    `generation` change à chaque ajout, modification ou suppression de
+    livre (et au dépickling) : deux catalogues, ou deux états d'un même
+    catalogue, n'ont jamais la même génération. Les résultats de recherche
+    mis en cache (cache.py) sont associés à la génération du catalogue.
+    """
+
+    def __setstate__(self, etat):
+        self.__dict__.update(etat)
+        # Numéro propre à ce processus : celui de l'état picklé ne l'est pas
+        self.generation = next(_generations)
+
+    def _creer_index(self):
+        self.generation = next(_generations)
+        self.index_titres = IndexTitres()
+        self.index_termes = IndexTermes()
+        self.index_categories = IndexCategories()
+        self.index_auteurs = IndexAuteurs()
+        self._index_completion = None
+
+    @property
+    def index_completion(self):
+        if self._index_completion is None:
+            index = IndexCompletion()
+            for code, livre in self.items():
+                index.ajouter(code, livre["titre"], livre["auteur"])
+            self._index_completion = index
+        return self._index_completion
+
+    def _indexer(self, code, livre, ancien=None):
+        self.index_titres.ajouter(code, livre["titre"])
+        self.index_termes.ajouter(code, livre["titre"], livre["auteur"], livre["note"])
+        self.index_categories.ajouter(code, livre["categories"], livre["note"])
+        self.index_auteurs.ajouter(code, livre["auteur"], livre["note"])
+        self.generation = next(_generations)
+        if self._index_completion is not None:
+            if ancien is not None:
+                self._index_completion.retirer(code, ancien["titre"], ancien["auteur"])
+            self._index_completion.ajouter(code, livre["titre"], livre["auteur"])
+
+    def _desindexer(self, code, livre):
+        self.index_titres.retirer(code)
+        self.index_termes.retirer(code)
+        self.index_categories.retirer(code)
+        self.index_auteurs.retirer(code)
+        self.generation = next(_generations)
+        if self._index_completion is not None:
+            self._index_completion.retirer(code, livre["titre"], livre["auteur"])
+
+    def _vider_index(self):
+        self.index_titres.vider()
+        self.index_termes.vider()
+        self.index_categories.vider()
+        self.index_auteurs.vider()
+        self.generation = next(_generations)
+        self._index_completion = None
+
+
+# -------------------- CATALOGUE (DICTIONNAIRE) --------------------
+
+class Catalogue(_CatalogueIndexe, dict):
+    """
+    Dictionnaire code -> livre accompagné de ses index de recherche.
+
+    Les livres peuvent être des dictionnaires ou des Livre.
+    """
+
+    def __init__(self, livres=()):
+        super().__init__()
+        self._creer_index()
+        for livre in livres:
+            self[livre["code"]] = livre
+
+    def __setitem__(self, code, livre):
+        ancien = self.get(code)
+        super().__setitem__(code, livre)
+        self._indexer(code, livre, ancien)
+
+    def __delitem__(self, code):
+        livre = self[code]
+        super().__delitem__(code)
+        self._desindexer(code, livre)
+
+    def __reduce__(self):
+        # Les index sont sérialisés tels quels : pas de reconstruction au
+        # dépickling (voir l'instantané du catalogue dans data.py)
+        return (_restaurer_catalogue, (self.__class__, list(self.items()), self.__dict__))
+
+    def pop(self, code, *defaut):
+        if code in self:
+            livre = super().pop(code)
+            self._desindexer(code, livre)
+            return livre
+        return super().pop(code, *defaut)
+
+    def popitem(self):
+        code, livre = super().popitem()
+        self._desindexer(code, livre)
+        return code, livre
+
+    def setdefault(self, code, livre=None):
+        if code not in self:
+            self[code] = livre
+        return self[code]
+
+    def update(self, *args, **kwargs):
+        for code, livre in dict(*args, **kwargs).items():
+            self[code] = livre
+
+    def clear(self):
+        super().clear()
+        self._vider_index()
+
+
+def _restaurer_catalogue(cls, elements, etat):
+    """Reconstruit un Catalogue dépicklé sans repasser par __setitem__."""
+    catalogue = cls.__new__(cls)
+    dict.update(catalogue, elements)
+    catalogue.__setstate__(etat)
+    return catalogue
+
+
+# -------------------- CATALOGUE EN COLONNES --------------------
+
+class CatalogueColonnes(_CatalogueIndexe, MutableMapping):
+    """
+    Catalogue stocké en colonnes parallèles.
+
+    - codes, titres, auteurs : listes de chaînes
+    - notes : array de flottants (8 octets par livre)
+    - catégories : chaque combinaison distincte de catégories est stockée
+      une seule fois ; chaque livre ne garde que le numéro (entier) de sa
+      combinaison dans un array
+
+    S'utilise comme le dictionnaire code -> livre habituel : catalogue[code]
+    et catalogue.values() renvoient des Livre construits à la demande.
+    Le catalogue porte les mêmes index que Catalogue.
+    """
+
+    def __init__(self, livres=()):
+        self._lignes = {}          # code -> numéro de ligne (ordre d'insertion)
+        self._codes = []
+        self._titres = []
+        self._auteurs = []
+        self._notes = array("d")
+        self._combinaisons = array("I")
+        self._tables_categories = []   # numéro de combinaison -> tuple de catégories
+        self._numeros_categories = {}  # tuple de catégories -> numéro de combinaison
+        self._lignes_vides = 0
+        self._creer_index()
+        for livre in livres:
+            self[livre["code"]] = livre
+
+    def _numero_combinaison(self, categories):
+        categories = tuple(categories)
+        numero = self._numeros_categories.get(categories)
+        if numero is None:
+            numero = len(self._tables_categories)
+            categories = tuple(sys.intern(c) for c in categories)
+            self._tables_categories.append(categories)
+            self._numeros_categories[categories] = numero
+        return numero
+
+    def _livre(self, ligne):
+        return Livre(
+            self._codes[ligne],
+            self._titres[ligne],
+            self._auteurs[ligne],
+            self._notes[ligne],
+            self._tables_categories[self._combinaisons[ligne]],
+        )
+
+    def __getitem__(self, code):
+        return self._livre(self._lignes[code])
+
+    def __contains__(self, code):
+        return code in self._lignes
+
+    def __iter__(self):
+        return iter(self._lignes)
+
+    def __len__(self):
+        return len(self._lignes)
+
+    def __setitem__(self, code, livre):
+        numero = self._numero_combinaison(livre["categories"])
+        ligne = self._lignes.get(code)
+        ancien = None
+
+        if ligne is None:
+            self._lignes[code] = len(self._codes)
+            self._codes.append(code)
+            self._titres.append(livre["titre"])
+            self._auteurs.append(livre["auteur"])
+            self._notes.append(livre["note"])
+            self._combinaisons.append(numero)
+        else:
+            # Mise à jour sur place : le livre garde sa position
+            ancien = self._livre(ligne)
+            self._titres[ligne] = livre["titre"]
+            self._auteurs[ligne] = livre["auteur"]
+            self._notes[ligne] = livre["note"]
+            self._combinaisons[ligne] = numero
+
+        self._indexer(code, livre, ancien)
+
+    def __delitem__(self, code):
+        ligne = self._lignes.pop(code)
+        livre = self._livre(ligne)
+        # La ligne est vidée (libère les chaînes) puis récupérée au compactage
+        self._codes[ligne] = None
+        self._titres[ligne] = None
+        self._auteurs[ligne] = None
+        self._lignes_vides += 1
+        self._desindexer(code, livre)
+        if self._lignes_vides > len(self._lignes):
+            self.compacter()
+
+    def clear(self):
+        self.__init__()
+
+    def compacter(self):
+        """Supprime les lignes des livres retirés (les index ne changent pas)."""
+        if self._lignes_vides == 0:
+            return
+        lignes = list(self._lignes.values())
+        self._codes = [self._codes[i] for i in lignes]
+        self._titres = [self._titres[i] for i in lignes]
+        self._auteurs = [self._auteurs[i] for i in lignes]
+        self._notes = array("d", (self._notes[i] for i in lignes))
+        self._combinaisons = array("I", (self._combinaisons[i] for i in lignes))
+        self._lignes = {code: i for i, code in enumerate(self._codes)}
+        self._lignes_vides = 0
@@ -5,5 +5,89 @@ Fichier de configuration de l'application.
 # Nom du fichier CSV contenant le catalogue de livres
 CATALOGUE_CSV = "livres.csv"
 
-# Nom du fichier texte qui contiendra l'historique des emprunts
-EMPRUNTS_FILE = "emprunts.txt"
\ No newline at end of file
+# Instantané binaire du catalogue (livres + index), recréé automatiquement
+# quand livres.csv change
+CATALOGUE_CACHE = "livres.cache"
+
+# Ancien historique des emprunts au format texte (importé automatiquement
+# dans l'historique binaire au premier lancement)
+EMPRUNTS_FILE = "emprunts.txt"
+
+# Historique des emprunts au format binaire indexé (l'index est écrit
+# à côté, avec l'extension .idx)
+HISTORIQUE_FILE = "emprunts.dat"
+
+# Stockage du catalogue et de l'historique : "fichiers" (livres.csv et son
+# instantané, emprunts.dat) ou "sqlite" (base BASE_SQLITE, voir
+# base_sqlite.py ; créée au premier lancement à partir des fichiers)
+STOCKAGE = "fichiers"
+BASE_SQLITE = "mediatheque.db"
+
+# Historique partagé par plusieurs bornes (plusieurs processus) : les
+# ajouts se font sous un verrou de fichier (emprunts.dat.lock). Peut être
+# désactivé pour une borne seule sur un système de fichiers sans verrous
+HISTORIQUE_PARTAGE = True
+
+# Écriture groupée des emprunts : nombre maximal d'emprunts en attente,
+# délai maximal (secondes) avant écriture, et synchronisation sur disque
+# (fsync) à chaque écriture
+TAMPON_EMPRUNTS = 64
+DELAI_EMPRUNTS = 1.0
+SYNCHRONISER_EMPRUNTS = False
+
+# Suivi des disponibilités : un livre dont tous les exemplaires sont
+# empruntés ne peut pas être ajouté à une liste d'emprunt tant qu'il n'est
+# pas rendu. Les retours sont enregistrés à côté de l'historique
+# (emprunts.dat.retours)
+SUIVI_DISPONIBILITES = True
+
+# Nombre d'exemplaires de chaque livre (fichier facultatif, lignes
+# "code,exemplaires") et nombre d'exemplaires d'un livre absent du fichier
+EXEMPLAIRES_CSV = "exemplaires.csv"
+EXEMPLAIRES_PAR_DEFAUT = 1
+
+# Adresse et port du service HTTP/JSON (serveur.py)
+HOTE_SERVICE = "127.0.0.1"
+PORT_SERVICE = 8080
+
+# Intervalle (secondes) entre deux vérifications de livres.csv par le
+# service : les livres modifiés sont rechargés à chaud
+DELAI_RECHARGEMENT = 2.0
+
+# Nombre maximal de livres renvoyés par la recherche approchée (titre ou
+# auteur, avec fautes de frappe), du plus pertinent au moins pertinent
+LIMITE_RECHERCHE_APPROCHEE = 20
+
+# Nombre d'emprunts affichés par page dans l'historique
+TAILLE_PAGE_HISTORIQUE = 10
+
+# Complétion de la saisie (codes, mots des titres, auteurs) : nombre de
+# propositions, et complétion dans la console (touche Tab si le module
+# readline est disponible ; une saisie terminée par "?" affiche les
+# propositions)
+LIMITE_COMPLETION = 10
+COMPLETION_CONSOLE = True
+
+# Chargement d'un catalogue réparti en plusieurs fichiers (fusion.py) :
+# nombre de processus d'analyse (None : un par cœur), et livre gardé quand
+# un code est présent dans plusieurs fichiers ("premier" ou "dernier" de
+# la liste des fichiers)
+PROCESSUS_CHARGEMENT = None
+POLITIQUE_DOUBLONS = "premier"
+
+# Cache des résultats de recherche (cache.py) : titre, catégorie, auteur.
+# Les entrées les moins récemment utilisées sont évincées au-delà de
+# ENTREES_CACHE_RECHERCHES entrées ou de MEMOIRE_CACHE_RECHERCHES octets
+# (estimation : les livres eux-mêmes ne sont pas copiés)
+CACHE_RECHERCHES = True
+ENTREES_CACHE_RECHERCHES = 1024
+MEMOIRE_CACHE_RECHERCHES = 32 * 2**20
+
+# Mesures de performance (mesures.py) : nombre d'appels, durées et volume
+# traité des fonctions coûteuses. Désactivées par défaut (aucun coût) ;
+# activables aussi par la variable d'environnement MEDIATHEQUE_MESURES=1.
+# Elles sont écrites à la sortie dans MESURES_FICHIER (extension ajoutée
+# selon le format : "json" -> .json, "prometheus" -> .prom)
+MESURES_ACTIVES = False
+MESURES_FICHIER = "mesures"
+FORMAT_MESURES = "json"
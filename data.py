@@ -1,115 +1,652 @@
 """
 Fonctions liées à la lecture et à l'écriture dans les fichiers :
-- chargement du catalogue depuis le CSV
+- chargement du catalogue depuis le CSV (complet ou par lots)
+- instantané binaire du catalogue pour un démarrage rapide
 - sauvegarde d'un emprunt
-- lecture de l'historique des emprunts
-
-Les livres sont représentés par des dictionnaires.
+- suivi des disponibilités (exemplaires, retours ; voir disponibilites.py)
+- lecture de l'historique des emprunts (stockage binaire indexé, voir historique.py)
+- stockage dans une base SQLite à la place des fichiers (STOCKAGE = "sqlite",
+  voir base_sqlite.py)
+
+Les livres sont représentés par des dictionnaires, regroupés dans un
+catalogue indexé (voir catalogue.py). Des représentations plus compactes
+peuvent être demandées au chargement (paramètre `stockage`).
 """
 
 import csv
+import gc
+import hashlib
+import mmap
 import os
+import pickle
+import struct
+import sys
+import time
 from datetime import datetime
 
-from config import CATALOGUE_CSV, EMPRUNTS_FILE
+try:
+    # Module disponible uniquement sous Unix (mesure de la mémoire maximale)
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    # sqlite3 peut manquer (Python compilé sans SQLite) : stockage "fichiers" seulement
+    from base_sqlite import CatalogueSQLite, HistoriqueSQLite
+except ImportError:
+    CatalogueSQLite = HistoriqueSQLite = None
+
+from catalogue import Catalogue, CatalogueColonnes, Livre
+from config import (
+    BASE_SQLITE,
+    CATALOGUE_CACHE,
+    CATALOGUE_CSV,
+    DELAI_EMPRUNTS,
+    EMPRUNTS_FILE,
+    EXEMPLAIRES_CSV,
+    HISTORIQUE_FILE,
+    HISTORIQUE_PARTAGE,
+    STOCKAGE,
+    SUIVI_DISPONIBILITES,
+    SYNCHRONISER_EMPRUNTS,
+    TAMPON_EMPRUNTS,
+)
+from disponibilites import SuiviDisponibilites, charger_exemplaires
+from historique import EcrivainEmprunts, HistoriqueEmprunts, lire_historique_texte, migrer_historique_texte
+from mesures import instrumenter
+
+
+# Nombre de livres par lot pour le chargement en flux
+TAILLE_LOT = 10_000
+
+
+def memoire_max_octets():
+    """
+    Retourne le pic de mémoire résidente du processus (en octets), ou None
+    si la mesure n'est pas disponible sur ce système.
+    """
+    if resource is None:
+        return None
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en kilo-octets sous Linux, en octets sous macOS
+    return pic if sys.platform == "darwin" else pic * 1024
 
 
-def charger_catalogue(path=CATALOGUE_CSV):
+def analyseur_livres(entetes):
     """
-    Charge le catalogue depuis un fichier CSV.
+    Retourne une fonction qui convertit une ligne du CSV (liste de champs)
+    en dictionnaire de livre, ou en None si la ligne n'a pas de code.
 
-    Retourne un dictionnaire où la clé est le code du livre (en majuscules)
-    et la valeur est un dictionnaire représentant le livre.
+    Les colonnes sont repérées une seule fois à partir de l'en-tête, et les
+    catégories ne sont découpées / mises en minuscules qu'une fois pour
+    chaque valeur distincte de la colonne "categories".
+    """
 
-    Gestion d'erreurs :
-    - si le fichier n'existe pas, on retourne un catalogue vide et on affiche un message d'erreur
-    - si la note est invalide, on met 0.0 par défaut
-    - si des caractères ne sont pas décodables en Windows-1252 (cp1252), ils sont remplacés pour éviter que le programme ne plante
+    # Position de chaque colonne (-1 si absente)
+    positions = {nom.strip(): i for i, nom in enumerate(entetes)}
+    i_code = positions.get("code", -1)
+    i_titre = positions.get("titre", -1)
+    i_auteur = positions.get("auteur", -1)
+    i_note = positions.get("note", -1)
+    i_cats = positions.get("categories", -1)
+
+    # Cache : valeur brute de la colonne "categories" -> tuple normalisé.
+    # Les chaînes de catégories sont ainsi partagées entre tous les livres.
+    cache_categories = {}
+
+    def colonne(ligne, i):
+        return ligne[i] if 0 <= i < len(ligne) else ""
+
+    def analyser(ligne):
+        code = colonne(ligne, i_code).strip().upper()
+        if code == "":
+            return None
+
+        # Conversion de la note en float
+        note_brute = colonne(ligne, i_note).strip()
+        try:
+            note = float(note_brute) if note_brute != "" else 0.0
+        except ValueError:
+            note = 0.0
+
+        # Catégories séparées par ";"
+        categories_brutes = colonne(ligne, i_cats)
+        categories = cache_categories.get(categories_brutes)
+        if categories is None:
+            categories = tuple(
+                sys.intern(c.strip().lower())
+                for c in categories_brutes.split(";")
+                if c.strip() != ""
+            )
+            cache_categories[categories_brutes] = categories
+
+        return {
+            "code": code,
+            "titre": colonne(ligne, i_titre).strip(),
+            "auteur": colonne(ligne, i_auteur).strip(),
+            "note": note,
+            "categories": list(categories),
+        }
+
+    return analyser
+
+
+def iterer_catalogue(path=CATALOGUE_CSV, taille_lot=TAILLE_LOT, stats=None):
     """
+    Lit le catalogue CSV en flux et produit les livres par lots (listes de
+    dictionnaires de `taille_lot` livres au plus).
 
-    catalogue = {}
+    Seul le lot courant est gardé en mémoire : l'appelant peut construire
+    ses index au fur et à mesure sans que le fichier entier soit chargé.
+    Chaque ligne est convertie par analyseur_livres.
+
+    Si `stats` est un dictionnaire, il est rempli à la fin de la lecture :
+    - "lignes" : nombre de livres produits
+    - "duree" : durée de la lecture (secondes)
+    - "lignes_par_seconde"
+    - "memoire_max" : pic de mémoire du processus en octets (None si inconnu)
+
+    Gestion d'erreurs identique à charger_catalogue.
+    """
 
     if not os.path.exists(path):
         print("[ERREUR] Le fichier de catalogue n'existe pas :", path)
-        return catalogue
+        return
+
+    debut = time.perf_counter()
+    nb_lignes = 0
 
     try:
         # errors='replace' pour remplacer les caractères illisibles au lieu de générer une erreur
-        # On utilise cp1252 pour gérer correctement les fichiers avec BOM si ils sont présents
         with open(path, "r", encoding="cp1252", errors="replace", newline="") as fichier:
-            # Utilisation de DictReader pour lire les lignes du fichier CSV en dictionnaires
-            lecteur = csv.DictReader(fichier)
+            lecteur = csv.reader(fichier)
+            entetes = next(lecteur, None)
+            if entetes is None:
+                return
 
+            analyser = analyseur_livres(entetes)
+            lot = []
             for ligne in lecteur:
-                code = ligne.get("code", "").strip().upper()
-                titre = ligne.get("titre", "").strip()
-                auteur = ligne.get("auteur", "").strip()
-
-                # Conversion de la note en float
-                note_brute = ligne.get("note", "").strip()
-                try:
-                    note = float(note_brute) if note_brute != "" else 0.0
-                except ValueError:
-                    note = 0.0
-
-                # Catégories séparées par ";"
-                categories_brutes = ligne.get("categories", "")
-                categories = []
-                for c in categories_brutes.split(";"):
-                    c = c.strip().lower()
-                    if c != "":
-                        categories.append(c)
-
-                if code == "":
+                livre = analyser(ligne)
+                if livre is None:
                     continue
+                lot.append(livre)
+                nb_lignes += 1
 
-                livre = {
-                    "code": code,
-                    "titre": titre,
-                    "auteur": auteur,
-                    "note": note,
-                    "categories": categories,
-                }
+                if len(lot) >= taille_lot:
+                    yield lot
+                    lot = []
 
-                catalogue[code] = livre
+            if lot:
+                yield lot
 
     except Exception as e:
         print("[ERREUR] Problème lors du chargement du catalogue :", e)
 
+    finally:
+        if stats is not None:
+            duree = time.perf_counter() - debut
+            stats["lignes"] = nb_lignes
+            stats["duree"] = duree
+            stats["lignes_par_seconde"] = nb_lignes / duree if duree > 0 else 0.0
+            stats["memoire_max"] = memoire_max_octets()
+
+
+@instrumenter("data.charger_catalogue", lignes=len, octets="path")
+def charger_catalogue(path=CATALOGUE_CSV, stats=None, stockage="dict"):
+    """
+    Charge le catalogue depuis un fichier CSV.
+
+    Retourne un catalogue (dictionnaire) où la clé est le code du livre
+    (en majuscules) et la valeur est un dictionnaire représentant le livre.
+    Les index de recherche sont construits au fur et à mesure du chargement,
+    lot par lot (voir iterer_catalogue, qui remplit aussi `stats`).
+
+    `stockage` choisit la représentation en mémoire :
+    - "dict" (par défaut) : un dictionnaire par livre
+    - "livre" : un Livre (__slots__) par livre
+    - "colonnes" : CatalogueColonnes, stockage en colonnes parallèles
+    Les trois s'utilisent de la même façon (livre["titre"], catalogue.get(code)...).
+
+    Gestion d'erreurs :
+    - si le fichier n'existe pas, on retourne un catalogue vide et on affiche un message d'erreur
+    - si la note est invalide, on met 0.0 par défaut
+    - si des caractères ne sont pas décodables en Windows-1252 (cp1252), ils sont remplacés pour éviter que le programme ne plante
+    """
+
+    if stockage not in ("dict", "livre", "colonnes"):
+        raise ValueError(f"stockage inconnu : {stockage!r}")
+
+    catalogue = CatalogueColonnes() if stockage == "colonnes" else Catalogue()
+    compact = stockage == "livre"
+
+    for lot in iterer_catalogue(path, stats=stats):
+        for livre in lot:
+            if compact:
+                livre = Livre.depuis(livre)
+            catalogue[livre["code"]] = livre
+
     return catalogue
 
 
-def sauvegarder_emprunt(codes_livres, path=EMPRUNTS_FILE):
+# -------------------- INSTANTANÉ DU CATALOGUE --------------------
+
+# Début de tout fichier d'instantané ; à changer si le format évolue
+SIGNATURE_INSTANTANE = b"MEDIACAT\x05"
+
+
+def empreinte_fichier(path):
+    """Calcule l'empreinte (BLAKE2b) du contenu d'un fichier."""
+    empreinte = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fichier:
+        for bloc in iter(lambda: fichier.read(1 << 20), b""):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+
+def _description_source(path):
+    """Taille et date de modification du CSV (clé rapide de l'instantané)."""
+    infos = os.stat(path)
+    return {"taille": infos.st_size, "mtime_ns": infos.st_mtime_ns}
+
+
+def sauvegarder_instantane(catalogue, path_csv=CATALOGUE_CSV, path_cache=CATALOGUE_CACHE, stockage="dict"):
+    """
+    Écrit un instantané binaire du catalogue et de ses index.
+
+    Format du fichier :
+    - signature SIGNATURE_INSTANTANE
+    - longueur (4 octets) puis en-tête picklé : taille, date de modification
+      et empreinte du CSV source, stockage utilisé
+    - catalogue picklé (livres + index, sans reconstruction au chargement)
+
+    L'écriture passe par un fichier temporaire renommé à la fin : un
+    instantané à moitié écrit n'est jamais lu.
+    """
+
+    try:
+        entete = _description_source(path_csv)
+        entete["empreinte"] = empreinte_fichier(path_csv)
+        entete["stockage"] = stockage
+        entete_binaire = pickle.dumps(entete, protocol=pickle.HIGHEST_PROTOCOL)
+
+        temporaire = path_cache + ".tmp"
+        with open(temporaire, "wb") as fichier:
+            fichier.write(SIGNATURE_INSTANTANE)
+            fichier.write(struct.pack("<I", len(entete_binaire)))
+            fichier.write(entete_binaire)
+            pickle.dump(catalogue, fichier, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporaire, path_cache)
+    except Exception as e:
+        print("[ATTENTION] Impossible d'écrire l'instantané du catalogue :", e)
+
+
+def charger_instantane(path_csv=CATALOGUE_CSV, path_cache=CATALOGUE_CACHE, stockage="dict", verifier_empreinte=True):
+    """
+    Charge l'instantané du catalogue s'il correspond encore au CSV.
+
+    L'instantané est valide si la taille du CSV n'a pas changé et :
+    - que sa date de modification est identique (et, si verifier_empreinte,
+      que son empreinte l'est aussi),
+    - ou que sa date a changé mais pas son contenu (même empreinte).
+
+    Le fichier est lu à travers un mmap : le catalogue est dépicklé
+    directement depuis le fichier projeté en mémoire, sans copie
+    intermédiaire de son contenu.
+
+    Retourne le catalogue, ou None si l'instantané est absent, périmé ou
+    illisible. L'instantané doit provenir de l'application elle-même (il
+    est lu avec pickle).
+    """
+
+    if not os.path.exists(path_cache) or not os.path.exists(path_csv):
+        return None
+
+    try:
+        with open(path_cache, "rb") as fichier, \
+                mmap.mmap(fichier.fileno(), 0, access=mmap.ACCESS_READ) as projection:
+            debut = len(SIGNATURE_INSTANTANE)
+            if projection[:debut] != SIGNATURE_INSTANTANE:
+                return None
+
+            (longueur,) = struct.unpack_from("<I", projection, debut)
+            debut += 4
+            entete = pickle.loads(projection[debut:debut + longueur])
+            debut += longueur
+
+            source = _description_source(path_csv)
+            if entete["stockage"] != stockage or entete["taille"] != source["taille"]:
+                return None
+            if entete["mtime_ns"] != source["mtime_ns"] or verifier_empreinte:
+                if entete["empreinte"] != empreinte_fichier(path_csv):
+                    return None
+
+            # Le ramasse-miettes est suspendu pendant le dépickling : sinon il
+            # se déclenche sans cesse sur ces millions de nouveaux objets
+            gc_actif = gc.isenabled()
+            gc.disable()
+            try:
+                with memoryview(projection) as vue:
+                    return pickle.loads(vue[debut:])
+            finally:
+                if gc_actif:
+                    gc.enable()
+
+    except Exception as e:
+        print("[INFO] Instantané du catalogue illisible, rechargement depuis le CSV :", e)
+        return None
+
+
+@instrumenter("data.charger_catalogue_rapide", lignes=len)
+def charger_catalogue_rapide(path=CATALOGUE_CSV, path_cache=CATALOGUE_CACHE, stockage="dict", stats=None):
     """
-    Enregistre un emprunt dans le fichier d'historique.
+    Charge le catalogue depuis son instantané binaire si le CSV n'a pas
+    changé, sinon depuis le CSV (puis réécrit l'instantané).
+
+    Si `stats` est un dictionnaire, "source" y indique d'où vient le
+    catalogue ("instantane", "csv" ou "sqlite").
+
+    Avec STOCKAGE = "sqlite", le catalogue par défaut (CATALOGUE_CSV) est
+    celui de la base (voir ouvrir_catalogue_sqlite) ; un autre fichier est
+    lu comme d'habitude.
+    """
+
+    if _dans_base(path, CATALOGUE_CSV):
+        catalogue = ouvrir_catalogue_sqlite()
+        if catalogue is not None:
+            if stats is not None:
+                stats["source"] = "sqlite"
+            return catalogue
+
+    catalogue = charger_instantane(path, path_cache, stockage)
+    if catalogue is not None:
+        if stats is not None:
+            stats["source"] = "instantane"
+        return catalogue
+
+    if stats is not None:
+        stats["source"] = "csv"
+    catalogue = charger_catalogue(path, stats=stats, stockage=stockage)
+
+    # On ne met pas en cache un catalogue vide (fichier absent ou illisible)
+    if catalogue:
+        sauvegarder_instantane(catalogue, path, path_cache, stockage)
+
+    return catalogue
+
+
+# -------------------- BASE SQLITE --------------------
+
+def _dans_base(path, defaut):
+    """Le fichier `path` est-il remplacé par la base (STOCKAGE = "sqlite") ?"""
+    return STOCKAGE == "sqlite" and path == defaut
+
 
-    Format choisi:
-    - une ligne par emprunt
-    - chaque ligne : date | code1, code2, code3
+def _emprunts_dates(historique):
+    """Emprunts d'un HistoriqueEmprunts sous forme de couples (datetime, codes)."""
+    for emprunt in historique:
+        yield datetime.strptime(emprunt["datetime"], "%Y-%m-%d %H:%M:%S"), emprunt["codes"]
 
-    Exemple :
+
+def _copier_historique(path, destination):
+    """Copie l'historique binaire `path` dans `destination` ; retourne le nombre d'emprunts."""
+    source = HistoriqueEmprunts(path, partage=False)
+    try:
+        if isinstance(destination, HistoriqueSQLite):
+            return destination.importer(_emprunts_dates(source))
+        emprunts = list(_emprunts_dates(source))
+        if emprunts:
+            destination.ajouter_lot(emprunts)
+        return len(emprunts)
+    finally:
+        source.fermer()
+
+
+def importer_base_sqlite(path_base=BASE_SQLITE, path=CATALOGUE_CSV, path_historique=HISTORIQUE_FILE,
+                         path_texte=EMPRUNTS_FILE):
+    """
+    Crée la base SQLite `path_base` à partir des fichiers : catalogue CSV,
+    historique binaire (à défaut, ancien historique texte) et journal des
+    retours. Les fichiers absents sont ignorés ; ils ne sont pas modifiés.
+
+    La base est construite dans un fichier temporaire puis renommée : une
+    base à moitié importée n'est jamais ouverte. Les retours restent dans
+    un journal à côté de la base (path_base + ".retours").
+
+    Lève FileExistsError si la base existe déjà. Retourne le nombre de
+    livres, d'emprunts et de retours importés.
+    """
+    if CatalogueSQLite is None:
+        raise OSError("module sqlite3 indisponible")
+    if os.path.exists(path_base):
+        raise FileExistsError(path_base)
+
+    temporaire = f"{path_base}.{os.getpid()}.tmp"
+    livres = emprunts = 0
+    try:
+        catalogue = CatalogueSQLite(temporaire)
+        historique = HistoriqueSQLite(temporaire, partage=False)
+        try:
+            if os.path.exists(path):
+                livres = catalogue.importer(livre for lot in iterer_catalogue(path) for livre in lot)
+            if os.path.exists(path_historique):
+                emprunts = _copier_historique(path_historique, historique)
+            elif path_texte is not None and os.path.exists(path_texte):
+                emprunts = historique.importer(lire_historique_texte(path_texte))
+        finally:
+            catalogue.fermer()
+            historique.fermer()
+        if os.path.exists(path_base):
+            # Créée entre-temps par une autre borne
+            raise FileExistsError(path_base)
+        os.replace(temporaire, path_base)
+    finally:
+        for chemin in (temporaire, temporaire + "-wal", temporaire + "-shm"):
+            if os.path.exists(chemin):
+                os.remove(chemin)
+
+    retours = 0
+    path_retours = path_historique + ".retours"
+    if os.path.exists(path_retours) and not os.path.exists(path_base + ".retours"):
+        destination = HistoriqueEmprunts(path_base + ".retours", partage=False)
+        try:
+            retours = _copier_historique(path_retours, destination)
+        finally:
+            destination.fermer()
+    return livres, emprunts, retours
+
+
+def ouvrir_catalogue_sqlite(path_base=BASE_SQLITE):
+    """
+    Ouvre le catalogue de la base SQLite, créée au premier lancement à
+    partir des fichiers existants (voir importer_base_sqlite).
+
+    Retourne None (et affiche un message) si la base ne peut pas être
+    ouverte : le catalogue est alors lu depuis les fichiers.
+    """
+    if CatalogueSQLite is None:
+        print("[ERREUR] Le module sqlite3 n'est pas disponible : catalogue lu depuis les fichiers.")
+        return None
+    try:
+        preparer_base_sqlite(path_base)
+        return CatalogueSQLite(path_base)
+    except Exception as e:
+        print("[ERREUR] Impossible d'ouvrir la base", path_base, ":", e)
+        return None
+
+
+def preparer_base_sqlite(path_base=BASE_SQLITE):
+    """Crée la base à partir des fichiers si elle n'existe pas encore."""
+    if os.path.exists(path_base):
+        return
+    try:
+        livres, emprunts, _ = importer_base_sqlite(path_base)
+    except FileExistsError:
+        # Créée entre-temps par une autre borne
+        return
+    print(f"[INFO] Base {path_base} créée : {livres} livre(s), {emprunts} emprunt(s) importé(s).")
+
+
+# -------------------- HISTORIQUE DES EMPRUNTS --------------------
+
+# Historiques déjà ouverts (chemin -> HistoriqueEmprunts) : l'index n'est
+# chargé qu'une fois par exécution
+_historiques = {}
+
+# Écrivains avec tampon associés (chemin -> EcrivainEmprunts)
+_ecrivains = {}
+
+# Suivis des disponibilités associés (chemin -> SuiviDisponibilites)
+_disponibilites = {}
+
+
+def ouvrir_historique(path=HISTORIQUE_FILE, path_texte=EMPRUNTS_FILE):
+    """
+    Retourne l'historique binaire des emprunts (ouvert une seule fois).
+
+    Au premier lancement (historique binaire absent), les emprunts de
+    l'ancien fichier texte sont importés s'il existe ; ce fichier est
+    conservé tel quel.
+
+    L'historique peut être partagé par plusieurs bornes (HISTORIQUE_PARTAGE) :
+    un historique déjà ouvert est rafraîchi pour inclure les emprunts
+    enregistrés entre-temps par les autres.
+
+    Avec STOCKAGE = "sqlite", l'historique par défaut (HISTORIQUE_FILE) est
+    celui de la base (HistoriqueSQLite).
+
+    Retourne None (et affiche un message) si l'historique est illisible.
+    """
+
+    historique = _historiques.get(path)
+    if historique is not None:
+        try:
+            historique.rafraichir()
+        except Exception as e:
+            print("[ATTENTION] Impossible de relire les nouveaux emprunts :", e)
+        return historique
+
+    try:
+        if _dans_base(path, HISTORIQUE_FILE) and HistoriqueSQLite is not None:
+            preparer_base_sqlite()
+            historique = HistoriqueSQLite(BASE_SQLITE, partage=HISTORIQUE_PARTAGE)
+        else:
+            if not os.path.exists(path) and path_texte is not None and os.path.exists(path_texte):
+                nombre = migrer_historique_texte(path_texte, path, si_vide=True)
+                if nombre:
+                    print(f"[INFO] {nombre} emprunt(s) importé(s) depuis {path_texte}.")
+            historique = HistoriqueEmprunts(path, partage=HISTORIQUE_PARTAGE)
+    except Exception as e:
+        print("[ERREUR] Impossible d'ouvrir l'historique des emprunts :", e)
+        return None
+
+    _historiques[path] = historique
+    return historique
+
+
+def ouvrir_ecrivain(path=HISTORIQUE_FILE):
+    """
+    Retourne l'écrivain avec tampon de l'historique (créé une seule fois),
+    réglé par TAMPON_EMPRUNTS, DELAI_EMPRUNTS et SYNCHRONISER_EMPRUNTS.
+    Retourne None si l'historique ne peut pas être ouvert.
+    """
+
+    ecrivain = _ecrivains.get(path)
+    if ecrivain is None:
+        historique = ouvrir_historique(path)
+        if historique is None:
+            return None
+        ecrivain = EcrivainEmprunts(historique, TAMPON_EMPRUNTS, DELAI_EMPRUNTS, SYNCHRONISER_EMPRUNTS)
+        _ecrivains[path] = ecrivain
+    return ecrivain
+
+
+def ouvrir_disponibilites(path=HISTORIQUE_FILE, path_exemplaires=EXEMPLAIRES_CSV):
+    """
+    Retourne le suivi des disponibilités de l'historique (créé une seule
+    fois) : exemplaires lus dans `path_exemplaires`, emprunts passant par
+    l'écrivain de l'historique.
+
+    Retourne None si le suivi est désactivé (SUIVI_DISPONIBILITES) ou si
+    l'historique ne peut pas être ouvert (un message est alors affiché).
+    """
+
+    if not SUIVI_DISPONIBILITES:
+        return None
+
+    suivi = _disponibilites.get(path)
+    if suivi is None:
+        ecrivain = ouvrir_ecrivain(path)
+        if ecrivain is None:
+            return None
+        try:
+            suivi = SuiviDisponibilites(ecrivain.historique, charger_exemplaires(path_exemplaires), ecrivain)
+        except Exception as e:
+            print("[ERREUR] Impossible d'ouvrir le suivi des disponibilités :", e)
+            return None
+        _disponibilites[path] = suivi
+    return suivi
+
+
+def vider_emprunts_en_attente(path=HISTORIQUE_FILE):
+    """Écrit les emprunts encore dans le tampon (avant une lecture de l'historique)."""
+    ecrivain = _ecrivains.get(path)
+    if ecrivain is None:
+        return
+    try:
+        ecrivain.vider()
+    except Exception as e:
+        print("[ERREUR] Impossible d'écrire les emprunts en attente :", e)
+
+
+def fermer_historiques():
+    """
+    Écrit les emprunts en attente puis ferme les historiques ouverts (et
+    sauvegarde leurs index). À appeler avant de quitter l'application.
+    """
+    for path in list(_ecrivains):
+        vider_emprunts_en_attente(path)
+    _ecrivains.clear()
+    for suivi in _disponibilites.values():
+        suivi.fermer()
+    _disponibilites.clear()
+    for historique in _historiques.values():
+        historique.fermer()
+    _historiques.clear()
+
+
+@instrumenter("data.sauvegarder_emprunt", lignes="codes_livres")
+def sauvegarder_emprunt(codes_livres, path=HISTORIQUE_FILE):
+    """
+    Enregistre un emprunt à la fin de l'historique (ajout seul : les
+    emprunts déjà enregistrés ne sont jamais réécrits).
+
+    Chaque emprunt garde sa date et la liste de ses codes, par exemple :
     2025-12-08 14:35:12 | L01, L02, L15
+
+    L'écriture passe par un tampon (voir ouvrir_ecrivain) : elle a lieu au
+    plus tard DELAI_EMPRUNTS secondes après l'appel, et dans tous les cas
+    à la fermeture de l'application (fermer_historiques).
     """
 
     if not codes_livres:
         # Rien à sauvegarder
         return
 
-    # On construit la ligne à écrire
-    date_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    codes_str = ", ".join(codes_livres)
-    ligne = date_str + " | " + codes_str + "\n"
+    ecrivain = ouvrir_ecrivain(path)
+    if ecrivain is None:
+        return
 
     try:
-        with open(path, "a", encoding="utf-8") as fichier:
-            fichier.write(ligne)
+        ecrivain.ecrire(codes_livres)
     except Exception as e:
         print("[ERREUR] Impossible de sauvegarder l'emprunt :", e)
 
 
-def charger_historique(path=EMPRUNTS_FILE):
+@instrumenter("data.charger_historique", lignes=len, octets="path")
+def charger_historique(path=HISTORIQUE_FILE):
     """
-    Charge l'historique des emprunts depuis le fichier texte.
+    Charge tout l'historique des emprunts.
 
     Retourne une liste de dictionnaires de la forme :
     [
@@ -117,50 +654,21 @@ def charger_historique(path=EMPRUNTS_FILE):
         ...
     ]
 
+    Pour parcourir un gros historique sans tout charger, utiliser plutôt
+    ouvrir_historique() (parcours inverse, recherche par période).
+
     Gestion d'erreurs :
-    - si le fichier n'existe pas, on retourne une liste vide
-    - si une ligne est mal formée, on l'ignore
+    - si l'historique n'existe pas encore, on retourne une liste vide
+    - si la fin du fichier est corrompue (écriture interrompue), elle est ignorée
     """
 
-    historique = []
-
-    if not os.path.exists(path):
-        # Pas encore d'emprunts enregistrés
-        return historique
+    historique = ouvrir_historique(path)
+    if historique is None:
+        return []
 
+    vider_emprunts_en_attente(path)
     try:
-        with open(path, "r", encoding="utf-8") as fichier:
-            for ligne in fichier:
-                ligne = ligne.strip()
-                if ligne == "":
-                    # Ligne vide, on passe
-                    continue
-
-                # On s'attend à "date | codes"
-                morceaux = ligne.split(" | ")
-                if len(morceaux) != 2:
-                    # Ligne mal formée, on ignore
-                    continue
-
-                date_str = morceaux[0].strip()
-                codes_str = morceaux[1].strip()
-
-                if codes_str == "":
-                    codes = []
-                else:
-                    # On sépare les codes par des virgules
-                    codes = []
-                    for c in codes_str.split(", "):
-                        c = c.strip().upper()
-                        if c != "":
-                            codes.append(c)
-
-                historique.append({
-                    "datetime": date_str,
-                    "codes": codes
-                })
-
+        return list(historique)
     except Exception as e:
         print("[ERREUR] Problème lors du chargement de l'historique :", e)
-
-    return historique
\ No newline at end of file
+        return []
@@ -0,0 +1,318 @@
+"""
+Disponibilité des livres : exemplaires, emprunts en cours et retours.
+
+- exemplaires.csv (facultatif) : nombre d'exemplaires de chaque livre, une
+  ligne "code,exemplaires" par livre ; un livre absent du fichier en a
+  EXEMPLAIRES_PAR_DEFAUT.
+
+- journal des retours (emprunts.dat.retours) : à côté de l'historique des
+  emprunts et au même format (HistoriqueEmprunts : ajout seul, crc,
+  verrou entre processus) ; un enregistrement par retour, avec les codes
+  des livres rendus.
+
+- table des disponibilités : pour chaque livre, nombre d'exemplaires
+  sortis (emprunts moins retours). Elle est tenue en mémoire et mise à
+  jour en O(1) par livre à chaque emprunt ou retour ; la disponibilité
+  d'un livre se lit donc en temps constant, quelle que soit la taille des
+  journaux.
+
+La table n'est qu'un résumé des deux journaux : elle se reconstruit en les
+rejouant. Un point de reprise (emprunts.dat.dispo) est sauvegardé tous les
+INTERVALLE_POINT_REPRISE événements et à la fermeture ; au chargement,
+seuls les emprunts et retours enregistrés depuis sont rejoués. Les
+événements écrits par d'autres processus (historique partagé) sont pris en
+compte de la même façon, avant chaque lecture de la table.
+
+Les emprunts enregistrés avant la mise en place du suivi (historique
+existant sans journal des retours) sont considérés comme rendus : le
+journal des retours commence par un retour de régularisation qui les
+solde tous.
+"""
+
+import csv
+import os
+import pickle
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+from config import EXEMPLAIRES_CSV, EXEMPLAIRES_PAR_DEFAUT, SYNCHRONISER_EMPRUNTS
+from historique import HistoriqueEmprunts
+
+
+# Nombre d'emprunts et de retours rejoués entre deux sauvegardes de la table
+INTERVALLE_POINT_REPRISE = 1000
+
+
+def charger_exemplaires(path=EXEMPLAIRES_CSV):
+    """
+    Lit le nombre d'exemplaires des livres (CSV "code,exemplaires", avec
+    en-tête). Retourne un dictionnaire code -> nombre d'exemplaires (vide si
+    le fichier n'existe pas). Les lignes mal formées sont ignorées.
+    """
+    exemplaires = {}
+    if not os.path.exists(path):
+        return exemplaires
+
+    with open(path, "r", encoding="cp1252", errors="replace", newline="") as fichier:
+        lecteur = csv.reader(fichier)
+        next(lecteur, None)
+        for ligne in lecteur:
+            if len(ligne) < 2:
+                continue
+            code = ligne[0].strip().upper()
+            try:
+                nombre = int(ligne[1])
+            except ValueError:
+                continue
+            if code != "" and nombre >= 0:
+                exemplaires[code] = nombre
+    return exemplaires
+
+
+# -------------------- TABLE --------------------
+
+class TableDisponibilites:
+    """
+    Nombre d'exemplaires sortis de chaque livre (emprunts moins retours).
+
+    `emprunts_lus` et `retours_lus` sont les nombres d'enregistrements de
+    chaque journal déjà comptés dans la table.
+    """
+
+    def __init__(self, sortis=None, emprunts_lus=0, retours_lus=0):
+        self._sortis = sortis if sortis is not None else {}   # code -> exemplaires sortis
+        self.emprunts_lus = emprunts_lus
+        self.retours_lus = retours_lus
+
+    def __len__(self):
+        """Nombre de livres dont au moins un exemplaire est sorti."""
+        return len(self._sortis)
+
+    def sortis(self, code):
+        """Nombre d'exemplaires du livre `code` actuellement empruntés."""
+        return self._sortis.get(code, 0)
+
+    def emprunter(self, codes):
+        for code in codes:
+            self._sortis[code] = self._sortis.get(code, 0) + 1
+
+    def rendre(self, codes):
+        for code in codes:
+            reste = self._sortis.get(code, 0) - 1
+            if reste:
+                self._sortis[code] = reste
+            else:
+                del self._sortis[code]
+
+    def sauvegarder(self, path):
+        """Écrit la table (point de reprise) via un fichier temporaire."""
+        # Un fichier temporaire par processus (historique partagé)
+        temporaire = f"{path}.{os.getpid()}.tmp"
+        with open(temporaire, "wb") as fichier:
+            pickle.dump({"emprunts_lus": self.emprunts_lus, "retours_lus": self.retours_lus,
+                         "sortis": self._sortis}, fichier, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporaire, path)
+
+    @classmethod
+    def charger(cls, path):
+        """Charge une table sauvegardée (table vide si le fichier est absent)."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "rb") as fichier:
+            contenu = pickle.load(fichier)
+        return cls(contenu["sortis"], contenu["emprunts_lus"], contenu["retours_lus"])
+
+
+# -------------------- SUIVI --------------------
+
+class SuiviDisponibilites:
+    """
+    Disponibilités des livres d'un historique d'emprunts.
+
+    - `historique` : HistoriqueEmprunts des emprunts
+    - `exemplaires` : code -> nombre d'exemplaires (voir charger_exemplaires)
+    - `ecrivain` : EcrivainEmprunts de l'historique ; ses emprunts encore
+      en attente d'écriture comptent comme sortis, et sont écrits avant
+      chaque emprunt vérifié
+
+    Un emprunt est vérifié puis écrit directement dans l'historique sous
+    son verrou de fichier (et non dans le tampon de l'écrivain, que les
+    autres processus ne voient pas) : deux bornes ne peuvent pas prêter le
+    même dernier exemplaire. Emprunts et retours sont synchronisés sur
+    disque (fsync) comme les écritures de l'écrivain
+    (SYNCHRONISER_EMPRUNTS sans écrivain).
+
+    Le journal des retours et le point de reprise sont créés à côté de
+    l'historique (extensions .retours et .dispo).
+    """
+
+    def __init__(self, historique, exemplaires=None, ecrivain=None, defaut=EXEMPLAIRES_PAR_DEFAUT):
+        self.historique = historique
+        self.exemplaires_livres = exemplaires if exemplaires is not None else {}
+        self.ecrivain = ecrivain
+        self.synchroniser = ecrivain.synchroniser if ecrivain is not None else SYNCHRONISER_EMPRUNTS
+        self.defaut = defaut
+        self.path_point_reprise = historique.path + ".dispo"
+        self.retours = HistoriqueEmprunts(historique.path + ".retours", partage=historique.partage)
+        self._verrou = threading.RLock()
+        self._depuis_sauvegarde = 0
+
+        self._initialiser_retours()
+        self.table = self._charger_table()
+        self.rafraichir()
+
+    def _initialiser_retours(self):
+        """Crée le retour de régularisation si le journal des retours est vide."""
+        # Sous les deux verrous : aucun emprunt ne peut arriver entre-temps,
+        # et une seule borne écrit la régularisation
+        with self.historique.verrouiller(), self.retours.verrouiller():
+            self.historique.rafraichir()
+            self.retours.rafraichir()
+            if len(self.retours):
+                return
+            anciens = []
+            for numero in range(len(self.historique)):
+                anciens.extend(self.historique.lire(numero)["codes"])
+            # Écrit même vide : un journal non vide signale un suivi en place
+            self.retours.ajouter(anciens)
+
+    def _charger_table(self):
+        try:
+            table = TableDisponibilites.charger(self.path_point_reprise)
+        except Exception:
+            # Point de reprise illisible : tout est rejoué
+            table = TableDisponibilites()
+        if table.emprunts_lus > len(self.historique) or table.retours_lus > len(self.retours):
+            table = TableDisponibilites()
+        return table
+
+    @contextmanager
+    def _verrouiller(self, journal):
+        """
+        Verrous d'une écriture dans `journal` : l'écrivain (s'il y en a un),
+        le suivi, puis le verrou de fichier du journal. Toujours dans cet
+        ordre : les vidages de l'écrivain prennent le sien puis celui de
+        l'historique, les lectures celui du suivi puis ceux des journaux.
+        """
+        if self.ecrivain is None:
+            with self._verrou, journal.verrouiller():
+                yield
+        else:
+            with self.ecrivain._verrou, self._verrou, journal.verrouiller():
+                yield
+
+    def rafraichir(self):
+        """
+        Compte dans la table les emprunts et retours enregistrés depuis la
+        dernière mise à jour (par ce processus ou par d'autres) et retourne
+        leur nombre.
+        """
+        with self._verrou:
+            self.historique.rafraichir()
+            self.retours.rafraichir()
+            table = self.table
+            if table.emprunts_lus > len(self.historique) or table.retours_lus > len(self.retours):
+                # Journal raccourci (écriture interrompue d'une autre borne)
+                table = self.table = TableDisponibilites()
+
+            nombre = len(self.historique) - table.emprunts_lus + len(self.retours) - table.retours_lus
+            for numero in range(table.emprunts_lus, len(self.historique)):
+                table.emprunter(self.historique.lire(numero)["codes"])
+            table.emprunts_lus = len(self.historique)
+            for numero in range(table.retours_lus, len(self.retours)):
+                table.rendre(self.retours.lire(numero)["codes"])
+            table.retours_lus = len(self.retours)
+
+            self._depuis_sauvegarde += nombre
+            if self._depuis_sauvegarde >= INTERVALLE_POINT_REPRISE:
+                table.sauvegarder(self.path_point_reprise)
+                self._depuis_sauvegarde = 0
+            return nombre
+
+    # ---- lecture ----
+
+    def exemplaires(self, code):
+        """Nombre d'exemplaires du livre `code`."""
+        return self.exemplaires_livres.get(code, self.defaut)
+
+    def _sortis(self, code):
+        if self.ecrivain is None:
+            return self.table.sortis(code)
+        # Lu sans le verrou de l'écrivain : une lecture n'attend pas un
+        # vidage en cours (un emprunt en cours d'écriture peut être compté
+        # deux fois, jamais oublié)
+        return self.table.sortis(code) + self.ecrivain.en_attente(code)
+
+    def sortis(self, code):
+        """Nombre d'exemplaires du livre `code` actuellement empruntés."""
+        with self._verrou:
+            self.rafraichir()
+            return self._sortis(code)
+
+    def disponibles(self, code):
+        """Nombre d'exemplaires du livre `code` disponibles (jamais négatif)."""
+        with self._verrou:
+            self.rafraichir()
+            return max(0, self.exemplaires(code) - self._sortis(code))
+
+    # ---- écriture ----
+
+    def emprunter(self, codes):
+        """
+        Enregistre l'emprunt des livres dont un exemplaire est disponible
+        et retourne les codes refusés, faute d'exemplaire disponible.
+
+        La vérification et l'écriture se font sous le verrou de fichier de
+        l'historique, après avoir compté les emprunts des autres bornes :
+        l'emprunt est écrit directement dans l'historique (les emprunts en
+        attente dans l'écrivain sont écrits d'abord).
+        """
+        with self._verrouiller(self.historique):
+            if self.ecrivain is not None:
+                self.ecrivain.vider()
+            self.rafraichir()
+            demandes = Counter()
+            acceptes = []
+            refuses = []
+            for code in codes:
+                demandes[code] += 1
+                if self._sortis(code) + demandes[code] <= self.exemplaires(code):
+                    acceptes.append(code)
+                else:
+                    refuses.append(code)
+            if acceptes:
+                self.historique.ajouter_lot([(datetime.now(), acceptes)], synchroniser=self.synchroniser)
+                self.rafraichir()
+            return refuses
+
+    def rendre(self, codes):
+        """
+        Enregistre le retour des livres dont un exemplaire est sorti et
+        retourne les codes refusés (livre qui n'était pas emprunté).
+        """
+        with self._verrou, self.retours.verrouiller():
+            self.rafraichir()
+            rendus = Counter()
+            acceptes = []
+            refuses = []
+            for code in codes:
+                if self._sortis(code) - rendus[code] > 0:
+                    rendus[code] += 1
+                    acceptes.append(code)
+                else:
+                    refuses.append(code)
+            if acceptes:
+                self.retours.ajouter_lot([(datetime.now(), acceptes)], synchroniser=self.synchroniser)
+                self.rafraichir()
+            return refuses
+
+    def fermer(self):
+        """Sauvegarde la table et ferme le journal des retours."""
+        with self._verrou:
+            try:
+                self.table.sauvegarder(self.path_point_reprise)
+            except OSError:
+                pass
+            self.retours.fermer()
@@ -0,0 +1,218 @@
+"""
+Chargement d'un catalogue réparti en plusieurs fichiers (catalogue
+collectif : un CSV par région, au format de livres.csv).
+
+Les fichiers sont analysés en parallèle par un groupe de processus ; le
+processus principal fusionne les livres dans un seul catalogue (et ses
+index) au fur et à mesure que les fichiers arrivent, dans l'ordre de la
+liste des fichiers.
+
+Chaque livre ne traverse qu'une fois la frontière entre processus : un
+processus d'analyse renvoie les livres d'un fichier sous forme de tuples
+(code, titre, auteur, note, catégories), sérialisés une seule fois ; le
+processus principal en fait directement les livres du catalogue.
+
+Un code présent dans plusieurs fichiers est un conflit, résolu selon
+l'ordre des fichiers (POLITIQUES_DOUBLONS) :
+- "premier" : le livre du premier fichier de la liste est gardé
+- "dernier" : le livre du dernier fichier de la liste est gardé
+Dans un même fichier, la dernière ligne l'emporte (comme pour
+charger_catalogue). Les conflits sont décrits dans le rapport de
+chargement et peuvent être écrits en CSV.
+
+Usage (fusion de fichiers régionaux en un seul livres.csv) :
+    python fusion.py regions/*.csv --sortie livres.csv --rapport conflits.csv [--processus 4]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from catalogue import CLES_LIVRE, Catalogue, CatalogueColonnes, Livre
+from config import POLITIQUE_DOUBLONS, PROCESSUS_CHARGEMENT
+from data import iterer_catalogue
+from mesures import instrumenter
+
+
+# Règles de résolution des codes présents dans plusieurs fichiers
+POLITIQUES_DOUBLONS = ("premier", "dernier")
+
+
+def analyser_fichier(path):
+    """
+    Analyse un fichier du catalogue (dans un processus du groupe).
+    Retourne (livres, durée) : les livres sous forme de tuples dans l'ordre
+    de CLES_LIVRE, un seul par code (la dernière ligne l'emporte).
+    """
+    debut = time.perf_counter()
+    livres = {}
+    for lot in iterer_catalogue(path):
+        for livre in lot:
+            livres[livre["code"]] = (livre["code"], livre["titre"], livre["auteur"],
+                                     livre["note"], livre["categories"])
+    return list(livres.values()), time.perf_counter() - debut
+
+
+def _analyses(paths, processus):
+    """Itère sur les analyses des fichiers, dans l'ordre de `paths`."""
+    if processus <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield analyser_fichier(path)
+        return
+    with ProcessPoolExecutor(max_workers=processus) as groupe:
+        # map rend les résultats dans l'ordre des fichiers : le premier
+        # fichier est fusionné pendant que les suivants sont analysés
+        yield from groupe.map(analyser_fichier, paths)
+
+
+def _meme_livre(livre, valeurs):
+    """Le livre du catalogue a-t-il les valeurs (tuple d'analyser_fichier) ?"""
+    return (livre["titre"] == valeurs[1] and livre["auteur"] == valeurs[2]
+            and livre["note"] == valeurs[3] and list(livre["categories"]) == list(valeurs[4]))
+
+
+@instrumenter("fusion.charger_catalogues", lignes=len)
+def charger_catalogues(paths, processus=PROCESSUS_CHARGEMENT, politique=POLITIQUE_DOUBLONS,
+                       stockage="dict", rapport=None):
+    """
+    Charge plusieurs fichiers CSV du catalogue dans un seul catalogue.
+
+    - `processus` : nombre de processus d'analyse (None : un par cœur,
+      1 : analyse dans le processus courant, sans groupe)
+    - `politique` : "premier" ou "dernier", livre gardé quand un code est
+      présent dans plusieurs fichiers
+    - `stockage` : comme pour charger_catalogue ("dict", "livre", "colonnes")
+
+    Les livres sont ajoutés dans l'ordre des fichiers, puis des lignes
+    (avec "dernier", un livre remplacé garde la place du premier). Un
+    fichier absent est signalé et ignoré.
+
+    Si `rapport` est un dictionnaire, il est rempli à la fin :
+    - "fichiers" : pour chaque fichier, {"path", "livres", "gardes", "duree_analyse"}
+    - "conflits" : pour chaque code en conflit, {"code", "garde" (fichier
+      du livre gardé), "ecartes" (fichiers des livres écartés),
+      "identiques" (True si tous les livres du code sont identiques)}
+    - "absents" : fichiers introuvables
+    - "processus", "duree" (secondes)
+    """
+    if politique not in POLITIQUES_DOUBLONS:
+        raise ValueError(f"politique de doublons inconnue : {politique!r}")
+    if stockage not in ("dict", "livre", "colonnes"):
+        raise ValueError(f"stockage inconnu : {stockage!r}")
+
+    debut = time.perf_counter()
+    absents = [path for path in paths if not os.path.exists(path)]
+    for path in absents:
+        print("[ERREUR] Le fichier de catalogue n'existe pas :", path)
+    paths = [path for path in paths if path not in absents]
+    if processus is None:
+        processus = os.cpu_count() or 1
+    processus = max(1, min(processus, len(paths)))
+
+    catalogue = CatalogueColonnes() if stockage == "colonnes" else Catalogue()
+    compact = stockage == "livre"
+    origines = {}       # code -> numéro du fichier du livre gardé
+    conflits = {}       # code -> numéros des fichiers du code, dans l'ordre
+    differents = set()  # codes en conflit dont les livres diffèrent
+    fichiers = []
+
+    for numero, (path, (livres, duree)) in enumerate(zip(paths, _analyses(paths, processus))):
+        gardes = 0
+        for valeurs in livres:
+            code = valeurs[0]
+            precedent = origines.get(code)
+            if precedent is not None:
+                conflits.setdefault(code, [precedent]).append(numero)
+                if not _meme_livre(catalogue[code], valeurs):
+                    differents.add(code)
+                if politique == "premier":
+                    continue
+                # "dernier" : le livre remplace le précédent, à sa place
+                fichiers[precedent]["gardes"] -= 1
+            catalogue[code] = Livre(*valeurs) if compact else dict(zip(CLES_LIVRE, valeurs))
+            origines[code] = numero
+            gardes += 1
+        fichiers.append({"path": path, "livres": len(livres), "gardes": gardes, "duree_analyse": duree})
+
+    if rapport is not None:
+        rapport["fichiers"] = fichiers
+        rapport["conflits"] = [
+            {
+                "code": code,
+                "garde": paths[origines[code]],
+                "ecartes": [paths[n] for n in numeros if n != origines[code]],
+                "identiques": code not in differents,
+            }
+            for code, numeros in conflits.items()
+        ]
+        rapport["absents"] = absents
+        rapport["processus"] = processus
+        rapport["duree"] = time.perf_counter() - debut
+    return catalogue
+
+
+def ecrire_conflits(conflits, path):
+    """
+    Écrit les conflits d'un rapport de chargement en CSV (en-tête
+    code,garde,ecartes,identiques ; fichiers écartés séparés par ";").
+    """
+    with open(path, "w", encoding="utf-8", newline="") as fichier:
+        ecrivain = csv.writer(fichier)
+        ecrivain.writerow(["code", "garde", "ecartes", "identiques"])
+        for conflit in conflits:
+            ecrivain.writerow([conflit["code"], conflit["garde"], ";".join(conflit["ecartes"]),
+                               "oui" if conflit["identiques"] else "non"])
+
+
+def ecrire_catalogue(catalogue, path):
+    """Écrit le catalogue au format de livres.csv (Windows-1252)."""
+    temporaire = path + ".tmp"
+    with open(temporaire, "w", encoding="cp1252", errors="replace", newline="") as fichier:
+        ecrivain = csv.writer(fichier)
+        ecrivain.writerow(CLES_LIVRE)
+        for livre in catalogue.values():
+            ecrivain.writerow([livre["code"], livre["titre"], livre["auteur"], livre["note"],
+                               ";".join(livre["categories"])])
+    os.replace(temporaire, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("fichiers", nargs="+", help="fichiers CSV à fusionner, par ordre de priorité")
+    parser.add_argument("--sortie", help="catalogue fusionné à écrire (format de livres.csv)")
+    parser.add_argument("--rapport", help="fichier CSV des conflits")
+    parser.add_argument("--processus", type=int, default=PROCESSUS_CHARGEMENT,
+                        help="nombre de processus d'analyse (défaut : un par cœur)")
+    parser.add_argument("--politique", choices=POLITIQUES_DOUBLONS, default=POLITIQUE_DOUBLONS,
+                        help="livre gardé pour un code présent dans plusieurs fichiers")
+    args = parser.parse_args()
+
+    rapport = {}
+    catalogue = charger_catalogues(args.fichiers, args.processus, args.politique, rapport=rapport)
+
+    for fichier in rapport["fichiers"]:
+        print(f"{fichier['path']} : {fichier['livres']} livre(s), {fichier['gardes']} gardé(s), "
+              f"analyse {fichier['duree_analyse']:.2f} s")
+    differents = sum(1 for conflit in rapport["conflits"] if not conflit["identiques"])
+    print(f"[INFO] {len(catalogue)} livre(s) chargé(s) en {rapport['duree']:.2f} s "
+          f"({rapport['processus']} processus) ; {len(rapport['conflits'])} code(s) en double, "
+          f"dont {differents} avec des livres différents.")
+
+    try:
+        if args.rapport:
+            ecrire_conflits(rapport["conflits"], args.rapport)
+            print("[OK] Conflits écrits dans", args.rapport)
+        if args.sortie:
+            ecrire_catalogue(catalogue, args.sortie)
+            print("[OK] Catalogue fusionné écrit dans", args.sortie)
+    except OSError as e:
+        print("[ERREUR] Écriture impossible :", e)
+        return 1
+    return 1 if rapport["absents"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
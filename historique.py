@@ -0,0 +1,898 @@
+"""
+Stockage binaire de l'historique des emprunts.
+
+L'historique est un fichier en ajout seul (chaque emprunt est écrit à la
+fin, jamais réécrit), accompagné d'un fichier d'index :
+
+- fichier de données (emprunts.dat) :
+    signature SIGNATURE_DONNEES, puis une suite d'enregistrements
+    [longueur (4 octets) | crc32 (4 octets) | horodatage (8 octets) | codes]
+    où codes est "L01,L02,L15" encodé en UTF-8
+
+- fichier d'index (emprunts.dat.idx) :
+    une entrée de 16 octets par emprunt : horodatage et position de
+    l'enregistrement dans le fichier de données
+
+- index inversé (emprunts.dat.codes) :
+    code du livre -> numéros des emprunts qui le contiennent, sauvegardé
+    de temps en temps (point de reprise)
+
+- journal de l'index inversé (emprunts.dat.codes.delta) :
+    un bloc par lot d'emprunts ajouté depuis le point de reprise
+    [premier numéro (4 octets) | nombre (4 octets) | longueur (4 octets) |
+    crc32 (4 octets) | horodatage du dernier (8 octets) | codes]
+    où codes est "L01,L02\nL15" (un emprunt par ligne) encodé en UTF-8 ;
+    au chargement, l'index est prolongé par ce journal, lu d'un seul
+    tenant, sans relire les enregistrements de l'historique un par un
+
+L'horodatage est la date locale de l'emprunt sous forme d'entier
+AAAAMMJJHHMMSS (20251208143512) : il se compare comme la date elle-même.
+Les emprunts étant ajoutés dans l'ordre chronologique, l'index est trié par
+date : une recherche par période se fait par dichotomie, et le parcours du
+plus récent au plus ancien lit directement les enregistrements par leur
+position, sans jamais relire le reste du fichier.
+
+Accès partagé (plusieurs bornes sur le même historique) : chaque ajout se
+fait sous un verrou exclusif posé sur emprunts.dat.lock, après avoir pris
+en compte les emprunts écrits par les autres processus. Les données d'un
+emprunt sont écrites avant son entrée d'index : un lecteur qui suit l'index
+ne voit que des enregistrements complets (vérifiés par leur crc).
+"""
+
+import os
+import pickle
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime
+from heapq import nsmallest
+
+from config import EMPRUNTS_FILE, HISTORIQUE_FILE
+
+try:
+    import fcntl
+except ImportError:   # Windows
+    fcntl = None
+    import msvcrt
+
+
+# Début du fichier de données ; à changer si le format évolue
+SIGNATURE_DONNEES = b"MEDIAHIS\x01"
+
+# En-tête d'un enregistrement : longueur des codes, crc32, horodatage
+ENTETE = struct.Struct("<IIq")
+
+# En-tête d'un bloc du journal de l'index inversé : premier numéro, nombre
+# d'emprunts, longueur des codes, crc32, horodatage du dernier emprunt
+ENTETE_DELTA = struct.Struct("<IIIIq")
+
+# Sauvegarde de l'index inversé (le journal .codes.delta est alors vidé) :
+# après au moins INTERVALLE_SAUVEGARDE_CODES emprunts indexés, et au moins
+# PART_SAUVEGARDE_CODES fois le nombre d'emprunts déjà sauvegardés. La
+# sauvegarde réécrit tout l'index : son coût grandit avec l'historique,
+# l'intervalle aussi, si bien que le coût réparti sur chaque ajout reste
+# borné
+INTERVALLE_SAUVEGARDE_CODES = 1000
+PART_SAUVEGARDE_CODES = 0.25
+
+
+# -------------------- DATES --------------------
+
+def horodatage(moment):
+    """Convertit un datetime en entier AAAAMMJJHHMMSS."""
+    return (
+        moment.year * 10**10 + moment.month * 10**8 + moment.day * 10**6
+        + moment.hour * 10**4 + moment.minute * 100 + moment.second
+    )
+
+
+def date_texte(valeur):
+    """Convertit un horodatage AAAAMMJJHHMMSS en "AAAA-MM-JJ HH:MM:SS"."""
+    texte = f"{valeur:014d}"
+    return f"{texte[0:4]}-{texte[4:6]}-{texte[6:8]} {texte[8:10]}:{texte[10:12]}:{texte[12:14]}"
+
+
+def date_horodatage(valeur):
+    """Convertit un horodatage AAAAMMJJHHMMSS en datetime."""
+    jour, heure = divmod(valeur, 10**6)
+    annee, reste = divmod(jour, 10**4)
+    mois, jour = divmod(reste, 100)
+    heures, reste = divmod(heure, 10**4)
+    minutes, secondes = divmod(reste, 100)
+    return datetime(annee, mois, jour, heures, minutes, secondes)
+
+
+def _borne(valeur, fin=False):
+    """
+    Convertit une borne de période en horodatage.
+
+    Accepte un datetime, une date ou une chaîne "AAAA-MM-JJ[ HH:MM[:SS]]".
+    Une date sans heure utilisée comme borne de fin couvre toute la journée.
+    """
+    if isinstance(valeur, str):
+        texte = valeur.strip()
+        valeur = datetime.fromisoformat(texte)
+        if fin and len(texte) <= 10:
+            valeur = valeur.replace(hour=23, minute=59, second=59)
+    elif not isinstance(valeur, datetime) and isinstance(valeur, date):
+        valeur = datetime(valeur.year, valeur.month, valeur.day, 23, 59, 59) if fin \
+            else datetime(valeur.year, valeur.month, valeur.day)
+    return horodatage(valeur)
+
+
+# -------------------- VERROU ENTRE PROCESSUS --------------------
+
+class VerrouFichier:
+    """
+    Verrou exclusif partagé entre processus, posé sur le fichier `path`
+    (créé au besoin, jamais supprimé).
+
+    S'utilise avec "with" ; le verrou est réentrant dans un même processus
+    (un fil qui le détient déjà peut le reprendre).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fichier = None
+        self._profondeur = 0
+        self._verrou = threading.RLock()
+
+    def __enter__(self):
+        self._verrou.acquire()
+        try:
+            if self._profondeur == 0:
+                if self._fichier is None:
+                    self._fichier = open(self.path, "a+b")
+                _verrouiller(self._fichier)
+        except BaseException:
+            self._verrou.release()
+            raise
+        self._profondeur += 1
+        return self
+
+    def __exit__(self, *exception):
+        self._profondeur -= 1
+        if self._profondeur == 0:
+            _deverrouiller(self._fichier)
+        self._verrou.release()
+
+    def fermer(self):
+        with self._verrou:
+            if self._fichier is not None and self._profondeur == 0:
+                self._fichier.close()
+                self._fichier = None
+
+
+def _verrouiller(fichier):
+    if fcntl is not None:
+        fcntl.flock(fichier.fileno(), fcntl.LOCK_EX)
+        return
+    # msvcrt verrouille des octets à partir de la position courante et
+    # abandonne au bout de 10 secondes : on réessaie tant qu'il le faut
+    fichier.seek(0)
+    while True:
+        try:
+            msvcrt.locking(fichier.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+
+def _deverrouiller(fichier):
+    if fcntl is not None:
+        fcntl.flock(fichier.fileno(), fcntl.LOCK_UN)
+    else:
+        fichier.seek(0)
+        msvcrt.locking(fichier.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# -------------------- INDEX INVERSÉ --------------------
+
+class IndexCodesEmprunts:
+    """
+    Index inversé code du livre -> numéros des emprunts qui le contiennent.
+
+    Tient aussi à jour, pour chaque nombre d'emprunts, l'ensemble des codes
+    empruntés ce nombre de fois : le classement des livres les plus
+    empruntés ne demande ni parcours ni tri de tous les livres.
+
+    `jusqu_a` est le nombre d'emprunts de l'historique déjà indexés.
+    """
+
+    def __init__(self, emprunts=None, jusqu_a=0):
+        self._emprunts = emprunts if emprunts is not None else {}   # code -> array de numéros
+        self._par_effectif = {}   # nombre d'emprunts -> set de codes
+        self.jusqu_a = jusqu_a
+        for code, numeros in self._emprunts.items():
+            self._par_effectif.setdefault(len(numeros), set()).add(code)
+
+    def __len__(self):
+        return len(self._emprunts)
+
+    def ajouter(self, numero, codes):
+        """Indexe l'emprunt `numero` (à appeler dans l'ordre des numéros)."""
+        for code in set(codes):
+            numeros = self._emprunts.get(code)
+            if numeros is None:
+                numeros = self._emprunts[code] = array("I")
+            else:
+                self._changer_effectif(code, len(numeros), len(numeros) + 1)
+            numeros.append(numero)
+            if len(numeros) == 1:
+                self._par_effectif.setdefault(1, set()).add(code)
+        self.jusqu_a = numero + 1
+
+    def etendre(self, emprunts):
+        """
+        Indexe d'un bloc les couples (numéro, codes) de `emprunts` (numéros
+        croissants) : chaque code touché ne change de classe d'effectif
+        qu'une fois, quel que soit le nombre de ses nouveaux emprunts.
+        """
+        nouveaux = {}
+        numero = None
+        for numero, codes in emprunts:
+            for code in set(codes):
+                nouveaux.setdefault(code, []).append(numero)
+        if numero is None:
+            return
+        for code, ajouts in nouveaux.items():
+            numeros = self._emprunts.get(code)
+            if numeros is None:
+                numeros = self._emprunts[code] = array("I", ajouts)
+                self._par_effectif.setdefault(len(numeros), set()).add(code)
+            else:
+                self._changer_effectif(code, len(numeros), len(numeros) + len(ajouts))
+                numeros.extend(ajouts)
+        self.jusqu_a = numero + 1
+
+    def _changer_effectif(self, code, ancien, nouveau):
+        codes = self._par_effectif[ancien]
+        codes.discard(code)
+        if not codes:
+            del self._par_effectif[ancien]
+        self._par_effectif.setdefault(nouveau, set()).add(code)
+
+    def numeros(self, code):
+        """Numéros (croissants) des emprunts contenant le livre `code`."""
+        return self._emprunts.get(code, ())
+
+    def effectif(self, code):
+        """Nombre d'emprunts contenant le livre `code`."""
+        return len(self._emprunts.get(code, ()))
+
+    def effectifs(self):
+        """Itère sur les couples (code, nombre d'emprunts)."""
+        for code, numeros in self._emprunts.items():
+            yield code, len(numeros)
+
+    def plus_empruntes(self, n=10):
+        """
+        Retourne les `n` livres les plus empruntés : liste de couples
+        (code, nombre d'emprunts), à égalité par ordre de code.
+        """
+        resultat = []
+        for effectif in sorted(self._par_effectif, reverse=True):
+            if len(resultat) >= n:
+                break
+            # nsmallest évite de trier tout un groupe de codes à égalité
+            for code in nsmallest(n - len(resultat), self._par_effectif[effectif]):
+                resultat.append((code, effectif))
+        return resultat
+
+    def sauvegarder(self, path):
+        """Écrit l'index (point de reprise) via un fichier temporaire."""
+        # Un fichier temporaire par processus (historique partagé)
+        temporaire = f"{path}.{os.getpid()}.tmp"
+        with open(temporaire, "wb") as fichier:
+            pickle.dump({"jusqu_a": self.jusqu_a, "emprunts": self._emprunts}, fichier,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporaire, path)
+
+    @classmethod
+    def charger(cls, path):
+        """Charge un index sauvegardé (index vide si le fichier est absent)."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "rb") as fichier:
+            contenu = pickle.load(fichier)
+        return cls(contenu["emprunts"], contenu["jusqu_a"])
+
+
+# -------------------- HISTORIQUE --------------------
+
+class HistoriqueEmprunts:
+    """
+    Historique des emprunts stocké au format binaire indexé.
+
+    Les emprunts sont renvoyés sous la même forme que charger_historique :
+    {"datetime": "AAAA-MM-JJ HH:MM:SS", "codes": ["L01", "L02"]}.
+
+    Les numéros d'emprunt commencent à 0 dans l'ordre chronologique.
+
+    Si `partage` est vrai, l'historique peut être utilisé en même temps par
+    plusieurs processus : les ajouts sont faits sous un verrou de fichier
+    et rafraichir() prend en compte les emprunts ajoutés par les autres.
+    """
+
+    def __init__(self, path=HISTORIQUE_FILE, partage=True):
+        self.path = path
+        self.path_index = path + ".idx"
+        self._dates = array("q")      # numéro -> horodatage
+        self._positions = array("q")  # numéro -> position dans le fichier de données
+        self._fin = len(SIGNATURE_DONNEES)   # fin du dernier enregistrement valide
+        self.path_codes = path + ".codes"
+        self.path_codes_delta = path + ".codes.delta"
+        self._lecteur = None
+        self._ecriture = None          # fichier de données ouvert en écriture
+        self._ecriture_index = None    # fichier d'index ouvert en ajout
+        self._ecriture_delta = None    # journal de l'index inversé ouvert en ajout
+        self._index_codes = None
+        self._codes_sauvegardes = 0   # emprunts couverts par emprunts.dat.codes
+        # Un écrivain (EcrivainEmprunts) peut écrire depuis un autre fil
+        self._verrou = threading.RLock()
+        self.partage = partage
+        self._verrou_fichier = VerrouFichier(path + ".lock") if partage else None
+        with self.verrouiller():
+            self._ouvrir()
+
+    @contextmanager
+    def verrouiller(self):
+        """
+        Réserve l'historique pour ce fil et, en accès partagé, pour ce
+        processus (les autres attendent pour écrire).
+        """
+        with self._verrou:
+            if self._verrou_fichier is None:
+                yield
+            else:
+                with self._verrou_fichier:
+                    yield
+
+    # ---- ouverture et index ----
+
+    def _ouvrir(self):
+        if not os.path.exists(self.path):
+            with open(self.path, "wb") as fichier:
+                fichier.write(SIGNATURE_DONNEES)
+            with open(self.path_index, "wb"):
+                pass
+
+        with open(self.path, "rb") as fichier:
+            if fichier.read(len(SIGNATURE_DONNEES)) != SIGNATURE_DONNEES:
+                raise ValueError(f"{self.path} n'est pas un historique d'emprunts")
+
+        self._charger_index()
+        self._completer_index()
+
+    def _charger_index(self):
+        """Charge l'index tel quel (lecture binaire, sans analyse)."""
+        self._dates = array("q")
+        self._positions = array("q")
+        self._fin = len(SIGNATURE_DONNEES)
+        self._lire_entrees_index(0)
+
+    def _lire_entrees_index(self, debut):
+        """
+        Ajoute en mémoire les entrées du fichier d'index à partir de la
+        position `debut` (en octets) et met à jour la fin des données.
+        """
+        entrees = array("q")
+        if os.path.exists(self.path_index):
+            with open(self.path_index, "rb") as fichier:
+                fichier.seek(debut)
+                contenu = fichier.read()
+            # Une entrée incomplète (écriture interrompue ou en cours) est ignorée
+            contenu = contenu[:len(contenu) - len(contenu) % 16]
+            entrees.frombytes(contenu)
+            if sys.byteorder == "big":
+                entrees.byteswap()
+
+        dates = entrees[0::2]
+        positions = entrees[1::2]
+
+        # On écarte les entrées qui pointent au-delà du fichier de données
+        taille = os.path.getsize(self.path)
+        while positions and positions[-1] + ENTETE.size > taille:
+            dates.pop()
+            positions.pop()
+
+        if positions:
+            self._dates.extend(dates)
+            self._positions.extend(positions)
+            with open(self.path, "rb") as fichier:
+                fichier.seek(self._positions[-1])
+                entete = fichier.read(ENTETE.size)
+            longueur = ENTETE.unpack(entete)[0]
+            self._fin = self._positions[-1] + ENTETE.size + longueur
+
+    def _completer_index(self):
+        """
+        Indexe les enregistrements écrits après la dernière entrée de l'index
+        (index absent ou en retard). Seule la fin du fichier est relue.
+
+        En accès partagé, à appeler sous le verrou de fichier.
+        """
+        # Supprime les entrées invalides écartées au chargement. L'index est
+        # raccourci sur place : les autres processus gardent le même fichier
+        with open(self.path_index, "ab") as fichier:
+            if fichier.tell() != 16 * len(self._positions):
+                fichier.truncate(16 * len(self._positions))
+
+        if os.path.getsize(self.path) <= self._fin:
+            return
+
+        nouvelles = []
+        with open(self.path, "rb") as fichier:
+            position = self._fin
+            while True:
+                enregistrement = self._lire_a(fichier, position)
+                if enregistrement is None:
+                    break
+                valeur, _, taille = enregistrement
+                nouvelles.append((valeur, position))
+                position += taille
+            self._fin = position
+
+        if nouvelles:
+            self._ecrire_index(nouvelles)
+
+    def _ecrire_index(self, entrees):
+        bloc = array("q")
+        for valeur, position in entrees:
+            # L'index doit rester trié : une date antérieure à la précédente
+            # (horloge reculée, ou emprunt d'une autre borne enregistré en
+            # retard) est rangée à la date précédente
+            if self._dates and valeur < self._dates[-1]:
+                valeur = self._dates[-1]
+            self._dates.append(valeur)
+            self._positions.append(position)
+            bloc.append(valeur)
+            bloc.append(position)
+        if sys.byteorder == "big":
+            bloc.byteswap()
+        if self._ecriture_index is not None:
+            self._ecriture_index.write(bloc.tobytes())
+            self._ecriture_index.flush()
+        else:
+            with open(self.path_index, "ab") as fichier:
+                fichier.write(bloc.tobytes())
+
+    def rafraichir(self):
+        """
+        Prend en compte les emprunts ajoutés par d'autres processus depuis
+        l'ouverture (ou le dernier rafraîchissement) et retourne leur nombre.
+
+        Seul l'index est relu, à partir de la dernière entrée connue : le
+        coût est proportionnel au nombre de nouveaux emprunts.
+        """
+        with self._verrou:
+            avant = len(self._positions)
+            taille = os.path.getsize(self.path_index) if os.path.exists(self.path_index) else 0
+            if taille < 16 * avant:
+                # Index raccourci par un autre processus (après une écriture
+                # interrompue) : il est relu en entier
+                self._charger_index()
+                self._index_codes = None
+            elif taille >= 16 * (avant + 1):
+                self._lire_entrees_index(16 * avant)
+            else:
+                return 0
+
+            if len(self._positions) != avant and self._lecteur is not None:
+                # Le lecteur peut garder en mémoire tampon une ancienne fin
+                # de fichier (enregistrement incomplet depuis remplacé)
+                self._lecteur.close()
+                self._lecteur = None
+            if self._index_codes is not None:
+                self._rattraper_index_codes()
+            return len(self._positions) - avant
+
+    # ---- lecture ----
+
+    @staticmethod
+    def _lire_a(fichier, position):
+        """
+        Lit l'enregistrement situé à `position`.
+
+        Retourne (horodatage, codes, taille totale), ou None si
+        l'enregistrement est incomplet ou corrompu (crc invalide).
+        """
+        fichier.seek(position)
+        entete = fichier.read(ENTETE.size)
+        if len(entete) < ENTETE.size:
+            return None
+        longueur, crc, valeur = ENTETE.unpack(entete)
+        contenu = fichier.read(longueur)
+        if len(contenu) < longueur or zlib.crc32(contenu, valeur & 0xFFFFFFFF) != crc:
+            return None
+        codes = contenu.decode("utf-8").split(",") if contenu else []
+        return valeur, codes, ENTETE.size + longueur
+
+    def _fichier(self):
+        if self._lecteur is None:
+            self._lecteur = open(self.path, "rb")
+        return self._lecteur
+
+    def lire(self, numero):
+        """Retourne l'emprunt numéro `numero` (les négatifs partent de la fin)."""
+        with self._verrou:
+            position = self._positions[numero]
+            valeur, codes, _ = self._lire_a(self._fichier(), position)
+        return {"datetime": date_texte(valeur), "codes": codes}
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __iter__(self):
+        """Parcourt les emprunts du plus ancien au plus récent."""
+        for numero in range(len(self._positions)):
+            yield self.lire(numero)
+
+    def parcourir_inverse(self, depuis=None):
+        """
+        Parcourt les emprunts du plus récent au plus ancien.
+
+        Si `depuis` est donné (numéro d'emprunt), le parcours commence à cet
+        emprunt au lieu du dernier.
+        """
+        debut = len(self._positions) - 1 if depuis is None else min(depuis, len(self._positions) - 1)
+        for numero in range(debut, -1, -1):
+            yield self.lire(numero)
+
+    def numeros_entre(self, debut=None, fin=None):
+        """
+        Retourne l'intervalle (range) des numéros des emprunts dont la date
+        est comprise entre `debut` et `fin` (bornes incluses, None = pas de
+        borne). Recherche par dichotomie dans l'index : O(log n).
+        """
+        with self._verrou:
+            bas = 0 if debut is None else bisect_left(self._dates, _borne(debut))
+            haut = len(self._dates) if fin is None else bisect_right(self._dates, _borne(fin, fin=True))
+        return range(bas, max(bas, haut))
+
+    def entre(self, debut=None, fin=None):
+        """Parcourt, dans l'ordre chronologique, les emprunts d'une période."""
+        for numero in self.numeros_entre(debut, fin):
+            yield self.lire(numero)
+
+    def dates_extremes(self):
+        """Dates (datetime) du premier et du dernier emprunt, ou None si vide."""
+        if not self._dates:
+            return None
+        return date_horodatage(self._dates[0]), date_horodatage(self._dates[-1])
+
+    # ---- index inversé ----
+
+    @property
+    def index_codes(self):
+        """
+        Index inversé code -> emprunts (IndexCodesEmprunts), chargé à la
+        première utilisation puis tenu à jour à chaque ajout.
+        """
+        if self._index_codes is None:
+            try:
+                index = IndexCodesEmprunts.charger(self.path_codes)
+            except Exception:
+                # Sauvegarde illisible : on reconstruit tout
+                index = IndexCodesEmprunts()
+            if index.jusqu_a > len(self):
+                index = IndexCodesEmprunts()
+            self._codes_sauvegardes = index.jusqu_a
+            index.etendre(self._emprunts_delta(index.jusqu_a))
+            self._index_codes = index
+            self._rattraper_index_codes()
+            self._sauvegarder_index_codes()
+        return self._index_codes
+
+    def _emprunts_historique(self, debut, fin):
+        for numero in range(debut, fin):
+            yield numero, self.lire(numero)["codes"]
+
+    def _emprunts_delta(self, debut):
+        """
+        Itère sur les couples (numéro, codes) du journal .codes.delta à
+        partir de l'emprunt `debut`. Le journal est lu jusqu'au premier bloc
+        incomplet ou corrompu (crc) ; les blocs qui ne correspondent pas à
+        l'historique (horodatage) sont ignorés, et un emprunt absent du
+        journal est relu dans l'historique.
+        """
+        try:
+            with open(self.path_codes_delta, "rb") as fichier:
+                contenu = fichier.read()
+        except OSError:
+            return
+        suivant = debut
+        position = 0
+        while position + ENTETE_DELTA.size <= len(contenu):
+            premier, nombre, longueur, crc, valeur = ENTETE_DELTA.unpack_from(contenu, position)
+            position += ENTETE_DELTA.size
+            codes = contenu[position:position + longueur]
+            position += longueur
+            if len(codes) < longueur or zlib.crc32(codes, premier ^ nombre) != crc:
+                return
+            dernier = premier + nombre - 1
+            if not nombre or dernier < suivant or dernier >= len(self) or self._dates[dernier] != valeur:
+                continue
+            yield from self._emprunts_historique(suivant, premier)
+            for numero, ligne in enumerate(codes.decode("utf-8").split("\n"), premier):
+                if numero >= suivant:
+                    yield numero, ligne.split(",") if ligne else []
+            suivant = dernier + 1
+
+    def _ecrire_delta_codes(self, premier, emprunts):
+        """Ajoute au journal .codes.delta le lot `emprunts`, numéroté à partir de `premier`."""
+        codes = "\n".join(",".join(codes) for _, codes in emprunts).encode("utf-8")
+        nombre = len(emprunts)
+        entete = ENTETE_DELTA.pack(premier, nombre, len(codes), zlib.crc32(codes, premier ^ nombre),
+                                   self._dates[premier + nombre - 1])
+        if self._ecriture_delta is None:
+            self._ecriture_delta = open(self.path_codes_delta, "ab")
+        self._ecriture_delta.write(entete + codes)
+        self._ecriture_delta.flush()
+
+    def _rattraper_index_codes(self):
+        """Indexe les emprunts ajoutés à l'historique depuis la dernière mise à jour de l'index inversé."""
+        index = self._index_codes
+        index.etendre(self._emprunts_historique(index.jusqu_a, len(self)))
+
+    def _sauvegarder_index_codes(self):
+        """
+        Sauvegarde l'index inversé et vide son journal si assez d'emprunts
+        ont été indexés depuis la dernière sauvegarde. Sous le verrou de
+        fichier, après rafraîchissement : l'index couvre alors tout
+        l'historique, le journal peut être vidé sans rien perdre.
+        """
+        nouveaux = self._index_codes.jusqu_a - self._codes_sauvegardes
+        if nouveaux < max(INTERVALLE_SAUVEGARDE_CODES, PART_SAUVEGARDE_CODES * self._codes_sauvegardes):
+            return
+        with self.verrouiller():
+            if self.partage:
+                self.rafraichir()
+            index = self._index_codes
+            if index is None:
+                return
+            index.sauvegarder(self.path_codes)
+            with open(self.path_codes_delta, "wb"):
+                pass
+            self._codes_sauvegardes = index.jusqu_a
+
+    def emprunts_du_livre(self, code):
+        """Parcourt, dans l'ordre chronologique, les emprunts contenant le livre `code`."""
+        for numero in self.index_codes.numeros(code):
+            yield self.lire(numero)
+
+    # ---- écriture ----
+
+    def ajouter(self, codes, moment=None):
+        """
+        Ajoute un emprunt à la fin de l'historique et retourne son numéro.
+
+        `moment` est la date de l'emprunt (maintenant par défaut).
+        """
+        return self.ajouter_lot([(moment or datetime.now(), codes)])
+
+    def ajouter_lot(self, emprunts, synchroniser=False):
+        """
+        Ajoute plusieurs emprunts (couples (datetime, codes)) en une seule
+        écriture et retourne le numéro du dernier.
+
+        Les fichiers restent ouverts entre deux appels. Si `synchroniser`
+        est vrai, les données et l'index sont forcés sur le disque (fsync)
+        une seule fois pour tout le lot.
+
+        Si une écriture précédente a été interrompue (fin de fichier
+        corrompue), cette fin est supprimée avant l'ajout.
+
+        En accès partagé, l'ajout se fait sous le verrou de fichier, après
+        avoir indexé les emprunts écrits entre-temps par d'autres processus.
+        """
+        emprunts = list(emprunts)
+        if not emprunts:
+            return len(self._positions) - 1
+
+        with self.verrouiller():
+            if self.partage:
+                self.rafraichir()
+                self._completer_index()
+
+            bloc = bytearray()
+            entrees = []
+            for moment, codes in emprunts:
+                valeur = horodatage(moment)
+                contenu = ",".join(codes).encode("utf-8")
+                crc = zlib.crc32(contenu, valeur & 0xFFFFFFFF)
+                entrees.append((valeur, self._fin + len(bloc)))
+                bloc += ENTETE.pack(len(contenu), crc, valeur)
+                bloc += contenu
+
+            fichier = self._fichier_ecriture()
+            fichier.seek(0, os.SEEK_END)
+            if fichier.tell() != self._fin:
+                fichier.truncate(self._fin)
+                fichier.seek(self._fin)
+            fichier.write(bloc)
+            fichier.flush()
+            self._fin += len(bloc)
+
+            self._ecrire_index(entrees)
+
+            if synchroniser:
+                os.fsync(fichier.fileno())
+                os.fsync(self._ecriture_index.fileno())
+
+            # Le journal de l'index inversé est écrit à chaque ajout ; l'index
+            # lui-même n'est tenu à jour que s'il a déjà été chargé
+            premier = len(self._positions) - len(entrees)
+            self._ecrire_delta_codes(premier, emprunts)
+            if self._index_codes is not None:
+                for decalage, (_, codes) in enumerate(emprunts):
+                    self._index_codes.ajouter(premier + decalage, codes)
+                self._sauvegarder_index_codes()
+
+            return len(self._positions) - 1
+
+    def _fichier_ecriture(self):
+        """Ouvre (une seule fois) les fichiers de données et d'index en écriture."""
+        if self._ecriture is None:
+            self._ecriture = open(self.path, "r+b")
+            self._ecriture_index = open(self.path_index, "ab")
+        return self._ecriture
+
+    def fermer(self):
+        with self._verrou:
+            if self._verrou_fichier is not None:
+                self._verrou_fichier.fermer()
+            # L'index inversé n'est pas sauvegardé : son journal .codes.delta
+            # contient déjà les emprunts ajoutés depuis le point de reprise
+            for fichier in (self._lecteur, self._ecriture, self._ecriture_index, self._ecriture_delta):
+                if fichier is not None:
+                    fichier.close()
+            self._lecteur = None
+            self._ecriture = None
+            self._ecriture_index = None
+            self._ecriture_delta = None
+
+
+# -------------------- ÉCRITURE GROUPÉE --------------------
+
+class EcrivainEmprunts:
+    """
+    Écrivain d'emprunts avec tampon : les emprunts sont accumulés en mémoire
+    puis écrits en un seul bloc dans l'historique.
+
+    Le tampon est vidé :
+    - dès qu'il contient `taille_tampon` emprunts ;
+    - au plus tard `delai` secondes après le premier emprunt en attente
+      (minuterie en arrière-plan) ;
+    - à l'appel de vider() ou fermer().
+
+    Si `synchroniser` est vrai, chaque vidage se termine par un fsync
+    (validation groupée : un seul fsync pour tous les emprunts du bloc).
+    Les emprunts gardent la date de leur enregistrement, pas celle du vidage.
+
+    L'écrivain compte aussi, pour chaque livre, ses emprunts en attente
+    (en_attente) : le suivi des disponibilités en tient compte avant qu'ils
+    n'arrivent dans l'historique.
+    """
+
+    def __init__(self, historique, taille_tampon=64, delai=1.0, synchroniser=False):
+        self.historique = historique
+        self.taille_tampon = taille_tampon
+        self.delai = delai
+        self.synchroniser = synchroniser
+        self._tampon = []
+        self._en_attente = Counter()   # code -> emprunts en attente
+        # Réentrant : le suivi des disponibilités écrit en le détenant déjà
+        self._verrou = threading.RLock()
+        self._minuterie = None
+
+    def __len__(self):
+        """Nombre d'emprunts en attente d'écriture."""
+        return len(self._tampon)
+
+    def en_attente(self, code):
+        """Nombre d'emprunts en attente d'écriture qui contiennent le livre `code`."""
+        return self._en_attente.get(code, 0)
+
+    def ecrire(self, codes, moment=None):
+        """Ajoute un emprunt au tampon (écrit immédiatement si le tampon est plein)."""
+        with self._verrou:
+            codes = list(codes)
+            self._tampon.append((moment or datetime.now(), codes))
+            self._en_attente.update(codes)
+            if len(self._tampon) >= self.taille_tampon:
+                self._vider()
+            elif self._minuterie is None and self.delai is not None:
+                self._minuterie = threading.Timer(self.delai, self._vider_en_arriere_plan)
+                self._minuterie.daemon = True
+                self._minuterie.start()
+
+    def vider(self):
+        """Écrit tous les emprunts en attente."""
+        with self._verrou:
+            self._vider()
+
+    def _vider_en_arriere_plan(self):
+        try:
+            self.vider()
+        except Exception as e:
+            print("[ERREUR] Impossible d'écrire les emprunts en attente :", e)
+
+    def _vider(self):
+        if self._minuterie is not None:
+            self._minuterie.cancel()
+            self._minuterie = None
+        if not self._tampon:
+            return
+        emprunts = self._tampon
+        self._tampon = []
+        try:
+            self.historique.ajouter_lot(emprunts, synchroniser=self.synchroniser)
+        except Exception:
+            # Rien n'est perdu : les emprunts restent en attente
+            self._tampon = emprunts + self._tampon
+            raise
+        # Le tampon était entièrement en attente (écrit sous le verrou)
+        self._en_attente.clear()
+
+    def fermer(self):
+        """Vide le tampon ; l'historique lui-même reste ouvert."""
+        self.vider()
+
+
+# -------------------- MIGRATION --------------------
+
+def lire_historique_texte(path=EMPRUNTS_FILE):
+    """
+    Lit l'ancien historique texte (une ligne "date | code1, code2" par
+    emprunt) et produit des couples (datetime, codes).
+
+    Les lignes mal formées (ou dont la date est illisible) sont ignorées.
+    """
+    with open(path, "r", encoding="utf-8") as fichier:
+        for ligne in fichier:
+            morceaux = ligne.strip().split(" | ")
+            if len(morceaux) != 2:
+                continue
+            try:
+                moment = datetime.strptime(morceaux[0].strip(), "%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                continue
+            codes = [c.strip().upper() for c in morceaux[1].split(",") if c.strip() != ""]
+            yield moment, codes
+
+
+def migrer_historique_texte(path_texte=EMPRUNTS_FILE, path=HISTORIQUE_FILE, si_vide=False):
+    """
+    Importe l'ancien historique texte dans le stockage binaire.
+
+    Les emprunts importés sont ajoutés à la suite de ceux déjà présents ;
+    si `si_vide` est vrai, rien n'est importé quand l'historique binaire
+    contient déjà des emprunts (import déjà fait par une autre borne).
+    L'import se fait sous le verrou de l'historique. Le fichier texte n'est
+    pas modifié. Retourne le nombre d'emprunts importés.
+    """
+    historique = HistoriqueEmprunts(path)
+    lot = []
+    nombre = 0
+    try:
+        with historique.verrouiller():
+            historique.rafraichir()
+            if si_vide and len(historique):
+                return 0
+            for emprunt in lire_historique_texte(path_texte):
+                lot.append(emprunt)
+                if len(lot) >= 10_000:
+                    historique.ajouter_lot(lot)
+                    nombre += len(lot)
+                    lot = []
+            historique.ajouter_lot(lot)
+            nombre += len(lot)
+    finally:
+        historique.fermer()
+    return nombre
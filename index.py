@@ -0,0 +1,1330 @@
+"""
+Index de recherche construits à partir du catalogue :
+
+- index de titres par trigrammes (recherche partielle insensible à la casse)
+- index de termes des titres et auteurs (recherche approchée, tolérante
+  aux fautes de frappe et aux accents, classée par pertinence)
+- index de catégories (ensembles d'identifiants) et requêtes booléennes
+  ET / OU / SAUF sur plusieurs catégories, avec résultats par note
+  décroissante
+- index d'auteurs : nom normalisé (accents, espaces, encodage) -> livres
+  de l'auteur, par nom exact ou début de nom, avec résultats par note
+  décroissante
+- index de complétion : codes, mots des titres et noms d'auteurs triés,
+  complétés par préfixe (recherche dichotomique), les plus fréquents
+  d'abord
+
+Les index ne stockent pas les livres eux-mêmes, uniquement leurs codes.
+Chaque livre reçoit un identifiant entier croissant dans l'ordre
+d'insertion, ce qui permet de renvoyer les résultats dans le même ordre
+que le parcours du catalogue.
+"""
+
+import heapq
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from collections import deque
+from itertools import combinations, groupby, islice, product, repeat
+
+
+# Longueur des n-grammes utilisés par l'index de titres
+TAILLE_NGRAMME = 3
+
+# En dessous de ce nombre de candidats, on vérifie directement les titres
+# plutôt que d'intersecter d'autres listes
+SEUIL_VERIFICATION = 64
+
+
+def extraire_ngrammes(texte, n=TAILLE_NGRAMME):
+    """Retourne l'ensemble des n-grammes (sous-chaînes de longueur n) d'un texte."""
+    return {texte[i:i + n] for i in range(len(texte) - n + 1)}
+
+
+def _intersecter(candidats, liste):
+    """
+    Intersection de deux listes d'identifiants triées.
+
+    L'intersection est faite par les ensembles Python (boucle en C) puis
+    retriée : le coût reste bien inférieur à une vérification candidat par
+    candidat en Python.
+    """
+    communs = set(candidats)
+    communs.intersection_update(liste)
+    return sorted(communs)
+
+
+class _IndexCodes:
+    """
+    Base commune des index : attribution des identifiants entiers.
+
+    Un code garde son identifiant tant qu'il reste dans l'index ; un code
+    retiré puis réinséré reçoit un nouvel identifiant (en fin d'ordre),
+    exactement comme une clé supprimée puis réinsérée dans un dictionnaire.
+    """
+
+    def __init__(self):
+        self._ids = {}         # code -> identifiant
+        self._codes = []       # identifiant -> code (None si retiré)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _nouvel_identifiant(self, code):
+        ident = len(self._codes)
+        self._ids[code] = ident
+        self._codes.append(code)
+        return ident
+
+    def _liberer_identifiant(self, code):
+        ident = self._ids.pop(code, None)
+        if ident is not None:
+            self._codes[ident] = None
+        return ident
+
+    def _vider_identifiants(self):
+        self._ids.clear()
+        self._codes.clear()
+
+
+class IndexTitres(_IndexCodes):
+    """
+    Index inversé de trigrammes sur les titres (en minuscules).
+
+    Pour chaque trigramme, on conserve la liste triée des identifiants des
+    livres dont le titre le contient. Une recherche intersecte les listes
+    des trigrammes du fragment recherché puis vérifie chaque candidat par
+    un test de sous-chaîne : le résultat est donc strictement identique à
+    un parcours complet du catalogue.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._postings = {}    # trigramme -> array d'identifiants triés
+        self._titres = []      # identifiant -> titre en minuscules (None si retiré)
+
+    def ajouter(self, code, titre):
+        """
+        Indexe (ou réindexe) le titre d'un livre.
+
+        Si le code est déjà présent, il garde son identifiant : sa position
+        dans les résultats reste la même, comme pour une mise à jour d'une
+        clé existante dans un dictionnaire.
+        """
+        titre_min = titre.lower()
+        ident = self._ids.get(code)
+
+        if ident is None:
+            ident = self._nouvel_identifiant(code)
+            self._titres.append(titre_min)
+            # Identifiant plus grand que tous les autres : simple ajout en fin
+            for gramme in extraire_ngrammes(titre_min):
+                liste = self._postings.get(gramme)
+                if liste is None:
+                    liste = self._postings[gramme] = array("I")
+                liste.append(ident)
+            return
+
+        ancien = self._titres[ident]
+        if ancien == titre_min:
+            return
+
+        anciens_grammes = extraire_ngrammes(ancien)
+        nouveaux_grammes = extraire_ngrammes(titre_min)
+        self._retirer_grammes(ident, anciens_grammes - nouveaux_grammes)
+        for gramme in nouveaux_grammes - anciens_grammes:
+            liste = self._postings.get(gramme)
+            if liste is None:
+                liste = self._postings[gramme] = array("I")
+            insort(liste, ident)
+        self._titres[ident] = titre_min
+
+    def retirer(self, code):
+        """Retire un livre de l'index (sans effet si le code est inconnu)."""
+        ident = self._liberer_identifiant(code)
+        if ident is None:
+            return
+        self._retirer_grammes(ident, extraire_ngrammes(self._titres[ident]))
+        self._titres[ident] = None
+
+    def vider(self):
+        """Supprime toutes les entrées de l'index."""
+        self._vider_identifiants()
+        self._postings.clear()
+        self._titres.clear()
+
+    def _retirer_grammes(self, ident, grammes):
+        for gramme in grammes:
+            liste = self._postings.get(gramme)
+            if liste is None:
+                continue
+            position = bisect_left(liste, ident)
+            if position < len(liste) and liste[position] == ident:
+                del liste[position]
+            if not liste:
+                del self._postings[gramme]
+
+    def rechercher(self, fragment):
+        """
+        Retourne la liste des codes dont le titre contient le fragment.
+
+        Le fragment doit déjà être normalisé (espaces retirés, minuscules).
+        Les codes sont renvoyés dans l'ordre d'insertion.
+        """
+        if fragment == "":
+            return []
+
+        # Fragment trop court pour avoir un trigramme : on parcourt les
+        # titres déjà mis en minuscules (pas de conversion à chaque requête)
+        if len(fragment) < TAILLE_NGRAMME:
+            return [
+                self._codes[ident]
+                for ident, titre in enumerate(self._titres)
+                if titre is not None and fragment in titre
+            ]
+
+        listes = []
+        for gramme in extraire_ngrammes(fragment):
+            liste = self._postings.get(gramme)
+            if liste is None:
+                # Un trigramme absent de tout titre : aucun résultat possible
+                return []
+            listes.append(liste)
+
+        # On part de la liste la plus courte et on l'intersecte avec les
+        # suivantes tant qu'il reste beaucoup de candidats et que la liste
+        # suivante n'est pas démesurément plus longue
+        listes.sort(key=len)
+        candidats = listes[0]
+        for liste in listes[1:]:
+            if len(candidats) <= SEUIL_VERIFICATION or len(liste) > 32 * len(candidats):
+                break
+            candidats = _intersecter(candidats, liste)
+
+        # Vérification finale : les trigrammes présents ne garantissent pas
+        # que le fragment apparaisse d'un seul tenant dans le titre
+        titres = self._titres
+        codes = self._codes
+        return [codes[ident] for ident in candidats if fragment in titres[ident]]
+
+
+# -------------------- RECHERCHE APPROCHÉE --------------------
+
+# Poids d'un terme de la requête selon la distance d'édition au terme
+# trouvé (0, 1 ou 2 fautes de frappe)
+POIDS_DISTANCE = (1.0, 0.6, 0.3)
+
+# Facteur appliqué quand le terme est trouvé dans l'auteur plutôt que
+# dans le titre
+POIDS_AUTEUR = 0.8
+
+# Termes de la requête au-delà desquels les suivants sont ignorés
+MAX_TERMES_REQUETE = 4
+
+# Nombre de termes de requête dont les variantes (termes proches du
+# vocabulaire) sont gardées en mémoire
+MAX_VARIANTES = 10_000
+
+_MOT = re.compile(r"\w+")
+_OCTET_NON_NUL = re.compile(rb"[^\x00]")
+_DIACRITIQUES = re.compile("[\u0300-\u036f]")
+
+
+def replier(texte):
+    """Met un texte en minuscules et retire ses accents ("Élie" -> "elie")."""
+    texte = texte.casefold()
+    if texte.isascii():
+        return texte
+    # Décomposition "é" -> "e" + accent combinant, puis retrait des accents
+    return _DIACRITIQUES.sub("", unicodedata.normalize("NFKD", texte)).replace("œ", "oe").replace("æ", "ae")
+
+
+# Séquences typiques d'un texte UTF-8 relu en Windows-1252 ("Ã©" pour "é")
+_MARQUES_MOJIBAKE = ("Ã", "Â", "â€")
+
+
+def reparer_encodage(texte):
+    """
+    Répare un texte UTF-8 décodé par erreur en Windows-1252
+    ("Ã‰lie" -> "Élie") ; un texte sans ces séquences, ou qui ne se
+    répare pas, est retourné tel quel.
+    """
+    if not any(marque in texte for marque in _MARQUES_MOJIBAKE):
+        return texte
+    try:
+        return texte.encode("cp1252").decode("utf-8")
+    except UnicodeError:
+        return texte
+
+
+def normaliser_auteur(auteur):
+    """
+    Nom d'auteur réparé (voir reparer_encodage), sans espaces superflues
+    ("Victor  Hugo " -> "Victor Hugo"). replier() en donne la clé de
+    recherche, sans accents ni majuscules.
+    """
+    return " ".join(reparer_encodage(auteur).split())
+
+
+def termes_recherche(texte):
+    """
+    Découpe un texte en termes de recherche : mots repliés (voir replier)
+    d'au moins deux caractères, dans l'ordre du texte.
+    """
+    return [mot for mot in _MOT.findall(replier(texte)) if len(mot) > 1]
+
+
+def distance_max(terme):
+    """Nombre de fautes de frappe tolérées pour un terme de la requête."""
+    if len(terme) <= 3:
+        return 0
+    if len(terme) <= 6:
+        return 1
+    return 2
+
+
+class Vocabulaire:
+    """
+    Vocabulaire de l'index approché : recherche des termes à distance
+    d'édition (Levenshtein) bornée d'un terme donné.
+
+    La recherche simule un automate de Levenshtein par bits (Wu et Manber) :
+    pour chaque nombre d'erreurs d (0, 1 ou 2), un entier dont le bit i
+    indique que les i premiers caractères du terme cherché correspondent au
+    texte lu avec au plus d erreurs. Chaque caractère lu coûte quelques
+    opérations sur ces trois entiers.
+
+    Les termes sont gardés dans une liste triée, parcourue comme un arbre
+    de préfixes : les états calculés pour un préfixe servent à tous les
+    termes qui le partagent, et dès qu'aucun état n'est plus actif, tous
+    les termes de ce préfixe sont sautés d'un coup (recherche dichotomique).
+
+    Les termes ajoutés sont mis de côté et fusionnés à la liste triée à la
+    recherche suivante (un seul tri pour tout un chargement).
+    """
+
+    def __init__(self):
+        self._termes = []
+        self._nouveaux = []
+
+    def __len__(self):
+        return len(self._termes) + len(self._nouveaux)
+
+    def ajouter(self, terme):
+        """Ajoute un terme (supposé absent du vocabulaire)."""
+        self._nouveaux.append(terme)
+
+    def _tries(self):
+        if self._nouveaux:
+            self._termes.extend(self._nouveaux)
+            self._termes.sort()
+            self._nouveaux = []
+        return self._termes
+
+    def rechercher(self, terme, k):
+        """
+        Retourne la liste des couples (terme, distance) à distance <= k
+        (k vaut 0, 1 ou 2).
+        """
+        if not 0 <= k <= 2:
+            raise ValueError(f"distance non prise en charge : {k}")
+        termes = self._tries()
+        n = len(terme)
+        plein = (1 << (n + 1)) - 1
+        fin_terme = 1 << n
+        masques = {}           # caractère -> positions (décalées de 1) dans le terme
+        for position, c in enumerate(terme):
+            masques[c] = masques.get(c, 0) | (1 << (position + 1))
+
+        # etats[j] : états de l'automate (0, 1 et 2 erreurs) après les j
+        # premiers caractères du chemin courant ; au départ, d suppressions
+        # atteignent la position d
+        etats = [(1, 3 & plein, 7 & plein)]
+        chemin = ""
+        trouves = []
+        i = 0
+        total = len(termes)
+
+        while i < total:
+            mot = termes[i]
+            commun = 0
+            fin = min(len(mot), len(chemin))
+            while commun < fin and mot[commun] == chemin[commun]:
+                commun += 1
+            del etats[commun + 1:]
+            e0, e1, e2 = etats[-1]
+
+            for j in range(commun, len(mot)):
+                b = masques.get(mot[j], 0)
+                # Correspondance, ou une erreur de plus : insertion,
+                # substitution, suppression
+                n0 = (e0 << 1) & b
+                n1 = (((e1 << 1) & b) | e0 | ((e0 | n0) << 1)) & plein
+                n2 = (((e2 << 1) & b) | e1 | ((e1 | n1) << 1)) & plein
+                etat = (n0, n1, n2)
+                etats.append(etat)
+                e0, e1, e2 = etat
+                if not etat[k]:
+                    # Plus aucun état actif : aucun terme commençant par ce
+                    # préfixe ne peut convenir
+                    chemin = mot[:j + 1]
+                    i = bisect_left(termes, chemin + "\U0010ffff", i + 1)
+                    break
+            else:
+                chemin = mot
+                for d in range(k + 1):
+                    if etats[-1][d] & fin_terme:
+                        trouves.append((mot, d))
+                        break
+                i += 1
+
+        return trouves
+
+
+class IndexTermes(_IndexCodes):
+    """
+    Index de recherche approchée sur les titres et les auteurs.
+
+    Les titres et auteurs sont découpés en termes repliés (minuscules, sans
+    accents). Pour chaque terme, on conserve la liste des identifiants des
+    livres qui le contiennent, séparément pour les titres et les auteurs.
+    Les termes de la requête sont cherchés dans le vocabulaire avec une ou
+    deux fautes de frappe tolérées (voir Vocabulaire).
+
+    Les listes ne font que grandir (identifiants croissants) : un livre
+    modifié reçoit un nouvel identifiant et l'ancien devient un identifiant
+    mort, ignoré par les recherches. Les listes sont nettoyées quand les
+    identifiants morts deviennent plus nombreux que les vivants.
+
+    Pour le classement, les livres sont numérotés par note décroissante
+    (rang) et les listes sont converties en bitmaps de rangs (entiers
+    Python) : les intersections se font entre entiers, en C, et les livres
+    les mieux notés d'un résultat sont ses bits les plus bas.
+    Les livres ajoutés depuis la numérotation sont traités à part (fin des
+    listes), jusqu'à la numérotation suivante.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._titres = {}          # terme -> array d'identifiants (titres)
+        self._auteurs = {}         # terme -> array d'identifiants (auteurs)
+        self._notes = array("d")   # identifiant -> note
+        self._vocabulaire = Vocabulaire()
+        self._variantes = {}       # terme de requête -> [(terme, distance)]
+        self._morts = 0
+        # Numérotation par note, construite à la demande : rang -> identifiant,
+        # identifiant -> rang, premier identifiant non numéroté
+        self._ordre = None
+        self._rangs = None
+        self._debut_recents = 0
+        self._bitmaps = {}         # (auteur ?, terme) -> bitmap des rangs
+
+    def __getstate__(self):
+        # La numérotation et les bitmaps sont refaites à la première
+        # recherche : inutile de les sérialiser
+        etat = self.__dict__.copy()
+        etat.update(_ordre=None, _rangs=None, _debut_recents=0, _bitmaps={})
+        return etat
+
+    def ajouter(self, code, titre, auteur, note):
+        """Indexe (ou réindexe) le titre, l'auteur et la note d'un livre."""
+        if code in self._ids:
+            self._retirer_identifiant(code)
+        ident = self._nouvel_identifiant(code)
+        self._notes.append(note)
+
+        for termes, postings in ((termes_recherche(titre), self._titres),
+                                 (termes_recherche(auteur), self._auteurs)):
+            for terme in set(termes):
+                liste = postings.get(terme)
+                if liste is None:
+                    liste = postings[terme] = array("I")
+                    if terme not in self._titres or terme not in self._auteurs:
+                        self._nouveau_terme(terme)
+                liste.append(ident)
+
+    def retirer(self, code):
+        """Retire un livre de l'index (sans effet si le code est inconnu)."""
+        if code in self._ids:
+            self._retirer_identifiant(code)
+
+    def vider(self):
+        """Supprime toutes les entrées de l'index."""
+        self.__init__()
+
+    def _nouveau_terme(self, terme):
+        self._vocabulaire.ajouter(terme)
+        # Les variantes déjà calculées peuvent inclure ce terme
+        self._variantes.clear()
+
+    def _retirer_identifiant(self, code):
+        self._liberer_identifiant(code)
+        self._morts += 1
+        if self._morts > max(1024, len(self._ids)):
+            self._nettoyer()
+
+    def _nettoyer(self):
+        """Retire les identifiants morts des listes (le vocabulaire est gardé)."""
+        codes = self._codes
+        for postings in (self._titres, self._auteurs):
+            for terme, liste in postings.items():
+                postings[terme] = array("I", [i for i in liste if codes[i] is not None])
+        self._morts = 0
+        self._ordre = None
+
+    # ---- Numérotation par note ----
+
+    def _numeroter(self):
+        """
+        (Re)numérote les livres par note décroissante (à note égale, dans
+        l'ordre d'insertion) quand trop de livres ont été ajoutés depuis.
+        """
+        recents = len(self._codes) - self._debut_recents
+        if self._ordre is not None and recents <= 4096 + len(self._ordre) // 32:
+            return
+        ordre = sorted(self._ids.values())
+        ordre.sort(key=self._notes.__getitem__, reverse=True)
+        # Les identifiants morts reçoivent un rang hors de l'ordre
+        rangs = array("I", [len(ordre)]) * len(self._codes)
+        for rang, ident in enumerate(ordre):
+            rangs[ident] = rang
+        self._ordre = ordre
+        self._rangs = rangs
+        self._debut_recents = len(self._codes)
+
+        # Les bitmaps des listes fréquentes (au moins len(ordre) / 64
+        # entrées) sont calculées d'avance et gardées : leur taille totale
+        # et leur coût de calcul sont bornés par le nombre d'entrées des listes
+        self._bitmaps = {}
+        for auteur, postings in ((False, self._titres), (True, self._auteurs)):
+            for terme, liste in postings.items():
+                if len(liste) * 64 >= len(ordre) and liste:
+                    self._bitmaps[(auteur, terme)] = self._bitmap_frequente(liste)
+
+    def _bitmap(self, postings, terme, liste, fin):
+        """Bitmap des rangs des livres numérotés d'une liste (liste[:fin])."""
+        bits = self._bitmaps.get((postings is self._auteurs, terme))
+        if bits is not None:
+            return bits
+        # Liste peu fréquente : bits posés un à un
+        octets = bytearray(len(self._ordre) // 8 + 1)
+        rangs = self._rangs
+        for position in range(fin):
+            rang = rangs[liste[position]]
+            octets[rang >> 3] |= 1 << (rang & 7)
+        return int.from_bytes(octets, "little")
+
+    def _bitmap_frequente(self, liste):
+        """
+        Bitmap des rangs d'une liste longue : un octet par rang est écrit
+        (boucle en C), puis les octets sont regroupés 8 par 8 en bits.
+        """
+        octets = bytearray(len(self._ordre) + 8)
+        deque(map(octets.__setitem__, map(self._rangs.__getitem__, liste), repeat(1)), maxlen=0)
+        bits = 0
+        for decalage in range(8):
+            # octets[decalage::8][j] est l'octet du rang 8j + decalage
+            bits |= int.from_bytes(octets[decalage::8], "little") << decalage
+        return bits
+
+    # ---- Recherche ----
+
+    def _niveaux(self, terme):
+        """
+        Niveaux de correspondance d'un terme de la requête : liste de
+        triplets (poids, bitmap des rangs, ensemble des identifiants
+        récents), du meilleur poids au moins bon. Un livre n'apparaît qu'au
+        niveau de sa meilleure correspondance (titre ou auteur, terme exact
+        ou approché).
+        """
+        variantes = self._variantes.get(terme)
+        if variantes is None:
+            if len(self._variantes) >= MAX_VARIANTES:
+                self._variantes.clear()
+            variantes = self._variantes[terme] = self._vocabulaire.rechercher(terme, distance_max(terme))
+
+        debut = self._debut_recents
+        par_poids = {}
+        for trouve, d in variantes:
+            for postings, facteur in ((self._titres, 1.0), (self._auteurs, POIDS_AUTEUR)):
+                liste = postings.get(trouve)
+                if not liste:
+                    continue
+                fin = bisect_left(liste, debut)
+                bits = self._bitmap(postings, trouve, liste, fin)
+                poids = POIDS_DISTANCE[d] * facteur
+                niveau = par_poids.get(poids)
+                if niveau is None:
+                    par_poids[poids] = [bits, set(liste[fin:])]
+                else:
+                    niveau[0] |= bits
+                    niveau[1].update(liste[fin:])
+
+        niveaux = []
+        vus_bits = 0
+        vus_recents = set()
+        for poids in sorted(par_poids, reverse=True):
+            bits, recents = par_poids[poids]
+            bits &= ~vus_bits
+            recents -= vus_recents
+            if bits or recents:
+                niveaux.append((poids, bits, recents))
+                vus_bits |= bits
+                vus_recents |= recents
+        return niveaux
+
+    def rechercher(self, requete, limite=20):
+        """
+        Retourne au plus `limite` couples (code, pertinence), du plus
+        pertinent au moins pertinent.
+
+        Classement :
+        1. nombre de termes de la requête trouvés dans le livre ;
+        2. somme des poids des termes trouvés (terme exact plutôt
+           qu'approché, titre plutôt qu'auteur) ;
+        3. note décroissante ;
+        4. ordre d'insertion.
+
+        La pertinence est la somme des poids divisée par le nombre de termes
+        de la requête (1.0 : tous les termes trouvés tels quels dans le titre).
+        """
+        termes = list(dict.fromkeys(termes_recherche(requete)))[:MAX_TERMES_REQUETE]
+        if not termes or limite <= 0:
+            return []
+
+        self._numeroter()
+        niveaux = [n for n in (self._niveaux(terme) for terme in termes) if n]
+        resultats = []
+        emis_bits = 0
+        emis_recents = set()
+
+        # Un livre qui correspond à plus de termes est déjà sorti (ou la
+        # limite est atteinte) avant qu'on passe aux combinaisons plus petites
+        for taille in range(len(niveaux), 0, -1):
+            candidats = []
+            for presents in combinations(niveaux, taille):
+                for choix in product(*presents):
+                    candidats.append((round(sum(n[0] for n in choix), 6), choix))
+            candidats.sort(key=lambda c: c[0], reverse=True)
+
+            # Les combinaisons de même poids forment un seul groupe, classé par note
+            for score, groupe in groupby(candidats, key=lambda c: c[0]):
+                bits = 0
+                recents = set()
+                for _, choix in groupe:
+                    communs = choix[0][1]
+                    for niveau in choix[1:]:
+                        communs &= niveau[1]
+                    bits |= communs
+                    ensembles = sorted((n[2] for n in choix), key=len)
+                    recents |= ensembles[0].intersection(*ensembles[1:])
+                bits &= ~emis_bits
+                recents -= emis_recents
+
+                pertinence = round(score / len(termes), 3)
+                for ident in self._mieux_notes(bits, recents, limite - len(resultats)):
+                    resultats.append((self._codes[ident], pertinence))
+                    if ident < self._debut_recents:
+                        emis_bits |= 1 << self._rangs[ident]
+                    else:
+                        emis_recents.add(ident)
+                if len(resultats) >= limite:
+                    return resultats
+
+        return resultats
+
+    def _mieux_notes(self, bits, recents, k):
+        """
+        Les k livres vivants les mieux notés (à note égale, les plus anciens)
+        parmi une bitmap de rangs et un ensemble d'identifiants récents.
+        """
+        codes = self._codes
+        ordre = self._ordre
+        pris = []
+        if bits:
+            octets = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+            for trouve in _OCTET_NON_NUL.finditer(octets):
+                position = trouve.start()
+                octet = octets[position]
+                for bit in range(8):
+                    if not octet >> bit & 1:
+                        continue
+                    rang = position * 8 + bit
+                    if rang >= len(ordre):
+                        break
+                    ident = ordre[rang]
+                    if codes[ident] is not None:
+                        pris.append(ident)
+                if len(pris) >= k:
+                    break
+        if recents:
+            pris.extend(i for i in recents if codes[i] is not None)
+            pris.sort(key=self._cle_note)
+        return pris[:k]
+
+    def _cle_note(self, ident):
+        return -self._notes[ident], ident
+
+
+# -------------------- CATÉGORIES --------------------
+
+# Au-delà d'un livre sur SEUIL_PARCOURS_NOTES, un résultat demandé par note
+# est lu dans l'ordre par note de tout l'index plutôt que trié
+SEUIL_PARCOURS_NOTES = 32
+
+# Mots-clés des requêtes multi-catégories (insensibles à la casse)
+OPERATEURS_ET = {"and", "et"}
+OPERATEURS_OU = {"or", "ou"}
+OPERATEURS_SAUF = {"not", "sauf"}
+
+
+class IndexCategories(_IndexCodes):
+    """
+    Index catégorie -> ensemble des identifiants des livres de la catégorie.
+
+    Les catégories sont supposées déjà normalisées (minuscules, sans espaces
+    superflus), comme celles produites par charger_catalogue.
+
+    L'index garde aussi la note de chaque livre pour renvoyer les résultats
+    par note décroissante : tous les livres sont rangés une fois pour toutes
+    par note (ordre construit à la demande), et un gros résultat est lu en
+    parcourant cet ordre plutôt qu'en le triant. Les livres ajoutés depuis
+    sont triés à part et fusionnés au parcours ; l'ordre est reconstruit
+    quand ils deviennent trop nombreux ou qu'une note change.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._ensembles = {}     # catégorie -> set d'identifiants
+        self._categories = []    # identifiant -> tuple des catégories du livre
+        self._notes = array("d")  # identifiant -> note
+        # Identifiants par note décroissante (None : à construire) et premier
+        # identifiant absent de cet ordre
+        self._ordre = None
+        self._debut_recents = 0
+
+    def __getstate__(self):
+        # L'ordre par note est reconstruit à la demande : inutile de le sérialiser
+        etat = self.__dict__.copy()
+        etat.update(_ordre=None, _debut_recents=0)
+        return etat
+
+    def ajouter(self, code, categories, note=0.0):
+        """Indexe (ou réindexe) les catégories et la note d'un livre."""
+        categories = tuple(categories)
+        ident = self._ids.get(code)
+
+        if ident is None:
+            ident = self._nouvel_identifiant(code)
+            self._categories.append(categories)
+            self._notes.append(note)
+            anciennes = ()
+        else:
+            if self._notes[ident] != note:
+                self._notes[ident] = note
+                if ident < self._debut_recents:
+                    # Livre déjà rangé dans l'ordre par note : à refaire
+                    self._ordre = None
+            anciennes = self._categories[ident]
+            if anciennes == categories:
+                return
+            self._categories[ident] = categories
+
+        for cat in set(anciennes) - set(categories):
+            self._retirer_de(cat, ident)
+        for cat in categories:
+            ensemble = self._ensembles.get(cat)
+            if ensemble is None:
+                ensemble = self._ensembles[cat] = set()
+            ensemble.add(ident)
+
+    def retirer(self, code):
+        """Retire un livre de l'index (sans effet si le code est inconnu)."""
+        ident = self._liberer_identifiant(code)
+        if ident is None:
+            return
+        for cat in self._categories[ident]:
+            self._retirer_de(cat, ident)
+        self._categories[ident] = None
+
+    def vider(self):
+        """Supprime toutes les entrées de l'index."""
+        self._vider_identifiants()
+        self._ensembles.clear()
+        self._categories.clear()
+        self._notes = array("d")
+        self._ordre = None
+        self._debut_recents = 0
+
+    def _retirer_de(self, cat, ident):
+        ensemble = self._ensembles.get(cat)
+        if ensemble is None:
+            return
+        ensemble.discard(ident)
+        if not ensemble:
+            del self._ensembles[cat]
+
+    def categories(self):
+        """Retourne la liste triée des catégories présentes dans l'index."""
+        return sorted(self._ensembles)
+
+    def effectif(self, cat):
+        """Nombre de livres dans une catégorie (sans construire de liste)."""
+        return len(self._ensembles.get(cat, ()))
+
+    def rechercher(self, cat, par_note=False):
+        """
+        Retourne les codes des livres d'une catégorie, dans l'ordre
+        d'insertion, ou par note décroissante si par_note (itérateur).
+        """
+        ensemble = self._ensembles.get(cat, set())
+        return self._par_note(ensemble) if par_note else self._vers_codes(ensemble)
+
+    def rechercher_requete(self, requete, par_note=False):
+        """
+        Évalue une requête booléenne sur les catégories et retourne les codes
+        correspondants, dans l'ordre d'insertion, ou par note décroissante
+        si par_note (itérateur ; à note égale, dans l'ordre d'insertion).
+
+        Syntaxe (mots-clés insensibles à la casse) :
+        - "classique AND drame"       (ou ET)
+        - "aventure OR poésie"        (ou OU)
+        - "classique NOT roman"       (ou SAUF) : classique et pas roman
+        - parenthèses pour grouper : "(drame OR roman) AND classique"
+
+        Le ET est prioritaire sur le OU. Lève ValueError si la requête est
+        mal formée.
+        """
+        ensemble = self._evaluer(analyser_requete(requete))
+        return self._par_note(ensemble) if par_note else self._vers_codes(ensemble)
+
+    def _vers_codes(self, identifiants):
+        # Trier les identifiants redonne l'ordre d'insertion du catalogue :
+        # coût proportionnel à la taille du résultat
+        codes = self._codes
+        return [codes[ident] for ident in sorted(identifiants)]
+
+    def _cle_note(self, ident):
+        return -self._notes[ident], ident
+
+    def _par_note(self, identifiants):
+        """
+        Itère sur les codes des identifiants par note décroissante (à note
+        égale, dans l'ordre d'insertion).
+
+        Un petit résultat est trié directement. Un gros résultat (plus d'un
+        livre sur SEUIL_PARCOURS_NOTES) est lu dans l'ordre par note de tout
+        l'index : les k premiers livres coûtent environ k * SEUIL_PARCOURS_NOTES
+        tests d'appartenance, sans tri ni liste de la taille du résultat.
+        """
+        codes = self._codes
+        if len(identifiants) * SEUIL_PARCOURS_NOTES < len(self._ids):
+            for ident in sorted(identifiants, key=self._cle_note):
+                yield codes[ident]
+            return
+
+        ordre = self._ordre_notes()
+        recents = sorted(
+            (ident for ident in range(self._debut_recents, len(codes)) if ident in identifiants),
+            key=self._cle_note,
+        )
+        if recents:
+            ordre = heapq.merge(ordre, recents, key=self._cle_note)
+        for ident in ordre:
+            if ident in identifiants:
+                yield codes[ident]
+
+    def _ordre_notes(self):
+        recents = len(self._codes) - self._debut_recents
+        if self._ordre is None or recents > 4096 + len(self._ordre) // 32:
+            ordre = sorted(self._ids.values())
+            ordre.sort(key=self._notes.__getitem__, reverse=True)
+            self._ordre = ordre
+            self._debut_recents = len(self._codes)
+        return self._ordre
+
+    def _evaluer(self, noeud):
+        """
+        Évalue un nœud de l'arbre de requête en ensemble d'identifiants.
+
+        Pour un ET, on intersecte en partant du plus petit ensemble puis on
+        soustrait les exclusions : le coût dépend de la taille des ensembles
+        manipulés, pas de celle du catalogue. Seule une requête composée
+        uniquement d'exclusions ("NOT roman") doit partir de tout le catalogue.
+        """
+        genre = noeud[0]
+
+        if genre == "cat":
+            return self._ensembles.get(noeud[1], set())
+
+        if genre == "ou":
+            resultat = set()
+            for enfant in noeud[1]:
+                resultat |= self._evaluer(enfant)
+            return resultat
+
+        # genre == "et" : noeud = ("et", inclus, exclus)
+        inclus = sorted((self._evaluer(e) for e in noeud[1]), key=len)
+        if inclus:
+            resultat = set(inclus[0])
+            for ensemble in inclus[1:]:
+                if not resultat:
+                    break
+                resultat &= ensemble
+        else:
+            resultat = set(self._ids.values())
+
+        for enfant in noeud[2]:
+            if not resultat:
+                break
+            resultat -= self._evaluer(enfant)
+        return resultat
+
+
+def analyser_requete(requete):
+    """
+    Arbre d'une requête multi-catégories (voir _AnalyseurRequete) ; lève
+    ValueError si la requête est mal formée.
+    """
+    return _AnalyseurRequete(requete).analyser()
+
+
+class _AnalyseurRequete:
+    """
+    Analyseur syntaxique des requêtes multi-catégories.
+
+    Grammaire :
+        ou     := et (OR et)*
+        et     := sauf ((AND)? sauf)*      -- "x NOT y" vaut "x AND NOT y"
+        sauf   := NOT sauf | atome
+        atome  := "(" ou ")" | categorie
+
+    Une catégorie peut contenir plusieurs mots ("science fiction") : les mots
+    consécutifs qui ne sont pas des mots-clés forment une seule catégorie.
+
+    L'arbre produit est fait de tuples :
+    ("cat", nom), ("ou", [enfants]), ("et", [inclus], [exclus]).
+    """
+
+    def __init__(self, requete):
+        self.jetons = self._decouper(requete)
+        self.position = 0
+
+    @staticmethod
+    def _decouper(requete):
+        jetons = []
+        for morceau in requete.replace("(", " ( ").replace(")", " ) ").split():
+            mot = morceau.lower()
+            if mot in OPERATEURS_ET:
+                jetons.append(("et", mot))
+            elif mot in OPERATEURS_OU:
+                jetons.append(("ou", mot))
+            elif mot in OPERATEURS_SAUF:
+                jetons.append(("sauf", mot))
+            elif mot in ("(", ")"):
+                jetons.append((mot, mot))
+            elif jetons and jetons[-1][0] == "cat":
+                # Catégorie en plusieurs mots
+                jetons[-1] = ("cat", jetons[-1][1] + " " + mot)
+            else:
+                jetons.append(("cat", mot))
+        return jetons
+
+    def _courant(self):
+        if self.position < len(self.jetons):
+            return self.jetons[self.position][0]
+        return None
+
+    def analyser(self):
+        if not self.jetons:
+            raise ValueError("requête vide")
+        arbre = self._ou()
+        if self._courant() is not None:
+            raise ValueError(f"mot inattendu : '{self.jetons[self.position][1]}'")
+        return arbre
+
+    def _ou(self):
+        enfants = [self._et()]
+        while self._courant() == "ou":
+            self.position += 1
+            enfants.append(self._et())
+        return enfants[0] if len(enfants) == 1 else ("ou", enfants)
+
+    def _et(self):
+        inclus = []
+        exclus = []
+        self._sauf(inclus, exclus)
+        while self._courant() in ("et", "sauf"):
+            if self._courant() == "et":
+                self.position += 1
+            self._sauf(inclus, exclus)
+        if len(inclus) == 1 and not exclus:
+            return inclus[0]
+        return ("et", inclus, exclus)
+
+    def _sauf(self, inclus, exclus):
+        # Un nombre impair de NOT fait passer le terme dans les exclusions
+        negations = 0
+        while self._courant() == "sauf":
+            self.position += 1
+            negations += 1
+        (exclus if negations % 2 else inclus).append(self._atome())
+
+    def _atome(self):
+        genre = self._courant()
+        if genre == "cat":
+            nom = self.jetons[self.position][1]
+            self.position += 1
+            return ("cat", nom)
+        if genre == "(":
+            self.position += 1
+            noeud = self._ou()
+            if self._courant() != ")":
+                raise ValueError("parenthèse fermante manquante")
+            self.position += 1
+            return noeud
+        if genre is None:
+            raise ValueError("requête incomplète")
+        raise ValueError(f"mot inattendu : '{self.jetons[self.position][1]}'")
+
+
+# -------------------- COMPLÉTION --------------------
+
+# Au-delà de ce nombre de clés pour un préfixe, les meilleures complétions
+# (par poids) sont gardées en mémoire jusqu'à la modification suivante
+SEUIL_CACHE_COMPLETION = 256
+
+# Majorant de toutes les clés qui commencent par un préfixe donné
+_FIN_PREFIXE = "\U0010ffff"
+
+
+class Prefixes:
+    """
+    Ensemble de clés (chaînes) avec complétion par préfixe.
+
+    Chaque clé a un poids (nombre de livres qui la portent) et une forme
+    affichée. Les clés sont gardées dans une liste triée : les clés d'un
+    préfixe y forment une tranche, trouvée par dichotomie.
+
+    Comme pour Vocabulaire, les clés ajoutées sont mises de côté et
+    fusionnées à la liste triée à la complétion suivante. Une clé retirée
+    reste dans la liste (ignorée) jusqu'au prochain nettoyage ; une clé
+    retirée puis remise peut y apparaître deux fois (doublons voisins).
+    """
+
+    def __init__(self):
+        self._poids = {}       # clé -> poids
+        self._formes = {}      # clé -> forme affichée, si différente de la clé
+        self._triees = []
+        self._nouvelles = []
+        self._absentes = 0     # clés retirées encore présentes dans les listes
+        self._meilleures = {}  # (préfixe, k) -> meilleures clés par poids
+
+    def __getstate__(self):
+        etat = self.__dict__.copy()
+        etat["_meilleures"] = {}
+        return etat
+
+    def __len__(self):
+        return len(self._poids)
+
+    def __contains__(self, cle):
+        return cle in self._poids
+
+    def poids(self, cle):
+        return self._poids.get(cle, 0)
+
+    def forme(self, cle):
+        return self._formes.get(cle, cle)
+
+    def ajouter(self, cle, forme=None):
+        """Ajoute une occurrence de `cle` (la première forme donnée est gardée)."""
+        poids = self._poids.get(cle)
+        if poids is None:
+            self._poids[cle] = 1
+            if forme is not None and forme != cle:
+                self._formes[cle] = forme
+            self._nouvelles.append(cle)
+        else:
+            self._poids[cle] = poids + 1
+        if self._meilleures:
+            self._meilleures.clear()
+
+    def retirer(self, cle):
+        """Retire une occurrence de `cle` (sans effet si la clé est absente)."""
+        poids = self._poids.get(cle)
+        if poids is None:
+            return
+        if poids > 1:
+            self._poids[cle] = poids - 1
+        else:
+            del self._poids[cle]
+            self._formes.pop(cle, None)
+            self._absentes += 1
+        if self._meilleures:
+            self._meilleures.clear()
+
+    def _tries(self):
+        if self._absentes > 1024 + len(self._poids) // 4:
+            self._triees = sorted(self._poids)
+            self._nouvelles = []
+            self._absentes = 0
+        elif self._nouvelles:
+            # Deux suites triées : la fusion du tri de Python est linéaire
+            self._nouvelles.sort()
+            self._triees.extend(self._nouvelles)
+            self._triees.sort()
+            self._nouvelles = []
+        return self._triees
+
+    def _tranche(self, triees, debut, fin):
+        """Clés présentes de triees[debut:fin], sans doublons."""
+        poids = self._poids
+        precedente = None
+        for i in range(debut, fin):
+            cle = triees[i]
+            if cle != precedente and cle in poids:
+                yield cle
+            precedente = cle
+
+    def cles(self, prefixe):
+        """Itère sur les clés commençant par `prefixe`, dans l'ordre alphabétique."""
+        triees = self._tries()
+        debut = bisect_left(triees, prefixe)
+        return self._tranche(triees, debut, bisect_left(triees, prefixe + _FIN_PREFIXE, debut))
+
+    def completer(self, prefixe, k, par_poids=True):
+        """
+        Retourne au plus `k` clés commençant par `prefixe` : les plus
+        lourdes d'abord (puis par ordre alphabétique) si `par_poids`, sinon
+        dans l'ordre alphabétique.
+        """
+        if k <= 0:
+            return []
+        triees = self._tries()
+        debut = bisect_left(triees, prefixe)
+        fin = bisect_left(triees, prefixe + _FIN_PREFIXE, debut)
+
+        if not par_poids:
+            # Les k premières de la tranche (plus quelques clés ignorées)
+            return list(islice(self.cles(prefixe), k))
+
+        cache = fin - debut > SEUIL_CACHE_COMPLETION
+        if cache:
+            meilleures = self._meilleures.get((prefixe, k))
+            if meilleures is not None:
+                return list(meilleures)
+        poids = self._poids
+        meilleures = heapq.nsmallest(k, self._tranche(triees, debut, fin), key=lambda c: (-poids[c], c))
+        if cache:
+            self._meilleures[(prefixe, k)] = meilleures
+        return list(meilleures)
+
+
+def mots_titre(titre):
+    """
+    Mots d'un titre proposés à la complétion : en minuscules (accents
+    compris), d'au moins deux caractères, sans doublons.
+    """
+    return {mot for mot in _MOT.findall(titre.lower()) if len(mot) > 1}
+
+
+def cles_auteur(nom):
+    """
+    Clés de complétion d'un auteur : la suite de son nom replié à partir de
+    chaque mot ("victor hugo", "hugo"), pour compléter aussi bien par le
+    prénom que par le nom. Chaque clé se termine par le nom complet
+    (après un caractère nul) : deux auteurs de même nom de famille gardent
+    des clés distinctes.
+    """
+    mots = replier(nom).split()
+    complet = "\x00" + " ".join(mots)
+    return {" ".join(mots[i:]) + complet for i in range(len(mots))}
+
+
+class IndexCompletion:
+    """
+    Complétion par préfixe (saisie assistée) :
+    - des codes, par ordre alphabétique
+    - des mots des titres (forme en minuscules, accents compris), du plus
+      fréquent au moins fréquent ; le préfixe est comparé sans accents
+    - des auteurs (nom normalisé, voir normaliser_auteur), de celui qui a le plus de
+      livres à celui qui en a le moins ; le préfixe peut être le début du
+      prénom ou du nom
+
+    Retirer un livre demande son titre et son auteur (ceux qui ont été
+    indexés) : l'index ne garde aucune donnée par livre.
+    """
+
+    def __init__(self):
+        self.codes = Prefixes()
+        self.mots = Prefixes()
+        self.auteurs = Prefixes()
+        # Clés déjà calculées (mot -> clé, nom -> clés) : un même mot ou
+        # auteur revient dans de nombreux livres
+        self._cles_mots = {}
+        self._cles_auteurs = {}
+
+    def __getstate__(self):
+        etat = self.__dict__.copy()
+        etat["_cles_mots"] = {}
+        etat["_cles_auteurs"] = {}
+        return etat
+
+    def _cles_titre(self, titre):
+        cles = self._cles_mots
+        for mot in mots_titre(titre):
+            cle = cles.get(mot)
+            if cle is None:
+                cle = cles[mot] = replier(mot)
+            yield cle, mot
+
+    def _cles_auteur(self, auteur):
+        resultat = self._cles_auteurs.get(auteur)
+        if resultat is None:
+            nom = normaliser_auteur(auteur)
+            resultat = self._cles_auteurs[auteur] = nom, tuple(cles_auteur(nom))
+        return resultat
+
+    def ajouter(self, code, titre, auteur):
+        self.codes.ajouter(code)
+        for cle, mot in self._cles_titre(titre):
+            self.mots.ajouter(cle, mot)
+        nom, cles = self._cles_auteur(auteur)
+        for cle in cles:
+            self.auteurs.ajouter(cle, nom)
+
+    def retirer(self, code, titre, auteur):
+        self.codes.retirer(code)
+        for cle, _ in self._cles_titre(titre):
+            self.mots.retirer(cle)
+        for cle in self._cles_auteur(auteur)[1]:
+            self.auteurs.retirer(cle)
+
+    def vider(self):
+        """Supprime toutes les entrées de l'index."""
+        self.__init__()
+
+    def completer_codes(self, prefixe, k):
+        return self.codes.completer(prefixe.strip().upper(), k, par_poids=False)
+
+    def completer_mots(self, prefixe, k):
+        return [self.mots.forme(cle) for cle in self.mots.completer(replier(prefixe.strip()), k)]
+
+    def completer_auteurs(self, prefixe, k):
+        # Un auteur a une clé par mot de son nom : on en demande davantage,
+        # puis on garde chaque auteur une fois
+        prefixe = " ".join(replier(prefixe).split())
+        noms = []
+        for cle in self.auteurs.completer(prefixe, 4 * k):
+            nom = self.auteurs.forme(cle)
+            if nom not in noms:
+                noms.append(nom)
+                if len(noms) == k:
+                    break
+        return noms
+
+
+# -------------------- AUTEURS --------------------
+
+def _cle_auteur(auteur):
+    return replier(normaliser_auteur(auteur))
+
+
+class IndexAuteurs(IndexCategories):
+    """
+    Index auteur -> identifiants de ses livres.
+
+    Les noms sont comparés normalisés (voir normaliser_auteur, puis sans
+    accents ni majuscules) : "Élie Wiesel", "elie  wiesel " et un
+    "Ã‰lie Wiesel" mal décodé désignent le même auteur.
+
+    Chaque auteur est traité comme l'unique catégorie de ses livres : les
+    livres d'un auteur se lisent dans l'ordre du catalogue ou par note
+    décroissante comme ceux d'une catégorie. Les noms normalisés sont en
+    plus gardés triés (Prefixes) pour la recherche par début de nom.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._noms = Prefixes()   # clé -> nombre de livres, forme : nom affiché
+        # Nom tel que chargé -> (nom normalisé, (clé,)) : le tuple des
+        # « catégories » est partagé par tous les livres de l'auteur
+        self._cles_noms = {}
+
+    def __getstate__(self):
+        etat = super().__getstate__()
+        etat["_cles_noms"] = {}
+        return etat
+
+    def _cle(self, auteur):
+        # Mise en cache des noms du catalogue seulement (pas des requêtes)
+        resultat = self._cles_noms.get(auteur)
+        if resultat is None:
+            nom = normaliser_auteur(auteur)
+            resultat = self._cles_noms[auteur] = nom, (replier(nom),)
+        return resultat
+
+    def ajouter(self, code, auteur, note=0.0):
+        """Indexe (ou réindexe) l'auteur et la note d'un livre."""
+        nom, cles = self._cle(auteur)
+        cle = cles[0]
+        ident = self._ids.get(code)
+
+        if ident is None:
+            # Nouveau livre (cas du chargement) : sans passer par la
+            # réindexation générale d'IndexCategories
+            ident = self._nouvel_identifiant(code)
+            self._categories.append(cles)
+            self._notes.append(note)
+            ensemble = self._ensembles.get(cle)
+            if ensemble is None:
+                ensemble = self._ensembles[cle] = set()
+            ensemble.add(ident)
+            self._noms.ajouter(cle, nom)
+            return
+
+        ancienne = self._categories[ident][0]
+        super().ajouter(code, cles, note)
+        if ancienne != cle:
+            self._noms.retirer(ancienne)
+            self._noms.ajouter(cle, nom)
+
+    def retirer(self, code):
+        """Retire un livre de l'index (sans effet si le code est inconnu)."""
+        ident = self._ids.get(code)
+        if ident is not None:
+            self._noms.retirer(self._categories[ident][0])
+        super().retirer(code)
+
+    def vider(self):
+        super().vider()
+        self._noms = Prefixes()
+        self._cles_noms.clear()
+
+    def auteurs(self, prefixe=""):
+        """Noms des auteurs dont le nom commence par `prefixe`, par ordre alphabétique."""
+        return [self._noms.forme(cle) for cle in self._noms.cles(_cle_auteur(prefixe))]
+
+    def nombre_livres(self, auteur):
+        """Nombre de livres d'un auteur (sans construire de liste)."""
+        return self.effectif(_cle_auteur(auteur))
+
+    def rechercher(self, auteur, par_note=False):
+        """
+        Retourne les codes des livres de l'auteur, dans l'ordre d'insertion,
+        ou par note décroissante si par_note (itérateur).
+        """
+        return super().rechercher(_cle_auteur(auteur), par_note)
+
+    def rechercher_prefixe(self, prefixe, par_note=False):
+        """
+        Comme rechercher, pour tous les auteurs dont le nom commence par
+        `prefixe` ("victor h" : Victor Hugo, Victor Hamel...).
+        """
+        ensembles = self._ensembles
+        identifiants = set()
+        for cle in self._noms.cles(_cle_auteur(prefixe)):
+            identifiants |= ensembles[cle]
+        return self._par_note(identifiants) if par_note else self._vers_codes(identifiants)
@@ -1,19 +1,47 @@
 """
 Logique métier de l'application :
 
-- Fonctions de recherche dans le catalogue
-- Gestion de la liste d'emprunt courante
-- Validation d'un emprunt (enregistrement dans l'historique)
+- Fonctions de recherche dans le catalogue (listes de résultats, ou
+  itérateurs iterer_* qui les produisent au fur et à mesure) ; les
+  résultats des recherches par titre, catégorie et auteur sont mis en
+  cache (cache.py), qu'ils soient lus en liste ou au fur et à mesure
+- Complétion par préfixe des codes, mots des titres et auteurs
+- Gestion de la liste d'emprunt courante (ListeEmprunt), livre par livre
+  ou par lots de codes
+- Validation d'un emprunt (enregistrement dans l'historique) et retours,
+  avec vérification des exemplaires disponibles
 
 Les livres sont des dictionnaires avec les clés :
 "code", "titre", "auteur", "note", "categories".
 """
 
+import heapq
+from itertools import islice
+
+from cache import en_cache
+from config import HISTORIQUE_FILE, LIMITE_COMPLETION, LIMITE_RECHERCHE_APPROCHEE
 from data import sauvegarder_emprunt
+from index import IndexAuteurs, IndexCategories, IndexCompletion, IndexTermes, replier
+from mesures import instrumenter
 
 
 # -------------------- RECHERCHE --------------------
 
+# Ordres possibles des résultats de recherche (paramètre `tri`)
+TRIS = ("note", "titre", "auteur")
+
+
+def _requete_normalisee(texte):
+    """Clé de cache d'une requête de titre ou de catégorie."""
+    return texte.strip().lower()
+
+
+def _auteur_normalise(nom):
+    """Clé de cache d'une recherche par auteur."""
+    return replier(" ".join(nom.split()))
+
+
+@instrumenter("logic.rechercher_par_code", lignes=lambda livre: livre is not None)
 def rechercher_par_code(catalogue, code):
     """
     Recherche un livre dans le catalogue à partir de son code.
@@ -32,95 +60,413 @@ def rechercher_par_code(catalogue, code):
     return catalogue.get(code)
 
 
-def rechercher_par_titre(catalogue, texte_titre):
+def _cle_tri(tri):
+    """Clé de tri des livres pour un ordre de TRIS."""
+    if tri == "note":
+        return lambda livre: -livre["note"]
+    if tri == "titre":
+        return lambda livre: replier(livre["titre"])
+    if tri == "auteur":
+        return lambda livre: replier(livre["auteur"])
+    raise ValueError(f"tri inconnu : {tri!r}")
+
+
+def _ordonner(livres, tri=None, limite=None):
     """
-    Recherche des livres dont le titre contient le texte donné.
+    Itérateur sur des livres dans l'ordre demandé, au plus `limite`.
 
-    - Recherche partielle
-    - Insensible à la casse
-    - Retourne une liste de livres (peut être vide)
+    - tri=None : ordre d'arrivée, les livres ne sont pas mis en liste
+    - avec une limite : sélection des `limite` premiers par tas, en
+      mémoire proportionnelle à la limite et non au nombre de livres
+    - sans limite : tri complet
+
+    À clé égale, les livres gardent leur ordre d'arrivée.
+    """
+    if tri is None:
+        return iter(livres) if limite is None else islice(livres, limite)
+    cle = _cle_tri(tri)
+    if limite is None:
+        return iter(sorted(livres, key=cle))
+    return iter(heapq.nsmallest(limite, livres, key=cle))
+
+
+# Les recherches par titre, catégorie(s) et auteur sont mesurées sur
+# l'itérateur, sous le nom de la recherche : la console le lit directement,
+# le mode par lots et le service via la liste rechercher_par_*
+@instrumenter("logic.rechercher_par_titre", lignes=len)
+@en_cache(_requete_normalisee)
+def iterer_par_titre(catalogue, texte_titre, tri=None, limite=None):
+    """
+    Comme rechercher_par_titre, mais retourne un itérateur : les livres sont
+    produits au fur et à mesure, sans construire la liste des résultats.
     """
 
     if texte_titre is None:
-        return []
+        return
 
     fragment = texte_titre.strip().lower()
     if fragment == "":
-        return []
-
-    resultats = []
+        return
 
-    for livre in catalogue.values():
-        titre_minuscule = livre["titre"].lower()
-        if fragment in titre_minuscule:
-            resultats.append(livre)
+    index = getattr(catalogue, "index_titres", None)
+    if index is not None:
+        livres = (catalogue[code] for code in index.rechercher(fragment))
+    else:
+        livres = (livre for livre in catalogue.values() if fragment in livre["titre"].lower())
 
-    return resultats
+    yield from _ordonner(livres, tri, limite)
 
 
-def rechercher_par_categorie(catalogue, categorie):
+def rechercher_par_titre(catalogue, texte_titre, tri=None, limite=None):
     """
-    Recherche des livres appartenant à une catégorie donnée.
+    Recherche des livres dont le titre contient le texte donné.
 
+    - Recherche partielle
     - Insensible à la casse
-    - Retourne une liste de livres (possiblement vide)
+    - tri : None (ordre du catalogue), "note" (décroissante), "titre" ou
+      "auteur" (alphabétique, sans tenir compte des accents)
+    - limite : nombre maximal de livres retournés (None : tous)
+    - Retourne une liste de livres (peut être vide)
+
+    Si le catalogue dispose d'un index de titres (catalogue chargé par
+    charger_catalogue), on l'utilise au lieu de parcourir tous les livres.
+    """
+    return list(iterer_par_titre(catalogue, texte_titre, tri, limite))
+
+
+@instrumenter("logic.rechercher_par_categorie", lignes=len)
+@en_cache(_requete_normalisee)
+def iterer_par_categorie(catalogue, categorie, tri=None, limite=None):
+    """
+    Comme rechercher_par_categorie, mais retourne un itérateur : les livres
+    sont produits au fur et à mesure, sans construire la liste des résultats.
     """
 
     if categorie is None:
-        return []
+        return
 
     cat = categorie.strip().lower()
     if cat == "":
+        return
+
+    index = getattr(catalogue, "index_categories", None)
+    if index is None:
+        # livre["categories"] est une liste de chaînes déjà en minuscules
+        livres = (livre for livre in catalogue.values() if cat in livre["categories"])
+        yield from _ordonner(livres, tri, limite)
+    elif tri == "note":
+        # L'index fournit directement les livres par note décroissante
+        for code in islice(index.rechercher(cat, par_note=True), limite):
+            yield catalogue[code]
+    else:
+        livres = (catalogue[code] for code in index.rechercher(cat))
+        yield from _ordonner(livres, tri, limite)
+
+
+def rechercher_par_categorie(catalogue, categorie, tri=None, limite=None):
+    """
+    Recherche des livres appartenant à une catégorie donnée.
+
+    - Insensible à la casse
+    - tri et limite : comme pour rechercher_par_titre
+    - Retourne une liste de livres (possiblement vide)
+
+    Si le catalogue dispose d'un index de catégories, on l'utilise au lieu
+    de parcourir tous les livres ; les meilleures notes d'une grande
+    catégorie sont alors obtenues sans trier toute la catégorie.
+    """
+    return list(iterer_par_categorie(catalogue, categorie, tri, limite))
+
+
+@instrumenter("logic.rechercher_par_categories", lignes=len)
+def iterer_par_categories(catalogue, requete, tri=None, limite=None):
+    """
+    Comme rechercher_par_categories, mais retourne un itérateur : les livres
+    sont produits au fur et à mesure, sans construire la liste des résultats.
+    """
+
+    if requete is None or requete.strip() == "":
+        return
+
+    index = getattr(catalogue, "index_categories", None)
+    if index is None:
+        # Catalogue sans index (dictionnaire simple) : on en construit un
+        # temporaire, ce qui revient au coût d'un parcours complet
+        index = IndexCategories()
+        for livre in catalogue.values():
+            index.ajouter(livre["code"], livre["categories"], livre["note"])
+
+    try:
+        codes = index.rechercher_requete(requete, par_note=tri == "note")
+    except ValueError as e:
+        print("[ERREUR] Requête de catégories invalide :", e)
+        return
+
+    if tri == "note":
+        for code in islice(codes, limite):
+            yield catalogue[code]
+    else:
+        yield from _ordonner((catalogue[code] for code in codes), tri, limite)
+
+
+def rechercher_par_categories(catalogue, requete, tri=None, limite=None):
+    """
+    Recherche des livres à partir d'une requête booléenne sur les catégories.
+
+    Exemples :
+    - "classique AND drame NOT roman"
+    - "aventure OR poésie"
+    - "(drame OU roman) ET classique SAUF historique"
+
+    - Insensible à la casse (catégories et mots-clés)
+    - tri et limite : comme pour rechercher_par_titre
+    - Retourne une liste de livres (possiblement vide)
+    - Si la requête est mal formée, affiche un message d'erreur et retourne []
+    """
+    return list(iterer_par_categories(catalogue, requete, tri, limite))
+
+
+@instrumenter("logic.rechercher_par_auteur", lignes=len)
+@en_cache(_auteur_normalise)
+def iterer_par_auteur(catalogue, nom, tri=None, limite=None):
+    """
+    Comme rechercher_par_auteur, mais retourne un itérateur : les livres
+    sont produits au fur et à mesure, sans construire la liste des résultats.
+    """
+
+    if nom is None:
+        return
+
+    nom = nom.strip()
+    prefixe = nom.endswith("*")
+    if prefixe:
+        nom = nom[:-1].strip()
+    if nom == "":
+        return
+
+    index = getattr(catalogue, "index_auteurs", None)
+    if index is None:
+        # Catalogue sans index (dictionnaire simple) : index temporaire
+        index = IndexAuteurs()
+        for livre in catalogue.values():
+            index.ajouter(livre["code"], livre["auteur"], livre["note"])
+
+    rechercher = index.rechercher_prefixe if prefixe else index.rechercher
+    if tri == "note":
+        # L'index fournit directement les livres par note décroissante
+        for code in islice(rechercher(nom, par_note=True), limite):
+            yield catalogue[code]
+    else:
+        yield from _ordonner((catalogue[code] for code in rechercher(nom)), tri, limite)
+
+
+def rechercher_par_auteur(catalogue, nom, tri=None, limite=None):
+    """
+    Recherche des livres d'un auteur.
+
+    - Nom complet, insensible à la casse, aux accents et aux espaces
+      superflues ("elie wiesel" trouve "Élie Wiesel")
+    - Nom terminé par * : tous les auteurs dont le nom commence ainsi
+      ("victor h*")
+    - tri et limite : comme pour rechercher_par_titre ; avec tri="note",
+      les livres sont lus par note décroissante dans l'index, sans tri
+    - Retourne une liste de livres (possiblement vide)
+    """
+    return list(iterer_par_auteur(catalogue, nom, tri, limite))
+
+
+@instrumenter("logic.rechercher_approximative", lignes=len)
+def rechercher_approximative(catalogue, texte, limite=LIMITE_RECHERCHE_APPROCHEE):
+    """
+    Recherche approchée des livres par mots du titre ou de l'auteur.
+
+    - Insensible à la casse et aux accents ("miserables" trouve "Misérables")
+    - Tolère une faute de frappe dans les mots de 4 à 6 lettres, deux
+      au-delà ("flaubret" trouve "Flaubert")
+    - Livres classés par pertinence : nombre de mots trouvés, mots exacts
+      avant mots approchés, titre avant auteur ; à pertinence égale, par
+      note décroissante
+    - Retourne au plus `limite` livres (liste possiblement vide)
+    """
+
+    if texte is None or texte.strip() == "":
         return []
 
-    resultats = []
+    index = getattr(catalogue, "index_termes", None)
+    if index is None:
+        # Catalogue sans index (dictionnaire simple) : index temporaire
+        index = IndexTermes()
+        for livre in catalogue.values():
+            index.ajouter(livre["code"], livre["titre"], livre["auteur"], livre["note"])
 
-    for livre in catalogue.values():
-        # livre["categories"] est une liste de chaînes déjà en minuscules
-        if cat in livre["categories"]:
-            resultats.append(livre)
+    return [catalogue[code] for code, _ in index.rechercher(texte, limite)]
 
-    return resultats
+
+# -------------------- COMPLÉTION --------------------
+
+# Ce que complète completer (paramètre `sorte`)
+SORTES_COMPLETION = ("code", "titre", "auteur")
+
+
+def completer(catalogue, prefixe, sorte="code", limite=LIMITE_COMPLETION):
+    """
+    Propositions de complétion d'un début de saisie (au plus `limite`) :
+
+    - sorte "code" : codes commençant par `prefixe` (insensible à la
+      casse), par ordre alphabétique
+    - sorte "titre" : mots des titres, en minuscules, des plus fréquents
+      aux moins fréquents (préfixe insensible aux accents)
+    - sorte "auteur" : noms d'auteurs dont le prénom ou le nom commence par
+      `prefixe`, de celui qui a le plus de livres à celui qui en a le moins
+
+    Retourne une liste de chaînes (possiblement vide).
+    """
+
+    if sorte not in SORTES_COMPLETION:
+        raise ValueError(f"sorte de complétion inconnue : {sorte!r}")
+    if prefixe is None:
+        return []
+
+    index = getattr(catalogue, "index_completion", None)
+    if index is None:
+        # Catalogue sans index (dictionnaire simple) : index temporaire
+        index = IndexCompletion()
+        for code, livre in catalogue.items():
+            index.ajouter(code, livre["titre"], livre["auteur"])
+
+    if sorte == "code":
+        return index.completer_codes(prefixe, limite)
+    if sorte == "titre":
+        return index.completer_mots(prefixe, limite)
+    return index.completer_auteurs(prefixe, limite)
 
 
 # -------------------- LISTE D'EMPRUNT --------------------
 
-def ajouter_livre_emprunt(catalogue, liste_emprunt, code):
+MESSAGE_CODE_VIDE = "[ERREUR] Code vide. Merci de saisir un code valide."
+
+
+class ListeEmprunt:
     """
-    Ajoute un livre à la liste d'emprunt courante à partir de son code.
+    Liste d'emprunt courante : les livres dans l'ordre où ils ont été
+    ajoutés, sans doublon.
 
-    - Vérifie que le code n'est pas vide
-    - Vérifie que le livre existe dans le catalogue
-    - Vérifie que le livre n'est pas déjà dans la liste d'emprunt
-    - Ajoute le livre si tout est OK
+    Les livres sont rangés dans un dictionnaire code -> livre (qui garde
+    l'ordre d'insertion) : ajout, retrait et test de présence d'un code se
+    font en temps constant, quelle que soit la taille de la liste.
 
-    Affiche des messages d'information / d'erreur pour l'utilisateur.
+    Se parcourt comme une liste de livres : for livre in liste,
+    len(liste), if liste, afficher_tableau_livres(liste)...
+
+    Si `disponibilites` (SuiviDisponibilites, voir data.ouvrir_disponibilites)
+    est donné, les fonctions de ce module refusent les livres dont aucun
+    exemplaire n'est disponible, et la validation enregistre l'emprunt
+    dans ce suivi.
     """
 
-    if code is None:
-        print("[ERREUR] Code vide. Merci de saisir un code valide.")
-        return
+    def __init__(self, livres=(), disponibilites=None):
+        self._livres = {}
+        self.disponibilites = disponibilites
+        for livre in livres:
+            self.ajouter(livre)
 
-    code = code.strip().upper()
+    def __len__(self):
+        return len(self._livres)
+
+    def __iter__(self):
+        return iter(self._livres.values())
+
+    def __contains__(self, code):
+        return code in self._livres
+
+    def __repr__(self):
+        return f"ListeEmprunt({list(self._livres.values())!r})"
+
+    def ajouter(self, livre):
+        """Ajoute un livre en fin de liste. Retourne False s'il y était déjà."""
+        if livre["code"] in self._livres:
+            return False
+        self._livres[livre["code"]] = livre
+        return True
+
+    def retirer(self, code):
+        """Retire un livre par son code. Retourne le livre, ou None s'il n'y était pas."""
+        return self._livres.pop(code, None)
+
+    def codes(self):
+        """Codes des livres, dans l'ordre de la liste."""
+        return list(self._livres)
+
+    def clear(self):
+        self._livres.clear()
+
+
+def _normaliser_code(code):
+    return "" if code is None else code.strip().upper()
+
+
+def ajouter_emprunt(catalogue, liste_emprunt, code):
+    """
+    Ajoute un livre, sans affichage ; retourne (ajouté ?, message pour
+    l'utilisateur). Mêmes vérifications que ajouter_livre_emprunt.
+    """
+
+    code = _normaliser_code(code)
     if code == "":
-        print("[ERREUR] Code vide. Merci de saisir un code valide.")
-        return
+        return False, MESSAGE_CODE_VIDE
 
     # On cherche le livre dans le catalogue
     livre = catalogue.get(code)
     if livre is None:
-        print(f"[ERREUR] Aucun livre avec le code '{code}'.")
-        return
+        return False, f"[ERREUR] Aucun livre avec le code '{code}'."
+
+    if code in liste_emprunt:
+        return False, f"[INFO] Le livre '{livre['titre']}' est déjà dans la liste d'emprunt."
+
+    suivi = liste_emprunt.disponibilites
+    if suivi is not None and suivi.disponibles(code) == 0:
+        return False, _message_indisponible(livre, suivi)
 
-    # On vérifie si le livre est déjà dans la liste d'emprunt
-    for l in liste_emprunt:
-        if l["code"] == code:
-            print(f"[INFO] Le livre '{livre['titre']}' est déjà dans la liste d'emprunt.")
-            return
+    liste_emprunt.ajouter(livre)
 
-    # Tout est bon, on ajoute
-    liste_emprunt.append(livre)
-    print("[OK] Livre ajouté à la liste d'emprunt :", livre["titre"])
+    return True, f"[OK] Livre ajouté à la liste d'emprunt : {livre['titre']}"
+
+
+def _message_indisponible(livre, suivi):
+    return (f"[ERREUR] Le livre '{livre['titre']}' n'est pas disponible : "
+            f"{suivi.exemplaires(livre['code'])} exemplaire(s), tous empruntés.")
+
+
+def retirer_emprunt(liste_emprunt, code):
+    """Retire un livre, sans affichage ; retourne (retiré ?, message pour l'utilisateur)."""
+
+    code = _normaliser_code(code)
+    if code == "":
+        return False, MESSAGE_CODE_VIDE
+
+    livre = liste_emprunt.retirer(code)
+    if livre is None:
+        return False, f"[ERREUR] Le livre avec le code '{code}' n'est pas dans la liste d'emprunt."
+
+    return True, f"[OK] Livre retiré de la liste d'emprunt : {livre['titre']}"
+
+
+def ajouter_livre_emprunt(catalogue, liste_emprunt, code):
+    """
+    Ajoute un livre à la liste d'emprunt courante (ListeEmprunt) à partir
+    de son code.
+
+    - Vérifie que le code n'est pas vide
+    - Vérifie que le livre existe dans le catalogue
+    - Vérifie que le livre n'est pas déjà dans la liste d'emprunt
+    - Ajoute le livre si tout est OK
+
+    Affiche des messages d'information / d'erreur pour l'utilisateur et
+    retourne True si le livre a été ajouté.
+    """
+    ajoute, message = ajouter_emprunt(catalogue, liste_emprunt, code)
+    print(message)
+    return ajoute
 
 
 def supprimer_livre_emprunt(liste_emprunt, code):
@@ -130,48 +476,122 @@ def supprimer_livre_emprunt(liste_emprunt, code):
     - Vérifie que le code n'est pas vide
     - Supprime le livre s'il est présent
     - Affiche un message d'erreur sinon
+
+    Retourne True si le livre a été retiré.
     """
+    retire, message = retirer_emprunt(liste_emprunt, code)
+    print(message)
+    return retire
 
-    if code is None:
-        print("[ERREUR] Code vide. Merci de saisir un code valide.")
-        return
 
-    code = code.strip().upper()
-    if code == "":
-        print("[ERREUR] Code vide. Merci de saisir un code valide.")
-        return
+def ajouter_livres_emprunt(catalogue, liste_emprunt, codes):
+    """
+    Ajoute plusieurs livres à la liste d'emprunt (emprunts de groupe).
 
-    for index, livre in enumerate(liste_emprunt):
-        if livre["code"] == code:
-            titre = livre["titre"]
-            del liste_emprunt[index]
-            print("[OK] Livre retiré de la liste d'emprunt :", titre)
-            return
+    Rien n'est affiché : retourne la liste des codes refusés, chacun avec
+    son message, [(code, message), ...] (vide si tous ont été ajoutés).
+    Les codes valides sont ajoutés même si d'autres sont refusés.
+    """
+    refus = []
+    for code in codes:
+        ajoute, message = ajouter_emprunt(catalogue, liste_emprunt, code)
+        if not ajoute:
+            refus.append((code, message))
+    return refus
 
-    print(f"[ERREUR] Le livre avec le code '{code}' n'est pas dans la liste d'emprunt.")
 
+def supprimer_livres_emprunt(liste_emprunt, codes):
+    """
+    Retire plusieurs livres de la liste d'emprunt.
 
-def valider_emprunt(liste_emprunt):
+    Rien n'est affiché : retourne la liste des codes refusés, chacun avec
+    son message, [(code, message), ...] (vide si tous ont été retirés).
+    """
+    refus = []
+    for code in codes:
+        retire, message = retirer_emprunt(liste_emprunt, code)
+        if not retire:
+            refus.append((code, message))
+    return refus
+
+
+def emprunter_livres(liste_emprunt, path=HISTORIQUE_FILE):
+    """
+    Enregistre l'emprunt des livres de la liste, puis la vide. Rien n'est
+    affiché.
+
+    Avec un suivi des disponibilités, les livres sont vérifiés une dernière
+    fois (un autre emprunteur a pu prendre le dernier exemplaire depuis
+    leur ajout à la liste) et l'emprunt est enregistré dans l'historique de
+    ce suivi ; sinon, dans l'historique `path`.
+
+    Retourne (codes empruntés, refus [(code, message), ...]).
+    """
+
+    livres = {livre["code"]: livre for livre in liste_emprunt}
+    codes = liste_emprunt.codes()
+    suivi = liste_emprunt.disponibilites
+    liste_emprunt.clear()
+
+    if suivi is None:
+        sauvegarder_emprunt(codes, path)
+        return codes, []
+
+    refuses = set(suivi.emprunter(codes))
+    refus = [(code, _message_indisponible(livres[code], suivi)) for code in codes if code in refuses]
+    return [code for code in codes if code not in refuses], refus
+
+
+def valider_emprunt(liste_emprunt, path=HISTORIQUE_FILE):
     """
     Valide l'emprunt :
 
     - Si la liste est vide, affiche un message et ne fait rien
-    - Sinon, récupère les codes des livres, appelle la fonction de sauvegarde dans le fichier d'historique, puis vide la liste d'emprunt.
+    - Sinon, enregistre l'emprunt des livres de la liste dans le fichier
+      d'historique (`path`, ou celui du suivi des disponibilités de la
+      liste) via emprunter_livres, puis vide la liste d'emprunt.
+    - Les livres qui ne sont plus disponibles ne sont pas empruntés (un
+      message par livre)
+
+    Retourne les codes des livres empruntés.
     """
-    
+
     if not liste_emprunt:
         print("[INFO] La liste d'emprunt est vide. Rien à valider.")
-        return
+        return []
 
-    # On extrait uniquement les codes des livres
-    codes = []
-    for livre in liste_emprunt:
-        codes.append(livre["code"])
+    codes, refus = emprunter_livres(liste_emprunt, path)
+    for _, message in refus:
+        print(message)
 
-    # On enregistre l'emprunt dans le fichier
-    sauvegarder_emprunt(codes)
-
-    # On vide la liste pour la prochaine session
-    liste_emprunt.clear()
+    if not codes:
+        print("[INFO] Aucun livre n'a pu être emprunté. La liste d'emprunt a été réinitialisée.")
+        return codes
 
     print("[OK] Emprunt validé et enregistré. La liste d'emprunt a été réinitialisée.")
+    return codes
+
+
+# -------------------- RETOURS --------------------
+
+def rendre_livres(disponibilites, codes):
+    """
+    Enregistre le retour de livres (un ou plusieurs codes, insensibles à
+    la casse) dans le suivi des disponibilités.
+
+    Rien n'est affiché : retourne la liste des codes refusés, chacun avec
+    son message, [(code, message), ...] (vide si tous ont été rendus).
+    Un livre ne peut être rendu que si un de ses exemplaires est emprunté.
+    """
+    refus = []
+    valides = []
+    for code in codes:
+        normalise = _normaliser_code(code)
+        if normalise == "":
+            refus.append((code, MESSAGE_CODE_VIDE))
+        else:
+            valides.append(normalise)
+
+    for code in disponibilites.rendre(valides):
+        refus.append((code, f"[ERREUR] Aucun exemplaire du livre '{code}' n'est emprunté."))
+    return refus
@@ -1,12 +1,16 @@
 """
 Point d'entrée de l'application de gestion de médiathèque.
 
-- Charge le catalogue de livres depuis le fichier CSV
-- Initialise la liste d'emprunt courante
+- Charge le catalogue de livres (instantané binaire, ou fichier CSV s'il a changé)
+- Recharge le catalogue à chaud quand le fichier CSV est modifié (sauf catalogue lu dans la base SQLite)
+- Initialise la liste d'emprunt courante et le suivi des disponibilités
 - Affiche un menu en boucle permettant d'accéder à toutes les fonctionnalités
+- Mesures de performance (facultatives) affichées depuis le menu, écrites à la sortie
 """
 
-from data import charger_catalogue
+from data import charger_catalogue_rapide, fermer_historiques, ouvrir_disponibilites
+from logic import ListeEmprunt
+from rechargement import RechargeurCatalogue
 from ui import (
     afficher_menu_principal,
     saisir_choix_menu,
@@ -16,6 +20,9 @@ from ui import (
     action_ajout_livre,
     action_suppression_livre,
     action_validation_emprunt,
+    action_retour_livres,
+    afficher_mesures,
+    recharger_catalogue,
 )
 
 
@@ -23,48 +30,72 @@ def main():
     """Fonction principale qui lance l'application."""
 
     print("Chargement du catalogue de livres...")
-    catalogue = charger_catalogue()
+    stats = {}
+    catalogue = charger_catalogue_rapide(stats=stats)
 
     if not catalogue:
         print("[ATTENTION] Le catalogue est vide ou n'a pas pu être chargé.")
         print("Vous pouvez tout de même lancer le programme, mais certaines fonctionnalités seront limitées (aucun livre à emprunter).")
 
-    # Liste d'emprunt courante (en mémoire uniquement)
-    liste_emprunt = []
-
-    # Boucle principale
-    while True:
-        afficher_menu_principal()
-        choix = saisir_choix_menu(1, 7)
-
-        if choix == 1:
-            # Recherche
-            menu_recherche(catalogue)
-
-        elif choix == 2:
-            # Ajout d'un livre à la liste d'emprunt
-            action_ajout_livre(catalogue, liste_emprunt)
-
-        elif choix == 3:
-            # Suppression d'un livre de la liste d'emprunt
-            action_suppression_livre(liste_emprunt)
-
-        elif choix == 4:
-            # Affichage de la liste d'emprunt courante
-            afficher_liste_emprunt(liste_emprunt)
-
-        elif choix == 5:
-            # Validation de l'emprunt
-            action_validation_emprunt(liste_emprunt)
-
-        elif choix == 6:
-            # Consultation de l'historique
-            afficher_historique(catalogue)
-
-        elif choix == 7:
-            # Quitter
-            print("Fermeture de l'application. Merci d'avoir utilisé la médiathèque.")
-            break
+    # Les modifications de livres.csv sont appliquées avant chaque menu ;
+    # un catalogue lu dans la base SQLite ne l'est pas : c'est la base qui
+    # fait foi, livres.csv n'a servi qu'à la créer
+    rechargeur = None
+    if stats.get("source") != "sqlite":
+        rechargeur = RechargeurCatalogue(catalogue)
+
+    # Liste d'emprunt courante (en mémoire uniquement), limitée aux livres
+    # dont un exemplaire est disponible
+    disponibilites = ouvrir_disponibilites()
+    liste_emprunt = ListeEmprunt(disponibilites=disponibilites)
+
+    # Boucle principale (les emprunts en attente sont écrits quelle que
+    # soit la façon dont on en sort, y compris Ctrl+C)
+    try:
+        while True:
+            if rechargeur is not None:
+                recharger_catalogue(rechargeur)
+            afficher_menu_principal()
+            choix = saisir_choix_menu(1, 9)
+
+            if choix == 1:
+                # Recherche
+                menu_recherche(catalogue, disponibilites)
+
+            elif choix == 2:
+                # Ajout d'un livre à la liste d'emprunt
+                action_ajout_livre(catalogue, liste_emprunt)
+
+            elif choix == 3:
+                # Suppression d'un livre de la liste d'emprunt
+                action_suppression_livre(liste_emprunt)
+
+            elif choix == 4:
+                # Affichage de la liste d'emprunt courante
+                afficher_liste_emprunt(liste_emprunt)
+
+            elif choix == 5:
+                # Validation de l'emprunt
+                action_validation_emprunt(liste_emprunt)
+
+            elif choix == 6:
+                # Consultation de l'historique
+                afficher_historique(catalogue)
+
+            elif choix == 7:
+                # Retour de livres
+                action_retour_livres(disponibilites)
+
+            elif choix == 8:
+                # Mesures de performance
+                afficher_mesures()
+
+            elif choix == 9:
+                # Quitter
+                print("Fermeture de l'application. Merci d'avoir utilisé la médiathèque.")
+                break
+    finally:
+        fermer_historiques()
 
 
 if __name__ == "__main__":
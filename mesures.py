@@ -0,0 +1,319 @@
+"""
+Mesures de performance (facultatives) des fonctions coûteuses : chargement
+du catalogue, lecture et écriture de l'historique, recherches, affichage
+des tableaux.
+
+Les fonctions à mesurer sont décorées par instrumenter(). Pour chacune, on
+compte les appels et les erreurs, la durée totale et maximale, un
+histogramme des durées (classes BORNES_DUREES) et le volume traité
+(lignes : livres, emprunts ou codes ; octets : taille du fichier lu).
+
+Les mesures sont activées par MESURES_ACTIVES (config.py) ou par la
+variable d'environnement MEDIATHEQUE_MESURES=1, lues au démarrage.
+Désactivées, instrumenter() retourne la fonction d'origine : aucun coût
+à l'exécution. Activées, elles sont écrites à la sortie du programme
+dans MESURES_FICHIER (JSON ou format texte Prometheus), et à la demande
+depuis le menu de l'application.
+"""
+
+import atexit
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+
+from config import FORMAT_MESURES, MESURES_ACTIVES, MESURES_FICHIER
+
+
+# Variable d'environnement qui active (1) ou désactive (0) les mesures
+# sans modifier config.py
+VARIABLE_MESURES = "MEDIATHEQUE_MESURES"
+
+# Formats d'écriture des mesures et extension du fichier correspondant
+FORMATS_MESURES = {"json": ".json", "prometheus": ".prom"}
+
+# Bornes supérieures (secondes) des classes de l'histogramme des durées ;
+# une dernière classe reçoit les durées plus longues
+BORNES_DUREES = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Préfixe des noms de métriques au format Prometheus
+PREFIXE_PROMETHEUS = "mediatheque_"
+
+
+def _lire_activation():
+    valeur = os.environ.get(VARIABLE_MESURES)
+    if valeur is None:
+        return MESURES_ACTIVES
+    return valeur.strip().lower() not in ("", "0", "non", "false")
+
+
+ACTIVES = _lire_activation()
+
+
+class MesureFonction:
+    """Compteurs d'une fonction instrumentée."""
+
+    def __init__(self, nom):
+        self.nom = nom
+        self.remettre_a_zero()
+
+    def remettre_a_zero(self):
+        self.appels = 0
+        self.erreurs = 0
+        self.duree_totale = 0.0
+        self.duree_max = 0.0
+        self.lignes = 0
+        self.octets = 0
+        # classes[i] : appels de durée <= BORNES_DUREES[i] (et > la borne
+        # précédente) ; la dernière : durées > BORNES_DUREES[-1]
+        self.classes = [0] * (len(BORNES_DUREES) + 1)
+
+    def enregistrer(self, duree, lignes=0, octets=0, erreur=False):
+        with _verrou:
+            self.appels += 1
+            if erreur:
+                self.erreurs += 1
+            self.duree_totale += duree
+            if duree > self.duree_max:
+                self.duree_max = duree
+            self.lignes += lignes
+            self.octets += octets
+            self.classes[bisect_left(BORNES_DUREES, duree)] += 1
+
+    def quantile(self, q):
+        """
+        Estimation du quantile `q` (entre 0 et 1) des durées : borne
+        supérieure de la classe qui le contient (au plus la durée maximale).
+        """
+        if self.appels == 0:
+            return 0.0
+        rang = q * self.appels
+        cumul = 0
+        for borne, nombre in zip(BORNES_DUREES, self.classes):
+            cumul += nombre
+            if cumul >= rang:
+                return min(borne, self.duree_max)
+        return self.duree_max
+
+    def en_dict(self):
+        """Compteurs sous forme de dictionnaire (durées en secondes)."""
+        histogramme = {str(borne): nombre for borne, nombre in zip(BORNES_DUREES, self.classes)}
+        histogramme["+Inf"] = self.classes[-1]
+        return {
+            "appels": self.appels,
+            "erreurs": self.erreurs,
+            "duree_totale": self.duree_totale,
+            "duree_moyenne": self.duree_totale / self.appels if self.appels else 0.0,
+            "duree_max": self.duree_max,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "lignes": self.lignes,
+            "octets": self.octets,
+            "histogramme": histogramme,
+        }
+
+
+# Fonctions instrumentées (nom -> MesureFonction), dans l'ordre de déclaration
+_mesures = {}
+
+# Les fonctions mesurées peuvent être appelées depuis plusieurs fils (service)
+_verrou = threading.Lock()
+
+_debut = time.time()
+
+
+def _taille_fichier(path):
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return 0
+
+
+def instrumenter(nom, lignes=None, octets=None):
+    """
+    Décorateur : mesure les appels de la fonction sous le nom `nom`.
+
+    - `lignes` : volume traité, soit une fonction appliquée au résultat
+      (`len` pour une liste de livres), soit le nom d'un argument dont on
+      compte les éléments
+    - `octets` : nom de l'argument chemin du fichier lu (sa taille est
+      comptée)
+
+    Une fonction génératrice (itérateur de résultats) est mesurée jusqu'à
+    ce que l'itérateur soit épuisé ou fermé : la durée est celle passée à
+    produire les éléments (pas celle de l'appelant entre deux éléments) et,
+    si `lignes` est donné, le volume est le nombre d'éléments produits.
+
+    Si les mesures sont désactivées, la fonction est retournée telle quelle.
+    """
+    def decorer(fonction):
+        if not ACTIVES:
+            return fonction
+
+        mesure = _mesures.setdefault(nom, MesureFonction(nom))
+        if inspect.isgeneratorfunction(fonction):
+            return _instrumenter_iterateur(fonction, mesure, lignes is not None)
+        signature = inspect.signature(fonction)
+        par_argument = isinstance(lignes, str)
+
+        def arguments(args, kwargs):
+            lies = signature.bind(*args, **kwargs)
+            lies.apply_defaults()
+            return lies.arguments
+
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            debut = time.perf_counter()
+            try:
+                resultat = fonction(*args, **kwargs)
+            except Exception:
+                mesure.enregistrer(time.perf_counter() - debut, erreur=True)
+                raise
+            duree = time.perf_counter() - debut
+
+            nb_lignes = nb_octets = 0
+            try:
+                if lignes is not None or octets is not None:
+                    valeurs = arguments(args, kwargs) if par_argument or octets is not None else None
+                    if par_argument:
+                        nb_lignes = len(valeurs[lignes] or ())
+                    elif lignes is not None:
+                        nb_lignes = int(lignes(resultat))
+                    if octets is not None:
+                        nb_octets = _taille_fichier(valeurs[octets])
+            except Exception:
+                # Un volume impossible à calculer ne doit pas faire échouer l'appel
+                pass
+            mesure.enregistrer(duree, nb_lignes, nb_octets)
+            return resultat
+
+        return enveloppe
+
+    return decorer
+
+
+def _instrumenter_iterateur(fonction, mesure, compter):
+    @functools.wraps(fonction)
+    def enveloppe(*args, **kwargs):
+        iterateur = fonction(*args, **kwargs)
+        duree = 0.0
+        nombre = 0
+        erreur = False
+        try:
+            while True:
+                debut = time.perf_counter()
+                try:
+                    element = next(iterateur)
+                except StopIteration:
+                    return
+                except Exception:
+                    erreur = True
+                    raise
+                finally:
+                    duree += time.perf_counter() - debut
+                nombre += 1
+                yield element
+        finally:
+            # Épuisé, fermé avant la fin (affichage interrompu) ou en erreur
+            iterateur.close()
+            mesure.enregistrer(duree, nombre if compter else 0, erreur=erreur)
+
+    return enveloppe
+
+
+# -------------------- RAPPORTS --------------------
+
+def instantane():
+    """Toutes les mesures, sous forme de dictionnaire (sérialisable en JSON)."""
+    with _verrou:
+        fonctions = {nom: mesure.en_dict() for nom, mesure in _mesures.items()}
+    return {
+        "actives": ACTIVES,
+        "debut": datetime.fromtimestamp(_debut).isoformat(timespec="seconds"),
+        "duree": time.time() - _debut,
+        "fonctions": fonctions,
+    }
+
+
+def texte_json():
+    return json.dumps(instantane(), ensure_ascii=False, indent=2) + "\n"
+
+
+def texte_prometheus():
+    """Mesures au format texte d'exposition de Prometheus."""
+    lignes = []
+
+    def metrique(nom, type_metrique, aide, valeurs):
+        nom = PREFIXE_PROMETHEUS + nom
+        lignes.append(f"# HELP {nom} {aide}")
+        lignes.append(f"# TYPE {nom} {type_metrique}")
+        for suffixe, etiquettes, valeur in valeurs:
+            texte = ",".join(f'{cle}="{v}"' for cle, v in etiquettes)
+            lignes.append(f"{nom}{suffixe}{{{texte}}} {valeur!r}")
+
+    with _verrou:
+        mesures = list(_mesures.values())
+        metrique("appels_total", "counter", "Nombre d'appels.",
+                 [("", [("fonction", m.nom)], m.appels) for m in mesures])
+        metrique("erreurs_total", "counter", "Nombre d'appels terminés par une exception.",
+                 [("", [("fonction", m.nom)], m.erreurs) for m in mesures])
+        metrique("lignes_total", "counter", "Livres, emprunts ou codes traités.",
+                 [("", [("fonction", m.nom)], m.lignes) for m in mesures])
+        metrique("octets_total", "counter", "Octets des fichiers lus.",
+                 [("", [("fonction", m.nom)], m.octets) for m in mesures])
+
+        valeurs = []
+        for m in mesures:
+            cumul = 0
+            for borne, nombre in zip(BORNES_DUREES, m.classes):
+                cumul += nombre
+                valeurs.append(("_bucket", [("fonction", m.nom), ("le", str(borne))], cumul))
+            valeurs.append(("_bucket", [("fonction", m.nom), ("le", "+Inf")], m.appels))
+            valeurs.append(("_sum", [("fonction", m.nom)], m.duree_totale))
+            valeurs.append(("_count", [("fonction", m.nom)], m.appels))
+        metrique("duree_secondes", "histogram", "Durée des appels (secondes).", valeurs)
+
+    return "\n".join(lignes) + "\n"
+
+
+def ecrire_mesures(path=MESURES_FICHIER, format_mesures=FORMAT_MESURES):
+    """
+    Écrit les mesures dans `path` + l'extension du format ("json" ou
+    "prometheus") et retourne le chemin du fichier écrit.
+    """
+    if format_mesures not in FORMATS_MESURES:
+        raise ValueError(f"format de mesures inconnu : {format_mesures!r}")
+    texte = texte_json() if format_mesures == "json" else texte_prometheus()
+    path += FORMATS_MESURES[format_mesures]
+    with open(path, "w", encoding="utf-8") as fichier:
+        fichier.write(texte)
+    return path
+
+
+def reinitialiser():
+    """Remet toutes les mesures à zéro."""
+    global _debut
+    with _verrou:
+        # Remise à zéro sur place : les fonctions décorées gardent leur mesure
+        for mesure in _mesures.values():
+            mesure.remettre_a_zero()
+        _debut = time.time()
+
+
+def _ecrire_a_la_sortie():
+    try:
+        path = ecrire_mesures()
+    except (OSError, ValueError) as e:
+        print("[ERREUR] Impossible d'écrire les mesures :", e, file=sys.stderr)
+    else:
+        print("[INFO] Mesures de performance écrites dans", path, file=sys.stderr)
+
+
+if ACTIVES:
+    atexit.register(_ecrire_a_la_sortie)
@@ -0,0 +1,302 @@
+"""
+Rechargement à chaud du catalogue.
+
+Quand livres.csv change pendant que l'application tourne, seules les
+lignes ajoutées, supprimées ou modifiées sont appliquées au catalogue en
+mémoire ; ses index (titres, catégories) sont mis à jour livre par livre,
+jamais reconstruits.
+
+La comparaison se fait sur les octets du fichier, sans analyser les
+lignes : le début et la fin communs à l'ancien et au nouveau contenu sont
+écartés par comparaison de blocs, puis la partie restante est découpée en
+lignes, comparées par différence d'ensembles. Seules les lignes qui ont
+changé sont ensuite analysées en Python : le coût de l'analyse et de la
+mise à jour des index dépend de la taille de la différence, pas de celle
+du catalogue (un ajout de livres en fin de fichier ne relit rien d'autre).
+
+Un fichier n'est relu qu'une fois sa taille et sa date de modification
+stables d'une vérification à la suivante : un CSV en cours d'écriture
+(donc tronqué) n'est pas comparé. Un fichier sans en-tête ou sans aucun
+livre est refusé : le catalogue est conservé tel quel.
+
+Le rechargement se fait en deux temps :
+- preparer() lit le fichier et calcule la différence sans toucher au
+  catalogue (peut tourner dans un autre fil) ;
+- appliquer() modifie le catalogue d'un seul bloc. Elle doit être appelée
+  par le fil qui sert les lectures (boucle du menu, boucle asyncio du
+  service) : aucune lecture ne voit ainsi un catalogue à moitié modifié.
+
+Les codes sont supposés uniques dans le CSV (comme pour la recherche par
+code) ; en cas de doublon, c'est la dernière ligne lue qui l'emporte.
+"""
+
+import csv
+import io
+import os
+
+from catalogue import Livre
+from config import CATALOGUE_CSV
+from data import _description_source, analyseur_livres
+
+
+# Taille des blocs comparés pour trouver le début et la fin communs
+TAILLE_BLOC = 1 << 16
+
+
+def _decoder(contenu):
+    return contenu.decode("cp1252", errors="replace")
+
+
+def _premiere_ligne(contenu):
+    fin = contenu.find(b"\n")
+    return contenu if fin < 0 else contenu[:fin]
+
+
+def _prefixe_commun(a, b):
+    """Longueur du plus long début commun à deux bytes."""
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i:i + TAILLE_BLOC] == b[i:i + TAILLE_BLOC]:
+        i += TAILLE_BLOC
+    if i >= n:
+        return n
+    # Le premier octet différent est dans ce bloc : dichotomie
+    bas, haut = i, min(i + TAILLE_BLOC, n)
+    while bas < haut:
+        milieu = (bas + haut + 1) // 2
+        if a[bas:milieu] == b[bas:milieu]:
+            bas = milieu
+        else:
+            haut = milieu - 1
+    return bas
+
+
+def _suffixe_commun(a, b, maximum):
+    """Longueur de la plus longue fin commune à deux bytes (au plus `maximum`)."""
+    la, lb = len(a), len(b)
+    i = 0
+    while i < maximum:
+        taille = min(TAILLE_BLOC, maximum - i)
+        if a[la - i - taille:la - i] != b[lb - i - taille:lb - i]:
+            break
+        i += taille
+    else:
+        return maximum
+    bas, haut = i, i + taille
+    while bas < haut:
+        milieu = (bas + haut + 1) // 2
+        if a[la - milieu:la - bas] == b[lb - milieu:lb - bas]:
+            bas = milieu
+        else:
+            haut = milieu - 1
+    return bas
+
+
+def lignes_modifiees(ancien, nouveau):
+    """
+    Compare deux versions d'un fichier texte et retourne le couple
+    (lignes retirées, lignes ajoutées), deux ensembles de bytes.
+
+    Seule la partie située entre le début et la fin communs (ramenés à des
+    limites de lignes) est découpée en lignes.
+    """
+    debut = _prefixe_commun(ancien, nouveau)
+    if debut == len(ancien) == len(nouveau):
+        return set(), set()
+    debut = ancien.rfind(b"\n", 0, debut) + 1
+
+    fin = _suffixe_commun(ancien, nouveau, min(len(ancien), len(nouveau)) - debut)
+    # La fin commune doit commencer au début d'une ligne dans les deux
+    # versions : sinon elle est raccourcie jusqu'à la ligne suivante
+    position = len(ancien) - fin
+    if fin and (ancien[position - 1:position] != b"\n"
+                or nouveau[len(nouveau) - fin - 1:len(nouveau) - fin] != b"\n"):
+        suivante = ancien.find(b"\n", position)
+        fin = 0 if suivante < 0 else len(ancien) - suivante - 1
+
+    anciennes = set(ancien[debut:len(ancien) - fin].splitlines())
+    nouvelles = set(nouveau[debut:len(nouveau) - fin].splitlines())
+    return anciennes - nouvelles, nouvelles - anciennes
+
+
+class DiffCatalogue:
+    """
+    Différence entre le catalogue en mémoire et une nouvelle version du CSV.
+
+    - ajoutes : code -> livre (nouveaux codes)
+    - modifies : code -> livre (codes existants dont le livre a changé)
+    - supprimes : ensemble des codes retirés
+    """
+
+    def __init__(self, ajoutes, modifies, supprimes, description, contenu):
+        self.ajoutes = ajoutes
+        self.modifies = modifies
+        self.supprimes = supprimes
+        # Version du fichier à laquelle correspond la différence
+        self._description = description
+        self._contenu = contenu
+
+    def __len__(self):
+        return len(self.ajoutes) + len(self.modifies) + len(self.supprimes)
+
+    def resume(self):
+        return (f"{len(self.ajoutes)} ajout(s), {len(self.modifies)} modification(s), "
+                f"{len(self.supprimes)} suppression(s)")
+
+
+class RechargeurCatalogue:
+    """
+    Surveille le CSV d'un catalogue déjà chargé et lui applique les
+    changements du fichier.
+
+    `stockage` est celui utilisé au chargement : avec "livre", les livres
+    ajoutés ou modifiés sont convertis en Livre.
+
+    Le contenu du CSV correspondant au catalogue est gardé en mémoire
+    (un seul objet bytes, de la taille du fichier) pour servir de base à la
+    comparaison suivante.
+    """
+
+    def __init__(self, catalogue, path=CATALOGUE_CSV, stockage="dict"):
+        self.catalogue = catalogue
+        self.path = path
+        self.compact = stockage == "livre"
+        self._description = None
+        self._contenu = b""
+        # Version vue à la vérification précédente, et version refusée
+        # (vide) : elle n'est plus relue tant que le fichier ne change pas
+        self._observee = None
+        self._refusee = None
+        if os.path.exists(path):
+            self._description, self._contenu = self._lire()
+
+    def _lire(self):
+        description = _description_source(self.path)
+        with open(self.path, "rb") as fichier:
+            contenu = fichier.read()
+        return description, contenu
+
+    def a_change(self):
+        """
+        Vrai si la taille ou la date de modification du CSV a changé, et
+        n'a plus bougé depuis la vérification précédente (sinon le fichier
+        est peut-être en cours d'écriture : on attend la suivante).
+        """
+        if not os.path.exists(self.path):
+            # Fichier absent (en cours de remplacement ?) : on garde le catalogue
+            return False
+        description = _description_source(self.path)
+        if description == self._description or description == self._refusee:
+            return False
+        stable = description == self._observee
+        self._observee = description
+        return stable
+
+    def preparer(self):
+        """
+        Lit le CSV et calcule la différence avec le catalogue en mémoire,
+        sans le modifier. Retourne un DiffCatalogue, ou None si le fichier
+        n'a pas changé (ou pas encore fini de changer).
+
+        Lève ValueError si le fichier n'a pas d'en-tête ou aucun livre : le
+        catalogue n'est pas vidé, et ce fichier n'est plus relu tant qu'il
+        ne change pas.
+        """
+        if not self.a_change():
+            return None
+
+        description, contenu = self._lire()
+        if _description_source(self.path) != description:
+            # Modifié pendant la lecture : on attend qu'il soit stable
+            self._observee = None
+            return None
+        entete = _premiere_ligne(contenu)
+        if entete.strip() == b"" or contenu[len(entete):].strip() == b"":
+            self._refuser(description)
+
+        # En-tête modifié (colonnes déplacées...) : toutes les lignes sont relues
+        if not self._contenu or _premiere_ligne(self._contenu) != entete:
+            return self._diff_complet(description, contenu)
+
+        entetes = next(csv.reader([_decoder(entete)]))
+        analyser = analyseur_livres(entetes)
+        retirees, ajoutees = lignes_modifiees(self._contenu, contenu)
+
+        livres = {}
+        for ligne in ajoutees:
+            texte = _decoder(ligne)
+            if texte.count('"') % 2:
+                # Champ entre guillemets sur plusieurs lignes : la
+                # comparaison ligne à ligne ne s'applique pas
+                return self._diff_complet(description, contenu)
+            livre = analyser(next(csv.reader([texte]), []))
+            if livre is not None:
+                livres[livre["code"]] = livre
+
+        retires = set()
+        for ligne in retirees:
+            texte = _decoder(ligne)
+            if texte.count('"') % 2:
+                return self._diff_complet(description, contenu)
+            livre = analyser(next(csv.reader([texte]), []))
+            if livre is not None and livre["code"] not in livres:
+                retires.add(livre["code"])
+
+        return self._construire_diff(livres, retires, description, contenu)
+
+    def _diff_complet(self, description, contenu):
+        """Différence calculée en analysant tout le nouveau fichier."""
+        lecteur = csv.reader(io.StringIO(_decoder(contenu), newline=""))
+        entetes = next(lecteur, None)
+        livres = {}
+        if entetes is not None:
+            analyser = analyseur_livres(entetes)
+            for ligne in lecteur:
+                livre = analyser(ligne)
+                if livre is not None:
+                    livres[livre["code"]] = livre
+        if not livres:
+            self._refuser(description)
+        retires = {code for code in self.catalogue if code not in livres}
+        return self._construire_diff(livres, retires, description, contenu)
+
+    def _refuser(self, description):
+        self._refusee = description
+        raise ValueError(f"{self.path} n'a pas d'en-tête ou aucun livre valide : catalogue conservé")
+
+    def _construire_diff(self, livres, retires, description, contenu):
+        ajoutes = {}
+        modifies = {}
+        for code, livre in livres.items():
+            actuel = self.catalogue.get(code)
+            if actuel is None:
+                ajoutes[code] = livre
+            elif actuel != livre:
+                # Ligne réécrite sans changement du livre (espaces, note
+                # "4.50" au lieu de "4.5"...) : rien à faire
+                modifies[code] = livre
+        supprimes = {code for code in retires if code in self.catalogue}
+        return DiffCatalogue(ajoutes, modifies, supprimes, description, contenu)
+
+    def appliquer(self, diff):
+        """
+        Applique une différence au catalogue (et à ses index). À appeler
+        dans le fil qui sert les lectures du catalogue.
+        """
+        for code in diff.supprimes:
+            self.catalogue.pop(code, None)
+        for livres in (diff.ajoutes, diff.modifies):
+            for code, livre in livres.items():
+                self.catalogue[code] = Livre.depuis(livre) if self.compact else livre
+        self._description = diff._description
+        self._contenu = diff._contenu
+
+    def recharger(self):
+        """
+        Recharge le catalogue si le CSV a changé. Retourne la différence
+        appliquée (DiffCatalogue), ou None si le fichier n'a pas changé.
+        """
+        diff = self.preparer()
+        if diff is not None:
+            self.appliquer(diff)
+        return diff
@@ -0,0 +1,345 @@
+"""
+Service réseau (HTTP/JSON) de la médiathèque, basé sur asyncio.
+
+Le catalogue est chargé une seule fois et partagé en mémoire par toutes
+les requêtes. Chaque client (borne, application...) a sa propre liste
+d'emprunt, identifiée par un nom choisi par le client.
+
+Routes :
+    GET    /livres/<code>                    recherche par code
+    GET    /livres?titre=<texte>             recherche par titre (partielle)
+    GET    /livres?categorie=<catégorie>     recherche par catégorie
+    GET    /livres?categories=<requête>      recherche multi-catégories
+    GET    /livres?approche=<texte>          recherche approchée (titre ou auteur)
+    GET    /livres?auteur=<nom>              livres d'un auteur, par note
+    GET    /clients/<client>/liste           liste d'emprunt du client
+    POST   /clients/<client>/liste           ajout, corps {"code": "L01"}
+                                             ou {"codes": ["L01", "L02"]}
+    DELETE /clients/<client>/liste/<code>    retrait
+    POST   /clients/<client>/valider         validation de l'emprunt
+    DELETE /clients/<client>                 oublie la liste du client
+    POST   /retours                          retour, corps {"code": "L01"}
+                                             ou {"codes": ["L01", "L02"]}
+    GET    /mesures                          mesures de performance
+    GET    /cache                            compteurs du cache des recherches
+
+Les réponses ont la même forme que celles du mode par lots (batch.py) :
+{"ok": ..., "nombre": ..., "resultats": [...], "message": "..."}.
+
+Les commandes des listes d'emprunt (ajout, retrait, contenu, validation)
+et les retours s'exécutent dans un fil dédié, dans l'ordre d'arrivée :
+elles prennent les verrous de l'historique et des journaux, qu'un vidage
+de l'écrivain peut tenir pendant une écriture sur disque ; la boucle, elle,
+n'attend jamais un verrou.
+
+Le CSV du catalogue est surveillé (toutes les DELAI_RECHARGEMENT
+secondes) : ses modifications sont lues dans un autre fil, puis appliquées
+d'un bloc dans la boucle asyncio, entre deux requêtes, pendant que le fil
+d'écriture est suspendu entre deux commandes.
+
+Usage :
+    python serveur.py [--hote 127.0.0.1] [--port 8080] [--catalogue livres.csv]
+"""
+
+import argparse
+import asyncio
+import json
+import signal
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, redirect_stdout
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from batch import SessionLot
+from config import CATALOGUE_CSV, DELAI_RECHARGEMENT, HISTORIQUE_FILE, HOTE_SERVICE, PORT_SERVICE
+from data import charger_catalogue_rapide, fermer_historiques
+from rechargement import RechargeurCatalogue
+
+
+# Taille maximale du corps d'une requête (octets)
+TAILLE_MAX_CORPS = 64 * 1024
+
+RAISONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+def codes_du_corps(corps):
+    """
+    Codes d'un corps JSON {"code": "L01"} ou {"codes": ["L01", "L02"]},
+    séparés par des espaces, ou None si le corps est invalide.
+    """
+    try:
+        donnees = json.loads(corps or b"{}")
+        codes = donnees.get("codes") or [donnees.get("code", "")]
+        if isinstance(codes, str):
+            codes = [codes]
+        return " ".join(str(code) for code in codes)
+    except (ValueError, AttributeError, TypeError):
+        return None
+
+
+class ServiceMediatheque:
+    """
+    Traite les requêtes HTTP du service : un catalogue partagé et une
+    session (SessionLot) par client pour la liste d'emprunt.
+
+    Si `limite` est donnée, une recherche renvoie au plus `limite` livres
+    ("nombre" reste le nombre total de résultats).
+
+    Si `rechargeur` (RechargeurCatalogue) est donné, le catalogue est
+    rechargé à chaud quand son CSV change (voir surveiller_catalogue).
+    """
+
+    def __init__(self, catalogue, path_historique=HISTORIQUE_FILE, limite=None, rechargeur=None):
+        self.catalogue = catalogue
+        self.path_historique = path_historique
+        self.limite = limite
+        self.rechargeur = rechargeur
+        self.recherche = SessionLot(catalogue, path_historique, limite)
+        self.sessions = {}   # client -> SessionLot
+        # Un seul fil d'écriture : listes d'emprunt, emprunts et retours,
+        # dans l'ordre d'arrivée
+        self._ecriture = ThreadPoolExecutor(max_workers=1)
+
+    def session(self, client):
+        session = self.sessions.get(client)
+        if session is None:
+            session = self.sessions[client] = SessionLot(self.catalogue, self.path_historique, self.limite)
+        return session
+
+    async def traiter(self, methode, cible, corps):
+        """
+        Traite une requête et retourne (statut HTTP, dictionnaire JSON).
+        """
+        url = urlsplit(cible)
+        morceaux = [unquote(m) for m in url.path.split("/") if m != ""]
+        parametres = dict(parse_qsl(url.query))
+
+        if morceaux[:1] == ["livres"]:
+            if methode != "GET":
+                return 405, {"ok": False, "message": "[ERREUR] Méthode non autorisée."}
+            if len(morceaux) == 2:
+                return 200, self.recherche.executer(f"code {morceaux[1]}")
+            if len(morceaux) == 1:
+                for nom in ("titre", "categorie", "categories", "approche", "auteur"):
+                    if nom in parametres:
+                        return 200, self.recherche.executer(f"{nom} {parametres[nom]}")
+                return 400, {"ok": False, "message": "[ERREUR] Paramètre titre, categorie, categories, approche ou auteur attendu."}
+
+        elif morceaux[:1] == ["clients"] and len(morceaux) >= 2:
+            client = morceaux[1]
+            action = morceaux[2:]
+
+            if action == [] and methode == "DELETE":
+                existait = self.sessions.pop(client, None) is not None
+                return 200, {"ok": existait}
+            if action == ["liste"] and methode == "GET":
+                return 200, await self.ecrire(self.session(client), "liste")
+            if action == ["liste"] and methode == "POST":
+                codes = codes_du_corps(corps)
+                if codes is None:
+                    return 400, {"ok": False, "message": "[ERREUR] Corps JSON invalide."}
+                return 200, await self.ecrire(self.session(client), f"ajouter {codes}")
+            if len(action) == 2 and action[0] == "liste" and methode == "DELETE":
+                return 200, await self.ecrire(self.session(client), f"retirer {action[1]}")
+            if action == ["valider"] and methode == "POST":
+                return 200, await self.ecrire(self.session(client), "valider")
+
+        elif morceaux == ["retours"] and methode == "POST":
+            codes = codes_du_corps(corps)
+            if codes is None:
+                return 400, {"ok": False, "message": "[ERREUR] Corps JSON invalide."}
+            return 200, await self.ecrire(self.recherche, f"rendre {codes}")
+
+        elif morceaux == ["mesures"] and methode == "GET":
+            return 200, self.recherche.executer("mesures")
+
+        elif morceaux == ["cache"] and methode == "GET":
+            return 200, self.recherche.executer("cache")
+
+        return 404, {"ok": False, "message": f"[ERREUR] Route inconnue : {methode} {url.path}"}
+
+    async def ecrire(self, session, commande):
+        """
+        Exécute une commande de `session` dans le fil d'écriture. Ces
+        commandes lisent ou modifient les listes d'emprunt et prennent les
+        verrous de l'historique : un seul fil les exécute toutes, l'une
+        après l'autre.
+        """
+        boucle = asyncio.get_running_loop()
+        return await boucle.run_in_executor(self._ecriture, session.executer, commande)
+
+    @asynccontextmanager
+    async def ecriture_suspendue(self):
+        """
+        Suspend le fil d'écriture le temps du bloc : les commandes en cours
+        se terminent, les suivantes attendent la fin du bloc. La boucle
+        attend son tour sans se bloquer.
+        """
+        boucle = asyncio.get_running_loop()
+        pret = boucle.create_future()
+        reprise = threading.Event()
+
+        def suspendre():
+            boucle.call_soon_threadsafe(lambda: pret.done() or pret.set_result(None))
+            reprise.wait()
+
+        self._ecriture.submit(suspendre)
+        try:
+            await pret
+            yield
+        finally:
+            reprise.set()
+
+    async def surveiller_catalogue(self, delai=DELAI_RECHARGEMENT):
+        """
+        Vérifie le CSV du catalogue toutes les `delai` secondes. La lecture
+        et la comparaison se font dans un autre fil ; le catalogue n'est
+        modifié que dans la boucle, sans attente au milieu, et fil
+        d'écriture suspendu (ses commandes lisent aussi le catalogue) : une
+        requête voit l'ancien ou le nouveau catalogue, jamais un mélange des
+        deux.
+        """
+        boucle = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(delai)
+            try:
+                if not self.rechargeur.a_change():
+                    continue
+                diff = await boucle.run_in_executor(None, self.rechargeur.preparer)
+                if diff is not None:
+                    async with self.ecriture_suspendue():
+                        self.rechargeur.appliquer(diff)
+                    if diff:
+                        print("[INFO] Catalogue rechargé :", diff.resume())
+            except Exception as e:
+                print("[ERREUR] Impossible de recharger le catalogue :", e)
+
+    async def connexion(self, lecteur, ecrivain):
+        """Traite les requêtes d'une connexion (HTTP/1.1, connexion gardée ouverte)."""
+        try:
+            while True:
+                ligne = await lecteur.readline()
+                if not ligne:
+                    break
+
+                entetes = {}
+                while True:
+                    entete = await lecteur.readline()
+                    if entete in (b"\r\n", b"\n", b""):
+                        break
+                    nom, _, valeur = entete.decode("latin-1").partition(":")
+                    entetes[nom.strip().lower()] = valeur.strip()
+
+                garder = True
+                try:
+                    methode, cible, version = ligne.decode("latin-1").split()
+                    longueur = int(entetes.get("content-length", 0))
+                except ValueError:
+                    statut, resultat = 400, {"ok": False, "message": "[ERREUR] Requête invalide."}
+                    garder = False
+                else:
+                    if version != "HTTP/1.1" or entetes.get("connection", "").lower() == "close":
+                        garder = False
+                    if longueur > TAILLE_MAX_CORPS:
+                        statut, resultat = 413, {"ok": False, "message": "[ERREUR] Requête trop volumineuse."}
+                        garder = False
+                    else:
+                        corps = await lecteur.readexactly(longueur) if longueur > 0 else b""
+                        try:
+                            statut, resultat = await self.traiter(methode, cible, corps)
+                        except Exception as e:
+                            statut, resultat = 500, {"ok": False, "message": f"[ERREUR] {e}"}
+
+                contenu = json.dumps(resultat, ensure_ascii=False).encode("utf-8")
+                ecrivain.write(
+                    f"HTTP/1.1 {statut} {RAISONS[statut]}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(contenu)}\r\n"
+                    f"Connection: {'keep-alive' if garder else 'close'}\r\n\r\n".encode("latin-1")
+                    + contenu
+                )
+                await ecrivain.drain()
+                if not garder:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            # Client parti au milieu d'une requête, ou ligne trop longue
+            pass
+        finally:
+            ecrivain.close()
+
+    def fermer(self):
+        """Attend la fin des enregistrements en cours."""
+        self._ecriture.shutdown(wait=True)
+
+
+async def servir(service, hote=HOTE_SERVICE, port=PORT_SERVICE, pret=None):
+    """
+    Lance le service et traite les connexions jusqu'à la réception de
+    SIGINT ou SIGTERM (Ctrl+C sous Windows). `pret` est appelée avec le numéro de port une fois celui-ci ouvert
+    (utile avec port=0 : port libre choisi par le système).
+    """
+    serveur = await asyncio.start_server(service.connexion, hote, port)
+    port = serveur.sockets[0].getsockname()[1]
+    print(f"[INFO] Service de la médiathèque à l'écoute sur http://{hote}:{port}/")
+    if pret is not None:
+        pret(port)
+
+    arret = asyncio.Event()
+    boucle = asyncio.get_running_loop()
+    for signal_arret in (signal.SIGINT, signal.SIGTERM):
+        try:
+            boucle.add_signal_handler(signal_arret, arret.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows : Ctrl+C arrive sous forme de KeyboardInterrupt
+            pass
+    surveillance = None
+    if service.rechargeur is not None:
+        surveillance = asyncio.ensure_future(service.surveiller_catalogue())
+    try:
+        async with serveur:
+            await arret.wait()
+    finally:
+        if surveillance is not None:
+            surveillance.cancel()
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Service HTTP/JSON de la médiathèque.")
+    parser.add_argument("--hote", default=HOTE_SERVICE)
+    parser.add_argument("--port", type=int, default=PORT_SERVICE)
+    parser.add_argument("--catalogue", default=CATALOGUE_CSV, help="fichier CSV du catalogue")
+    parser.add_argument("--historique", default=HISTORIQUE_FILE,
+                        help="historique où enregistrer les emprunts validés")
+    parser.add_argument("--limite", type=int, default=50,
+                        help="nombre maximal de livres renvoyés par recherche")
+    args = parser.parse_args(arguments)
+
+    stats = {}
+    with redirect_stdout(sys.stderr):
+        catalogue = charger_catalogue_rapide(args.catalogue, stats=stats)
+
+    # Un catalogue lu dans la base SQLite n'est pas rechargé depuis le CSV
+    rechargeur = None
+    if stats.get("source") != "sqlite":
+        rechargeur = RechargeurCatalogue(catalogue, args.catalogue)
+    service = ServiceMediatheque(catalogue, args.historique, args.limite, rechargeur)
+    try:
+        asyncio.run(servir(service, args.hote, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("[INFO] Arrêt du service.")
+        service.fermer()
+        fermer_historiques()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Statistiques sur l'historique des emprunts :
+
+- livres les plus empruntés
+- catégories les plus empruntées
+- nombre d'emprunts par jour ou par mois
+
+Les calculs s'appuient sur les index de l'historique (index inversé
+code -> emprunts, index des dates) : aucune requête ne relit l'historique
+complet, ce qui permet d'alimenter un tableau de bord.
+"""
+
+from collections import Counter
+from datetime import date, timedelta
+from heapq import nlargest
+
+
+class StatistiquesEmprunts:
+    """
+    Statistiques calculées sur un historique (HistoriqueEmprunts) et un
+    catalogue.
+
+    Les effectifs par catégorie sont calculés une fois à partir de l'index
+    inversé (un passage par livre emprunté, pas par emprunt), puis mis à
+    jour uniquement avec les emprunts ajoutés depuis. Les catégories prises
+    en compte sont celles du catalogue au moment du calcul ; appeler
+    reinitialiser() après un changement de catalogue.
+    """
+
+    def __init__(self, historique, catalogue):
+        self.historique = historique
+        self.catalogue = catalogue
+        self._categories = None
+        self._vu = 0
+
+    def reinitialiser(self):
+        """Oublie les effectifs par catégorie (recalculés à la prochaine requête)."""
+        self._categories = None
+        self._vu = 0
+
+    # ---- livres ----
+
+    def livres_plus_empruntes(self, n=10):
+        """Liste des `n` couples (code, nombre d'emprunts) les plus fréquents."""
+        return self.historique.index_codes.plus_empruntes(n)
+
+    def nombre_emprunts_livre(self, code):
+        """Nombre d'emprunts contenant le livre `code`."""
+        return self.historique.index_codes.effectif(code.strip().upper())
+
+    # ---- catégories ----
+
+    def _categories_du_livre(self, code):
+        livre = self.catalogue.get(code)
+        return livre["categories"] if livre is not None else ()
+
+    def _mettre_a_jour_categories(self):
+        index = self.historique.index_codes
+        if self._categories is None:
+            self._categories = Counter()
+            for code, effectif in index.effectifs():
+                for cat in self._categories_du_livre(code):
+                    self._categories[cat] += effectif
+            self._vu = index.jusqu_a
+            return
+
+        # Seuls les emprunts ajoutés depuis le dernier calcul sont lus
+        for numero in range(self._vu, len(self.historique)):
+            for code in set(self.historique.lire(numero)["codes"]):
+                for cat in self._categories_du_livre(code):
+                    self._categories[cat] += 1
+        self._vu = len(self.historique)
+
+    def categories_plus_empruntees(self, n=10):
+        """
+        Liste des `n` couples (catégorie, nombre d'emprunts) les plus
+        fréquents. Un emprunt de deux livres d'une même catégorie compte
+        deux fois pour cette catégorie.
+        """
+        self._mettre_a_jour_categories()
+        return nlargest(n, self._categories.items(), key=lambda element: (element[1], element[0]))
+
+    # ---- dates ----
+
+    def _periode(self, debut, fin):
+        extremes = self.historique.dates_extremes()
+        if extremes is None:
+            return None
+        debut = debut if debut is not None else extremes[0].date()
+        fin = fin if fin is not None else extremes[1].date()
+        return debut, fin
+
+    def emprunts_par_jour(self, debut=None, fin=None):
+        """
+        Nombre d'emprunts pour chaque jour de `debut` à `fin` (objets date,
+        par défaut toute la période de l'historique).
+
+        Retourne une liste de couples ("AAAA-MM-JJ", nombre). Chaque jour
+        coûte deux recherches par dichotomie dans l'index des dates.
+        """
+        periode = self._periode(debut, fin)
+        if periode is None:
+            return []
+        jour, fin = periode
+
+        resultat = []
+        while jour <= fin:
+            resultat.append((jour.isoformat(), len(self.historique.numeros_entre(jour, jour))))
+            jour += timedelta(days=1)
+        return resultat
+
+    def emprunts_par_mois(self, debut=None, fin=None):
+        """
+        Nombre d'emprunts pour chaque mois de `debut` à `fin` (objets date,
+        par défaut toute la période de l'historique).
+
+        Retourne une liste de couples ("AAAA-MM", nombre). Le premier et le
+        dernier mois ne comptent que les jours de la période.
+        """
+        periode = self._periode(debut, fin)
+        if periode is None:
+            return []
+        debut, fin = periode
+
+        resultat = []
+        mois = date(debut.year, debut.month, 1)
+        while mois <= fin:
+            suivant = date(mois.year + mois.month // 12, mois.month % 12 + 1, 1)
+            dernier_jour = suivant - timedelta(days=1)
+            nombre = len(self.historique.numeros_entre(max(mois, debut), min(dernier_jour, fin)))
+            resultat.append((f"{mois.year:04d}-{mois.month:02d}", nombre))
+            mois = suivant
+        return resultat
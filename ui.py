@@ -2,30 +2,198 @@
 Interface utilisateur (console) :
 
 - Affichage du menu principal
-- Saisie sécurisée des choix
-- Affichage des listes de livres sous forme de tableaux
+- Saisie sécurisée des choix, complétion des codes, titres et auteurs
+- Affichage des listes de livres sous forme de tableaux, écrits au fur et
+  à mesure par lots (ou en CSV / JSON)
 - Sous-menu de recherche
 - Affichage de la liste d'emprunt
-- Affichage de l'historique des emprunts
+- Affichage de l'historique des emprunts (par pages, du plus récent au plus ancien)
+- Affichage et écriture des mesures de performance
 """
 
-from config import EMPRUNTS_FILE
-from data import charger_historique
+import csv
+import json
+import sys
+from contextlib import contextmanager
+from itertools import chain, islice
+
+try:
+    # Édition de ligne (complétion par la touche Tab) : absent sous Windows
+    import readline
+except ImportError:
+    readline = None
+
+import mesures
+from cache import cache_recherches
+from catalogue import livre_en_json
+from config import COMPLETION_CONSOLE, HISTORIQUE_FILE, TAILLE_PAGE_HISTORIQUE
+from data import ouvrir_historique, vider_emprunts_en_attente
 from logic import (
+    MESSAGE_CODE_VIDE,
+    TRIS,
+    completer,
     rechercher_par_code,
-    rechercher_par_titre,
-    rechercher_par_categorie,
+    iterer_par_titre,
+    iterer_par_categorie,
+    iterer_par_categories,
+    iterer_par_auteur,
+    rechercher_approximative,
     ajouter_livre_emprunt,
+    ajouter_livres_emprunt,
     supprimer_livre_emprunt,
+    supprimer_livres_emprunt,
     valider_emprunt,
+    rendre_livres,
 )
 
 
 # -------------------- TABLEAU DE LIVRES --------------------
 
-def afficher_tableau_livres(livres, titre_tableau=None):
+# Formats de sortie de ecrire_livres
+FORMATS_SORTIE = ("tableau", "csv", "json")
+
+# Nombre de livres lus avant l'affichage pour calculer la largeur des
+# colonnes d'un tableau
+LIGNES_MESURE_TABLEAU = 200
+
+# Nombre de lignes écrites d'un seul appel à write
+TAILLE_LOT_ECRITURE = 512
+
+# Noms des colonnes d'un tableau
+ENTETES_TABLEAU = ("Code", "Titre", "Auteur", "Note", "Catégories")
+
+
+class _Echo:
+    """Pseudo-fichier dont write retourne le texte : csv.writer produit alors des lignes."""
+
+    def write(self, texte):
+        return texte
+
+
+def _tronquer(texte, largeur):
+    """Raccourcit un texte à `largeur` caractères (terminé par "…" s'il est coupé)."""
+    return texte if len(texte) <= largeur else texte[:largeur - 1] + "…"
+
+
+def _mesurer_colonnes(livres):
+    """Largeur de chaque colonne du tableau pour afficher entièrement ces livres."""
+    largeurs = [len(entete) for entete in ENTETES_TABLEAU]
+    for livre in livres:
+        largeurs[0] = max(largeurs[0], len(livre["code"]))
+        largeurs[1] = max(largeurs[1], len(livre["titre"]))
+        largeurs[2] = max(largeurs[2], len(livre["auteur"]))
+        # Note affichée avec un chiffre après la virgule
+        largeurs[3] = max(largeurs[3], len(f"{livre['note']:.1f}"))
+        largeurs[4] = max(largeurs[4], len(", ".join(livre["categories"])))
+    return largeurs
+
+
+def _lignes_tableau(livres, largeurs):
+    largeur_code, largeur_titre, largeur_auteur, largeur_note, largeur_cat = largeurs
+    modele = (f"{{:<{largeur_code}}} | {{:<{largeur_titre}}} | {{:<{largeur_auteur}}} | "
+              f"{{:<{largeur_note}.1f}} | {{:<{largeur_cat}}}\n")
+    for livre in livres:
+        code = livre["code"]
+        titre = livre["titre"]
+        auteur = livre["auteur"]
+        cats_str = ", ".join(livre["categories"])
+        # Seules les valeurs plus longues que leur colonne sont raccourcies
+        if len(code) > largeur_code:
+            code = _tronquer(code, largeur_code)
+        if len(titre) > largeur_titre:
+            titre = _tronquer(titre, largeur_titre)
+        if len(auteur) > largeur_auteur:
+            auteur = _tronquer(auteur, largeur_auteur)
+        if len(cats_str) > largeur_cat:
+            cats_str = _tronquer(cats_str, largeur_cat)
+        yield modele.format(code, titre, auteur, livre["note"], cats_str)
+
+
+def _lignes_csv(livres):
+    # Mêmes colonnes que livres.csv : le fichier produit peut être rechargé
+    ecrivain = csv.writer(_Echo(), lineterminator="\n")
+    yield ecrivain.writerow(("code", "titre", "auteur", "note", "categories"))
+    for livre in livres:
+        yield ecrivain.writerow((livre["code"], livre["titre"], livre["auteur"],
+                                 livre["note"], ";".join(livre["categories"])))
+
+
+def _lignes_json(livres):
+    # Tableau JSON, un livre par ligne (un seul encodeur : json.dumps en
+    # recréerait un à chaque livre à cause de ensure_ascii=False)
+    encoder = json.JSONEncoder(ensure_ascii=False).encode
+    separateur = "[\n"
+    for livre in livres:
+        yield separateur + encoder(livre_en_json(livre))
+        separateur = ",\n"
+    yield "[]\n" if separateur == "[\n" else "\n]\n"
+
+
+def _ecrire_par_lots(sortie, lignes):
+    """Écrit des lignes par lots de TAILLE_LOT_ECRITURE et retourne leur nombre."""
+    nombre = 0
+    while True:
+        lot = list(islice(lignes, TAILLE_LOT_ECRITURE))
+        if not lot:
+            return nombre
+        sortie.write("".join(lot))
+        nombre += len(lot)
+
+
+def ecrire_livres(livres, sortie=None, format_sortie="tableau", titre_tableau=None,
+                  message_vide="Aucun livre à afficher.", largeurs=None):
     """
-    Affiche une liste de livres sous forme de tableau en console.
+    Écrit des livres sur `sortie` (par défaut la sortie standard) et
+    retourne le nombre de livres écrits.
+
+    `livres` peut être une liste ou un itérateur (résultats des fonctions
+    iterer_* de logic) : les livres sont écrits au fur et à mesure, en un
+    seul passage, par lots de TAILLE_LOT_ECRITURE lignes.
+
+    Formats (`format_sortie`) :
+    - "tableau" : colonnes Code | Titre | Auteur | Note | Catégories. La
+      largeur des colonnes est fixée par `largeurs` (5 entiers positifs) ou, à
+      défaut, calculée sur les LIGNES_MESURE_TABLEAU premiers livres ; les
+      valeurs plus longues que leur colonne sont raccourcies. S'il n'y a
+      aucun livre, écrit `message_vide` (et pas `titre_tableau`).
+    - "csv" : mêmes colonnes que livres.csv, catégories séparées par ";"
+    - "json" : tableau JSON d'objets livres
+    """
+    if sortie is None:
+        sortie = sys.stdout
+    livres = iter(livres)
+
+    if format_sortie == "csv":
+        return _ecrire_par_lots(sortie, _lignes_csv(livres)) - 1
+    if format_sortie == "json":
+        return _ecrire_par_lots(sortie, _lignes_json(livres)) - 1
+    if format_sortie != "tableau":
+        raise ValueError(f"format de sortie inconnu : {format_sortie!r}")
+
+    premiers = list(islice(livres, 1 if largeurs is not None else LIGNES_MESURE_TABLEAU))
+    if not premiers:
+        sortie.write(message_vide + "\n")
+        return 0
+    if largeurs is None:
+        largeurs = _mesurer_colonnes(premiers)
+
+    entete = " | ".join(
+        f"{_tronquer(nom, largeur):<{largeur}}" for nom, largeur in zip(ENTETES_TABLEAU, largeurs)
+    )
+    # Largeur totale (pour la ligne de séparation), avec les 4 séparateurs " | "
+    separation = "-" * (sum(largeurs) + 4 * 3)
+    if titre_tableau is not None:
+        sortie.write(titre_tableau + "\n")
+    sortie.write(entete + "\n" + separation + "\n")
+
+    return _ecrire_par_lots(sortie, _lignes_tableau(chain(premiers, livres), largeurs))
+
+
+@mesures.instrumenter("ui.afficher_tableau_livres", lignes=lambda nombre: nombre)
+def afficher_tableau_livres(livres, titre_tableau=None, message_vide="Aucun livre à afficher."):
+    """
+    Affiche des livres sous forme de tableau en console et retourne le
+    nombre de livres affichés.
 
     Colonnes :
     - Code
@@ -34,63 +202,78 @@ def afficher_tableau_livres(livres, titre_tableau=None):
     - Note
     - Catégories
 
-    Si la liste est vide, affiche un message adapté.
+    `livres` peut être une liste ou un itérateur : voir ecrire_livres.
+    S'il n'y a aucun livre, affiche `message_vide`.
     """
-    if not livres:
-        print("Aucun livre à afficher.")
+    return ecrire_livres(livres, titre_tableau=titre_tableau, message_vide=message_vide)
+
+
+# -------------------- SAISIE AVEC COMPLÉTION --------------------
+
+if readline is not None:
+    if "libedit" in (readline.__doc__ or ""):
+        # readline de macOS (libedit) : syntaxe de configuration différente
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+
+
+@contextmanager
+def _completion_tab(catalogue, sorte, prerempli=""):
+    """
+    Complétion par la touche Tab (readline) le temps d'une saisie, qui
+    commence par le texte `prerempli`.
+    """
+    if readline is None or not COMPLETION_CONSOLE or catalogue is None:
+        yield
         return
 
-    # Noms des colonnes
-    entetes = ["Code", "Titre", "Auteur", "Note", "Catégories"]
+    propositions = []
 
-    # Calcul de la largeur de chaque colonne
-    largeur_code = len(entetes[0])
-    largeur_titre = len(entetes[1])
-    largeur_auteur = len(entetes[2])
-    largeur_note = len(entetes[3])
-    largeur_cat = len(entetes[4])
+    def completer_texte(texte, etat):
+        if etat == 0:
+            propositions[:] = completer(catalogue, texte, sorte)
+        return propositions[etat] if etat < len(propositions) else None
 
-    for livre in livres:
-        largeur_code = max(largeur_code, len(livre["code"]))
-        largeur_titre = max(largeur_titre, len(livre["titre"]))
-        largeur_auteur = max(largeur_auteur, len(livre["auteur"]))
+    ancien, separateurs = readline.get_completer(), readline.get_completer_delims()
+    readline.set_completer(completer_texte)
+    # Un nom d'auteur contient des espaces : toute la saisie est complétée
+    readline.set_completer_delims("" if sorte == "auteur" else " \t\n")
+    if prerempli:
+        readline.set_startup_hook(lambda: readline.insert_text(prerempli))
+    try:
+        yield
+    finally:
+        readline.set_startup_hook()
+        readline.set_completer(ancien)
+        readline.set_completer_delims(separateurs)
 
-        # Note affichée avec un chiffre après la virgule
-        note_str = f"{livre['note']:.1f}"
-        largeur_note = max(largeur_note, len(note_str))
-        cats_str = ", ".join(livre["categories"])
-        largeur_cat = max(largeur_cat, len(cats_str))
 
-    # Largeur totale (pour la ligne de séparation)
-    largeur_totale = (
-        largeur_code + largeur_titre + largeur_auteur +
-        largeur_note + largeur_cat + 4 * 3  # 4 séparateurs " | "
-    )
+def saisir(invite, catalogue=None, sorte=None):
+    """
+    input() avec complétion de la saisie (voir logic.completer) : `sorte`
+    vaut "code", "titre" ou "auteur".
 
-    if titre_tableau is not None:
-        print(titre_tableau)
-
-    # Affichage de l'en-tête
-    print(
-        f"{entetes[0]:<{largeur_code}} | "
-        f"{entetes[1]:<{largeur_titre}} | "
-        f"{entetes[2]:<{largeur_auteur}} | "
-        f"{entetes[3]:<{largeur_note}} | "
-        f"{entetes[4]:<{largeur_cat}}"
-    )
-    print("-" * largeur_totale)
+    - touche Tab : complète le mot en cours (le nom entier pour un auteur),
+      si le module readline est disponible
+    - saisie terminée par "?" : affiche les propositions pour le dernier
+      mot, puis redemande la saisie (déjà remplie si readline est disponible)
+    """
+    debut = ""
+    while True:
+        with _completion_tab(catalogue, sorte, debut):
+            saisie = input(invite)
 
-    # Affichage des lignes
-    for livre in livres:
-        note_str = f"{livre['note']:.1f}"
-        cats_str = ", ".join(livre["categories"])
-        print(
-            f"{livre['code']:<{largeur_code}} | "
-            f"{livre['titre']:<{largeur_titre}} | "
-            f"{livre['auteur']:<{largeur_auteur}} | "
-            f"{note_str:<{largeur_note}} | "
-            f"{cats_str:<{largeur_cat}}"
-        )
+        if catalogue is None or not COMPLETION_CONSOLE or not saisie.rstrip().endswith("?"):
+            return saisie
+
+        debut = saisie.rstrip()[:-1]
+        prefixe = debut.strip() if sorte == "auteur" else (debut.split() or [""])[-1]
+        propositions = completer(catalogue, prefixe, sorte)
+        if propositions:
+            print("Propositions :", ", ".join(propositions))
+        else:
+            print(f"[INFO] Aucune proposition pour '{prefixe}'.")
 
 
 # -------------------- MENU PRINCIPAL --------------------
@@ -105,7 +288,9 @@ def afficher_menu_principal():
     print("4. Afficher la liste d'emprunt courante")
     print("5. Valider l'emprunt")
     print("6. Consulter l'historique des emprunts")
-    print("7. Quitter")
+    print("7. Rendre des livres")
+    print("8. Mesures de performance")
+    print("9. Quitter")
     print("\n========================================\n")
 
 
@@ -138,6 +323,24 @@ def saisir_choix_menu(min_val, max_val):
         return choix
 
 
+def saisir_tri():
+    """
+    Demande l'ordre des résultats d'une recherche : "note", "titre",
+    "auteur", ou None (ordre du catalogue) si la saisie est vide.
+    """
+
+    while True:
+        saisie = input("Trier par note, titre ou auteur (Entrée : ordre du catalogue) : ").strip().lower()
+
+        if saisie == "":
+            return None
+
+        if saisie in TRIS:
+            return saisie
+
+        print("[ERREUR] Merci de saisir note, titre, auteur, ou rien.")
+
+
 # -------------------- LISTE D'EMPRUNT --------------------
 
 def afficher_liste_emprunt(liste_emprunt):
@@ -157,130 +360,361 @@ def afficher_liste_emprunt(liste_emprunt):
 
 # -------------------- RECHERCHE --------------------
 
-def menu_recherche(catalogue):
+def menu_recherche(catalogue, disponibilites=None):
     """
-    Affiche un sous-menu de recherche et gère les actions de l'utilisateur :
+    Affiche un sous-menu de recherche et gère les actions de l'utilisateur.
+    Avec un suivi des disponibilités, la recherche par code indique aussi
+    le nombre d'exemplaires disponibles.
 
     1. Recherche par code
     2. Recherche par titre (partiel)
     3. Recherche par catégorie
-    4. Retour au menu principal
+    4. Recherche multi-catégories (ET / OU / SAUF)
+    5. Recherche approchée (titre ou auteur, fautes de frappe tolérées)
+    6. Recherche par auteur (nom complet, ou début du nom suivi de *)
+    7. Retour au menu principal
     """
 
     print("\n--- Recherche de livres ---")
     print("1. Recherche par code")
     print("2. Recherche par titre (partiel)")
     print("3. Recherche par catégorie")
-    print("4. Retour au menu principal")
+    print("4. Recherche multi-catégories (ET / OU / SAUF)")
+    print("5. Recherche approchée (titre ou auteur, fautes de frappe tolérées)")
+    print("6. Recherche par auteur")
+    print("7. Retour au menu principal")
 
-    choix = saisir_choix_menu(1, 4)
+    choix = saisir_choix_menu(1, 7)
 
     # Recherche par code
     if choix == 1:
-        code = input("Entrez le code du livre : ")
+        code = saisir("Entrez le code du livre : ", catalogue, "code")
         livre = rechercher_par_code(catalogue, code)
         if livre is not None:
             afficher_tableau_livres([livre], "\nRésultat :")
+            if disponibilites is not None:
+                print(f"Exemplaires disponibles : {disponibilites.disponibles(livre['code'])} "
+                      f"sur {disponibilites.exemplaires(livre['code'])}")
         else:
             print("[INFO] Aucun livre trouvé avec ce code.")
         return
 
     # Recherche par titre
     if choix == 2:
-        fragment = input("Entrez une partie du titre : ")
-        resultats = rechercher_par_titre(catalogue, fragment)
-        if not resultats:
-            print("[INFO] Aucun livre trouvé avec ce critère.")
-        else:
-            titre = f"\n{len(resultats)} livre(s) trouvé(s) :"
-            afficher_tableau_livres(resultats, titre)
+        fragment = saisir("Entrez une partie du titre : ", catalogue, "titre")
+        tri = saisir_tri()
+        # Les résultats sont affichés au fur et à mesure de la recherche
+        nombre = afficher_tableau_livres(
+            iterer_par_titre(catalogue, fragment, tri),
+            "\nLivres trouvés :",
+            "[INFO] Aucun livre trouvé avec ce critère.",
+        )
+        if nombre:
+            print(f"\n{nombre} livre(s) trouvé(s).")
         return
 
     # Recherche par catégorie
     if choix == 3:
         cat = input("Entrez une catégorie : ")
-        resultats = rechercher_par_categorie(catalogue, cat)
+        tri = saisir_tri()
+        # Les résultats sont affichés au fur et à mesure de la recherche
+        nombre = afficher_tableau_livres(
+            iterer_par_categorie(catalogue, cat, tri),
+            "\nLivres trouvés :",
+            "[INFO] Aucun livre trouvé dans cette catégorie.",
+        )
+        if nombre:
+            print(f"\n{nombre} livre(s) trouvé(s).")
+        return
+
+    # Recherche multi-catégories
+    if choix == 4:
+        print("Exemple : classique ET drame SAUF roman")
+        requete = input("Entrez la requête : ")
+        tri = saisir_tri()
+        # Les résultats sont affichés au fur et à mesure de la recherche
+        nombre = afficher_tableau_livres(
+            iterer_par_categories(catalogue, requete, tri),
+            "\nLivres trouvés :",
+            "[INFO] Aucun livre ne correspond à cette requête.",
+        )
+        if nombre:
+            print(f"\n{nombre} livre(s) trouvé(s).")
+        return
+
+    # Recherche approchée
+    if choix == 5:
+        texte = saisir("Entrez des mots du titre ou de l'auteur : ", catalogue, "titre")
+        resultats = rechercher_approximative(catalogue, texte)
         if not resultats:
-            print("[INFO] Aucun livre trouvé dans cette catégorie.")
+            print("[INFO] Aucun livre ne correspond à cette recherche.")
         else:
-            titre = f"\n{len(resultats)} livre(s) trouvé(s) :"
+            titre = f"\n{len(resultats)} livre(s) trouvé(s), du plus pertinent au moins pertinent :"
             afficher_tableau_livres(resultats, titre)
         return
 
+    # Recherche par auteur
+    if choix == 6:
+        print("Exemple : Victor Hugo, ou victor h* pour tous les auteurs dont le nom commence ainsi")
+        nom = saisir("Entrez le nom de l'auteur : ", catalogue, "auteur")
+        tri = saisir_tri()
+        # Les résultats sont affichés au fur et à mesure de la recherche
+        nombre = afficher_tableau_livres(
+            iterer_par_auteur(catalogue, nom, tri),
+            "\nLivres trouvés :",
+            "[INFO] Aucun livre trouvé pour cet auteur.",
+        )
+        if nombre:
+            print(f"\n{nombre} livre(s) trouvé(s).")
+        return
+
     # Retour
-    if choix == 4:
+    if choix == 7:
         return
 
 
 # -------------------- HISTORIQUE --------------------
 
-def afficher_historique(catalogue):
+def afficher_emprunt(numero, record, catalogue):
     """
-    Affiche l'historique des emprunts en lisant le fichier d'historique.
-
-    Pour chaque emprunt, on affiche :
+    Affiche un emprunt de l'historique :
     - le numéro d'emprunt
     - la date/heure
     - un tableau des livres trouvés dans le catalogue
     - la liste des codes inconnus (si certains livres ne sont plus dans le catalogue)
     """
-    historique = charger_historique(EMPRUNTS_FILE)
+    date_str = record.get("datetime", "Date inconnue")
+    codes = record.get("codes", [])
 
-    if not historique:
-        print("\nAucun emprunt enregistré pour le moment.")
+    print(f"\n--- Emprunt #{numero} ---")
+    print("Date :", date_str)
+
+    if not codes:
+        print("Aucun livre enregistré pour cet emprunt.")
         return
 
-    print("\n===== HISTORIQUE DES EMPRUNTS =====")
+    livres_trouves = []
+    codes_inconnus = []
 
-    for index, record in enumerate(historique, start=1):
-        date_str = record.get("datetime", "Date inconnue")
-        codes = record.get("codes", [])
+    # On reconstitue les livres connus à partir du catalogue
+    for code in codes:
+        livre = catalogue.get(code)
+        if livre is not None:
+            livres_trouves.append(livre)
+        else:
+            codes_inconnus.append(code)
 
-        print(f"\n--- Emprunt #{index} ---")
-        print("Date :", date_str)
+    if livres_trouves:
+        afficher_tableau_livres(livres_trouves, "Livres empruntés :")
+    else:
+        print("Aucun des livres de cet emprunt n'est présent dans le catalogue actuel.")
+
+    if codes_inconnus:
+        print("\nCodes non trouvés dans le catalogue actuel :")
+        for c in codes_inconnus:
+            print(" -", c)
 
-        if not codes:
-            print("Aucun livre enregistré pour cet emprunt.")
-            continue
 
-        livres_trouves = []
-        codes_inconnus = []
+def page_historique(historique, dernier, taille_page):
+    """
+    Générateur des emprunts d'une page, du plus récent au plus ancien.
 
-        # On reconstitue les livres connus à partir du catalogue
-        for code in codes:
-            livre = catalogue.get(code)
-            if livre is not None:
-                livres_trouves.append(livre)
+    `dernier` est l'indice (à partir de 0) de l'emprunt le plus récent de la
+    page. Seuls les emprunts de la page sont lus dans l'historique.
+    Produit des couples (numéro affiché à partir de 1, emprunt).
+    """
+    emprunts = islice(historique.parcourir_inverse(dernier), taille_page)
+    for decalage, record in enumerate(emprunts):
+        yield dernier - decalage + 1, record
+
+
+def afficher_historique(catalogue, taille_page=TAILLE_PAGE_HISTORIQUE):
+    """
+    Affiche l'historique des emprunts page par page, en commençant par les
+    plus récents.
+
+    Navigation :
+    - s : page suivante (emprunts plus anciens)
+    - p : page précédente (emprunts plus récents)
+    - d : aller à une date (premier emprunt de cette date ou d'avant)
+    - q : retour au menu principal
+
+    Seule la page affichée est lue dans l'historique : la mémoire utilisée
+    ne dépend pas de la taille de l'historique.
+    """
+    historique = ouvrir_historique(HISTORIQUE_FILE)
+    vider_emprunts_en_attente(HISTORIQUE_FILE)
+
+    if historique is None or len(historique) == 0:
+        print("\nAucun emprunt enregistré pour le moment.")
+        return
+
+    # Indice de l'emprunt le plus récent de la page affichée
+    dernier = len(historique) - 1
+
+    while True:
+        total = len(historique)
+        debut_page = max(dernier - taille_page + 1, 0)
+        print("\n===== HISTORIQUE DES EMPRUNTS =====")
+        print(f"Emprunts #{dernier + 1} à #{debut_page + 1} sur {total} (du plus récent au plus ancien)")
+
+        for numero, record in page_historique(historique, dernier, taille_page):
+            afficher_emprunt(numero, record, catalogue)
+
+        print("\n===================================")
+        print("[s] page suivante   [p] page précédente   [d] aller à une date   [q] retour")
+        saisie = input("Votre choix : ").strip().lower()
+
+        if saisie == "s":
+            if debut_page == 0:
+                print("[INFO] Vous êtes déjà sur la dernière page (emprunts les plus anciens).")
             else:
-                codes_inconnus.append(code)
+                dernier = debut_page - 1
 
-        if livres_trouves:
-            afficher_tableau_livres(livres_trouves, "Livres empruntés :")
-        else:
-            print("Aucun des livres de cet emprunt n'est présent dans le catalogue actuel.")
+        elif saisie == "p":
+            if dernier >= total - 1:
+                print("[INFO] Vous êtes déjà sur la première page (emprunts les plus récents).")
+            else:
+                dernier = min(dernier + taille_page, total - 1)
+
+        elif saisie == "d":
+            date_saisie = input("Date (AAAA-MM-JJ) : ").strip()
+            try:
+                numeros = historique.numeros_entre(None, date_saisie)
+            except ValueError:
+                print("[ERREUR] Date invalide. Format attendu : AAAA-MM-JJ.")
+                continue
+            if len(numeros) == 0:
+                print("[INFO] Aucun emprunt à cette date ou avant.")
+            else:
+                dernier = numeros[-1]
 
-        if codes_inconnus:
-            print("\nCodes non trouvés dans le catalogue actuel :")
-            for c in codes_inconnus:
-                print(" -", c)
+        elif saisie == "q":
+            return
 
-    print("\n===================================")
+        else:
+            print("[ERREUR] Choix invalide. Merci de saisir s, p, d ou q.")
 
 
 # -------------------- ACTIONS SUR LA LISTE (APPEL LOGIC) --------------------
 
 def action_ajout_livre(catalogue, liste_emprunt):
-    """Demande un code à l'utilisateur et appelle la fonction d'ajout."""
-    code = input("Code du livre à ajouter : ")
-    ajouter_livre_emprunt(catalogue, liste_emprunt, code)
+    """
+    Demande un ou plusieurs codes (séparés par des espaces) à l'utilisateur
+    et appelle la fonction d'ajout.
+    """
+    saisie = saisir("Code(s) du ou des livres à ajouter : ", catalogue, "code")
+    codes = saisie.split()
+    if len(codes) <= 1:
+        ajouter_livre_emprunt(catalogue, liste_emprunt, saisie)
+        return
+
+    refus = ajouter_livres_emprunt(catalogue, liste_emprunt, codes)
+    for _, message in refus:
+        print(message)
+    print(f"[OK] {len(codes) - len(refus)} livre(s) ajouté(s) à la liste d'emprunt.")
 
 
 def action_suppression_livre(liste_emprunt):
-    """Demande un code à l'utilisateur et appelle la fonction de suppression."""
-    code = input("Code du livre à retirer : ")
-    supprimer_livre_emprunt(liste_emprunt, code)
+    """
+    Demande un ou plusieurs codes (séparés par des espaces) à l'utilisateur
+    et appelle la fonction de suppression.
+    """
+    saisie = input("Code(s) du ou des livres à retirer : ")
+    codes = saisie.split()
+    if len(codes) <= 1:
+        supprimer_livre_emprunt(liste_emprunt, saisie)
+        return
+
+    refus = supprimer_livres_emprunt(liste_emprunt, codes)
+    for _, message in refus:
+        print(message)
+    print(f"[OK] {len(codes) - len(refus)} livre(s) retiré(s) de la liste d'emprunt.")
 
 
 def action_validation_emprunt(liste_emprunt):
     """Valide l'emprunt en appelant la fonction de logique métier."""
-    valider_emprunt(liste_emprunt)
\ No newline at end of file
+    valider_emprunt(liste_emprunt)
+
+
+def action_retour_livres(disponibilites):
+    """
+    Demande un ou plusieurs codes (séparés par des espaces) de livres
+    rendus et enregistre leur retour.
+    """
+    if disponibilites is None:
+        print("[INFO] Le suivi des disponibilités est désactivé : aucun retour à enregistrer.")
+        return
+
+    codes = input("Code(s) du ou des livres rendus : ").split()
+    if not codes:
+        print(MESSAGE_CODE_VIDE)
+        return
+
+    refus = rendre_livres(disponibilites, codes)
+    for _, message in refus:
+        print(message)
+    if len(refus) < len(codes):
+        print(f"[OK] {len(codes) - len(refus)} livre(s) rendu(s).")
+
+
+# -------------------- MESURES DE PERFORMANCE --------------------
+
+def afficher_mesures():
+    """
+    Affiche les compteurs du cache des recherches et les mesures de
+    performance des fonctions instrumentées, puis propose d'écrire ces
+    dernières dans un fichier (JSON ou Prometheus).
+    """
+    cache = cache_recherches.statistiques()
+    print(f"\nCache des recherches : {cache['entrees']} / {cache['entrees_max']} entrée(s), "
+          f"{cache['memoire'] / 2**20:.1f} / {cache['memoire_max'] / 2**20:.0f} Mo ; "
+          f"{cache['succes']} trouvée(s), {cache['echecs']} manquée(s) "
+          f"({cache['taux_succes']:.0%}), {cache['evictions']} éviction(s)")
+
+    if not mesures.ACTIVES:
+        print("[INFO] Les mesures de performance sont désactivées "
+              "(MESURES_ACTIVES dans config.py, ou variable d'environnement MEDIATHEQUE_MESURES=1).")
+        return
+
+    fonctions = mesures.instantane()["fonctions"]
+    largeur = max(len("Fonction"), *(len(nom) for nom in fonctions))
+    print(f"\n{'Fonction':<{largeur}} | {'Appels':>7} | {'Erreurs':>7} | {'Total (ms)':>10} | "
+          f"{'Moy. (ms)':>9} | {'p99 (ms)':>8} | {'Max (ms)':>8} | {'Lignes':>9} | {'Octets':>11}")
+    print("-" * (largeur + 93))
+    for nom, m in fonctions.items():
+        print(f"{nom:<{largeur}} | {m['appels']:>7} | {m['erreurs']:>7} | {m['duree_totale'] * 1000:>10.1f} | "
+              f"{m['duree_moyenne'] * 1000:>9.3f} | {m['p99'] * 1000:>8.3f} | {m['duree_max'] * 1000:>8.3f} | "
+              f"{m['lignes']:>9} | {m['octets']:>11}")
+
+    formats = " / ".join(mesures.FORMATS_MESURES)
+    while True:
+        saisie = input(f"Écrire les mesures dans un fichier ({formats}, Entrée : non) : ").strip().lower()
+        if saisie == "":
+            return
+        if saisie in mesures.FORMATS_MESURES:
+            break
+        print(f"[ERREUR] Merci de saisir {formats}, ou rien.")
+
+    try:
+        path = mesures.ecrire_mesures(format_mesures=saisie)
+    except OSError as e:
+        print("[ERREUR] Impossible d'écrire les mesures :", e)
+        return
+    print("[OK] Mesures écrites dans", path)
+
+
+# -------------------- RECHARGEMENT DU CATALOGUE --------------------
+
+def recharger_catalogue(rechargeur):
+    """
+    Applique au catalogue les modifications de livres.csv faites depuis le
+    dernier passage (rien si le fichier n'a pas changé).
+    """
+    try:
+        diff = rechargeur.recharger()
+    except Exception as e:
+        print("[ERREUR] Impossible de recharger le catalogue :", e)
+        return
+    if diff:
+        print("[INFO] Catalogue rechargé :", diff.resume())